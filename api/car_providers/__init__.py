@@ -1,16 +1,18 @@
-from .base import CarProvider, CarData, VehicleState
+from .base import CarProvider, CarData, VehicleState, ALL_FIELDS, DRIVING_FIELDS
 from .vwgroup import VWGroupProvider, BRAND_CONNECTORS
 from .audi import AudiProvider, AudiAPI, AuthenticationError
 from .renault import RenaultProvider
 from .tesla import TeslaProvider
 from .skoda import SkodaOAuthProvider
+from .pool import ProviderPool
 
 # All supported VW Group brands (Audi now uses its own provider)
 VW_GROUP_BRANDS = ["audi", "volkswagen", "vw", "skoda", "seat", "cupra"]
 
 __all__ = [
-    "CarProvider", "CarData", "VehicleState",
+    "CarProvider", "CarData", "VehicleState", "ALL_FIELDS", "DRIVING_FIELDS",
     "VWGroupProvider", "AudiProvider", "AudiAPI", "AuthenticationError",
     "RenaultProvider", "TeslaProvider", "SkodaOAuthProvider",
     "VW_GROUP_BRANDS", "BRAND_CONNECTORS",
+    "ProviderPool",
 ]
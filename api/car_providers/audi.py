@@ -10,7 +10,10 @@ import json
 import logging
 import re
 import secrets
+import threading
 import time
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from html.parser import HTMLParser
 from typing import Any
@@ -171,6 +174,14 @@ class AudiAPI:
     VEHICLE_API = "https://emea.bff.cariad.digital/vehicle/v1/vehicles"
     USER_API = "https://emea.bff.cariad.digital/user-login/v1/user"
 
+    # selectivestatus jobs that work, in parse order
+    STATUS_JOBS = (
+        "measurements",  # odometer, range
+        "fuelStatus",    # battery SOC, range
+        "charging",      # charging status
+        "readiness",     # online status
+    )
+
     # Required headers for Cariad BFF API
     API_HEADERS = {
         "User-Agent": "myAudi-Android/4.31.0 (Android 14; Build/UKQ1.231003.002)",
@@ -190,6 +201,8 @@ class AudiAPI:
             "Accept-Encoding": "gzip, deflate",
         })
         self._tokens: AudiTokens | None = None
+        # Status endpoints are fetched concurrently; one thread re-authenticates
+        self._auth_lock = threading.Lock()
 
     @property
     def tokens(self) -> AudiTokens | None:
@@ -386,20 +399,22 @@ class AudiAPI:
 
     def _ensure_tokens(self):
         """Ensure we have valid tokens, refreshing or logging in if needed."""
-        if self._tokens is None:
-            self.login()
-        elif self._tokens.is_expired:
-            # Try refresh first, fall back to full login
-            if not self.refresh():
-                logger.info("Refresh failed, doing full login")
+        with self._auth_lock:
+            if self._tokens is None:
                 self.login()
+            elif self._tokens.is_expired:
+                # Try refresh first, fall back to full login
+                if not self.refresh():
+                    logger.info("Refresh failed, doing full login")
+                    self.login()
 
     def _api_request(self, method: str, url: str, **kwargs) -> requests.Response:
         """Make an authenticated API request."""
         self._ensure_tokens()
 
+        access_token = self._tokens.access_token
         headers = kwargs.pop("headers", {})
-        headers["Authorization"] = f"Bearer {self._tokens.access_token}"
+        headers["Authorization"] = f"Bearer {access_token}"
         headers["Accept"] = "application/json"
         headers.update(self.API_HEADERS)
 
@@ -407,8 +422,11 @@ class AudiAPI:
 
         # Retry once on 401
         if response.status_code == 401:
-            logger.warning("Got 401, re-authenticating...")
-            self.login()
+            with self._auth_lock:
+                # A concurrent request may already have logged in again
+                if self._tokens.access_token == access_token:
+                    logger.warning("Got 401, re-authenticating...")
+                    self.login()
             headers["Authorization"] = f"Bearer {self._tokens.access_token}"
             response = self._session.request(method, url, headers=headers, **kwargs)
 
@@ -440,26 +458,39 @@ class AudiAPI:
 
         return vehicles
 
-    def get_vehicle_status(self, vin: str) -> AudiVehicle | None:
-        """Fetch detailed status for a vehicle using selectivestatus endpoint."""
+    def get_vehicle_status(
+        self, vin: str, jobs: Collection[str] | None = None, parking: bool = True
+    ) -> AudiVehicle | None:
+        """
+        Fetch detailed status for a vehicle using selectivestatus endpoint.
+
+        Args:
+            vin: Vehicle VIN
+            jobs: selectivestatus jobs to fetch (None = all STATUS_JOBS)
+            parking: Also fetch the parking position
+        """
         self._ensure_tokens()
 
         vehicle = AudiVehicle(vin=vin)
         base_url = f"{self.VEHICLE_API}/{vin}/selectivestatus"
+        jobs_to_fetch = [job for job in self.STATUS_JOBS if jobs is None or job in jobs]
 
-        # Fetch data using specific jobs that work
-        jobs_to_fetch = [
-            "measurements",  # odometer, range
-            "fuelStatus",    # battery SOC, range
-            "charging",      # charging status
-            "readiness",     # online status
-        ]
-
+        park_url = f"{self.VEHICLE_API}/{vin}/parkingposition"
         raw_data = {}
 
+        # The endpoints are independent, so fetch them concurrently; parse in
+        # job order afterwards (fuelStatus and charging both set battery and
+        # range, and the later job wins)
+        with ThreadPoolExecutor(max_workers=len(jobs_to_fetch) + 1, thread_name_prefix="audi-status") as pool:
+            job_futures = {
+                job: pool.submit(self._api_request, "GET", base_url, params={"jobs": job})
+                for job in jobs_to_fetch
+            }
+            park_future = pool.submit(self._api_request, "GET", park_url) if parking else None
+
         for job in jobs_to_fetch:
             try:
-                response = self._api_request("GET", base_url, params={"jobs": job})
+                response = job_futures[job].result()
                 if response.status_code in (200, 207):
                     data = response.json()
                     if data:
@@ -468,18 +499,18 @@ class AudiAPI:
             except Exception as e:
                 logger.warning(f"Failed to fetch {job} for {vin}: {e}")
 
-        # Fetch parking position separately (different endpoint)
-        try:
-            park_url = f"{self.VEHICLE_API}/{vin}/parkingposition"
-            response = self._api_request("GET", park_url)
-            if response.status_code == 200:
-                data = response.json()
-                raw_data["parkingPosition"] = data
-                if "data" in data:
-                    vehicle.latitude = data["data"].get("lat")
-                    vehicle.longitude = data["data"].get("lon")
-        except Exception as e:
-            logger.warning(f"Failed to fetch parking position for {vin}: {e}")
+        # Parking position (different endpoint)
+        if park_future is not None:
+            try:
+                response = park_future.result()
+                if response.status_code == 200:
+                    data = response.json()
+                    raw_data["parkingPosition"] = data
+                    if "data" in data:
+                        vehicle.latitude = data["data"].get("lat")
+                        vehicle.longitude = data["data"].get("lon")
+            except Exception as e:
+                logger.warning(f"Failed to fetch parking position for {vin}: {e}")
 
         vehicle.raw_data = raw_data
         return vehicle
@@ -552,7 +583,16 @@ class AuthenticationError(Exception):
 
 
 # Provider class that matches the CarProvider interface
-from .base import CarProvider, CarData, VehicleState
+from .base import CarProvider, CarData, VehicleState, wants
+
+
+# CarData fields each selectivestatus job fills in
+_JOB_FIELDS = {
+    "measurements": ("odometer_km", "range_km"),
+    "fuelStatus": ("battery_level", "range_km"),
+    "charging": ("battery_level", "range_km", "is_charging", "is_plugged_in", "charging_power_kw"),
+    "readiness": ("state",),
+}
 
 
 class AudiProvider(CarProvider):
@@ -567,6 +607,9 @@ class AudiProvider(CarProvider):
     2. Pre-stored OAuth tokens (from webview login flow)
     """
 
+    # Refresh pooled sessions this many seconds before the access token expires
+    TOKEN_REFRESH_MARGIN = 300
+
     def __init__(
         self,
         username: str = None,
@@ -609,6 +652,7 @@ class AudiProvider(CarProvider):
                 self._api.username = self._username
                 self._api.password = self._password
                 self._api.country = self._country
+                self._api._auth_lock = threading.Lock()
                 self._api._session = __import__("requests").Session()
                 self._api._session.headers.update({
                     "User-Agent": "myAudi-Android/4.31.0 (Android 14; SDK 34)",
@@ -673,8 +717,8 @@ class AudiProvider(CarProvider):
         self._connected = True
         return True
 
-    def get_data(self) -> CarData:
-        """Fetch car data from Audi API."""
+    def get_data(self, fields: Collection[str] | None = None) -> CarData:
+        """Fetch car data from Audi API, skipping jobs none of the fields need."""
         if not self._api:
             if not self.connect():
                 return CarData()
@@ -691,7 +735,10 @@ class AudiProvider(CarProvider):
                     return CarData()
 
             # Get vehicle status
-            status = self._api.get_vehicle_status(vin)
+            jobs = None
+            if not wants(fields, "raw_data"):
+                jobs = [job for job, served in _JOB_FIELDS.items() if wants(fields, *served)]
+            status = self._api.get_vehicle_status(vin, jobs=jobs, parking=wants(fields, "latitude", "longitude", "raw_data"))
             if not status:
                 return CarData(vin=vin)
 
@@ -722,6 +769,15 @@ class AudiProvider(CarProvider):
             logger.error(traceback.format_exc())
             return CarData()
 
+    def refresh_session(self) -> bool:
+        """Refresh the access token if it expires within TOKEN_REFRESH_MARGIN."""
+        import time
+        if not self._api or not self._api.tokens or not self._api.tokens.refresh_token:
+            return False
+        if self._api.tokens.expires_at - time.time() > self.TOKEN_REFRESH_MARGIN:
+            return False
+        return self._api.refresh()
+
     def get_tokens(self) -> dict | None:
         """Get current tokens for saving to storage."""
         if self._api and self._api.tokens:
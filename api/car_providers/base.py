@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections.abc import Collection
+from dataclasses import dataclass, fields as dataclass_fields
 from enum import Enum
 
 
@@ -24,9 +25,21 @@ class CarData:
     charging_remaining_minutes: int | None = None
     is_charging: bool = False
     is_plugged_in: bool = False
+    is_asleep: bool = False  # Car was asleep/offline and deliberately not woken (state is UNKNOWN)
     raw_data: dict | None = None  # Full API response for debugging
 
 
+# Field sets for CarProvider.get_data(fields=...); None requests everything
+ALL_FIELDS = frozenset(f.name for f in dataclass_fields(CarData))
+# Ping path: is the car driving, where is it, how far has it gone
+DRIVING_FIELDS = frozenset({"vin", "odometer_km", "latitude", "longitude", "state"})
+
+
+def wants(fields: Collection[str] | None, *names: str) -> bool:
+    """Whether a get_data field request needs any of the given CarData fields."""
+    return fields is None or any(name in fields for name in names)
+
+
 class CarProvider(ABC):
     """Abstract base class for car API providers"""
 
@@ -42,8 +55,15 @@ class CarProvider(ABC):
         pass
 
     @abstractmethod
-    def get_data(self) -> CarData:
-        """Fetch current car data including odometer, position, state, etc."""
+    def get_data(self, fields: Collection[str] | None = None) -> CarData:
+        """
+        Fetch current car data including odometer, position, state, etc.
+
+        Args:
+            fields: CarData fields the caller needs (None = all). Providers skip
+                vendor calls that only serve other fields; those stay at their
+                defaults. state may then read PARKED for a charging car.
+        """
         pass
 
     @abstractmethod
@@ -51,13 +71,22 @@ class CarProvider(ABC):
         """Clean up connection/resources"""
         pass
 
+    def refresh_session(self) -> bool:
+        """
+        Proactively refresh auth tokens if they are about to expire.
+
+        Called by the provider pool between pings. Returns True if tokens were
+        refreshed; providers without refreshable sessions keep the default.
+        """
+        return False
+
     def get_odometer(self) -> float | None:
         """Convenience method to get just the odometer"""
-        return self.get_data().odometer_km
+        return self.get_data(fields={"odometer_km"}).odometer_km
 
     def get_position(self) -> tuple[float, float] | None:
         """Convenience method to get just the position"""
-        data = self.get_data()
+        data = self.get_data(fields={"latitude", "longitude"})
         if data.latitude and data.longitude:
             return (data.latitude, data.longitude)
         return None
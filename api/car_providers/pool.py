@@ -0,0 +1,223 @@
+"""
+Process-wide pool of connected car providers.
+
+Providers keep their authenticated sessions (and the HTTP keep-alive
+connections behind them) between pings instead of logging in, fetching and
+disconnecting on every status check.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+
+from .base import CarProvider
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolEntry:
+    """A pooled provider plus the credential version it was built from."""
+
+    def __init__(self, provider: CarProvider, version: Hashable):
+        self.provider = provider
+        self.version = version
+        self.last_used = time.monotonic()
+        self.lock = threading.Lock()  # Providers are not thread-safe
+
+
+class ProviderPool:
+    """
+    Pool of providers keyed by (user_id, car_id).
+
+    Each entry remembers the credential version it was built from; a lease
+    with a different version disconnects the old provider and builds a new
+    one. Idle entries are evicted and a daemon thread refreshes tokens of
+    pooled providers before they expire, handing them to on_refresh so they
+    can be persisted.
+    """
+
+    def __init__(
+        self,
+        idle_seconds: float,
+        max_entries: int,
+        refresh_interval: float,
+        on_refresh: Callable[[Hashable, CarProvider], None] | None = None,
+    ):
+        self.idle_seconds = idle_seconds
+        self.max_entries = max_entries
+        self.refresh_interval = refresh_interval
+        self.on_refresh = on_refresh
+        self._entries: OrderedDict[Hashable, _PoolEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._refresher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+        # Counters
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    @contextmanager
+    def lease(
+        self,
+        key: Hashable,
+        version: Hashable,
+        factory: Callable[[], CarProvider | None],
+    ) -> Iterator[CarProvider | None]:
+        """
+        Borrow the pooled provider for key, building it if missing or stale.
+
+        The provider is exclusively held for the duration of the with-block.
+        If the block raises, the entry is discarded so the next lease starts
+        from a fresh login.
+
+        Args:
+            key: Pool key, normally (user_id, car_id)
+            version: Credential version the provider must match
+            factory: Builds a new (unconnected) provider, or returns None if
+                the car can't be polled (None is yielded and nothing is pooled)
+        """
+        self._ensure_refresher()
+        stale: list[CarProvider] = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version != version:
+                stale.append(self._entries.pop(key).provider)
+                entry = None
+            if entry is None:
+                provider = factory()
+                if provider is not None:
+                    entry = _PoolEntry(provider, version)
+                    self._entries[key] = entry
+                    self.builds += 1
+            else:
+                self.hits += 1
+            if entry is not None:
+                entry.last_used = time.monotonic()  # Not idle while leased
+                self._entries.move_to_end(key)
+                stale.extend(self._pop_over_capacity())
+
+        for old in stale:
+            _safe_disconnect(old)
+
+        if entry is None:
+            yield None
+            return
+
+        with entry.lock:
+            try:
+                yield entry.provider
+            except BaseException:
+                self.discard(key)
+                raise
+            finally:
+                entry.last_used = time.monotonic()
+
+    def set_version(self, key: Hashable, version: Hashable) -> None:
+        """Re-tag an entry after we wrote its credentials ourselves (e.g. refreshed tokens)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.version = version
+
+    def discard(self, key: Hashable) -> None:
+        """Remove and disconnect the provider for key."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            _safe_disconnect(entry.provider)
+
+    def evict_idle(self) -> int:
+        """Disconnect providers unused for idle_seconds. Returns number evicted."""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [k for k, e in self._entries.items() if e.last_used < cutoff and not e.lock.locked()]
+            evicted = [self._entries.pop(k).provider for k in idle]
+            self.evictions += len(evicted)
+        for provider in evicted:
+            _safe_disconnect(provider)
+        return len(evicted)
+
+    def refresh_tokens(self) -> int:
+        """Refresh tokens of idle pooled providers that are close to expiry."""
+        with self._lock:
+            entries = list(self._entries.items())
+        refreshed = 0
+        for key, entry in entries:
+            # Skip providers that are busy serving a ping
+            if not entry.lock.acquire(blocking=False):
+                continue
+            try:
+                if entry.provider.refresh_session():
+                    refreshed += 1
+                    if self.on_refresh:
+                        self.on_refresh(key, entry.provider)
+            except Exception as e:
+                logger.warning(f"Background token refresh failed for {entry.provider.brand}: {e}")
+            finally:
+                entry.lock.release()
+        return refreshed
+
+    def clear(self) -> None:
+        """Disconnect every pooled provider and reset counters."""
+        with self._lock:
+            providers = [e.provider for e in self._entries.values()]
+            self._entries.clear()
+            self.hits = self.builds = self.evictions = 0
+        for provider in providers:
+            _safe_disconnect(provider)
+
+    def stats(self) -> dict:
+        """Counters snapshot."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "builds": self.builds,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # === Internal ===
+
+    def _pop_over_capacity(self) -> list[CarProvider]:
+        """Pop least-recently-used entries over max_entries (caller holds _lock)."""
+        evicted = []
+        while len(self._entries) > self.max_entries:
+            _, entry = self._entries.popitem(last=False)
+            evicted.append(entry.provider)
+            self.evictions += 1
+        return evicted
+
+    def _ensure_refresher(self) -> None:
+        """Start the background maintenance thread on first use."""
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(
+                target=self._maintenance_loop, name="provider-pool", daemon=True
+            )
+            self._refresher.start()
+
+    def _maintenance_loop(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.evict_idle()
+                self.refresh_tokens()
+            except Exception as e:
+                logger.warning(f"Provider pool maintenance failed: {e}")
+
+
+def _safe_disconnect(provider: CarProvider) -> None:
+    """Disconnect a provider, logging instead of raising."""
+    try:
+        provider.disconnect()
+    except Exception as e:
+        logger.warning(f"Error disconnecting pooled {provider.brand} provider: {e}")
@@ -1,84 +1,148 @@
 import asyncio
 import logging
-from datetime import datetime
+import threading
+from collections.abc import Collection
+from concurrent.futures import Future
 
-from .base import CarProvider, CarData, VehicleState
+from .base import CarProvider, CarData, VehicleState, wants
 
 logger = logging.getLogger(__name__)
 
+# CarData fields served by the battery status endpoint
+_BATTERY_FIELDS = (
+    "battery_level", "range_km", "is_charging", "is_plugged_in",
+    "charging_power_kw", "charging_remaining_minutes",
+)
+
+
+class _SessionLoop:
+    """
+    Background event loop that owns every Renault session.
+
+    aiohttp sessions are bound to the loop they were created on, so logged-in
+    sessions can only outlive a call if all calls run on one long-lived loop.
+    """
+
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, coro) -> Future:
+        """Schedule a coroutine on the loop (started on first use)."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="renault-loop", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+
+_session_loop = _SessionLoop()
+
+
+def _is_auth_error(result) -> bool:
+    """Whether a vendor result/exception means the session must log in again."""
+    from renault_api.exceptions import NotAuthenticatedException
+    from renault_api.kamereon.exceptions import UnauthorizedException
+
+    return isinstance(result, (NotAuthenticatedException, UnauthorizedException))
+
 
 class RenaultProvider(CarProvider):
-    """Renault provider using renault-api library"""
+    """
+    Renault provider using renault-api library.
+
+    The logged-in client, account and VIN-to-vehicle mapping are kept between
+    calls (providers are pooled), so a steady-state poll only requests the
+    vehicle endpoints. The session logs in again when the vendor reports an
+    auth error.
+    """
 
     def __init__(self, username: str, password: str, locale: str = "nl_NL", vin: str = ""):
         self.username = username
         self.password = password
         self.locale = locale
         self.vin = vin  # Optional, will use first vehicle if not set
-        self._account_id = None
-        self._cached_data: CarData | None = None
+        self._websession = None  # aiohttp.ClientSession on _session_loop
+        self._client = None  # Logged-in RenaultClient
+        self._account = None  # RenaultAccount of the first account
+        self._vehicles: dict = {}  # Requested VIN ("" = first vehicle) -> RenaultVehicle
 
     @property
     def brand(self) -> str:
         return "renault"
 
     def connect(self) -> bool:
-        """Test connection to Renault API"""
+        """Log in (the session is kept for later calls)"""
         if not self.username or not self.password:
             logger.error("Renault credentials not configured")
             return False
 
         try:
-            # Run async connection test
-            asyncio.run(self._async_connect_test())
+            _session_loop.submit(self._ensure_client()).result()
             return True
         except Exception as e:
             logger.error(f"Failed to connect to Renault: {e}")
             return False
 
-    async def _async_connect_test(self):
-        """Async connection test"""
-        import aiohttp
-        from renault_api.renault_client import RenaultClient
-
-        async with aiohttp.ClientSession() as session:
-            client = RenaultClient(websession=session, locale=self.locale)
-            await client.session.login(self.username, self.password)
-            logger.info("Renault login successful")
-
-    def get_data(self) -> CarData:
+    def get_data(self, fields: Collection[str] | None = None) -> CarData:
         """Fetch current car data from Renault API"""
         try:
-            return asyncio.run(self._async_get_data())
+            return _session_loop.submit(self._async_get_data(fields)).result()
         except Exception as e:
             logger.error(f"Error fetching Renault data: {e}")
             import traceback
             logger.error(traceback.format_exc())
             return CarData()
 
-    async def _async_get_data(self) -> CarData:
-        """Async implementation of get_data"""
-        import aiohttp
-        from renault_api.renault_client import RenaultClient
+    async def _async_get_data(self, fields: Collection[str] | None = None) -> CarData:
+        """Async implementation of get_data; battery and HVAC calls only when requested"""
+        try:
+            vehicle = await self._get_vehicle()
+            return await self._read_vehicle(vehicle, fields) if vehicle else CarData()
+        except Exception as e:
+            if not _is_auth_error(e):
+                raise
+            logger.info(f"Renault session expired ({e}), logging in again")
+            await self._close_session()
+            vehicle = await self._get_vehicle()
+            return await self._read_vehicle(vehicle, fields) if vehicle else CarData()
+
+    # === Session ===
+
+    async def _ensure_client(self):
+        """Logged-in client, logging in on first use"""
+        if self._client is None:
+            import aiohttp
+            from renault_api.renault_client import RenaultClient
 
-        async with aiohttp.ClientSession() as session:
-            client = RenaultClient(websession=session, locale=self.locale)
-            await client.session.login(self.username, self.password)
+            websession = aiohttp.ClientSession()
+            client = RenaultClient(websession=websession, locale=self.locale)
+            try:
+                await client.session.login(self.username, self.password)
+            except Exception:
+                await websession.close()
+                raise
+            logger.info("Renault login successful")
+            self._websession, self._client = websession, client
+        return self._client
+
+    async def _get_vehicle(self):
+        """Vehicle for self.vin (or the first one); account and vehicle are cached"""
+        client = await self._ensure_client()
 
-            # Get account
+        if self._account is None:
             person = await client.get_person()
             if not person.accounts:
                 logger.error("No Renault accounts found")
-                return CarData()
+                return None
+            self._account = await client.get_api_account(person.accounts[0].accountId)
 
-            account_id = person.accounts[0].accountId
-            account = await client.get_api_account(account_id)
-
-            # Get vehicles
-            vehicles = await account.get_vehicles()
+        key = self.vin or ""
+        if key not in self._vehicles:
+            vehicles = await self._account.get_vehicles()
             if not vehicles.vehicleLinks:
                 logger.error("No vehicles found")
-                return CarData()
+                return None
 
             # Find the right vehicle
             vehicle_link = vehicles.vehicleLinks[0]
@@ -87,111 +151,151 @@ class RenaultProvider(CarProvider):
                     if vl.vin == self.vin:
                         vehicle_link = vl
                         break
+            self._vehicles[key] = await self._account.get_api_vehicle(vehicle_link.vin)
+        return self._vehicles[key]
 
-            vin = vehicle_link.vin
-            vehicle = await account.get_api_vehicle(vin)
-
-            # Gather all data
-            odometer = None
-            battery_level = None
-            range_km = None
-            is_charging = False
-            is_plugged_in = False
-            charging_power = None
-            charging_remaining_minutes = None
-            battery_temp = None
-            lat, lng = None, None
-            state = VehicleState.UNKNOWN
-            hvac_status = None
-            raw_data = {}
-
-            # Get cockpit data (odometer, fuel/battery level)
-            try:
-                cockpit = await vehicle.get_cockpit()
-                if cockpit:
-                    raw_data['cockpit'] = cockpit.__dict__ if hasattr(cockpit, '__dict__') else str(cockpit)
-                    if hasattr(cockpit, 'totalMileage'):
-                        odometer = cockpit.totalMileage
-            except Exception as e:
-                logger.warning(f"Could not get cockpit data: {e}")
-
-            # Get battery status
-            try:
-                battery = await vehicle.get_battery_status()
-                if battery:
-                    raw_data['battery'] = battery.__dict__ if hasattr(battery, '__dict__') else str(battery)
-                    if hasattr(battery, 'batteryLevel'):
-                        battery_level = battery.batteryLevel
-                    if hasattr(battery, 'batteryAutonomy'):
-                        range_km = battery.batteryAutonomy
-                    if hasattr(battery, 'batteryTemperature'):
-                        battery_temp = battery.batteryTemperature
-                    if hasattr(battery, 'chargingStatus'):
-                        charging_val = battery.chargingStatus
-                        # chargingStatus can be a float (1.0 = charging) or string
-                        is_charging = charging_val == 1.0 or charging_val == 1 or str(charging_val).lower() in ('charging', '1', '1.0')
-                    if hasattr(battery, 'plugStatus'):
-                        plug_val = battery.plugStatus
-                        is_plugged_in = plug_val == 1.0 or plug_val == 1 or str(plug_val).lower() in ('plugged', '1', '1.0')
-                    if hasattr(battery, 'chargingInstantaneousPower'):
-                        charging_power = battery.chargingInstantaneousPower
-                        # Convert from W to kW if needed
-                        if charging_power and charging_power > 100:
-                            charging_power = charging_power / 1000
-                    if hasattr(battery, 'chargingRemainingTime'):
-                        charging_remaining_minutes = battery.chargingRemainingTime
-            except Exception as e:
-                logger.warning(f"Could not get battery status: {e}")
-
-            # Get HVAC status
-            try:
-                hvac = await vehicle.get_hvac_status()
-                if hvac:
-                    raw_data['hvac'] = hvac.__dict__ if hasattr(hvac, '__dict__') else str(hvac)
-                    if hasattr(hvac, 'hvacStatus'):
-                        hvac_status = hvac.hvacStatus
-            except Exception as e:
-                logger.warning(f"Could not get HVAC status: {e}")
-
-            # Get location
-            try:
-                location = await vehicle.get_location()
-                if location:
-                    raw_data['location'] = location.__dict__ if hasattr(location, '__dict__') else str(location)
-                    if hasattr(location, 'gpsLatitude'):
-                        lat = location.gpsLatitude
-                    if hasattr(location, 'gpsLongitude'):
-                        lng = location.gpsLongitude
-            except Exception as e:
-                logger.warning(f"Could not get location: {e}")
-
-            # Build unified raw_data structure (similar to Audi format for main.py parsing)
-            raw_data['renault'] = {
-                'battery_temp_celsius': battery_temp,
-                'hvac_status': hvac_status,
-            }
-
-            # Determine state
-            if is_charging:
-                state = VehicleState.CHARGING
-            elif lat and lng:
-                state = VehicleState.PARKED  # If we have location, it's likely parked
-
-            return CarData(
-                vin=vin,
-                odometer_km=odometer,
-                latitude=lat,
-                longitude=lng,
-                state=state,
-                battery_level=battery_level,
-                range_km=range_km,
-                is_charging=is_charging,
-                is_plugged_in=is_plugged_in,
-                charging_power_kw=charging_power,
-                charging_remaining_minutes=charging_remaining_minutes,
-                raw_data=raw_data,
-            )
+    async def _close_session(self):
+        """Drop the session and everything resolved through it"""
+        websession = self._websession
+        self._websession = self._client = self._account = None
+        self._vehicles = {}
+        if websession is not None:
+            await websession.close()
+
+    # === Data ===
+
+    async def _read_vehicle(self, vehicle, fields: Collection[str] | None) -> CarData:
+        """Read the requested endpoints; an auth error on any of them is raised"""
+        vin = vehicle.vin
+
+        # Gather all data
+        odometer = None
+        battery_level = None
+        range_km = None
+        is_charging = False
+        is_plugged_in = False
+        charging_power = None
+        charging_remaining_minutes = None
+        battery_temp = None
+        lat, lng = None, None
+        state = VehicleState.UNKNOWN
+        hvac_status = None
+        raw_data = {}
+
+        # The endpoints are independent: request them concurrently. Each
+        # result (or its exception) is then handled on its own as before.
+        cockpit, battery, hvac, location = await asyncio.gather(
+            vehicle.get_cockpit(),
+            self._skip_unless(wants(fields, *_BATTERY_FIELDS, "raw_data"), vehicle.get_battery_status),
+            self._skip_unless(wants(fields, "raw_data"), vehicle.get_hvac_status),
+            vehicle.get_location(),
+            return_exceptions=True,
+        )
+        for result in (cockpit, battery, hvac, location):
+            if _is_auth_error(result):
+                raise result
+
+        # Cockpit data (odometer, fuel/battery level)
+        try:
+            if isinstance(cockpit, BaseException):
+                raise cockpit
+            if cockpit:
+                raw_data['cockpit'] = cockpit.__dict__ if hasattr(cockpit, '__dict__') else str(cockpit)
+                if hasattr(cockpit, 'totalMileage'):
+                    odometer = cockpit.totalMileage
+        except Exception as e:
+            logger.warning(f"Could not get cockpit data: {e}")
+
+        # Battery status
+        try:
+            if isinstance(battery, BaseException):
+                raise battery
+            if battery:
+                raw_data['battery'] = battery.__dict__ if hasattr(battery, '__dict__') else str(battery)
+                if hasattr(battery, 'batteryLevel'):
+                    battery_level = battery.batteryLevel
+                if hasattr(battery, 'batteryAutonomy'):
+                    range_km = battery.batteryAutonomy
+                if hasattr(battery, 'batteryTemperature'):
+                    battery_temp = battery.batteryTemperature
+                if hasattr(battery, 'chargingStatus'):
+                    charging_val = battery.chargingStatus
+                    # chargingStatus can be a float (1.0 = charging) or string
+                    is_charging = charging_val == 1.0 or charging_val == 1 or str(charging_val).lower() in ('charging', '1', '1.0')
+                if hasattr(battery, 'plugStatus'):
+                    plug_val = battery.plugStatus
+                    is_plugged_in = plug_val == 1.0 or plug_val == 1 or str(plug_val).lower() in ('plugged', '1', '1.0')
+                if hasattr(battery, 'chargingInstantaneousPower'):
+                    charging_power = battery.chargingInstantaneousPower
+                    # Convert from W to kW if needed
+                    if charging_power and charging_power > 100:
+                        charging_power = charging_power / 1000
+                if hasattr(battery, 'chargingRemainingTime'):
+                    charging_remaining_minutes = battery.chargingRemainingTime
+        except Exception as e:
+            logger.warning(f"Could not get battery status: {e}")
+
+        # HVAC status
+        try:
+            if isinstance(hvac, BaseException):
+                raise hvac
+            if hvac:
+                raw_data['hvac'] = hvac.__dict__ if hasattr(hvac, '__dict__') else str(hvac)
+                if hasattr(hvac, 'hvacStatus'):
+                    hvac_status = hvac.hvacStatus
+        except Exception as e:
+            logger.warning(f"Could not get HVAC status: {e}")
+
+        # Location
+        try:
+            if isinstance(location, BaseException):
+                raise location
+            if location:
+                raw_data['location'] = location.__dict__ if hasattr(location, '__dict__') else str(location)
+                if hasattr(location, 'gpsLatitude'):
+                    lat = location.gpsLatitude
+                if hasattr(location, 'gpsLongitude'):
+                    lng = location.gpsLongitude
+        except Exception as e:
+            logger.warning(f"Could not get location: {e}")
+
+        # Build unified raw_data structure (similar to Audi format for main.py parsing)
+        raw_data['renault'] = {
+            'battery_temp_celsius': battery_temp,
+            'hvac_status': hvac_status,
+        }
+
+        # Determine state
+        if is_charging:
+            state = VehicleState.CHARGING
+        elif lat and lng:
+            state = VehicleState.PARKED  # If we have location, it's likely parked
+
+        return CarData(
+            vin=vin,
+            odometer_km=odometer,
+            latitude=lat,
+            longitude=lng,
+            state=state,
+            battery_level=battery_level,
+            range_km=range_km,
+            is_charging=is_charging,
+            is_plugged_in=is_plugged_in,
+            charging_power_kw=charging_power,
+            charging_remaining_minutes=charging_remaining_minutes,
+            raw_data=raw_data,
+        )
+
+    @staticmethod
+    async def _skip_unless(needed: bool, fetch):
+        """Await fetch() if needed, else None (handled like an empty response)"""
+        return await fetch() if needed else None
 
     def disconnect(self) -> None:
-        """No persistent connection to close"""
-        pass
+        """Close the session"""
+        if self._websession is None:
+            return
+        try:
+            _session_loop.submit(self._close_session()).result(timeout=10)
+        except Exception as e:
+            logger.warning(f"Error closing Renault session: {e}")
@@ -1,9 +1,12 @@
 """Skoda provider using OAuth tokens with MySkoda API"""
 
 import logging
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 
-from .base import CarProvider, CarData, VehicleState
+from .base import CarProvider, CarData, VehicleState, wants
 
 logger = logging.getLogger(__name__)
 
@@ -50,8 +53,8 @@ class SkodaOAuthProvider(CarProvider):
             logger.error(f"Failed to get Skoda vehicles: {e}")
             return []
 
-    def get_data(self) -> CarData:
-        """Fetch current car data"""
+    def get_data(self, fields: Collection[str] | None = None) -> CarData:
+        """Fetch current car data (charging status only when battery/charging fields are requested)"""
         if not self._vehicles:
             self._vehicles = self._get_vehicles()
 
@@ -67,19 +70,25 @@ class SkodaOAuthProvider(CarProvider):
             return CarData()
 
         try:
-            # Get vehicle status
-            status_resp = self._session.get(f"{BASE_URL}/v2/vehicle-status/{vin}")
+            # Vehicle status and charging status (EVs) are independent: fetch both at once
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="skoda-status") as pool:
+                status_future = pool.submit(self._session.get, f"{BASE_URL}/v2/vehicle-status/{vin}")
+                charging_future = None
+                if wants(fields, "battery_level", "range_km", "is_charging", "is_plugged_in", "raw_data"):
+                    charging_future = pool.submit(self._session.get, f"{BASE_URL}/v1/charging/{vin}/status")
+
+            status_resp = status_future.result()
             status_resp.raise_for_status()
             status = status_resp.json()
 
-            # Get charging status for EVs
             charging = {}
-            try:
-                charging_resp = self._session.get(f"{BASE_URL}/v1/charging/{vin}/status")
-                if charging_resp.status_code == 200:
-                    charging = charging_resp.json()
-            except:
-                pass
+            if charging_future is not None:
+                try:
+                    charging_resp = charging_future.result()
+                    if charging_resp.status_code == 200:
+                        charging = charging_resp.json()
+                except:
+                    pass
 
             # Extract data
             odometer = None
@@ -1,20 +1,51 @@
 import logging
 import json
+from collections.abc import Collection
 from datetime import datetime
 
-from .base import CarProvider, CarData, VehicleState
+from utils.cache import TTLCache
+
+from .base import CarProvider, CarData, VehicleState, wants
 
 logger = logging.getLogger(__name__)
 
+# vehicle_data endpoint filters and the CarData fields each one serves
+_ENDPOINT_FIELDS = {
+    "vehicle_state": ("odometer_km",),
+    "drive_state": ("latitude", "longitude", "state"),
+    "location_data": ("latitude", "longitude"),
+    "charge_state": (
+        "battery_level", "range_km", "is_charging", "is_plugged_in",
+        "charging_power_kw", "charging_remaining_minutes",
+    ),
+}
+
+
+# Decrypted tokens per Tesla account, shared by providers in this process.
+# Entries expire so tokens refreshed by another instance are picked up.
+_token_cache = TTLCache(ttl_seconds=300, max_entries=1000, name="tesla_tokens")
+
 
 class TeslaProvider(CarProvider):
-    """Tesla provider using TeslaPy library"""
+    """
+    Tesla provider using TeslaPy library.
 
-    def __init__(self, email: str, refresh_token: str = None):
+    With wake_up=False (the trip state machine) the car is never woken: a car
+    that is not online is reported as UNKNOWN with its last known position,
+    so a poll never blocks on a wake-up or drains the 12 V battery.
+    """
+
+    # Trust the cached online/asleep state for this many seconds (non-waking mode)
+    STATE_MAX_AGE = 60
+
+    def __init__(self, email: str, refresh_token: str = None, wake_up: bool = True):
         self.email = email
         self._refresh_token = refresh_token
+        self._wake_up = wake_up
         self._tesla = None
         self._vehicle = None
+        self._vehicles: list | None = None  # vehicle_list(), cached for the provider's lifetime
+        self._saved_tokens: dict | None = None  # Last tokens read from or written to Firestore
 
     @property
     def brand(self) -> str:
@@ -25,12 +56,15 @@ class TeslaProvider(CarProvider):
         return "Tesla"
 
     def _load_tokens_from_firestore(self) -> dict | None:
-        """Load and decrypt cached tokens from Firestore."""
+        """Load and decrypt tokens, reading Firestore only on a token cache miss."""
+        cached = _token_cache.get(self.email)
+        if cached is not None:
+            self._saved_tokens = dict(cached)
+            return dict(cached)
         try:
-            from google.cloud import firestore
-            from utils.encryption import decrypt_dict, is_encrypted
-            db = firestore.Client()
-            doc = db.collection("cache").document(f"tesla_tokens_{self.email}").get()
+            from database import get_db
+            from utils.encryption import decrypt_dict
+            doc = get_db().collection("cache").document(f"tesla_tokens_{self.email}").get()
             if doc.exists:
                 data = doc.to_dict()
 
@@ -38,6 +72,8 @@ class TeslaProvider(CarProvider):
                 if data and "tokens_encrypted" in data:
                     logger.info("Loading encrypted Tesla tokens from Firestore")
                     tokens = decrypt_dict(data["tokens_encrypted"])
+                    _token_cache.put(self.email, dict(tokens))
+                    self._saved_tokens = dict(tokens)
                     return tokens
 
                 # Handle legacy unencrypted tokens (migrate on read)
@@ -52,20 +88,23 @@ class TeslaProvider(CarProvider):
         return None
 
     def _save_tokens_to_firestore(self, tokens: dict) -> None:
-        """Save encrypted tokens to Firestore for persistence."""
+        """Save encrypted tokens to Firestore for persistence, only when they changed."""
+        if tokens == self._saved_tokens:
+            return
         try:
-            from google.cloud import firestore
+            from database import get_db
             from utils.encryption import encrypt_dict
-            db = firestore.Client()
 
             # ENCRYPT before storing
             encrypted_tokens = encrypt_dict(tokens)
 
-            db.collection("cache").document(f"tesla_tokens_{self.email}").set({
+            get_db().collection("cache").document(f"tesla_tokens_{self.email}").set({
                 "tokens_encrypted": encrypted_tokens,
                 "encryption_version": "kms-v1",
                 "updated_at": datetime.utcnow().isoformat(),
             })
+            _token_cache.put(self.email, dict(tokens))
+            self._saved_tokens = dict(tokens)
             logger.info("Saved encrypted Tesla tokens to Firestore")
         except Exception as e:
             logger.warning(f"Could not save tokens to Firestore: {e}")
@@ -130,6 +169,8 @@ class TeslaProvider(CarProvider):
                         self._save_tokens_to_firestore(self._tesla.token)
                     except Exception as e:
                         logger.warning(f"Token refresh failed: {e}")
+                        # Another instance may hold newer tokens: re-read Firestore next time
+                        _token_cache.invalidate(self.email)
                         return False
                 return True
 
@@ -160,7 +201,7 @@ class TeslaProvider(CarProvider):
                 return []
 
         try:
-            vehicles = self._tesla.vehicle_list()
+            vehicles = self._vehicle_list()
             return [
                 {
                     "vin": v["vin"],
@@ -173,16 +214,23 @@ class TeslaProvider(CarProvider):
             logger.error(f"Failed to get Tesla vehicles: {e}")
             return []
 
-    def get_data(self, vin: str = None) -> CarData:
-        """Fetch current car data from Tesla API."""
+    def _vehicle_list(self) -> list:
+        """Account's vehicles, fetched once per provider."""
+        if self._vehicles is None:
+            self._vehicles = self._tesla.vehicle_list()
+        return self._vehicles
+
+    def get_data(self, fields: Collection[str] | None = None, vin: str = None) -> CarData:
+        """Fetch current car data from Tesla API, filtered to the endpoints the fields need."""
         if not self._tesla:
             if not self.connect():
                 return CarData()
 
         try:
-            vehicles = self._tesla.vehicle_list()
+            vehicles = self._vehicle_list()
             if not vehicles:
                 logger.error("No Tesla vehicles found")
+                self._vehicles = None  # Look again next time
                 return CarData()
 
             # Find vehicle by VIN or use first one
@@ -198,54 +246,44 @@ class TeslaProvider(CarProvider):
 
             self._vehicle = vehicle
 
-            # Wake up vehicle if needed (with timeout)
-            try:
-                if vehicle.get("state") != "online":
-                    logger.info("Waking up Tesla...")
-                    vehicle.sync_wake_up(timeout=30)
-            except Exception as e:
-                logger.warning(f"Could not wake Tesla: {e}")
-                # Continue anyway - we might get cached data
+            if not self._wake_up:
+                # Cached state, refreshed by a (non-waking) summary call when stale
+                if not vehicle.available(self.STATE_MAX_AGE):
+                    logger.info(f"Tesla is {vehicle.get('state')}, not waking it")
+                    data = self._to_car_data(vehicle, VehicleState.UNKNOWN)
+                    data.is_asleep = True
+                    return data
+            else:
+                # Wake up vehicle if needed (with timeout)
+                try:
+                    if vehicle.get("state") != "online":
+                        logger.info("Waking up Tesla...")
+                        vehicle.sync_wake_up(timeout=30)
+                except Exception as e:
+                    logger.warning(f"Could not wake Tesla: {e}")
+                    # Continue anyway - we might get cached data
 
             # Get vehicle data
+            live = True
             try:
-                data = vehicle.get_vehicle_data()
+                if wants(fields, "raw_data"):
+                    data = vehicle.get_vehicle_data()
+                else:
+                    endpoints = [name for name, served in _ENDPOINT_FIELDS.items() if wants(fields, *served)]
+                    data = vehicle.get_vehicle_data(endpoints=";".join(endpoints))
             except Exception as e:
                 logger.warning(f"Could not get live data, using cached: {e}")
                 data = vehicle
+                live = False
 
-            # Extract data
-            vehicle_state = data.get("vehicle_state", {})
-            charge_state = data.get("charge_state", {})
-            drive_state = data.get("drive_state", {})
-
-            # Determine state
-            state = VehicleState.UNKNOWN
-            if drive_state.get("shift_state") in ["D", "R", "N"]:
-                state = VehicleState.DRIVING
-            elif charge_state.get("charging_state") == "Charging":
-                state = VehicleState.CHARGING
-            else:
-                state = VehicleState.PARKED
-
-            # Save updated tokens
+            # Save updated tokens (written only when they changed)
             if hasattr(self._tesla, 'token') and self._tesla.token:
                 self._save_tokens_to_firestore(self._tesla.token)
 
-            return CarData(
-                vin=data.get("vin"),
-                odometer_km=self._miles_to_km(vehicle_state.get("odometer")),
-                latitude=drive_state.get("latitude"),
-                longitude=drive_state.get("longitude"),
-                state=state,
-                battery_level=charge_state.get("battery_level"),
-                range_km=self._miles_to_km(charge_state.get("battery_range")),
-                is_charging=charge_state.get("charging_state") == "Charging",
-                charging_power_kw=charge_state.get("charger_power"),
-                charging_remaining_minutes=charge_state.get("minutes_to_full_charge"),
-                is_plugged_in=charge_state.get("charge_port_door_open", False),
-                raw_data=data,
-            )
+            if not live and not self._wake_up:
+                # Cached drive_state may be from before the car fell asleep
+                return self._to_car_data(data, VehicleState.UNKNOWN)
+            return self._to_car_data(data)
 
         except Exception as e:
             logger.error(f"Error fetching Tesla data: {e}")
@@ -253,6 +291,36 @@ class TeslaProvider(CarProvider):
             logger.error(traceback.format_exc())
             return CarData()
 
+    def _to_car_data(self, data: dict, state: VehicleState | None = None) -> CarData:
+        """CarData from vehicle data; state is derived unless given."""
+        vehicle_state = data.get("vehicle_state", {})
+        charge_state = data.get("charge_state", {})
+        drive_state = data.get("drive_state", {})
+
+        # Determine state
+        if state is None:
+            if drive_state.get("shift_state") in ["D", "R", "N"]:
+                state = VehicleState.DRIVING
+            elif charge_state.get("charging_state") == "Charging":
+                state = VehicleState.CHARGING
+            else:
+                state = VehicleState.PARKED
+
+        return CarData(
+            vin=data.get("vin"),
+            odometer_km=self._miles_to_km(vehicle_state.get("odometer")),
+            latitude=drive_state.get("latitude"),
+            longitude=drive_state.get("longitude"),
+            state=state,
+            battery_level=charge_state.get("battery_level"),
+            range_km=self._miles_to_km(charge_state.get("battery_range")),
+            is_charging=charge_state.get("charging_state") == "Charging",
+            charging_power_kw=charge_state.get("charger_power"),
+            charging_remaining_minutes=charge_state.get("minutes_to_full_charge"),
+            is_plugged_in=charge_state.get("charge_port_door_open", False),
+            raw_data=data,
+        )
+
     def _miles_to_km(self, miles: float | None) -> float | None:
         """Convert miles to kilometers."""
         if miles is None:
@@ -268,3 +336,4 @@ class TeslaProvider(CarProvider):
                 pass
             self._tesla = None
             self._vehicle = None
+            self._vehicles = None
@@ -1,6 +1,8 @@
+import hashlib
+import json
 import logging
-import os
-import tempfile
+import threading
+from collections.abc import Collection
 from datetime import datetime
 
 from .base import CarProvider, CarData, VehicleState
@@ -27,6 +29,111 @@ BRAND_DISPLAY_NAMES = {
 }
 
 
+class VWGroupTokenStore:
+    """
+    CarConnectivity tokens kept in memory per vendor account.
+
+    Each account's tokens are read from Firestore once per process
+    (cache/{connector}_tokens_{account hash}) and written back only when a
+    session's tokens actually changed, so a poll does no token I/O at all.
+    """
+
+    def __init__(self):
+        self._persisted: dict[tuple[str, str], str] = {}  # (connector, account) -> tokens JSON
+        self._lock = threading.Lock()
+
+    def load(self, connector: str, username: str) -> dict:
+        """Tokens for an account (a copy, empty if none are stored)."""
+        key = (connector, username.lower())
+        with self._lock:
+            serialized = self._persisted.get(key)
+        if serialized is None:
+            serialized = self._read(connector, username) or "{}"
+            with self._lock:
+                serialized = self._persisted.setdefault(key, serialized)
+        return json.loads(serialized)
+
+    def save(self, connector: str, username: str, tokens: dict) -> bool:
+        """
+        Store an account's tokens, persisting to Firestore only if they changed.
+
+        Returns:
+            True if Firestore was written
+        """
+        if not tokens:
+            return False
+        key = (connector, username.lower())
+        serialized = json.dumps(tokens, sort_keys=True)
+        with self._lock:
+            previous = self._persisted.get(key)
+            if previous == serialized:
+                return False
+            self._persisted[key] = serialized
+
+        try:
+            from database import get_db
+            get_db().collection("cache").document(self._doc_id(connector, username)).set({
+                "tokens": serialized,
+                "updated_at": datetime.utcnow().isoformat(),
+            })
+            logger.info(f"Saved {connector} tokens to Firestore")
+            return True
+        except Exception as e:
+            logger.warning(f"Could not save tokens to Firestore: {e}")
+            with self._lock:
+                # Retry on the next poll unless newer tokens arrived meanwhile
+                if self._persisted.get(key) == serialized:
+                    if previous is None:
+                        self._persisted.pop(key)
+                    else:
+                        self._persisted[key] = previous
+            return False
+
+    def clear(self) -> None:
+        """Forget all in-memory tokens (tests)."""
+        with self._lock:
+            self._persisted.clear()
+
+    def _read(self, connector: str, username: str) -> str | None:
+        try:
+            from database import get_db
+            doc = get_db().collection("cache").document(self._doc_id(connector, username)).get()
+            if doc.exists:
+                data = doc.to_dict()
+                if data and data.get("tokens"):
+                    logger.info(f"Loaded {connector} tokens from Firestore")
+                    return data["tokens"]
+        except Exception as e:
+            logger.warning(f"Could not load tokens from Firestore: {e}")
+        return None
+
+    @staticmethod
+    def _doc_id(connector: str, username: str) -> str:
+        account = hashlib.sha256(username.lower().encode()).hexdigest()[:16]
+        return f"{connector}_tokens_{account}"
+
+
+# Singleton instance
+vwgroup_token_store = VWGroupTokenStore()
+
+
+def _car_connectivity(config: dict, tokenstore: dict):
+    """
+    Build a CarConnectivity instance whose connectors use the given tokenstore.
+
+    Connectors open their session (refresh or login) in their constructor, so
+    the tokens must be in place before CarConnectivity builds them; seeding
+    get_tokenstore() afterwards would always force a fresh login.
+    """
+    from carconnectivity.carconnectivity import CarConnectivity
+
+    class SeededCarConnectivity(CarConnectivity):
+        def get_tokenstore(self) -> dict:
+            return tokenstore
+
+    return SeededCarConnectivity(config=config)
+
+
 class VWGroupProvider(CarProvider):
     """VW Group provider (Audi, VW, Skoda, Seat, Cupra) using CarConnectivity library"""
 
@@ -37,9 +144,9 @@ class VWGroupProvider(CarProvider):
         self.country = country
         self.spin = spin
         self._cc = None
+        self._tokenstore: dict = {}
         self._vehicle = None
         self._connector_type = BRAND_CONNECTORS.get(self._brand, self._brand)
-        self._tokenstore = os.path.join(tempfile.gettempdir(), f"{self._connector_type}_tokenstore")
 
     @property
     def brand(self) -> str:
@@ -49,44 +156,19 @@ class VWGroupProvider(CarProvider):
     def display_name(self) -> str:
         return BRAND_DISPLAY_NAMES.get(self._brand, self._brand.title())
 
-    def _load_tokens_from_firestore(self) -> bool:
-        """Load cached tokens from Firestore to local file. Returns True if tokens found."""
-        try:
-            from google.cloud import firestore
-            db = firestore.Client()
-            doc = db.collection("cache").document(f"{self._connector_type}_tokens").get()
-            if doc.exists:
-                data = doc.to_dict()
-                if data and "tokens" in data:
-                    with open(self._tokenstore, "w") as f:
-                        f.write(data["tokens"])
-                    logger.info(f"Loaded {self.display_name} tokens from Firestore")
-                    return True
-        except Exception as e:
-            logger.warning(f"Could not load tokens from Firestore: {e}")
-        return False
-
-    def _save_tokens_to_firestore(self) -> None:
-        """Save local tokens to Firestore for persistence across cold starts."""
+    def _save_tokens(self) -> None:
+        """Hand the session's current tokens to the token store."""
         try:
-            from google.cloud import firestore
-            if os.path.exists(self._tokenstore):
-                with open(self._tokenstore, "r") as f:
-                    tokens = f.read()
-                if tokens:
-                    db = firestore.Client()
-                    db.collection("cache").document(f"{self._connector_type}_tokens").set({
-                        "tokens": tokens,
-                        "updated_at": datetime.utcnow().isoformat(),
-                    })
-                    logger.info(f"Saved {self.display_name} tokens to Firestore")
+            # Connectors copy their session tokens into the tokenstore on persist();
+            # CarConnectivity.persist() only writes a tokenstore file
+            for connector in self._cc.connectors.connectors.values():
+                connector.persist()
+            vwgroup_token_store.save(self._connector_type, self.username, self._tokenstore)
         except Exception as e:
-            logger.warning(f"Could not save tokens to Firestore: {e}")
+            logger.warning(f"Could not save {self.display_name} tokens: {e}")
 
     def connect(self) -> bool:
         """Connect to VW Group API"""
-        from carconnectivity.carconnectivity import CarConnectivity
-
         if not self.username or not self.password:
             logger.error(f"{self.display_name} credentials not configured")
             return False
@@ -108,18 +190,17 @@ class VWGroupProvider(CarProvider):
                 }
             }
 
-            # Try to load cached tokens from Firestore
-            self._load_tokens_from_firestore()
-
-            self._cc = CarConnectivity(config=cc_config, tokenstore_file=self._tokenstore)
+            # No tokenstore file: tokens live in memory, seeded from the token store
+            self._tokenstore = vwgroup_token_store.load(self._connector_type, self.username)
+            self._cc = _car_connectivity(cc_config, self._tokenstore)
             return True
 
         except Exception as e:
             logger.error(f"Failed to connect to {self.display_name}: {e}")
             return False
 
-    def get_data(self) -> CarData:
-        """Fetch current car data from VW Group API"""
+    def get_data(self, fields: Collection[str] | None = None) -> CarData:
+        """Fetch current car data from VW Group API (CarConnectivity fetches everything; fields is ignored)"""
         if not self._cc:
             if not self.connect():
                 return CarData()
@@ -161,8 +242,8 @@ class VWGroupProvider(CarProvider):
             if hasattr(vehicle, 'as_dict'):
                 raw_data = vehicle.as_dict()
 
-            # Save tokens for next cold start
-            self._save_tokens_to_firestore()
+            # Keep tokens for the next provider/cold start (written only when changed)
+            self._save_tokens()
 
             return CarData(
                 vin=vin,
@@ -115,15 +115,103 @@ CONFIG = {
 
 # Trip tracking
 STALE_TRIP_HOURS = 2  # Trips with no activity for 2+ hours are considered stale
+ACTIVE_TRIP_INDEX_STEP_MINUTES = 15  # Advance an active trip's indexed last_event_at in steps this large
+
+# Safety net (scheduler) concurrency - must finish within the Cloud Run request timeout (300s)
+SAFETY_NET_WORKERS = int(os.environ.get("SAFETY_NET_WORKERS", "8"))  # Users recovered in parallel
+SAFETY_NET_TRIP_TIMEOUT_SECONDS = 60    # Give up waiting on one user's recovery after this
+SAFETY_NET_TOTAL_TIMEOUT_SECONDS = 240  # Return partial results after this
+SAFETY_NET_POLL_SECONDS = 1.0           # Deadline check interval
+
+# Trip state writes carry an update-time precondition; a request that lost the
+# race re-reads the trip and runs again
+TRIP_STATE_MAX_ATTEMPTS = 3
+TRIP_STATE_RETRY_BACKOFF_SECONDS = 0.05  # Doubles per attempt, with jitter
+TRIP_FINALIZE_CLAIM_SECONDS = 300        # Older finalization claims are treated as abandoned
+
+# Webhook handlers run the (blocking) trip state machine on their own worker
+# threads, one thread per in-flight ping for its whole run, I/O included. Sized
+# to the Cloud Run request concurrency (terraform/cloud_run.tf) so every request
+# the instance accepts gets a thread, without taking the shared threadpool.
+WEBHOOK_MAX_CONCURRENCY = int(os.environ.get("WEBHOOK_MAX_CONCURRENCY", "80"))
 
 # GPS-based trip detection
 GPS_STATIONARY_TIMEOUT_MINUTES = 5   # Auto-end trip after 5 min stationary (was 30)
 GPS_STATIONARY_RADIUS_METERS = 50    # Consider stationary if within 50m
 TRIP_RESUME_WINDOW_MINUTES = 30      # Resume trip if driving again within 30 min of stop
 
+# Trail cleanup (see utils/trail.py): outliers are flagged as events arrive,
+# finalized trails are filtered again and simplified before routing/storage
+GPS_MAX_SPEED_MPS = 70                # ~250 km/h; faster jumps between fixes are GPS outliers
+GPS_OUTLIER_MAX_RUN = 3               # Accept the next fix after this many consecutive outliers
+TRAIL_SIMPLIFY_TOLERANCE_METERS = 15  # Max distance of a dropped point from the simplified trail (0 = off)
+
+# Adaptive vendor polling once a trip has its start odometer (see services/poll_scheduler.py)
+POLL_SCHEDULER_ENABLED = os.environ.get("POLL_SCHEDULER_ENABLED", "true").lower() == "true"
+POLL_MIN_INTERVAL_SECONDS = 60             # Slow/stopped, near a known location, confirming parked
+POLL_DEFAULT_INTERVAL_SECONDS = 180        # Driving
+POLL_CRUISE_INTERVAL_SECONDS = 420         # Phone speed above POLL_CRUISE_SPEED_MPS
+POLL_PARKED_MAX_INTERVAL_SECONDS = 1800    # Cap for exponential backoff while parked at a skip location
+POLL_CRUISE_SPEED_MPS = 16.7               # ~60 km/h
+POLL_SLOW_SPEED_MPS = 3.0                  # ~11 km/h
+POLL_SPEED_WINDOW_SECONDS = 120            # Phone speed averaged over this window
+POLL_NEAR_END_METERS = 1000                # Poll promptly within this distance of a known location
+POLL_LEAVE_SKIP_METERS = 300               # Phone moved this far from the last poll: car left skip location
+
+# GPS event storage for new trips:
+#   "inline"  - every event lives in cache/trip_start (rewritten on each ping)
+#   "chunked" - full chunks are appended to users/{uid}/gps_logs/{log_id}/chunks,
+#               trip_start only keeps counters, pointers and a short recent tail
+GPS_EVENT_STORAGE = os.environ.get("GPS_EVENT_STORAGE", "inline")
+GPS_EVENT_CHUNK_SIZE = 50   # Events per chunk document
+GPS_EVENT_TAIL_SIZE = 30    # Recent events kept inline (must cover GPS_STATIONARY_TIMEOUT_MINUTES of pings)
+GPS_EVENT_LOG_TTL_DAYS = 7  # Chunk docs expire_at; deleted by the TTL policy in terraform/firestore.tf
+
 # Charging stations cache
 CHARGING_CACHE_TTL = 300  # 5 minutes
 
+# Decrypted car credentials cache (saves Firestore reads + KMS decrypts per ping)
+CREDENTIAL_CACHE_TTL = 300  # 5 minutes
+CREDENTIAL_CACHE_MAX_ENTRIES = 1000
+
+# Connected car provider pool (keeps vendor sessions warm between pings)
+PROVIDER_POOL_IDLE_SECONDS = 900  # Disconnect providers unused for 15 min
+PROVIDER_POOL_MAX_ENTRIES = 200
+PROVIDER_POOL_REFRESH_INTERVAL = 60  # Background idle eviction + token refresh
+
+# Reverse-geocode cache, keyed by geohash cell (8 chars = ~38 x 19 m)
+GEOCODE_CACHE_PRECISION = 8
+GEOCODE_CACHE_TTL = 86400  # In-memory tier: 24 hours
+GEOCODE_CACHE_MAX_ENTRIES = 5000
+GEOCODE_CACHE_TTL_DAYS = 90  # Firestore tier (expire_at, TTL policy in terraform/firestore.tf)
+
+# OSRM routing (set OSRM_BASE_URL to a local OSRM container to avoid the public
+# demo server; local servers accept far more points per request via OSRM_MAX_POINTS)
+OSRM_BASE_URL = os.environ.get("OSRM_BASE_URL", "https://router.project-osrm.org")
+OSRM_MAX_POINTS = int(os.environ.get("OSRM_MAX_POINTS", "25"))  # Points per route request
+OSRM_MAX_CONCURRENCY = int(os.environ.get("OSRM_MAX_CONCURRENCY", "4"))  # Parallel chunk requests
+OSRM_TIMEOUT_SECONDS = 10
+OSRM_RETRIES = 2  # Connection errors, 429 and 5xx, with exponential backoff
+OSRM_CACHE_TTL = 86400  # Route distances per coordinate sequence: 24 hours
+OSRM_CACHE_MAX_ENTRIES = 2000
+
+# Deferred trip enrichment (addresses, route deviation, classification).
+# Trips are committed from the odometer first; enrichment runs on background
+# workers and is retried from a durable queue by the safety-net scheduler.
+# Queue backends: "firestore" (production), "file" (local dev) or "memory"
+ENRICHMENT_QUEUE = os.environ.get("ENRICHMENT_QUEUE", "firestore")
+ENRICHMENT_QUEUE_PATH = os.environ.get("ENRICHMENT_QUEUE_PATH", ".enrichment_queue.json")
+ENRICHMENT_WORKERS = 2
+ENRICHMENT_MAX_ATTEMPTS = 6
+ENRICHMENT_RETRY_BASE_SECONDS = 60  # Doubles per failed attempt
+ENRICHMENT_LEASE_SECONDS = 300      # A running job is not re-picked by the scheduler before this
+ENRICHMENT_DRAIN_LIMIT = 50         # Jobs retried per scheduler run
+ENRICHMENT_JOB_MAX_SECONDS = 35     # Worst case per job: two geocodes and a route call, 10 s timeout each
+
+# The scheduler request (safety net + enrichment drain) must answer within
+# Cloud Run's 300 s request timeout; the drain stops starting jobs in time
+SCHEDULER_REQUEST_BUDGET_SECONDS = 280
+
 # Open Charge Map API
 OPENCHARGEMAP_API_KEY = os.environ.get("OPENCHARGEMAP_API_KEY", "")
 
@@ -4,15 +4,19 @@ Handles Firestore client initialization and trip cache operations.
 """
 
 import logging
+from datetime import datetime, timedelta, timezone
+
+from google.api_core import exceptions as google_exceptions
 from google.cloud import firestore
 
-from config import CONFIG
+from config import CONFIG, ACTIVE_TRIP_INDEX_STEP_MINUTES
 
 logger = logging.getLogger(__name__)
 
 # Firestore client (lazy init)
 _db: firestore.Client | None = None
 _locations_loaded = False
+_locations_version = 0  # Bumped by every writer of CONFIG["locations"]
 
 
 def get_db() -> firestore.Client:
@@ -40,38 +44,98 @@ def load_custom_locations(user_id: str | None = None):
                 "is_business": True,
             }
         _locations_loaded = True
+        locations_changed()
         logger.info(f"Loaded {len(CONFIG['locations'])} locations")
     except Exception as e:
         logger.error(f"Failed to load custom locations: {e}")
 
 
+def locations_changed():
+    """Record a change to CONFIG["locations"]; call after writing it."""
+    global _locations_version
+    _locations_version += 1
+
+
+def locations_version() -> int:
+    """Counter that changes whenever CONFIG["locations"] was written."""
+    return _locations_version
+
+
 # === Trip Cache Operations ===
 # Trip cache in Firestore to survive cold starts
 
+# Key under which a read trip cache carries its document update time (never stored)
+TRIP_CACHE_VERSION = "_update_time"
+
+# Trip cache field holding the active trip index entry last written for the trip
+ACTIVE_TRIP_INDEXED = "active_trip_index"
+
+
+class TripStateConflict(Exception):
+    """The trip cache changed (or was deleted) between read and write."""
+
+
+def _versioned(doc) -> dict:
+    data = dict(doc.to_dict())
+    data[TRIP_CACHE_VERSION] = doc.update_time
+    return data
+
 
 def get_trip_cache(user_id: str) -> dict | None:
-    """Get cached trip start from Firestore (per-user)."""
+    """
+    Get cached trip start from Firestore (per-user).
+
+    The dict carries the document's update time under TRIP_CACHE_VERSION,
+    which makes set_trip_cache write it back only if nobody else did first.
+    """
     try:
         db = get_db()
         doc = db.collection("users").document(user_id).collection("cache").document("trip_start").get()
         if doc.exists:
-            return doc.to_dict()
+            return _versioned(doc)
     except Exception as e:
         logger.error(f"Failed to get trip cache: {e}")
     return None
 
 
 def set_trip_cache(data: dict | None, user_id: str):
-    """Set or clear trip start cache in Firestore (per-user)."""
+    """
+    Set or clear trip start cache in Firestore (per-user), keeping the active trip index in sync.
+
+    A cache read with get_trip_cache is written with an update-time
+    precondition (fields are merged - set a field to None to clear it) and
+    gets the new version, so it can be written again. Caches built from
+    scratch are created, so they never overwrite a trip another request
+    started first. Clearing is unconditional.
+
+    Raises:
+        TripStateConflict: If a versioned cache changed or was deleted since it
+            was read, or a new cache's document already exists
+    """
     try:
         db = get_db()
         ref = db.collection("users").document(user_id).collection("cache").document("trip_start")
         if data:
-            ref.set(data)
+            _index_active_trip(user_id, data)
+            payload = {k: v for k, v in data.items() if k != TRIP_CACHE_VERSION}
+            version = data.get(TRIP_CACHE_VERSION)
+            if version is not None:
+                result = ref.update(payload, option=db.write_option(last_update_time=version))
+            else:
+                result = ref.create(payload)
+            data[TRIP_CACHE_VERSION] = getattr(result, "update_time", None)
         else:
+            payload = None
             ref.delete()
+    except (google_exceptions.FailedPrecondition, google_exceptions.NotFound) as e:
+        raise TripStateConflict(f"Trip cache for {user_id} changed since it was read") from e
+    except google_exceptions.AlreadyExists as e:
+        raise TripStateConflict(f"Trip cache for {user_id} was created by another request") from e
     except Exception as e:
         logger.error(f"Failed to set trip cache: {e}")
+        return
+    if not payload or not payload.get("active"):
+        _update_active_trip_index(user_id, None)
 
 
 def get_paused_trip(user_id: str) -> dict | None:
@@ -92,27 +156,240 @@ def set_paused_trip(data: dict | None, user_id: str):
         db = get_db()
         ref = db.collection("users").document(user_id).collection("cache").document("paused_trip")
         if data:
-            ref.set(data)
+            # Paused trips have no index entry; a resumed trip writes a new one
+            ref.set({k: v for k, v in data.items() if k not in (TRIP_CACHE_VERSION, ACTIVE_TRIP_INDEXED)})
         else:
             ref.delete()
     except Exception as e:
         logger.error(f"Failed to set paused trip: {e}")
 
 
-def get_all_active_trips() -> list[tuple[str, dict]]:
-    """Get all active trip caches across all users (for scheduler/safety net)."""
+# === GPS Event Log (chunked storage) ===
+# Append-only event chunks for trips using GPS_EVENT_STORAGE = "chunked"
+
+
+def write_gps_chunk(user_id: str, log_id: str, chunk_id: str, index: int, events: list[dict], expire_at: datetime):
+    """
+    Write one GPS event chunk under a new document ID.
+
+    Every write attempt uses its own chunk_id and the chunk only becomes part
+    of the trip once the trip cache listing it is written, so an attempt that
+    loses the trip cache race leaves an unreferenced chunk instead of
+    overwriting the winner's. Chunks are never deleted here: the Firestore
+    TTL policy on expire_at removes them after the trip (see
+    terraform/firestore.tf).
+    """
+    db = get_db()
+    ref = (
+        db.collection("users").document(user_id)
+        .collection("gps_logs").document(log_id)
+        .collection("chunks").document(chunk_id)
+    )
+    ref.create({"index": index, "events": events, "expire_at": expire_at})
+
+
+def get_gps_chunks(user_id: str, log_id: str, chunk_ids: list[str] | None = None) -> list[list[dict]]:
+    """
+    Get the GPS event chunks of a log, in append order.
+
+    Args:
+        chunk_ids: Chunks the trip cache references, in order; others are
+            leftovers of lost writes and skipped. None reads every chunk
+            (logs written before chunk IDs were tracked).
+    """
+    try:
+        db = get_db()
+        chunks_ref = (
+            db.collection("users").document(user_id)
+            .collection("gps_logs").document(log_id)
+            .collection("chunks")
+        )
+        chunks = {doc.id: doc.to_dict() for doc in chunks_ref.stream()}
+        if chunk_ids is None:
+            ordered = sorted(chunks.values(), key=lambda c: c.get("index", 0))
+        else:
+            missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in chunks]
+            if missing:
+                logger.error(f"GPS log {log_id} is missing chunks {missing}")
+            ordered = [chunks[chunk_id] for chunk_id in chunk_ids if chunk_id in chunks]
+        return [c.get("events", []) for c in ordered]
+    except Exception as e:
+        logger.error(f"Failed to get GPS chunks: {e}")
+        return []
+
+
+# === Geocode Cache ===
+# Reverse-geocoded addresses per geohash cell, shared by all users (persistent
+# tier behind the in-memory cache in location_service)
+
+
+def get_cached_geocode(cell: str) -> dict | None:
+    """Get a cached geocode entry for a geohash cell (None if missing or expired)."""
+    try:
+        doc = get_db().collection("geocode_cache").document(cell).get()
+        if not doc.exists:
+            return None
+        data = doc.to_dict()
+        expire_at = data.get("expire_at")
+        if expire_at is not None:
+            if expire_at.tzinfo is not None:
+                expire_at = expire_at.astimezone(timezone.utc).replace(tzinfo=None)
+            if expire_at <= datetime.utcnow():
+                return None
+        return data
+    except Exception as e:
+        logger.error(f"Failed to get cached geocode: {e}")
+        return None
+
+
+def set_cached_geocode(cell: str, address: str, expire_at: datetime):
+    """Store a geocoded address for a geohash cell."""
+    try:
+        get_db().collection("geocode_cache").document(cell).set({
+            "address": address,
+            "created_at": datetime.utcnow(),
+            "expire_at": expire_at,
+        })
+    except Exception as e:
+        logger.error(f"Failed to set cached geocode: {e}")
+
+
+# === Active Trip Index ===
+# active_trips/{user_id} mirrors every live trip_start cache, so the safety net
+# reads only users that are actually on a trip instead of scanning all users.
+# Paused and finished trips have no entry (set_trip_cache(None) removes it).
+
+
+def _parse_event_time(timestamp: str | None) -> datetime | None:
+    """Parse an ISO-8601 event timestamp to naive UTC."""
+    if not timestamp:
+        return None
+    try:
+        dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def _active_trip_index_entry(data: dict) -> dict:
+    """Index fields of an active trip cache: last event time and end trigger."""
+    events = data.get("gps_events") or []
+    last_event_at = (
+        _parse_event_time(events[-1].get("timestamp") if events else None)
+        or _parse_event_time(data.get("start_time"))
+        or datetime.utcnow()
+    )
+    return {"last_event_at": last_event_at, "end_triggered": bool(data.get("end_triggered"))}
+
+
+def _index_active_trip(user_id: str, data: dict):
+    """
+    Write an active trip's index entry ahead of its trip cache write, when it changed.
+
+    The trip cache records the entry last written under ACTIVE_TRIP_INDEXED,
+    so most pings skip the index write: end_triggered is written when it
+    flips and last_event_at only in ACTIVE_TRIP_INDEX_STEP_MINUTES steps. An
+    indexed time a few minutes behind only makes the safety net look at the
+    trip early; it re-checks the trip cache's own last event. Writing the
+    entry first means the cache never records an entry that was not written.
+    """
+    if not data.get("active"):
+        data[ACTIVE_TRIP_INDEXED] = None
+        return
+
+    entry = _active_trip_index_entry(data)
+    indexed = data.get(ACTIVE_TRIP_INDEXED)
+    if indexed and indexed.get("end_triggered") == entry["end_triggered"]:
+        indexed_at = _parse_event_time(indexed.get("last_event_at"))
+        if indexed_at and entry["last_event_at"] - indexed_at < timedelta(minutes=ACTIVE_TRIP_INDEX_STEP_MINUTES):
+            return
+
+    if _update_active_trip_index(user_id, data):
+        data[ACTIVE_TRIP_INDEXED] = {
+            "last_event_at": entry["last_event_at"].isoformat() + "Z",
+            "end_triggered": entry["end_triggered"],
+        }
+
+
+def _update_active_trip_index(user_id: str, data: dict | None) -> bool:
+    """Write or remove a user's active trip index entry. Returns False if the write failed."""
+    try:
+        ref = get_db().collection("active_trips").document(user_id)
+        if not data or not data.get("active"):
+            ref.delete()
+            return True
+
+        entry = _active_trip_index_entry(data)
+        ref.set({
+            "user_id": user_id,
+            "last_event_at": entry["last_event_at"],
+            "end_triggered": entry["end_triggered"],
+            "updated_at": datetime.utcnow(),
+        })
+        return True
+    except Exception as e:
+        logger.error(f"Failed to update active trip index for {user_id}: {e}")
+        return False
+
+
+def get_all_active_trips(stale_before: datetime | None = None) -> list[tuple[str, dict]]:
+    """
+    Get active trip caches from the active trip index (for scheduler/safety net).
+
+    Args:
+        stale_before: If set, only return trips whose last event is at or before
+            this time (naive UTC) or whose end was triggered
+
+    Returns:
+        List of (user_id, trip cache) tuples
+    """
     active_trips = []
     try:
         db = get_db()
-        # Query all users' trip caches
-        users_ref = db.collection("users").stream()
-        for user_doc in users_ref:
-            user_id = user_doc.id
+        index_ref = db.collection("active_trips")
+        if stale_before is None:
+            entries = list(index_ref.stream())
+        else:
+            entries = list(index_ref.where(filter=firestore.FieldFilter("last_event_at", "<=", stale_before)).stream())
+            entries.extend(index_ref.where(filter=firestore.FieldFilter("end_triggered", "==", True)).stream())
+
+        seen = set()
+        for entry in entries:
+            user_id = entry.id
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+
             cache_doc = db.collection("users").document(user_id).collection("cache").document("trip_start").get()
-            if cache_doc.exists:
-                cache = cache_doc.to_dict()
-                if cache and cache.get("active"):
-                    active_trips.append((user_id, cache))
+            cache = _versioned(cache_doc) if cache_doc.exists else None
+            if cache and cache.get("active"):
+                active_trips.append((user_id, cache))
+            else:
+                # Entry outlived its trip (e.g. index delete failed) - drop it
+                logger.info(f"Removing orphaned active trip index entry for {user_id}")
+                index_ref.document(user_id).delete()
     except Exception as e:
         logger.error(f"Failed to get active trips: {e}")
     return active_trips
+
+
+def rebuild_active_trip_index() -> int:
+    """
+    Rebuild the active trip index by scanning every user's trip cache.
+
+    Only needed once for trips that started before the index existed.
+
+    Returns:
+        Number of index entries written
+    """
+    db = get_db()
+    written = 0
+    for user_doc in db.collection("users").stream():
+        cache_doc = db.collection("users").document(user_doc.id).collection("cache").document("trip_start").get()
+        cache = cache_doc.to_dict() if cache_doc.exists else None
+        if cache and cache.get("active"):
+            _update_active_trip_index(user_doc.id, cache)
+            written += 1
+    return written
@@ -289,6 +289,7 @@ def get_car_data_by_id_legacy(car_id: str, user_id: str = Depends(get_current_us
                         "refresh_token": new_tokens["refresh_token"],
                         "updated_at": datetime.utcnow().isoformat(),
                     })
+                    car_service.invalidate_credentials(user_id, car_id)
                 except Exception as e:
                     logger.warning(f"Failed to save refreshed tokens: {e}")
 
@@ -19,6 +19,8 @@ from .car import (
 )
 from .location import (
     WebhookLocation,
+    WebhookPoint,
+    WebhookPingBatch,
     CustomLocation,
 )
 from .export import ExportRequest
@@ -48,6 +50,8 @@ __all__ = [
     "CarTestRequest",
     # Location models
     "WebhookLocation",
+    "WebhookPoint",
+    "WebhookPingBatch",
     "CustomLocation",
     # Export models
     "ExportRequest",
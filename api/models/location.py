@@ -2,8 +2,12 @@
 Location-related Pydantic models.
 """
 
+from datetime import datetime
+
 from pydantic import BaseModel, field_validator
 
+MAX_BATCH_POINTS = 500
+
 
 class WebhookLocation(BaseModel):
     """GPS location from webhook request."""
@@ -25,6 +29,25 @@ class WebhookLocation(BaseModel):
         return v
 
 
+class WebhookPoint(WebhookLocation):
+    """Buffered GPS point with the device timestamp it was recorded at."""
+    timestamp: datetime | None = None
+
+
+class WebhookPingBatch(BaseModel):
+    """Ordered batch of buffered GPS points (oldest first)."""
+    points: list[WebhookPoint]
+
+    @field_validator('points')
+    @classmethod
+    def validate_points(cls, v):
+        if not v:
+            raise ValueError('At least one point is required')
+        if len(v) > MAX_BATCH_POINTS:
+            raise ValueError(f'At most {MAX_BATCH_POINTS} points per batch, got {len(v)}')
+        return v
+
+
 class CustomLocation(BaseModel):
     """Custom named location."""
     name: str
@@ -42,10 +42,12 @@ class Trip(BaseModel):
     created_at: str | None = None
     car_id: str | None = None  # "audi", "prive", or "unknown" (show red in UI)
     gps_trail: list[GpsPoint] = []  # Route waypoints for Google Maps
+    gps_trail_encoded: str | None = None  # Compact trail (utils.trail_codec), when requested with trail_format=encoded
     google_maps_km: float | None = None  # Shortest route distance from Google Maps
     route_deviation_percent: float | None = None  # How much longer than Google Maps route (%)
     route_flag: str | None = None  # "long_route" if significantly longer than Google Maps
     distance_source: str | None = None  # "odometer", "osrm", or "gps" - how distance was calculated
+    enrichment_status: str | None = None  # "pending" until addresses/route deviation are filled in, then "done"
 
 
 class TripUpdate(BaseModel):
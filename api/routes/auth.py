@@ -24,6 +24,7 @@ from models.auth import (
     RefreshTokenRequest,
     RefreshTokenResponse,
 )
+from services.car_service import car_service
 from services.token_service import token_service
 
 logger = logging.getLogger(__name__)
@@ -171,6 +172,9 @@ def delete_account(user: str = Depends(get_current_user)):
         if user_ref.get().exists:
             user_ref.delete()
 
+        # Drop decrypted credentials still held in memory
+        car_service.invalidate_user_credentials(user)
+
         # Revoke all tokens
         deleted_counts["tokens"] = token_service.revoke_all_user_tokens(user)
 
@@ -15,6 +15,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from models.auth import AudiAuthRequest, AudiCallbackRequest
 from auth.dependencies import get_current_user
 from database import get_db
+from services.car_service import car_service
 from utils.encryption import encrypt_string
 
 router = APIRouter(prefix="/audi/auth", tags=["oauth", "audi"])
@@ -188,6 +189,7 @@ def handle_audi_callback(request: AudiCallbackRequest, user_id: str = Depends(ge
 
     # Store tokens
     car_ref.collection("credentials").document("api").set(tokens, merge=True)
+    car_service.invalidate_credentials(user_id, request.car_id)
 
     # Update car brand
     car_ref.update({"brand": "audi"})
@@ -223,6 +225,7 @@ def handle_audi_callback(request: AudiCallbackRequest, user_id: str = Depends(ge
 
         if vehicles:
             car_ref.collection("credentials").document("api").set({"vin": vehicles[0].vin}, merge=True)
+            car_service.invalidate_credentials(user_id, request.car_id)
             return {
                 "status": "success",
                 "vin": vehicles[0].vin,
@@ -15,6 +15,7 @@ from models.auth import RenaultAuthRequest, RenaultCallbackRequest, RenaultLogin
 from config import get_renault_gigya_config, get_renault_gigya_api_keys
 from auth.dependencies import get_current_user
 from database import get_db
+from services.car_service import car_service
 from utils.encryption import encrypt_string
 
 router = APIRouter(prefix="/renault/auth", tags=["oauth", "renault"])
@@ -103,6 +104,7 @@ def renault_direct_login(request: RenaultLoginRequest, user_id: str = Depends(ge
         }
 
         car_ref.collection("credentials").document("api").set(tokens, merge=True)
+        car_service.invalidate_credentials(user_id, request.car_id)
 
         logger.info(f"Renault login completed for car {request.car_id}, user {user_id}")
 
@@ -218,6 +220,7 @@ def handle_renault_callback(request: RenaultCallbackRequest, user_id: str = Depe
         }
 
         car_ref.collection("credentials").document("api").set(tokens, merge=True)
+        car_service.invalidate_credentials(user_id, request.car_id)
 
         # Clean up state doc
         car_ref.collection("credentials").document("oauth_state").delete()
@@ -9,6 +9,7 @@ from fastapi import APIRouter, HTTPException, Depends
 
 from auth.dependencies import get_current_user
 from database import get_db
+from services.car_service import car_service
 
 router = APIRouter(tags=["oauth", "tesla"])
 logger = logging.getLogger(__name__)
@@ -41,6 +42,7 @@ def get_tesla_auth_url(car_id: str, callback_url: str, user_id: str = Depends(ge
         "oauth_pending": True,
         "updated_at": datetime.now(tz=timezone.utc).isoformat(),
     }, merge=True)
+    car_service.invalidate_credentials(user_id, car_id)
 
     return {"status": "authorization_required", "auth_url": auth_url}
 
@@ -77,6 +79,7 @@ def complete_tesla_auth(car_id: str, callback_url: str, user_id: str = Depends(g
         "oauth_completed": True,
         "updated_at": datetime.now(tz=timezone.utc).isoformat(),
     })
+    car_service.invalidate_credentials(user_id, car_id)
 
     # Update car brand
     car_ref.update({"brand": "tesla"})
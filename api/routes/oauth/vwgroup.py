@@ -16,6 +16,7 @@ from models.auth import VWGroupAuthRequest, VWGroupCallbackRequest
 from config import VW_GROUP_OAUTH_CONFIG
 from auth.dependencies import get_current_user
 from database import get_db
+from services.car_service import car_service
 from utils.encryption import encrypt_string
 
 router = APIRouter(prefix="/vwgroup/auth", tags=["oauth", "vwgroup"])
@@ -203,6 +204,7 @@ def handle_vwgroup_callback(request: VWGroupCallbackRequest, user_id: str = Depe
     }
 
     car_ref.collection("credentials").document("api").set(tokens, merge=True)
+    car_service.invalidate_credentials(user_id, request.car_id)
 
     # Clean up state doc
     car_ref.collection("credentials").document("oauth_state").delete()
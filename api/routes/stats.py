@@ -2,12 +2,17 @@
 Stats and export routes.
 """
 
+import time
+
 from fastapi import APIRouter, Depends
 
+from config import SCHEDULER_REQUEST_BUDGET_SECONDS
 from models.export import ExportRequest
 from auth.dependencies import get_current_user
 from services.export_service import export_service
+from services.trip_service import trip_service
 from services.webhook_service import webhook_service
+from utils.concurrency import run_blocking
 
 router = APIRouter(tags=["stats"])
 
@@ -39,7 +44,7 @@ def export_to_sheet(req: ExportRequest, user_id: str = Depends(get_current_user)
 @router.get("/audi/compare")
 async def compare_odometer(car_id: str | None = None, user_id: str = Depends(get_current_user)):
     """Compare car odometer with calculated trips - returns data for visualization."""
-    return export_service.compare_odometer(user_id, car_id)
+    return await run_blocking(export_service.compare_odometer, user_id, car_id)
 
 
 @router.get("/audi/odometer-now")
@@ -71,4 +76,8 @@ def get_current_odometer(user: str):
 @router.get("/audi/check-trip")
 def check_stale_trips():
     """Safety net: called periodically to recover stale/orphaned trips."""
-    return webhook_service.check_stale_trips()
+    started = time.monotonic()
+    result = webhook_service.check_stale_trips()
+    # Retry trip enrichment that failed or was lost with an instance, in the time left
+    result["enrichment"] = trip_service.drain_enrichment_queue(deadline=started + SCHEDULER_REQUEST_BUDGET_SECONDS)
+    return result
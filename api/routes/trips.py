@@ -29,6 +29,7 @@ def get_trips(
     cursor: str | None = None,
     page: int | None = Query(default=None, ge=1),
     limit: int = Query(default=50, le=100),
+    trail_format: str = Query(default="points", pattern="^(points|encoded)$"),
     user_id: str = Depends(get_current_user),
 ) -> TripsResponse | Sequence[Trip]:
     """
@@ -38,14 +39,17 @@ def get_trips(
     - Cursor-based (preferred): Use `cursor` parameter for efficient pagination
     - Legacy page-based: Use `page` parameter (deprecated, less efficient)
 
+    Use `trail_format=encoded` to receive each trail as a compact
+    `gps_trail_encoded` string (see utils.trail_codec) instead of a point list.
+
     Returns TripsResponse with next_cursor for cursor-based, or list of trips for legacy.
     """
     if page is not None:
         # Legacy mode: page-based pagination (for backwards compatibility)
-        return trip_service.get_trips_legacy(user_id, year, month, car_id, page, limit)
+        return trip_service.get_trips_legacy(user_id, year, month, car_id, page, limit, trail_format=trail_format)
 
     # Cursor-based pagination (efficient)
-    trips, next_cursor = trip_service.get_trips(user_id, year, month, car_id, cursor, limit)
+    trips, next_cursor = trip_service.get_trips(user_id, year, month, car_id, cursor, limit, trail_format=trail_format)
     return TripsResponse(trips=list(trips), next_cursor=next_cursor)
 
 
@@ -87,9 +91,13 @@ def create_full_trip(trip: FullTrip, user_id: str = Depends(get_current_user)):
 
 
 @router.get("/{trip_id}", response_model=Trip)
-def get_trip(trip_id: str, user_id: str = Depends(get_current_user)):
+def get_trip(
+    trip_id: str,
+    trail_format: str = Query(default="points", pattern="^(points|encoded)$"),
+    user_id: str = Depends(get_current_user),
+):
     """Get single trip."""
-    trip = trip_service.get_trip(trip_id)
+    trip = trip_service.get_trip(trip_id, trail_format=trail_format)
     if not trip:
         raise HTTPException(status_code=404, detail="Trip not found")
     if trip.get("user_id") != user_id:
@@ -3,13 +3,18 @@ Webhook routes for trip tracking.
 """
 
 import logging
+from collections.abc import Callable
+
+import anyio
 from fastapi import APIRouter, HTTPException, Header, Request
 
-from models.location import WebhookLocation
+from config import WEBHOOK_MAX_CONCURRENCY
+from models.location import WebhookLocation, WebhookPingBatch
 from services.webhook_service import webhook_service
 from services.token_service import token_service
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from utils.concurrency import run_blocking
 
 router = APIRouter(prefix="/webhook", tags=["webhooks"])
 logger = logging.getLogger(__name__)
@@ -17,6 +22,11 @@ logger = logging.getLogger(__name__)
 # Rate limiter for webhook endpoints
 limiter = Limiter(key_func=get_remote_address)
 
+# Dedicated worker threads for the (synchronous) trip state machine: Firestore, KMS
+# and vendor API calls all block the thread that runs it. This separates webhook
+# load from the shared threadpool; it does not make the pings themselves async.
+webhook_threads = anyio.CapacityLimiter(WEBHOOK_MAX_CONCURRENCY)
+
 
 def get_webhook_user(authorization: str | None = None) -> str:
     """
@@ -45,9 +55,23 @@ def get_webhook_user(authorization: str | None = None) -> str:
     raise HTTPException(status_code=401, detail="Invalid or expired token")
 
 
+async def dispatch(authorization: str | None, handler: Callable, *args) -> dict:
+    """
+    Authenticate and run a webhook handler on the webhook worker threads.
+
+    The handler is synchronous and holds one worker thread for its whole
+    run, I/O included, so at most WEBHOOK_MAX_CONCURRENCY pings are in
+    flight; further pings queue here until a thread is free.
+    """
+    def call() -> dict:
+        return handler(get_webhook_user(authorization), *args)
+
+    return await run_blocking(call, limiter=webhook_threads)
+
+
 @router.post("/ping")
 @limiter.limit("120/minute")
-def webhook_ping(
+async def webhook_ping(
     request: Request,
     loc: WebhookLocation,
     car_id: str | None = None,
@@ -55,13 +79,26 @@ def webhook_ping(
     authorization: str | None = Header(None, alias="Authorization"),
 ):
     """GPS ping during trip. Requires Bearer token."""
-    user_id = get_webhook_user(authorization)
-    return webhook_service.handle_ping(user_id, loc.lat, loc.lng, car_id, device_id)
+    return await dispatch(authorization, webhook_service.handle_ping, loc.lat, loc.lng, car_id, device_id)
+
+
+@router.post("/pings")
+@limiter.limit("30/minute")
+async def webhook_pings(
+    request: Request,
+    batch: WebhookPingBatch,
+    car_id: str | None = None,
+    device_id: str | None = None,
+    authorization: str | None = Header(None, alias="Authorization"),
+):
+    """Batch of buffered GPS pings (oldest first), processed as one ping. Requires Bearer token."""
+    points = [{"lat": p.lat, "lng": p.lng, "timestamp": p.timestamp} for p in batch.points]
+    return await dispatch(authorization, webhook_service.handle_pings, points, car_id, device_id)
 
 
 @router.post("/start")
 @limiter.limit("10/minute")
-def webhook_start(
+async def webhook_start(
     request: Request,
     loc: WebhookLocation,
     car_id: str | None = None,
@@ -69,50 +106,45 @@ def webhook_start(
     authorization: str | None = Header(None, alias="Authorization"),
 ):
     """Trip start. Requires Bearer token."""
-    user_id = get_webhook_user(authorization)
-    return webhook_service.handle_start(user_id, loc.lat, loc.lng, car_id, device_id)
+    return await dispatch(authorization, webhook_service.handle_start, loc.lat, loc.lng, car_id, device_id)
 
 
 @router.post("/end")
 @limiter.limit("10/minute")
-def webhook_end(
+async def webhook_end(
     request: Request,
     loc: WebhookLocation,
     authorization: str | None = Header(None, alias="Authorization"),
 ):
     """Trip end. Requires Bearer token."""
-    user_id = get_webhook_user(authorization)
-    return webhook_service.handle_end(user_id, loc.lat, loc.lng)
+    return await dispatch(authorization, webhook_service.handle_end, loc.lat, loc.lng)
 
 
 @router.post("/finalize")
 @limiter.limit("10/minute")
-def webhook_finalize(
+async def webhook_finalize(
     request: Request,
     authorization: str | None = Header(None, alias="Authorization"),
 ):
     """Force finalize a pending trip. Requires Bearer token."""
-    user_id = get_webhook_user(authorization)
-    return webhook_service.handle_finalize(user_id)
+    return await dispatch(authorization, webhook_service.handle_finalize)
 
 
 @router.post("/cancel")
 @limiter.limit("10/minute")
-def webhook_cancel(
+async def webhook_cancel(
     request: Request,
     authorization: str | None = Header(None, alias="Authorization"),
 ):
     """Cancel the current trip. Requires Bearer token."""
-    user_id = get_webhook_user(authorization)
-    return webhook_service.handle_cancel(user_id)
+    return await dispatch(authorization, webhook_service.handle_cancel)
 
 
 @router.get("/status")
 @limiter.limit("60/minute")
-def webhook_status(
+async def webhook_status(
     request: Request,
     authorization: str | None = Header(None, alias="Authorization"),
 ):
     """Check current trip status. Requires Bearer token."""
-    user_id = get_webhook_user(authorization)
-    return webhook_service.get_status(user_id)
+    return await dispatch(authorization, webhook_service.get_status)
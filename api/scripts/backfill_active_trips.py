@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+One-time migration: build the active_trips index from existing trip caches.
+
+Trips that started before the index existed get an entry on their next
+ping anyway; this covers trips that will never ping again (the ones the
+safety net exists for).
+
+Run with: python -m scripts.backfill_active_trips
+"""
+
+import logging
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Run the backfill."""
+    from database import rebuild_active_trip_index
+
+    written = rebuild_active_trip_index()
+    print(f"\nBackfill complete: {written} active trip(s) indexed")
+
+
+if __name__ == "__main__":
+    main()
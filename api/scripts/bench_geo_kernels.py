@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: scalar haversine loops vs the NumPy array kernels in utils.geo.
+
+Run with: python -m scripts.bench_geo_kernels [points]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from utils.geo import distances_from, haversine, path_distances
+
+
+def _best_of(func, runs: int = 5) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    """Run the benchmark."""
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = np.random.default_rng(7)
+    lats = 51.9 + rng.uniform(0, 0.5, points)
+    lngs = 4.4 + rng.uniform(0, 0.5, points)
+    lat_list, lng_list = lats.tolist(), lngs.tolist()
+
+    cases = [
+        (
+            "path distances",
+            lambda: sum(haversine(lat_list[i], lng_list[i], lat_list[i + 1], lng_list[i + 1]) for i in range(points - 1)),
+            lambda: path_distances(lats, lngs).sum(),
+        ),
+        (
+            "one-to-many",
+            lambda: [haversine(51.9, 4.4, lat, lng) <= 150 for lat, lng in zip(lat_list, lng_list)],
+            lambda: distances_from(51.9, 4.4, lats, lngs) <= 150,
+        ),
+    ]
+    print(f"{points} points")
+    for name, scalar, vectorized in cases:
+        scalar_s = _best_of(scalar)
+        vector_s = _best_of(vectorized)
+        print(f"  {name:15} scalar {scalar_s * 1000:7.2f} ms   numpy {vector_s * 1000:6.2f} ms   {scalar_s / vector_s:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
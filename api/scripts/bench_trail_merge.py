@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: trail merge + dedupe on 10k-point trails.
+
+Compares utils.trail.merge_trails against the previous approach (concatenate,
+sort on ISO timestamp strings, scalar haversine per point) on a synthetic
+drive: a 5k-point car trail interleaved with 5k phone pings.
+
+Run with: python -m scripts.bench_trail_merge [points]
+"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+
+from utils.geo import haversine
+from utils.trail import merge_trails
+
+
+def _streams(points: int) -> tuple[list[dict], list[dict]]:
+    """Car and phone trails along a line, ~40 m between consecutive fixes."""
+    start = datetime(2024, 1, 20, 8, 0, 0)
+    car, phone = [], []
+    for i in range(points):
+        point = {
+            "lat": 51.90 + i * 0.00036,
+            "lng": 4.40 + (i % 7) * 0.00001,
+            "timestamp": (start + timedelta(seconds=i * 2)).isoformat() + "Z",
+        }
+        (car if i % 2 == 0 else phone).append(point)
+    return car, phone
+
+
+def _sort_and_dedupe(car: list[dict], phone: list[dict]) -> list[dict]:
+    all_points = car + phone
+    all_points.sort(key=lambda p: p.get("timestamp", ""))
+    trail = []
+    for p in all_points:
+        if not trail:
+            trail.append(p)
+        else:
+            last = trail[-1]
+            if haversine(last["lat"], last.get("lng", last.get("lon")), p["lat"], p.get("lng", p.get("lon"))) >= 50:
+                trail.append(p)
+    return trail
+
+
+def _best_of(func, runs: int = 5) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    """Run the benchmark."""
+    points = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    car, phone = _streams(points)
+
+    old = _sort_and_dedupe(car, phone)
+    new = merge_trails(car, phone)
+    assert len(old) == len(new), f"dedupe mismatch: {len(old)} vs {len(new)}"
+
+    old_s = _best_of(lambda: _sort_and_dedupe(car, phone))
+    new_s = _best_of(lambda: merge_trails(car, phone))
+    print(f"{points} points -> {len(new)} kept")
+    print(f"  sort + haversine: {old_s * 1000:7.1f} ms  ({points / old_s:,.0f} points/s)")
+    print(f"  merge_trails:     {new_s * 1000:7.1f} ms  ({points / new_s:,.0f} points/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,17 +3,52 @@ Car service - car management and API credential operations.
 """
 
 import logging
+from collections.abc import Callable
 from datetime import datetime
 
 from google.cloud import firestore
 
-from config import CONFIG
+from car_providers.pool import ProviderPool
+from config import (
+    CONFIG, CREDENTIAL_CACHE_TTL, CREDENTIAL_CACHE_MAX_ENTRIES,
+    PROVIDER_POOL_IDLE_SECONDS, PROVIDER_POOL_MAX_ENTRIES, PROVIDER_POOL_REFRESH_INTERVAL,
+)
 from database import get_db
 from models.car import Car
+from utils.cache import TTLCache
 from utils.encryption import decrypt_string
 
 logger = logging.getLogger(__name__)
 
+# Fields stored KMS-encrypted in credentials/api (each costs one decrypt RPC)
+ENCRYPTED_CREDENTIAL_FIELDS = [
+    "access_token", "refresh_token", "id_token", "gigya_token", "gigya_jwt", "password",
+]
+
+# Decrypted credentials per (user_id, car_id); None = no credentials doc
+_credential_cache = TTLCache(CREDENTIAL_CACHE_TTL, CREDENTIAL_CACHE_MAX_ENTRIES, name="credentials")
+
+
+def _on_provider_refresh(key: tuple[str, str], provider) -> None:
+    """Persist tokens refreshed in the background by the provider pool."""
+    user_id, car_id = key
+    if user_id and hasattr(provider, "get_tokens"):
+        car_service.save_refreshed_tokens(user_id, car_id, provider.get_tokens())
+
+
+# Connected providers per (user_id, car_id), rebuilt when credentials change
+_provider_pool = ProviderPool(
+    idle_seconds=PROVIDER_POOL_IDLE_SECONDS,
+    max_entries=PROVIDER_POOL_MAX_ENTRIES,
+    refresh_interval=PROVIDER_POOL_REFRESH_INTERVAL,
+    on_refresh=_on_provider_refresh,
+)
+
+
+def _count_encrypted_fields(creds: dict) -> int:
+    """Number of KMS decrypt calls _decrypt_credentials makes for creds."""
+    return sum(1 for field in ENCRYPTED_CREDENTIAL_FIELDS if creds.get(f"{field}_encrypted"))
+
 
 def _decrypt_credentials(creds: dict) -> dict:
     """
@@ -214,6 +249,7 @@ class CarService:
 
         # Delete the car
         car_ref.delete()
+        self.invalidate_credentials(user_id, car_id)
 
         # If it was default, make another car default
         if was_default:
@@ -336,7 +372,12 @@ class CarService:
     # === Credential Management ===
 
     def get_cars_with_credentials(self, user_id: str) -> list[dict]:
-        """Get all cars that have API credentials configured."""
+        """
+        Get all cars that have API credentials configured.
+
+        Decrypted credentials are cached per car (see invalidate_credentials),
+        so steady-state pings only stream the car documents.
+        """
         db = get_db()
         cars_ref = db.collection("users").document(user_id).collection("cars")
         cars_with_creds = []
@@ -346,27 +387,83 @@ class CarService:
             car_data = car_doc.to_dict()
 
             # Only use car's own credentials - no fallbacks
-            creds_doc = cars_ref.document(car_id).collection("credentials").document("api").get()
-            if creds_doc.exists:
-                raw_creds = creds_doc.to_dict()
-                # Decrypt credentials
-                creds = _decrypt_credentials(raw_creds)
+            creds = self._load_credentials(cars_ref, user_id, car_id)
+            if creds is not None:
+                brand = creds.get("brand", car_data.get("brand", "")).lower()
                 # Support both username/password and OAuth-based auth
                 has_password_auth = creds.get("username") and creds.get("password")
                 has_oauth_auth = creds.get("oauth_completed") and creds.get("access_token")
                 # Also check for Renault Gigya auth
                 has_renault_auth = creds.get("oauth_completed") and creds.get("gigya_token")
-                if has_password_auth or has_oauth_auth or has_renault_auth:
+                # Tesla tokens live in cache/tesla_tokens_{email}, not in the credentials doc
+                has_tesla_auth = creds.get("oauth_completed") and brand == "tesla"
+                if has_password_auth or has_oauth_auth or has_renault_auth or has_tesla_auth:
                     cars_with_creds.append({
                         "car_id": car_id,
                         "user_id": user_id,
                         "name": car_data.get("name", car_id),
-                        "brand": creds.get("brand", car_data.get("brand", "")).lower(),
+                        "brand": brand,
                         "credentials": creds,
                     })
 
         return cars_with_creds
 
+    def _load_credentials(self, cars_ref, user_id: str, car_id: str) -> dict | None:
+        """Get decrypted credentials for a car, reading Firestore/KMS only on cache miss."""
+        def load() -> tuple[dict | None, int]:
+            creds_doc = cars_ref.document(car_id).collection("credentials").document("api").get()
+            if not creds_doc.exists:
+                return None, 0
+            raw_creds = creds_doc.to_dict()
+            return _decrypt_credentials(raw_creds), _count_encrypted_fields(raw_creds)
+
+        creds = _credential_cache.get_or_load((user_id, car_id), load)
+        # Callers may mutate their copy; keep the cached dict pristine
+        return dict(creds) if creds is not None else None
+
+    def invalidate_credentials(self, user_id: str, car_id: str) -> None:
+        """Drop cached credentials for a car. Call after every credentials/api write."""
+        _credential_cache.invalidate((user_id, car_id))
+
+    def invalidate_user_credentials(self, user_id: str) -> int:
+        """Drop cached credentials for all of a user's cars. Returns number of entries removed."""
+        return _credential_cache.invalidate_where(lambda key: key[0] == user_id)
+
+    def save_refreshed_tokens(self, user_id: str, car_id: str, tokens: dict | None) -> None:
+        """
+        Persist refreshed OAuth tokens (encrypted) for a pooled provider.
+
+        The pooled provider already holds these tokens, so its entry is
+        re-tagged with the new credential version instead of being rebuilt.
+        """
+        from utils.encryption import encrypt_string
+
+        if not tokens or not tokens.get("refresh_token"):
+            return
+        try:
+            db = get_db()
+            creds_ref = db.collection("users").document(user_id).collection("cars").document(car_id).collection("credentials").document("api")
+            updated_at = datetime.utcnow().isoformat()
+            creds_ref.update({
+                "access_token_encrypted": encrypt_string(tokens["access_token"]),
+                "id_token_encrypted": encrypt_string(tokens["id_token"]) if tokens.get("id_token") else None,
+                "refresh_token_encrypted": encrypt_string(tokens["refresh_token"]),
+                "expires_at": tokens["expires_at"],
+                "updated_at": updated_at,
+            })
+            self.invalidate_credentials(user_id, car_id)
+            _provider_pool.set_version((user_id, car_id), updated_at)
+            logger.info(f"Saved refreshed tokens for car {car_id}")
+        except Exception as e:
+            logger.warning(f"Failed to save refreshed tokens: {e}")
+
+    def credential_cache_stats(self) -> dict:
+        """Credential cache counters (hit rate, KMS decrypt calls made and saved)."""
+        stats = _credential_cache.stats()
+        stats["kms_calls"] = stats.pop("load_cost")
+        stats["kms_calls_saved"] = stats.pop("saved_cost")
+        return stats
+
     def save_car_credentials(self, user_id: str, car_id: str, creds: dict) -> dict:
         """Save API credentials for a specific car."""
         from utils.encryption import encrypt_string
@@ -394,6 +491,7 @@ class CarService:
             "start_odometer": creds.get("start_odometer", 0),
             "updated_at": datetime.utcnow().isoformat(),
         })
+        self.invalidate_credentials(user_id, car_id)
 
         # Update car brand to match credentials
         car_ref.update({"brand": creds.get("brand", "audi")})
@@ -437,6 +535,7 @@ class CarService:
         car_ref.collection("credentials").document("api").delete()
         # Also delete oauth_state if exists
         car_ref.collection("credentials").document("oauth_state").delete()
+        self.invalidate_credentials(user_id, car_id)
 
         return {"status": "deleted"}
 
@@ -474,82 +573,91 @@ class CarService:
             logger.error(f"Failed to get last parked GPS: {e}")
         return None
 
+    def _build_provider(self, car_info: dict):
+        """Create an unconnected provider for a car, or None if it can't be polled."""
+        from car_providers import AudiProvider, VWGroupProvider, RenaultProvider, TeslaProvider, VW_GROUP_BRANDS
+
+        creds = car_info["credentials"]
+        brand = car_info["brand"]
+
+        if brand == "renault":
+            return RenaultProvider(
+                username=creds["username"],
+                password=creds["password"],
+                locale=creds.get("locale", "nl_NL"),
+                vin=creds.get("vin"),
+            )
+        elif brand == "audi":
+            # Audi uses OAuth only
+            if not creds.get("oauth_completed") or not creds.get("access_token"):
+                logger.warning(f"Audi car {car_info['car_id']} has no OAuth tokens")
+                return None
+
+            expires_at = creds.get("expires_at")
+            if isinstance(expires_at, str):
+                try:
+                    expires_at = datetime.fromisoformat(expires_at.replace("Z", "+00:00")).timestamp()
+                except:
+                    expires_at = None
+
+            return AudiProvider(
+                country=creds.get("country", "NL"),
+                vin=creds.get("vin"),
+                access_token=creds["access_token"],
+                id_token=creds.get("id_token"),
+                token_type=creds.get("token_type", "bearer"),
+                expires_at=expires_at,
+                refresh_token=creds.get("refresh_token"),
+            )
+        elif brand == "tesla":
+            # Never wake the car from a ping: asleep/offline reports UNKNOWN
+            return TeslaProvider(email=creds["username"], wake_up=False)
+        elif brand in VW_GROUP_BRANDS:
+            # Use VWGroupProvider for other VW Group brands
+            return VWGroupProvider(
+                brand=brand,
+                username=creds["username"],
+                password=creds["password"],
+                country=creds.get("country", "NL"),
+                spin=creds.get("spin"),
+            )
+
+        logger.warning(f"Unknown brand {brand} for car {car_info['car_id']}")
+        return None
+
     def check_car_driving_status(self, car_info: dict) -> dict | None:
-        """Check if a specific car is driving. Returns car data if driving, None if parked/error."""
-        from car_providers import AudiProvider, VWGroupProvider, RenaultProvider, VW_GROUP_BRANDS, VehicleState
+        """
+        Check if a specific car is driving. Returns car data if driving, None if parked/error.
+
+        Providers are leased from a process-wide pool so authenticated vendor
+        sessions survive between pings; the pooled provider is rebuilt when
+        the credentials' updated_at changes.
+        """
+        from car_providers import DRIVING_FIELDS, VehicleState
 
         creds = car_info["credentials"]
         brand = car_info["brand"]
+        user_id = car_info.get("user_id")
+        car_id = car_info["car_id"]
+        pool_key = (user_id, car_id)
 
         try:
-            if brand == "renault":
-                provider = RenaultProvider(
-                    username=creds["username"],
-                    password=creds["password"],
-                    locale=creds.get("locale", "nl_NL"),
-                    vin=creds.get("vin"),
-                )
-            elif brand == "audi":
-                # Audi uses OAuth only
-                if not creds.get("oauth_completed") or not creds.get("access_token"):
-                    logger.warning(f"Audi car {car_info['car_id']} has no OAuth tokens")
+            with _provider_pool.lease(pool_key, creds.get("updated_at"), lambda: self._build_provider(car_info)) as provider:
+                if provider is None:
                     return None
+                # Only what the ping path uses: no battery/charging calls
+                data = provider.get_data(fields=DRIVING_FIELDS)
 
-                expires_at = creds.get("expires_at")
-                if isinstance(expires_at, str):
-                    try:
-                        expires_at = datetime.fromisoformat(expires_at.replace("Z", "+00:00")).timestamp()
-                    except:
-                        expires_at = None
-
-                provider = AudiProvider(
-                    country=creds.get("country", "NL"),
-                    vin=creds.get("vin"),
-                    access_token=creds["access_token"],
-                    id_token=creds.get("id_token"),
-                    token_type=creds.get("token_type", "bearer"),
-                    expires_at=expires_at,
-                    refresh_token=creds.get("refresh_token"),
-                )
-            elif brand in VW_GROUP_BRANDS:
-                # Use VWGroupProvider for other VW Group brands
-                provider = VWGroupProvider(
-                    brand=brand,
-                    username=creds["username"],
-                    password=creds["password"],
-                    country=creds.get("country", "NL"),
-                    spin=creds.get("spin"),
-                )
-            else:
-                logger.warning(f"Unknown brand {brand} for car {car_info['car_id']}")
-                return None
+                # Save refreshed tokens back to Firestore (for Audi OAuth), only when they changed
+                if brand == "audi" and hasattr(provider, 'get_tokens') and user_id:
+                    new_tokens = provider.get_tokens()
+                    if new_tokens and new_tokens.get("access_token") != creds.get("access_token"):
+                        self.save_refreshed_tokens(user_id, car_id, new_tokens)
 
-            data = provider.get_data()
-
-            # Save refreshed tokens back to Firestore (for Audi OAuth)
-            if brand == "audi" and hasattr(provider, 'get_tokens'):
-                from utils.encryption import encrypt_string
-                new_tokens = provider.get_tokens()
-                if new_tokens and new_tokens.get("refresh_token"):
-                    try:
-                        user_id = car_info.get("user_id")
-                        car_id = car_info["car_id"]
-                        if user_id:
-                            db = get_db()
-                            creds_ref = db.collection("users").document(user_id).collection("cars").document(car_id).collection("credentials").document("api")
-                            # Encrypt refreshed tokens
-                            creds_ref.update({
-                                "access_token_encrypted": encrypt_string(new_tokens["access_token"]),
-                                "id_token_encrypted": encrypt_string(new_tokens["id_token"]) if new_tokens.get("id_token") else None,
-                                "refresh_token_encrypted": encrypt_string(new_tokens["refresh_token"]),
-                                "expires_at": new_tokens["expires_at"],
-                                "updated_at": datetime.utcnow().isoformat(),
-                            })
-                            logger.info(f"Saved refreshed Audi tokens for car {car_id}")
-                    except Exception as e:
-                        logger.warning(f"Failed to save refreshed tokens: {e}")
-
-            provider.disconnect()
+            # Empty data usually means a dead session - start fresh next time
+            # (a car deliberately left asleep is not a dead session)
+            if data.state == VehicleState.UNKNOWN and data.odometer_km is None and not data.is_asleep:
+                _provider_pool.discard(pool_key)
 
             # Handle state from CarData
             if data.state == VehicleState.PARKED:
@@ -565,7 +673,9 @@ class CarService:
                 # State unknown - return None to indicate unreliable data
                 # This prevents counters from being reset based on bad API data
                 raw = data.raw_data or {}
-                vehicle_state = raw.get("state", {}).get("val", "unknown")
+                raw_state = raw.get("state", {})
+                # CarConnectivity nests the state ({"val": ...}); Tesla reports a plain string
+                vehicle_state = raw_state.get("val", "unknown") if isinstance(raw_state, dict) else raw_state
                 is_parked = None  # Unknown state - don't assume parked or driving
 
             # Get odometer
@@ -597,10 +707,21 @@ class CarService:
             logger.error(traceback.format_exc())
             return None
 
-    def find_driving_car(self, user_id: str) -> tuple[dict | None, str]:
+    def find_driving_car(
+        self,
+        user_id: str,
+        cars: list[dict] | None = None,
+        check_status: Callable[[dict], dict | None] | None = None,
+    ) -> tuple[dict | None, str]:
         """
         Find which car (if any) is currently driving.
 
+        Args:
+            user_id: User ID
+            cars: Pre-loaded result of get_cars_with_credentials (loaded if None)
+            check_status: Status lookup to use instead of check_car_driving_status
+                (lets callers share one vendor call per car across a request)
+
         Returns:
             tuple: (car_status, reason) where reason is one of:
                 - "driving": car is driving (car_status contains car info)
@@ -608,7 +729,9 @@ class CarService:
                 - "no_cars": no cars configured with credentials
                 - "api_error": all API checks failed
         """
-        cars = self.get_cars_with_credentials(user_id)
+        if cars is None:
+            cars = self.get_cars_with_credentials(user_id)
+        check_status = check_status or self.check_car_driving_status
         logger.info(f"Checking {len(cars)} cars for driving status")
         timestamp = datetime.utcnow().isoformat() + "Z"
 
@@ -618,7 +741,7 @@ class CarService:
 
         api_errors = 0
         for car_info in cars:
-            status = self.check_car_driving_status(car_info)
+            status = check_status(car_info)
             if not status:
                 api_errors += 1
                 continue
@@ -0,0 +1,207 @@
+"""
+Durable job queue for deferred trip enrichment.
+
+Jobs are plain dicts keyed by "id". A job is due while its next_attempt_at
+(ISO string, microsecond precision) is <= now. A run claims a job with
+lease(), which succeeds only if next_attempt_at is still the value the
+runner read, so two runners never both start it. Finished jobs are deleted;
+jobs that ran out of attempts keep next_attempt_at=None so they are never
+picked up again but stay around for inspection.
+
+Backends: Firestore (production), a JSON file (local development) and
+in-memory (tests, single process).
+"""
+
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from google.api_core import exceptions as google_exceptions
+from google.cloud import firestore
+
+from database import get_db
+
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_COLLECTION = "enrichment_jobs"
+
+
+class EnrichmentQueue(ABC):
+    """Storage for enrichment jobs."""
+
+    @abstractmethod
+    def put(self, job: dict) -> None:
+        """Add or replace a job."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> dict | None:
+        """Get a job by ID."""
+
+    @abstractmethod
+    def update(self, job_id: str, fields: dict) -> None:
+        """Merge fields into a job (no-op if it no longer exists)."""
+
+    @abstractmethod
+    def lease(self, job_id: str, expected: str, until: str) -> dict | None:
+        """
+        Claim a job for one run.
+
+        Increments attempts and moves next_attempt_at to until, but only if
+        next_attempt_at still equals expected (nobody leased or finished the
+        job since it was read).
+
+        Returns:
+            The leased job, or None if it is gone or was claimed by someone else
+        """
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        """Remove a finished job."""
+
+    @abstractmethod
+    def due(self, now: str, limit: int) -> list[dict]:
+        """Jobs whose next_attempt_at is <= now, oldest first."""
+
+
+class MemoryEnrichmentQueue(EnrichmentQueue):
+    """Process-local queue; jobs are lost on restart."""
+
+    def __init__(self):
+        self._jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def put(self, job: dict) -> None:
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            self._changed()
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, fields: dict) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+                self._changed()
+
+    def lease(self, job_id: str, expected: str, until: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.get("next_attempt_at") != expected:
+                return None
+            job["attempts"] = job.get("attempts", 0) + 1
+            job["next_attempt_at"] = until
+            self._changed()
+            return dict(job)
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            if self._jobs.pop(job_id, None) is not None:
+                self._changed()
+
+    def due(self, now: str, limit: int) -> list[dict]:
+        with self._lock:
+            jobs = [dict(j) for j in self._jobs.values() if j.get("next_attempt_at") and j["next_attempt_at"] <= now]
+        jobs.sort(key=lambda j: j["next_attempt_at"])
+        return jobs[:limit]
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def _changed(self) -> None:
+        """Called with the lock held after every change."""
+
+
+class FileEnrichmentQueue(MemoryEnrichmentQueue):
+    """In-memory queue persisted to a JSON file after every change."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        if os.path.exists(path):
+            with open(path) as f:
+                self._jobs = json.load(f)
+
+    def _changed(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._jobs, f)
+        os.replace(tmp, self.path)
+
+
+class FirestoreEnrichmentQueue(EnrichmentQueue):
+    """Jobs stored as documents in the enrichment_jobs collection."""
+
+    def _collection(self):
+        return get_db().collection(ENRICHMENT_COLLECTION)
+
+    def put(self, job: dict) -> None:
+        self._collection().document(job["id"]).set(job)
+
+    def get(self, job_id: str) -> dict | None:
+        doc = self._collection().document(job_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def update(self, job_id: str, fields: dict) -> None:
+        ref = self._collection().document(job_id)
+        if ref.get().exists:
+            ref.update(fields)
+
+    def lease(self, job_id: str, expected: str, until: str) -> dict | None:
+        ref = self._collection().document(job_id)
+        doc = ref.get()
+        if not doc.exists:
+            return None
+        job = doc.to_dict()
+        if job.get("next_attempt_at") != expected:
+            return None
+        job["attempts"] = job.get("attempts", 0) + 1
+        job["next_attempt_at"] = until
+        try:
+            # Precondition: fails if another runner leased (or finished) the job since our read
+            ref.update(
+                {"attempts": job["attempts"], "next_attempt_at": until},
+                option=get_db().write_option(last_update_time=doc.update_time),
+            )
+        except (google_exceptions.FailedPrecondition, google_exceptions.NotFound):
+            return None
+        return job
+
+    def delete(self, job_id: str) -> None:
+        self._collection().document(job_id).delete()
+
+    def due(self, now: str, limit: int) -> list[dict]:
+        # Single-field range query: no composite index needed
+        query = self._collection().where(filter=firestore.FieldFilter("next_attempt_at", "<=", now)).limit(limit)
+        jobs = [doc.to_dict() for doc in query.stream()]
+        jobs.sort(key=lambda j: j["next_attempt_at"])
+        return jobs
+
+
+def create_enrichment_queue(kind: str, path: str | None = None) -> EnrichmentQueue:
+    """
+    Build a queue backend.
+
+    Args:
+        kind: "firestore", "file" or "memory"
+        path: JSON file for the file backend
+
+    Returns:
+        EnrichmentQueue instance
+
+    Raises:
+        ValueError: If kind is unknown or the file backend has no path
+    """
+    if kind == "firestore":
+        return FirestoreEnrichmentQueue()
+    if kind == "memory":
+        return MemoryEnrichmentQueue()
+    if kind == "file":
+        if not path:
+            raise ValueError("File enrichment queue needs a path")
+        return FileEnrichmentQueue(path)
+    raise ValueError(f"Unknown enrichment queue: {kind}")
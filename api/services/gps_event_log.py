@@ -0,0 +1,220 @@
+"""
+GPS event log - storage of phone GPS events for active trips.
+
+Trips started with GPS_EVENT_STORAGE = "inline" keep every event in
+cache["gps_events"]. Chunked trips append full chunks to
+users/{uid}/gps_logs/{log_id}/chunks and keep only counters, the first
+event, a recent tail and the IDs of their chunks in the trip cache, so each
+ping rewrites a small, bounded document. A chunk belongs to the trip only
+once a trip cache write listing its ID succeeds, so racing pings never lose
+or duplicate events. Callers go through this service and never need to know
+which mode a trip uses.
+
+Events that imply an impossible speed from the previous accepted point are
+flagged is_outlier as they arrive and left out of metrics and trails.
+
+Both modes keep running metrics in cache["gps_metrics"], updated in O(1)
+per event over non-skip, non-outlier points: haversine distance, bounding box, first and
+last point, point count and the last time the phone moved more than
+GPS_STATIONARY_RADIUS_METERS. Status queries and short-trip checks read
+these instead of scanning the trail. cache["gps_window"] holds the
+stationary detector's sliding window (see stationary_detector.py).
+"""
+
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from config import (
+    GPS_EVENT_STORAGE, GPS_EVENT_CHUNK_SIZE, GPS_EVENT_TAIL_SIZE, GPS_EVENT_LOG_TTL_DAYS, GPS_STATIONARY_RADIUS_METERS,
+    GPS_MAX_SPEED_MPS, GPS_OUTLIER_MAX_RUN,
+)
+from database import write_gps_chunk, get_gps_chunks
+from utils.geo import haversine, GPS_DISTANCE_CORRECTION
+from utils.trail import is_speed_outlier
+from .stationary_detector import stationary_detector
+
+logger = logging.getLogger(__name__)
+
+
+def _new_metrics() -> dict:
+    return {
+        "count": 0,  # Non-skip points
+        "distance_m": 0.0,
+        "min_lat": None,
+        "max_lat": None,
+        "min_lng": None,
+        "max_lng": None,
+        "first": None,
+        "last": None,
+        "last_moved": None,  # Point where the phone last left a GPS_STATIONARY_RADIUS_METERS circle
+        "outlier_run": 0,  # Consecutive events flagged is_outlier
+    }
+
+
+def _add_to_metrics(metrics: dict, event: dict) -> None:
+    """Fold one event into the running metrics (skip-location events are ignored, outliers flagged)."""
+    if event.get("is_skip"):
+        return
+    point = {"lat": event["lat"], "lng": event["lng"], "timestamp": event.get("timestamp")}
+    last = metrics["last"]
+    run = metrics.get("outlier_run", 0)
+    if last and run < GPS_OUTLIER_MAX_RUN and is_speed_outlier(last, point, GPS_MAX_SPEED_MPS):
+        event["is_outlier"] = True
+        metrics["outlier_run"] = run + 1
+        return
+    metrics["outlier_run"] = 0
+    if last:
+        metrics["distance_m"] += haversine(last["lat"], last["lng"], point["lat"], point["lng"])
+        metrics["min_lat"] = min(metrics["min_lat"], point["lat"])
+        metrics["max_lat"] = max(metrics["max_lat"], point["lat"])
+        metrics["min_lng"] = min(metrics["min_lng"], point["lng"])
+        metrics["max_lng"] = max(metrics["max_lng"], point["lng"])
+    else:
+        metrics["first"] = point
+        metrics["min_lat"] = metrics["max_lat"] = point["lat"]
+        metrics["min_lng"] = metrics["max_lng"] = point["lng"]
+
+    moved = metrics["last_moved"]
+    if not moved or haversine(moved["lat"], moved["lng"], point["lat"], point["lng"]) > GPS_STATIONARY_RADIUS_METERS:
+        metrics["last_moved"] = point
+    metrics["last"] = point
+    metrics["count"] += 1
+
+
+class GpsEventLog:
+    """Service for reading and appending a trip's GPS events."""
+
+    def start(self, cache: dict) -> None:
+        """Initialize event storage fields on a new trip cache."""
+        cache["gps_events"] = []
+        cache["gps_metrics"] = _new_metrics()
+        cache["gps_window"] = stationary_detector.new_window()
+        if GPS_EVENT_STORAGE == "chunked":
+            cache["gps_storage"] = "chunked"
+            cache["gps_log_id"] = uuid.uuid4().hex
+            cache["gps_event_count"] = 0
+            cache["gps_chunk_count"] = 0
+            cache["gps_chunk_ids"] = []  # Chunk documents of this log, in append order
+            cache["gps_tail_flushed"] = 0  # Leading tail events already in chunks
+            cache["gps_first_event"] = None
+
+    def is_chunked(self, cache: dict) -> bool:
+        return cache.get("gps_storage") == "chunked"
+
+    def append(self, cache: dict, event: dict) -> None:
+        """Append an event in memory; chunked trips persist it on flush()."""
+        cache.setdefault("gps_events", []).append(event)
+        if "gps_metrics" in cache:
+            _add_to_metrics(cache["gps_metrics"], event)
+        if "gps_window" in cache:
+            stationary_detector.add(cache["gps_window"], event)
+        if self.is_chunked(cache):
+            cache["gps_event_count"] = cache.get("gps_event_count", 0) + 1
+            if not cache.get("gps_first_event"):
+                cache["gps_first_event"] = event
+
+    def count(self, cache: dict) -> int:
+        """Total number of events in the trip."""
+        if self.is_chunked(cache):
+            return cache.get("gps_event_count", 0)
+        return len(cache.get("gps_events", []))
+
+    def first(self, cache: dict) -> dict | None:
+        """First event of the trip (no chunk reads)."""
+        if self.is_chunked(cache):
+            return cache.get("gps_first_event")
+        events = cache.get("gps_events", [])
+        return events[0] if events else None
+
+    def last(self, cache: dict) -> dict | None:
+        """Most recent event of the trip (no chunk reads)."""
+        events = cache.get("gps_events", [])
+        return events[-1] if events else None
+
+    def metrics(self, cache: dict, user_id: str) -> dict:
+        """
+        Running metrics of the trip's non-skip points.
+
+        Caches started before metrics existed are rebuilt from the full event
+        list once; the result is stored in the cache for later appends.
+        """
+        if "gps_metrics" not in cache:
+            metrics = _new_metrics()
+            for event in self.load(cache, user_id):
+                _add_to_metrics(metrics, event)
+            cache["gps_metrics"] = metrics
+        return cache["gps_metrics"]
+
+    def distance_km(self, cache: dict, user_id: str) -> float:
+        """Straight-line GPS distance with the road correction factor (no trail scan)."""
+        return self.metrics(cache, user_id)["distance_m"] / 1000 * GPS_DISTANCE_CORRECTION
+
+    @staticmethod
+    def phone_trail(events: list[dict]) -> list[dict]:
+        """Trail points of events, without skip-location events and outliers."""
+        return [
+            {"lat": e["lat"], "lng": e["lng"], "timestamp": e["timestamp"]}
+            for e in events if not e.get("is_skip") and not e.get("is_outlier")
+        ]
+
+    def recent(self, cache: dict) -> list[dict]:
+        """Recent events kept in the cache (all events for inline trips)."""
+        return cache.get("gps_events", [])
+
+    def load(self, cache: dict, user_id: str) -> list[dict]:
+        """
+        Load every event of the trip, in order.
+
+        Reads chunk documents for chunked trips, so only call this when the
+        full trail is actually needed (finalization).
+        """
+        if not self.is_chunked(cache):
+            return cache.get("gps_events", [])
+
+        events = []
+        for chunk in get_gps_chunks(user_id, cache["gps_log_id"], cache.get("gps_chunk_ids")):
+            events.extend(chunk)
+        events.extend(cache.get("gps_events", [])[cache.get("gps_tail_flushed", 0):])
+        return events
+
+    def flush(self, cache: dict, user_id: str) -> None:
+        """
+        Move full chunks of pending events to the append-only log.
+
+        Call right before the trip cache is written. Flushed events are
+        trimmed to a recent tail (used for stationary detection). If the
+        chunk write fails, events stay inline and are retried next time.
+        The chunk gets a fresh ID per attempt and counts only if the
+        following trip cache write succeeds.
+        """
+        if not self.is_chunked(cache):
+            return
+
+        events = cache.get("gps_events", [])
+        flushed = cache.get("gps_tail_flushed", 0)
+        pending = events[flushed:]
+        if len(pending) < GPS_EVENT_CHUNK_SIZE:
+            return
+
+        index = cache.get("gps_chunk_count", 0)
+        # Logs started before chunk IDs were tracked used the index as ID
+        chunk_ids = cache.get("gps_chunk_ids", [f"{i:05d}" for i in range(index)])
+        chunk_id = f"{index:05d}-{uuid.uuid4().hex[:8]}"
+        expire_at = datetime.utcnow() + timedelta(days=GPS_EVENT_LOG_TTL_DAYS)
+        try:
+            write_gps_chunk(user_id, cache["gps_log_id"], chunk_id, index, pending, expire_at)
+        except Exception as e:
+            logger.error(f"Failed to write GPS chunk {index}, keeping events inline: {e}")
+            return
+
+        tail = events[-GPS_EVENT_TAIL_SIZE:]
+        cache["gps_events"] = tail
+        cache["gps_tail_flushed"] = len(tail)
+        cache["gps_chunk_count"] = index + 1
+        cache["gps_chunk_ids"] = chunk_ids + [chunk_id]
+        logger.info(f"Flushed GPS chunk {index} ({len(pending)} events), total: {cache.get('gps_event_count', 0)}")
+
+
+# Singleton instance
+gps_event_log = GpsEventLog()
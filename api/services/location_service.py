@@ -3,25 +3,65 @@ Location service - geocoding and distance calculations.
 """
 
 import logging
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
 import requests
 
-from config import CONFIG
-from database import get_db, load_custom_locations
-from utils.geo import haversine
+from config import CONFIG, GEOCODE_CACHE_PRECISION, GEOCODE_CACHE_TTL, GEOCODE_CACHE_MAX_ENTRIES, GEOCODE_CACHE_TTL_DAYS
+from database import get_db, load_custom_locations, locations_changed, locations_version, get_cached_geocode, set_cached_geocode
+from utils.cache import TTLCache
+from utils.geo import haversine, geohash, within_radius, distances_from
+from utils.spatial import LocationIndex
 
 logger = logging.getLogger(__name__)
 
+# Google reverse-geocode results per geohash cell (memory tier; Firestore tier in database.py).
+# Cost = Google API calls made by the load.
+_geocode_cache = TTLCache(ttl_seconds=GEOCODE_CACHE_TTL, max_entries=GEOCODE_CACHE_MAX_ENTRIES, name="geocode")
+
+
+class _GeocodeUnavailable(Exception):
+    """Google returned no usable address; nothing is cached."""
+
 
 class LocationService:
     """Service for location-related operations."""
 
+    def __init__(self):
+        self._geocode_stats_lock = threading.Lock()
+        self._geocode_firestore_hits = 0
+        self._geocode_api_calls = 0
+
+        # Grid index mirroring CONFIG["locations"]
+        self._location_index = LocationIndex()
+        self._indexed_source: dict | None = None  # CONFIG["locations"] dict the index mirrors
+        self._indexed_version = -1  # locations_version() the index was built at
+        self._index_lock = threading.Lock()
+
     def is_skip_location(self, lat: float, lon: float) -> bool:
         """Check if location is a skip location (e.g., daycare)."""
         skip = CONFIG["skip_location"]
         if skip["lat"] == 0:
             return False
-        distance = haversine(lat, lon, skip["lat"], skip["lon"])
-        return distance <= skip["radius"]
+        return within_radius(lat, lon, skip["lat"], skip["lon"], skip["radius"])
+
+    def match_known_location(self, lat: float, lon: float) -> tuple[str, dict] | None:
+        """
+        Find the nearest known location whose radius contains the point.
+
+        Returns:
+            (label, location config) or None
+        """
+        self._sync_location_index()
+        match = self._location_index.nearest(lat, lon)
+        return (match[0], match[1]) if match else None
+
+    def is_near_known_location(self, lat: float, lon: float, margin: float) -> bool:
+        """Whether the point is within margin meters of any known location's radius."""
+        self._sync_location_index()
+        return self._location_index.any_within(lat, lon, margin)
 
     def reverse_geocode(self, lat: float, lon: float, user_id: str | None = None) -> dict:
         """
@@ -40,17 +80,16 @@ class LocationService:
         load_custom_locations(user_id)
 
         # Check known locations first
-        for label, loc in CONFIG["locations"].items():
-            if loc["lat"] == 0:
-                continue
-            if haversine(lat, lon, loc["lat"], loc["lon"]) <= loc["radius"]:
-                return {
-                    "address": label,
-                    "label": label,
-                    "is_business": loc["is_business"],
-                    "lat": lat,
-                    "lon": lon,
-                }
+        match = self.match_known_location(lat, lon)
+        if match:
+            label, loc = match
+            return {
+                "address": label,
+                "label": label,
+                "is_business": loc["is_business"],
+                "lat": lat,
+                "lon": lon,
+            }
 
         # Fall back to Google Maps API
         api_key = CONFIG["maps_api_key"]
@@ -63,23 +102,18 @@ class LocationService:
                 "lon": lon,
             }
 
+        cell = geohash(lat, lon, GEOCODE_CACHE_PRECISION)
         try:
-            url = f"https://maps.googleapis.com/maps/api/geocode/json?latlng={lat},{lon}&key={api_key}&language=nl"
-            data = requests.get(url, timeout=10).json()
-            if data["status"] == "OK" and data["results"]:
-                parts = []
-                for c in data["results"][0]["address_components"]:
-                    if "route" in c["types"]:
-                        parts.insert(0, c["long_name"])
-                    if "locality" in c["types"]:
-                        parts.append(c["long_name"])
-                return {
-                    "address": ", ".join(parts) or f"{lat:.4f}, {lon:.4f}",
-                    "label": None,
-                    "is_business": None,
-                    "lat": lat,
-                    "lon": lon,
-                }
+            address = _geocode_cache.get_or_load(cell, lambda: self._load_geocode(cell, lat, lon, api_key))
+            return {
+                "address": address,
+                "label": None,
+                "is_business": None,
+                "lat": lat,
+                "lon": lon,
+            }
+        except _GeocodeUnavailable:
+            pass
         except Exception as e:
             logger.error(f"Geocode error: {e}")
 
@@ -91,6 +125,52 @@ class LocationService:
             "lon": lon,
         }
 
+    def _load_geocode(self, cell: str, lat: float, lon: float, api_key: str) -> tuple[str, int]:
+        """Cache loader: Firestore tier first, then the Google Geocoding API."""
+        cached = get_cached_geocode(cell)
+        if cached and cached.get("address"):
+            with self._geocode_stats_lock:
+                self._geocode_firestore_hits += 1
+            return cached["address"], 1
+
+        with self._geocode_stats_lock:
+            self._geocode_api_calls += 1
+        url = f"https://maps.googleapis.com/maps/api/geocode/json?latlng={lat},{lon}&key={api_key}&language=nl"
+        data = requests.get(url, timeout=10).json()
+        if data["status"] != "OK" or not data["results"]:
+            raise _GeocodeUnavailable(data["status"])
+
+        parts = []
+        for c in data["results"][0]["address_components"]:
+            if "route" in c["types"]:
+                parts.insert(0, c["long_name"])
+            if "locality" in c["types"]:
+                parts.append(c["long_name"])
+        if not parts:
+            raise _GeocodeUnavailable("no route or locality")
+
+        address = ", ".join(parts)
+        set_cached_geocode(cell, address, datetime.utcnow() + timedelta(days=GEOCODE_CACHE_TTL_DAYS))
+        return address, 1
+
+    def geocode_cache_stats(self) -> dict:
+        """Geocode cache counters: memory hits/misses, Firestore hits and Google API calls."""
+        stats = _geocode_cache.stats()
+        stats.pop("load_cost")
+        memory_saved = stats.pop("saved_cost")
+        with self._geocode_stats_lock:
+            stats["firestore_hits"] = self._geocode_firestore_hits
+            stats["api_calls"] = self._geocode_api_calls
+        stats["api_calls_saved"] = memory_saved + stats["firestore_hits"]
+        return stats
+
+    def reset_geocode_cache(self) -> None:
+        """Drop the in-memory geocode tier and its counters."""
+        _geocode_cache.clear()
+        with self._geocode_stats_lock:
+            self._geocode_firestore_hits = 0
+            self._geocode_api_calls = 0
+
     def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> dict:
         """
         Calculate driving distance between two points.
@@ -145,33 +225,42 @@ class LocationService:
             "user_id": user_id,  # Track who created it
         })
 
-        # Also add to runtime config for immediate use
+        # Also add to runtime config (and spatial index) for immediate use
         CONFIG["locations"][name] = {
             "lat": lat,
             "lon": lng,
             "radius": 150,
             "is_business": True,
         }
+        locations_changed()
 
         # Update existing trips within 150m radius (only for this user if specified)
         updated = 0
         query = db.collection("trips")
         if user_id:
             query = query.where("user_id", "==", user_id)
-        trips = query.stream()
-        for doc in trips:
+        docs = []
+        from_coords = []
+        to_coords = []
+        for doc in query.stream():
             d = doc.to_dict()
-            updates = {}
-            # Check from location
-            if d.get("from_lat") and d.get("from_lon"):
-                if haversine(lat, lng, d["from_lat"], d["from_lon"]) <= 150:
+            docs.append(doc)
+            # Missing (or zero) coordinates become NaN and never match
+            from_coords.append((d.get("from_lat") or np.nan, d.get("from_lon") or np.nan))
+            to_coords.append((d.get("to_lat") or np.nan, d.get("to_lon") or np.nan))
+
+        if docs:
+            from_coords = np.array(from_coords, dtype=float)
+            to_coords = np.array(to_coords, dtype=float)
+            from_match = distances_from(lat, lng, from_coords[:, 0], from_coords[:, 1]) <= 150
+            to_match = distances_from(lat, lng, to_coords[:, 0], to_coords[:, 1]) <= 150
+            for i in np.flatnonzero(from_match | to_match):
+                updates = {}
+                if from_match[i]:
                     updates["from_address"] = name
-            # Check to location
-            if d.get("to_lat") and d.get("to_lon"):
-                if haversine(lat, lng, d["to_lat"], d["to_lon"]) <= 150:
+                if to_match[i]:
                     updates["to_address"] = name
-            if updates:
-                doc.reference.update(updates)
+                docs[i].reference.update(updates)
                 updated += 1
 
         return {"status": "added", "name": name, "trips_updated": updated}
@@ -181,8 +270,37 @@ class LocationService:
         db = get_db()
         db.collection("locations").document(name).delete()
         CONFIG["locations"].pop(name, None)
+        locations_changed()
         return {"status": "deleted"}
 
+    # === Spatial index maintenance ===
+
+    def _sync_location_index(self) -> None:
+        """
+        Bring the spatial index in line with CONFIG["locations"].
+
+        Writers of CONFIG["locations"] (load_custom_locations, add/delete_location)
+        call locations_changed(); a query only compares that version and the
+        dict's identity, and the index is rebuilt when either changed.
+        """
+        locations = CONFIG["locations"]
+        version = locations_version()
+        if locations is self._indexed_source and version == self._indexed_version:
+            return
+        with self._index_lock:
+            if locations is self._indexed_source and version == self._indexed_version:
+                return
+            self._location_index.clear()
+            for name, loc in list(locations.items()):
+                self._index_location(name, loc)
+            self._indexed_source = locations
+            self._indexed_version = version
+
+    def _index_location(self, name: str, loc: dict) -> None:
+        if loc["lat"] == 0:  # Not configured
+            return
+        self._location_index.add(name, loc["lat"], loc["lon"], loc["radius"], loc)
+
 
 # Singleton instance
 location_service = LocationService()
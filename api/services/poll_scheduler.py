@@ -0,0 +1,137 @@
+"""
+Poll scheduler - decides per ping whether the car vendor API is worth calling.
+
+Once a trip has its start odometer, the state machine only needs vendor data
+to (a) notice the car has parked and (b) keep last_odo reasonably fresh for
+the GPS fallback. Neither needs a call on every ping: a car cruising on the
+highway is not about to park, and a car waiting at a skip location rarely
+leaves. The scheduler picks a poll interval from the phone GPS and the last
+vendor answer, and pings in between only record GPS.
+
+State lives in the trip cache (last_poll_at, last_poll_odo, last_poll_lat,
+last_poll_lng), so it survives cold starts like the rest of the trip.
+"""
+
+import logging
+from datetime import datetime
+
+from config import (
+    POLL_MIN_INTERVAL_SECONDS,
+    POLL_DEFAULT_INTERVAL_SECONDS,
+    POLL_CRUISE_INTERVAL_SECONDS,
+    POLL_PARKED_MAX_INTERVAL_SECONDS,
+    POLL_CRUISE_SPEED_MPS,
+    POLL_SLOW_SPEED_MPS,
+    POLL_SPEED_WINDOW_SECONDS,
+    POLL_NEAR_END_METERS,
+    POLL_LEAVE_SKIP_METERS,
+)
+from utils.geo import haversine
+from .location_service import location_service
+
+logger = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Adaptive vendor polling policy for active trips."""
+
+    def should_poll(self, cache: dict, events: list[dict], now: datetime) -> tuple[bool, str, int]:
+        """
+        Decide whether this ping should call the vendor API.
+
+        Args:
+            cache: Trip cache (poll state and counters)
+            events: Recent GPS events, oldest first (last one is this ping)
+            now: Reference time (naive UTC)
+
+        Returns:
+            (poll, reason, interval_seconds)
+        """
+        last_poll_at = cache.get("last_poll_at")
+        if not last_poll_at or not events:
+            return True, "no_previous_poll", 0
+
+        interval, reason = self.poll_interval(cache, events)
+        elapsed = (now - self._parse(last_poll_at)).total_seconds()
+        if elapsed >= interval:
+            return True, reason, interval
+        return False, reason, interval
+
+    def poll_interval(self, cache: dict, events: list[dict]) -> tuple[int, str]:
+        """Seconds to wait after the last poll, and why."""
+        last = events[-1]
+
+        # Waiting at a skip location: exponential backoff, unless the phone left
+        skip_pause_count = cache.get("skip_pause_count", 0)
+        if skip_pause_count:
+            if self._moved_since_poll(cache, last) >= POLL_LEAVE_SKIP_METERS:
+                return 0, "left_skip_location"
+            backoff = POLL_MIN_INTERVAL_SECONDS * 2 ** (skip_pause_count - 1)
+            return min(backoff, POLL_PARKED_MAX_INTERVAL_SECONDS), "parked_at_skip"
+
+        # Confirming a stop or recovering from API errors: never delay
+        if cache.get("parked_count", 0) or cache.get("api_error_count", 0):
+            return POLL_MIN_INTERVAL_SECONDS, "confirming_state"
+
+        speed = self._phone_speed(events)
+        if speed is None or speed < POLL_SLOW_SPEED_MPS:
+            return POLL_MIN_INTERVAL_SECONDS, "slow_or_stopped"
+        if self._near_known_location(last):
+            return POLL_MIN_INTERVAL_SECONDS, "near_destination"
+        if cache.get("last_poll_odo") is not None and cache.get("last_poll_odo") == cache.get("last_odo_before_poll"):
+            # Odometer did not move between the last two polls
+            return POLL_MIN_INTERVAL_SECONDS, "odometer_stalled"
+        if speed >= POLL_CRUISE_SPEED_MPS:
+            return POLL_CRUISE_INTERVAL_SECONDS, "cruising"
+        return POLL_DEFAULT_INTERVAL_SECONDS, "driving"
+
+    def record_poll(self, cache: dict, now: datetime, lat: float, lng: float, odometer: float | None = None) -> None:
+        """Remember when and where the vendor API was last called."""
+        cache["last_odo_before_poll"] = cache.get("last_poll_odo")
+        cache["last_poll_at"] = now.isoformat() + "Z"
+        cache["last_poll_lat"] = lat
+        cache["last_poll_lng"] = lng
+        cache["last_poll_odo"] = odometer
+
+    # === Signals ===
+
+    def _phone_speed(self, events: list[dict]) -> float | None:
+        """Average phone speed (m/s) over the last POLL_SPEED_WINDOW_SECONDS of events."""
+        last = events[-1]
+        try:
+            last_time = self._parse(last["timestamp"])
+        except (KeyError, ValueError):
+            return None
+
+        first = None
+        for event in reversed(events[:-1]):
+            try:
+                if (last_time - self._parse(event["timestamp"])).total_seconds() > POLL_SPEED_WINDOW_SECONDS:
+                    break
+            except (KeyError, ValueError):
+                continue
+            first = event
+        if first is None:
+            return None
+
+        seconds = (last_time - self._parse(first["timestamp"])).total_seconds()
+        if seconds <= 0:
+            return None
+        return haversine(first["lat"], first["lng"], last["lat"], last["lng"]) / seconds
+
+    def _moved_since_poll(self, cache: dict, event: dict) -> float:
+        if cache.get("last_poll_lat") is None:
+            return 0.0
+        return haversine(cache["last_poll_lat"], cache["last_poll_lng"], event["lat"], event["lng"])
+
+    def _near_known_location(self, event: dict) -> bool:
+        """Phone is close to a known location (likely trip end)."""
+        return location_service.is_near_known_location(event["lat"], event["lng"], POLL_NEAR_END_METERS)
+
+    @staticmethod
+    def _parse(timestamp: str) -> datetime:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+# Singleton instance
+poll_scheduler = PollScheduler()
@@ -0,0 +1,169 @@
+"""
+Stationary detector - sliding window over a trip's recent GPS events.
+
+The rule: the phone is stationary when the events of the last
+GPS_STATIONARY_TIMEOUT_MINUTES (at least two) all lie within
+GPS_STATIONARY_RADIUS_METERS of the oldest event in that window. Events
+without coordinates count toward the two but are never measured.
+
+Instead of re-parsing and re-measuring the tail of gps_events on every ping,
+the window is kept in the trip cache (cache["gps_window"]) as parallel lists
+of epoch times and coordinates. Four monotonic deques track the window's
+min/max latitude and longitude, so the bounding box is known in O(1)
+amortized per event:
+
+- an extreme point farther than the radius from the oldest event proves
+  movement;
+- a bounding box whose farthest corner is within the radius proves the
+  phone is stationary;
+- only when neither bound decides is the window scanned, in one
+  distances_from call.
+
+Lists, not nested arrays, so the state can be stored in Firestore. Windows
+assume events arrive in time order, as pings do.
+"""
+
+import logging
+
+import numpy as np
+
+from config import GPS_STATIONARY_TIMEOUT_MINUTES, GPS_STATIONARY_RADIUS_METERS
+from utils.geo import haversine, distances_from
+from utils.trail import parse_epoch
+
+logger = logging.getLogger(__name__)
+
+_DEQUES = ("max_lat", "min_lat", "max_lng", "min_lng")
+# Corner bound must clear the radius by this relative margin to skip the scan
+_CORNER_MARGIN = 1e-6
+
+
+class StationaryDetector:
+    """Incremental GPS stationary detection for active trips."""
+
+    def new_window(self, timeout_minutes: int = GPS_STATIONARY_TIMEOUT_MINUTES) -> dict:
+        """Empty window state for a new trip."""
+        window = {
+            "timeout_s": timeout_minutes * 60,
+            "start": 0,  # Absolute index of the oldest event in the window
+            "newest": None,  # Latest epoch seen
+            "t": [],
+            "lat": [],
+            "lng": [],
+        }
+        for name in _DEQUES:
+            window[name] = []  # Absolute indices; values monotonic from the front
+        return window
+
+    def add(self, window: dict, event: dict) -> None:
+        """Add an event and drop the ones that fell out of the window."""
+        epoch = parse_epoch(event.get("timestamp"))
+        if epoch == float("-inf"):
+            return  # No usable timestamp: never part of a window
+
+        lat, lng = event.get("lat"), event.get("lng", event.get("lon"))
+        if not (lat and lng):
+            lat = lng = None
+
+        index = window["start"] + len(window["t"])
+        window["t"].append(epoch)
+        window["lat"].append(lat)
+        window["lng"].append(lng)
+        window["newest"] = epoch if window["newest"] is None else max(window["newest"], epoch)
+
+        if lat is not None:
+            self._push(window, "max_lat", "lat", index, lat, lambda old, new: old <= new)
+            self._push(window, "min_lat", "lat", index, lat, lambda old, new: old >= new)
+            self._push(window, "max_lng", "lng", index, lng, lambda old, new: old <= new)
+            self._push(window, "min_lng", "lng", index, lng, lambda old, new: old >= new)
+
+        cutoff = window["newest"] - window["timeout_s"]
+        while window["t"] and window["t"][0] < cutoff:
+            self._evict(window)
+
+    def is_stationary(self, window: dict, now: float) -> tuple[bool, int]:
+        """
+        Apply the stationary rule at time now.
+
+        Args:
+            window: Window state
+            now: Epoch seconds; events older than now - timeout are ignored
+
+        Returns:
+            (stationary, number of events in the window)
+        """
+        times = window["t"]
+        cutoff = now - window["timeout_s"]
+        skip = 0
+        while skip < len(times) and times[skip] < cutoff:
+            skip += 1
+        count = len(times) - skip
+        if count < 2:
+            return False, count
+
+        anchor_lat, anchor_lng = window["lat"][skip], window["lng"][skip]
+        if anchor_lat is None:
+            return True, count
+
+        first = window["start"] + skip
+        extremes = {name: self._extreme(window, name, first) for name in _DEQUES}
+        if extremes["max_lat"] is None:
+            return True, count  # No other event has coordinates
+
+        # Lower bound: any extreme point outside the radius
+        for index in extremes.values():
+            offset = index - window["start"]
+            if haversine(anchor_lat, anchor_lng, window["lat"][offset], window["lng"][offset]) > GPS_STATIONARY_RADIUS_METERS:
+                return False, count
+
+        # Upper bound: every point lies inside the bounding box
+        lat_bounds = [window["lat"][extremes[n] - window["start"]] for n in ("min_lat", "max_lat")]
+        lng_bounds = [window["lng"][extremes[n] - window["start"]] for n in ("min_lng", "max_lng")]
+        corner = max(haversine(anchor_lat, anchor_lng, la, ln) for la in lat_bounds for ln in lng_bounds)
+        if corner <= GPS_STATIONARY_RADIUS_METERS * (1 - _CORNER_MARGIN):
+            return True, count
+
+        lats = np.array(window["lat"][skip:], dtype=float)  # None (no coordinates) becomes NaN
+        lngs = np.array(window["lng"][skip:], dtype=float)
+        beyond = distances_from(anchor_lat, anchor_lng, lats, lngs) > GPS_STATIONARY_RADIUS_METERS
+        return not beyond.any(), count
+
+    def from_events(self, events: list[dict], timeout_minutes: int = GPS_STATIONARY_TIMEOUT_MINUTES) -> dict:
+        """Window built from an event list (caches started before windows existed)."""
+        window = self.new_window(timeout_minutes)
+        for event in events:
+            self.add(window, event)
+        return window
+
+    # === Helpers ===
+
+    @staticmethod
+    def _push(window: dict, name: str, axis: str, index: int, value: float, dominated) -> None:
+        """Append index to a monotonic deque, dropping entries the new value dominates."""
+        deque = window[name]
+        values = window[axis]
+        while deque and dominated(values[deque[-1] - window["start"]], value):
+            deque.pop()
+        deque.append(index)
+
+    @staticmethod
+    def _evict(window: dict) -> None:
+        """Drop the oldest event."""
+        for key in ("t", "lat", "lng"):
+            window[key].pop(0)
+        for name in _DEQUES:
+            if window[name] and window[name][0] == window["start"]:
+                window[name].pop(0)
+        window["start"] += 1
+
+    @staticmethod
+    def _extreme(window: dict, name: str, first: int) -> int | None:
+        """Index of the extreme value among events from absolute index first on."""
+        for index in window[name]:
+            if index >= first:
+                return index
+        return None
+
+
+# Singleton instance
+stationary_detector = StationaryDetector()
@@ -3,25 +3,58 @@ Trip service - trip CRUD and finalization.
 """
 
 import logging
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from collections.abc import Sequence
 
 from google.cloud import firestore
 
-from config import CONFIG
+from config import (
+    CONFIG,
+    ENRICHMENT_QUEUE,
+    ENRICHMENT_QUEUE_PATH,
+    ENRICHMENT_WORKERS,
+    ENRICHMENT_MAX_ATTEMPTS,
+    ENRICHMENT_RETRY_BASE_SECONDS,
+    ENRICHMENT_LEASE_SECONDS,
+    ENRICHMENT_DRAIN_LIMIT,
+    ENRICHMENT_JOB_MAX_SECONDS,
+)
 from database import get_db, load_custom_locations
 from models.trip import Trip, GpsPoint
 from utils.ids import generate_id
 from utils.routing import get_google_maps_route_distance, calculate_route_deviation
+from utils.trail_codec import encode_trail, trail_from_doc, encoded_trail_from_doc
 from .location_service import location_service
 from .car_service import car_service
+from .enrichment_queue import EnrichmentQueue, create_enrichment_queue
 
 logger = logging.getLogger(__name__)
 
+# Background enrichment workers (geocoding + routing after the trip is committed)
+_enrichment_executor = ThreadPoolExecutor(max_workers=ENRICHMENT_WORKERS, thread_name_prefix="trip-enrich")
+
+# Trip fields filled in by enrichment
+ENRICHED_FIELDS = (
+    "from_address", "to_address", "from_lat", "from_lon", "to_lat", "to_lon",
+    "trip_type", "business_km", "private_km",
+    "google_maps_km", "route_deviation_percent", "route_flag",
+)
+
+
+def _queue_time(dt: datetime) -> str:
+    """Fixed-width ISO timestamp, so queue times compare correctly as strings."""
+    return dt.isoformat(timespec="microseconds") + "Z"
+
 
 class TripService:
     """Service for trip-related operations."""
 
+    def __init__(self):
+        self._enrichment_queue: EnrichmentQueue | None = None
+        self._enrich_in_background = True
+
     def get_trips(
         self,
         user_id: str,
@@ -30,6 +63,7 @@ class TripService:
         car_id: str | None = None,
         cursor: str | None = None,
         limit: int = 50,
+        trail_format: str = "points",
     ) -> tuple[Sequence[Trip], str | None]:
         """
         Get trips with cursor-based pagination.
@@ -41,6 +75,7 @@ class TripService:
             car_id: Optional car ID filter (uses Firestore query, not client-side)
             cursor: Document ID to start after (for pagination)
             limit: Number of trips to return
+            trail_format: "points" (list of GpsPoint) or "encoded" (gps_trail_encoded string)
 
         Returns:
             Tuple of (trips, next_cursor) where next_cursor is None if no more results
@@ -84,7 +119,7 @@ class TripService:
         if has_more:
             docs = docs[:limit]
 
-        trips = [self._doc_to_trip(doc) for doc in docs]
+        trips = [self._doc_to_trip(doc, trail_format) for doc in docs]
         next_cursor = docs[-1].id if has_more and docs else None
 
         return trips, next_cursor
@@ -97,22 +132,23 @@ class TripService:
         car_id: str | None = None,
         page: int = 1,
         limit: int = 50,
+        trail_format: str = "points",
     ) -> Sequence[Trip]:
         """
         Legacy offset-based pagination (for backwards compatibility).
         NOTE: Inefficient - use get_trips() with cursor instead.
         """
-        trips, _ = self.get_trips(user_id, year, month, car_id, cursor=None, limit=page * limit)
+        trips, _ = self.get_trips(user_id, year, month, car_id, cursor=None, limit=page * limit, trail_format=trail_format)
         offset = (page - 1) * limit
         return trips[offset:offset + limit]
 
-    def get_trip(self, trip_id: str) -> Trip | None:
+    def get_trip(self, trip_id: str, trail_format: str = "points") -> Trip | None:
         """Get single trip by ID."""
         db = get_db()
         doc = db.collection("trips").document(trip_id).get()
         if not doc.exists:
             return None
-        return self._doc_to_trip(doc)
+        return self._doc_to_trip(doc, trail_format)
 
     def create_manual_trip(
         self,
@@ -240,7 +276,7 @@ class TripService:
             "created_at": datetime.utcnow().isoformat(),
             "car_id": car_id or car_service.get_default_car_id(user_id),
             "user_id": user_id,
-            "gps_trail": [{"lat": p["lat"], "lng": p["lng"], "timestamp": p.get("timestamp")} for p in (gps_trail or [])],
+            "gps_trail_encoded": encode_trail(gps_trail or []),
             "google_maps_km": google_maps_km,
             "route_deviation_percent": route_info.get("deviation_percent"),
             "route_flag": route_info.get("flag"),
@@ -360,20 +396,13 @@ class TripService:
         if gps_trail is None:
             gps_trail = []
 
-        # Geocode start and end
-        start_loc = location_service.reverse_geocode(start_gps["lat"], start_gps["lng"], user_id)
-        end_loc = location_service.reverse_geocode(end_gps["lat"], end_gps["lng"], user_id)
+        # Known locations only - addresses and route deviation are filled in by enrichment
+        start_loc = self._provisional_location(start_gps["lat"], start_gps["lng"])
+        end_loc = self._provisional_location(end_gps["lat"], end_gps["lng"])
 
         # Distance from odometer (ground truth) or GPS fallback
         distance_km = end_odo - start_odo
 
-        # Get route distance for comparison
-        google_maps_km = get_google_maps_route_distance(
-            start_gps["lat"], start_gps["lng"],
-            end_gps["lat"], end_gps["lng"]
-        )
-        route_info = calculate_route_deviation(distance_km, google_maps_km)
-
         # Parse timestamps
         start_dt = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
         end_dt = datetime.fromisoformat(end_gps["timestamp"].replace("Z", "+00:00"))
@@ -408,14 +437,13 @@ class TripService:
             "created_at": datetime.utcnow().isoformat(),
             "car_id": effective_car_id,
             "gps_trail": gps_trail,
-            "google_maps_km": route_info["google_maps_km"],
-            "route_deviation_percent": route_info["deviation_percent"],
-            "route_flag": route_info["flag"],
+            "google_maps_km": None,
+            "route_deviation_percent": None,
+            "route_flag": None,
             "distance_source": distance_source,
         }
 
-        db = get_db()
-        db.collection("trips").document(trip_id).set(trip_data)
+        self._commit_trip(trip_data, start_gps, end_gps, distance_km, start_time)
         logger.info(f"Trip finalized: {trip_id}, {distance_km} km (source: {distance_source}), {start_loc['label']} -> {end_loc['label']}")
 
         # Save end GPS and odometer as last_parked for next trip start
@@ -441,16 +469,9 @@ class TripService:
         Finalize trip using GPS data only (when car API is unavailable).
         Distance is calculated from GPS trail using OSRM routing or haversine.
         """
-        # Geocode start and end
-        start_loc = location_service.reverse_geocode(start_gps["lat"], start_gps["lng"], user_id)
-        end_loc = location_service.reverse_geocode(end_gps["lat"], end_gps["lng"], user_id)
-
-        # Get route distance for comparison
-        google_maps_km = get_google_maps_route_distance(
-            start_gps["lat"], start_gps["lng"],
-            end_gps["lat"], end_gps["lng"]
-        )
-        route_info = calculate_route_deviation(gps_distance_km, google_maps_km)
+        # Known locations only - addresses and route deviation are filled in by enrichment
+        start_loc = self._provisional_location(start_gps["lat"], start_gps["lng"])
+        end_loc = self._provisional_location(end_gps["lat"], end_gps["lng"])
 
         # Parse timestamps
         start_dt = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
@@ -486,14 +507,13 @@ class TripService:
             "created_at": datetime.utcnow().isoformat(),
             "car_id": effective_car_id,
             "gps_trail": gps_trail,
-            "google_maps_km": route_info["google_maps_km"],
-            "route_deviation_percent": route_info["deviation_percent"],
-            "route_flag": route_info["flag"],
+            "google_maps_km": None,
+            "route_deviation_percent": None,
+            "route_flag": None,
             "distance_source": "gps_only",
         }
 
-        db = get_db()
-        db.collection("trips").document(trip_id).set(trip_data)
+        self._commit_trip(trip_data, start_gps, end_gps, gps_distance_km, start_time)
         logger.info(f"Trip finalized (GPS-only): {trip_id}, {gps_distance_km:.1f} km, {start_loc['label']} -> {end_loc['label']}")
 
         # Save end GPS as last_parked for next trip start
@@ -505,12 +525,212 @@ class TripService:
 
         return trip_data
 
-    def _doc_to_trip(self, doc) -> Trip:
-        """Convert Firestore document to Trip model."""
+    # === Deferred enrichment ===
+
+    @property
+    def enrichment_queue(self) -> EnrichmentQueue:
+        if self._enrichment_queue is None:
+            self._enrichment_queue = create_enrichment_queue(ENRICHMENT_QUEUE, ENRICHMENT_QUEUE_PATH)
+        return self._enrichment_queue
+
+    def configure_enrichment(self, queue: EnrichmentQueue | None = None, background: bool = True) -> None:
+        """
+        Replace the enrichment queue backend.
+
+        Args:
+            queue: Queue to use (None: build from ENRICHMENT_QUEUE on first use)
+            background: Enrich new trips on the worker pool right after commit;
+                when False, jobs wait for drain_enrichment_queue()
+        """
+        self._enrichment_queue = queue
+        self._enrich_in_background = background
+
+    def _provisional_location(self, lat: float, lon: float) -> dict:
+        """Known-location match or coordinates; no Firestore or Maps calls."""
+        match = location_service.match_known_location(lat, lon)
+        if match:
+            label, loc = match
+            return {"address": label, "label": label, "is_business": loc.get("is_business"), "lat": lat, "lon": lon}
+        return {"address": f"{lat:.4f}, {lon:.4f}", "label": None, "is_business": None, "lat": lat, "lon": lon}
+
+    def _commit_trip(self, trip_data: dict, start_gps: dict, end_gps: dict, distance_km: float, start_time: str) -> None:
+        """
+        Queue the trip's enrichment, then write the provisional trip.
+
+        The job goes first so a committed trip always has one; a job whose
+        trip write failed finds no trip and is dropped as "skipped". With a
+        background worker the job starts out leased to it, so the scheduler
+        cannot run it before the trip exists.
+        """
+        trip_id = trip_data["id"]
+        trip_data["enrichment_status"] = "pending"
+
+        now = datetime.utcnow()
+        next_attempt_at = now + timedelta(seconds=ENRICHMENT_LEASE_SECONDS) if self._enrich_in_background else now
+        job = {
+            "id": trip_id,
+            "trip_id": trip_id,
+            "user_id": trip_data["user_id"],
+            "start_gps": {"lat": start_gps["lat"], "lng": start_gps["lng"]},
+            "end_gps": {"lat": end_gps["lat"], "lng": end_gps["lng"]},
+            "distance_km": distance_km,
+            "start_time": start_time,
+            "provisional": {field: trip_data.get(field) for field in ENRICHED_FIELDS},
+            "attempts": 0,
+            "next_attempt_at": _queue_time(next_attempt_at),
+            "created_at": _queue_time(now),
+            "last_error": None,
+        }
+        self.enrichment_queue.put(job)
+
+        db = get_db()
+        db.collection("trips").document(trip_id).set(self._to_storage(trip_data))
+
+        if self._enrich_in_background:
+            _enrichment_executor.submit(self._enrich_safely, trip_id, job["next_attempt_at"])
+
+    def _enrich_safely(self, job_id: str, expected: str) -> None:
+        try:
+            self.enrich_trip(job_id, expected)
+        except Exception as e:
+            # Job stays queued; the scheduler retries it
+            logger.error(f"Enrichment of {job_id} failed outside the job: {e}")
+
+    def enrich_trip(self, job_id: str, expected: str | None = None) -> str:
+        """
+        Run one enrichment job: geocode, route deviation and classification.
+
+        The job is leased first; of two runners that read the same job
+        (worker and scheduler, or two scheduler instances) only one gets the
+        lease, the other returns "leased".
+
+        Args:
+            job_id: Job (= trip) ID
+            expected: next_attempt_at the caller read (None: read the job and
+                run it only if it is due)
+
+        Returns:
+            "done", "skipped" (trip deleted), "retry", "failed", "leased" or "missing"
+        """
+        queue = self.enrichment_queue
+        now = datetime.utcnow()
+        if expected is None:
+            job = queue.get(job_id)
+            if not job:
+                return "missing"
+            expected = job.get("next_attempt_at")
+            if expected is None:
+                return "failed"
+            if expected > _queue_time(now):
+                return "leased"
+
+        # Lease the job so the scheduler does not start it again meanwhile
+        job = queue.lease(job_id, expected, _queue_time(now + timedelta(seconds=ENRICHMENT_LEASE_SECONDS)))
+        if job is None:
+            return "missing" if queue.get(job_id) is None else "leased"
+        attempts = job["attempts"]
+
+        try:
+            outcome = self._enrich(job)
+        except Exception as e:
+            if attempts >= ENRICHMENT_MAX_ATTEMPTS:
+                logger.error(f"Enrichment of trip {job_id} failed after {attempts} attempts: {e}")
+                queue.update(job_id, {"next_attempt_at": None, "last_error": str(e)})
+                return "failed"
+            delay = ENRICHMENT_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+            logger.warning(f"Enrichment of trip {job_id} failed (attempt {attempts}), retry in {delay}s: {e}")
+            queue.update(job_id, {"next_attempt_at": _queue_time(now + timedelta(seconds=delay)), "last_error": str(e)})
+            return "retry"
+
+        queue.delete(job_id)
+        return outcome
+
+    def _enrich(self, job: dict) -> str:
+        db = get_db()
+        ref = db.collection("trips").document(job["trip_id"])
+        doc = ref.get()
+        if not doc.exists:
+            return "skipped"
+        current = doc.to_dict()
+
+        start, end, user_id = job["start_gps"], job["end_gps"], job["user_id"]
+        distance_km = job["distance_km"]
+        start_loc = location_service.reverse_geocode(start["lat"], start["lng"], user_id)
+        end_loc = location_service.reverse_geocode(end["lat"], end["lng"], user_id)
+        google_maps_km = get_google_maps_route_distance(start["lat"], start["lng"], end["lat"], end["lng"])
+        route_info = calculate_route_deviation(distance_km, google_maps_km)
+        classification = self.classify_trip(job["start_time"], start_loc, end_loc, distance_km)
+
+        enriched = {
+            "from_address": start_loc["label"] or start_loc["address"],
+            "to_address": end_loc["label"] or end_loc["address"],
+            "from_lat": start_loc.get("lat"),
+            "from_lon": start_loc.get("lon"),
+            "to_lat": end_loc.get("lat"),
+            "to_lon": end_loc.get("lon"),
+            "trip_type": classification["type"],
+            "business_km": round(classification["business_km"], 1),
+            "private_km": round(classification["private_km"], 1),
+            "google_maps_km": route_info["google_maps_km"],
+            "route_deviation_percent": route_info["deviation_percent"],
+            "route_flag": route_info["flag"],
+        }
+        # Keep fields the user edited before enrichment ran
+        provisional = job.get("provisional", {})
+        updates = {k: v for k, v in enriched.items() if current.get(k) == provisional.get(k)}
+        updates["enrichment_status"] = "done"
+        ref.update(updates)
+        logger.info(f"Trip enriched: {job['trip_id']}, {updates.get('from_address')} -> {updates.get('to_address')}")
+        return "done"
+
+    def drain_enrichment_queue(self, limit: int = ENRICHMENT_DRAIN_LIMIT, deadline: float | None = None) -> dict:
+        """
+        Run due enrichment jobs (retries, and jobs lost with an instance).
+
+        Args:
+            limit: Maximum jobs to run
+            deadline: time.monotonic() value by which the drain must be done; a
+                job is only started if ENRICHMENT_JOB_MAX_SECONDS remain. Jobs
+                left over stay due for the next run.
+
+        Returns:
+            Dict with processed count, a count per outcome and, when the
+            deadline stopped the drain, the number of deferred jobs
+        """
+        jobs = self.enrichment_queue.due(_queue_time(datetime.utcnow()), limit)
+        result = {"processed": 0}
+        for i, job in enumerate(jobs):
+            if deadline is not None and time.monotonic() + ENRICHMENT_JOB_MAX_SECONDS > deadline:
+                result["deferred"] = len(jobs) - i
+                logger.warning(f"Enrichment drain out of time, {len(jobs) - i} jobs left for the next run")
+                break
+            outcome = self.enrich_trip(job["id"], job["next_attempt_at"])
+            result["processed"] += 1
+            result[outcome] = result.get(outcome, 0) + 1
+        return result
+
+    def _to_storage(self, trip_data: dict) -> dict:
+        """Firestore form of a trip: gps_trail list replaced by gps_trail_encoded."""
+        stored = dict(trip_data)
+        stored["gps_trail_encoded"] = encode_trail(stored.pop("gps_trail", None) or [])
+        return stored
+
+    def _doc_to_trip(self, doc, trail_format: str = "points") -> Trip:
+        """
+        Convert Firestore document to Trip model.
+
+        Reads both encoded and legacy (list of dicts) trails. With
+        trail_format="encoded" the trail is returned as gps_trail_encoded
+        and gps_trail is left empty.
+        """
         d = doc.to_dict()
-        # Convert gps_trail dicts to GpsPoint objects
-        gps_trail_data = d.get("gps_trail", [])
-        gps_trail = [GpsPoint(lat=p["lat"], lng=p["lng"], timestamp=p.get("timestamp")) for p in gps_trail_data]
+        gps_trail_encoded = None
+        if trail_format == "encoded":
+            gps_trail = []
+            gps_trail_encoded = encoded_trail_from_doc(d)
+        else:
+            # Convert gps_trail dicts to GpsPoint objects
+            gps_trail = [GpsPoint(lat=p["lat"], lng=p["lng"], timestamp=p.get("timestamp")) for p in trail_from_doc(d)]
         return Trip(
             id=doc.id,
             date=d.get("date", ""),
@@ -532,10 +752,12 @@ class TripService:
             created_at=d.get("created_at", ""),
             car_id=d.get("car_id"),
             gps_trail=gps_trail,
+            gps_trail_encoded=gps_trail_encoded,
             google_maps_km=d.get("google_maps_km"),
             route_deviation_percent=d.get("route_deviation_percent"),
             route_flag=d.get("route_flag"),
             distance_source=d.get("distance_source"),
+            enrichment_status=d.get("enrichment_status"),
         )
 
 
@@ -3,22 +3,99 @@ Webhook service - trip tracking state machine.
 """
 
 import logging
-from datetime import datetime
-
-from config import CONFIG, GPS_STATIONARY_TIMEOUT_MINUTES, GPS_STATIONARY_RADIUS_METERS, STALE_TRIP_HOURS, TRIP_RESUME_WINDOW_MINUTES
-from database import get_trip_cache, set_trip_cache, get_all_active_trips, get_paused_trip, set_paused_trip
+import random
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+from config import (
+    CONFIG, GPS_STATIONARY_TIMEOUT_MINUTES, GPS_STATIONARY_RADIUS_METERS, STALE_TRIP_HOURS, TRIP_RESUME_WINDOW_MINUTES,
+    SAFETY_NET_WORKERS, SAFETY_NET_TRIP_TIMEOUT_SECONDS, SAFETY_NET_TOTAL_TIMEOUT_SECONDS, SAFETY_NET_POLL_SECONDS,
+    POLL_SCHEDULER_ENABLED, TRIP_STATE_MAX_ATTEMPTS, TRIP_STATE_RETRY_BACKOFF_SECONDS, TRIP_FINALIZE_CLAIM_SECONDS,
+    GPS_MAX_SPEED_MPS, GPS_OUTLIER_MAX_RUN, TRAIL_SIMPLIFY_TOLERANCE_METERS,
+)
+from database import (
+    get_trip_cache, set_trip_cache, get_all_active_trips, get_paused_trip, set_paused_trip,
+    TRIP_CACHE_VERSION, TripStateConflict,
+)
 from utils.geo import haversine, calculate_gps_distance, get_gps_distance_from_trail
 from utils.routing import get_osrm_distance_from_trail
+from utils.trail import merge_trails, reject_outliers, simplify_trail
 from .location_service import location_service
 from .car_service import car_service
 from .trip_service import trip_service
+from .gps_event_log import gps_event_log
+from .poll_scheduler import poll_scheduler
+from .stationary_detector import stationary_detector
 
 logger = logging.getLogger(__name__)
 
 
+class PingContext:
+    """
+    Request-scoped view of the user's cars for one state-machine evaluation.
+
+    The credentialed car list and each car's vendor status are fetched at most
+    once and then shared by every branch, so a single ping never asks the
+    vendor API twice (and never sees two different answers).
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self._cars: list[dict] | None = None
+        self._statuses: dict[str, dict | None] = {}
+
+    def cars(self) -> list[dict]:
+        """Cars with API credentials (loaded on first use)."""
+        if self._cars is None:
+            self._cars = car_service.get_cars_with_credentials(self.user_id)
+        return self._cars
+
+    def car_info(self, car_id: str | None) -> dict | None:
+        """Credentialed car entry for car_id, or None if it has no credentials."""
+        if not car_id:
+            return None
+        return next((c for c in self.cars() if c["car_id"] == car_id), None)
+
+    def car_status(self, car_id: str | None) -> dict | None:
+        """Vendor driving status for car_id (one API round per context)."""
+        car_info = self.car_info(car_id)
+        return self._check_status(car_info) if car_info else None
+
+    def find_driving_car(self) -> tuple[dict | None, str]:
+        """find_driving_car() over the already-loaded car list and status memo."""
+        return car_service.find_driving_car(self.user_id, cars=self.cars(), check_status=self._check_status)
+
+    def polled(self) -> bool:
+        """Whether any vendor status call was made in this context."""
+        return bool(self._statuses)
+
+    def polled_status(self, car_id: str | None) -> dict | None:
+        """Status already fetched for car_id in this context (no API call)."""
+        return self._statuses.get(car_id)
+
+    def _check_status(self, car_info: dict) -> dict | None:
+        car_id = car_info["car_id"]
+        if car_id not in self._statuses:
+            self._statuses[car_id] = car_service.check_car_driving_status(car_info)
+        return self._statuses[car_id]
+
+
 class WebhookService:
     """Service for webhook-based trip tracking."""
 
+    def __init__(self):
+        # Users whose stale trip is being recovered by the safety net (this instance)
+        self._recovering: set[str] = set()
+        self._recovering_lock = threading.Lock()
+
+        # Optimistic concurrency counters
+        self._stats_lock = threading.Lock()
+        self.trip_state_conflicts = 0
+        self.trip_state_retries_exhausted = 0
+
     def handle_ping(
         self,
         user_id: str,
@@ -32,13 +109,90 @@ class WebhookService:
         IMPORTANT: This method writes to cache exactly ONCE at the end to minimize Firestore writes.
         All state changes accumulate in memory, then persist in a single write.
         """
-        timestamp = datetime.utcnow().isoformat() + "Z"
         logger.info(
             f"GPS ping at {lat}, {lng}, device_id={device_id}",
             extra={"user_id": user_id, "car_id": car_id}
         )
+        return self._handle_points(user_id, [{"lat": lat, "lng": lng, "timestamp": None}], car_id, device_id)
+
+    def handle_pings(
+        self,
+        user_id: str,
+        points: list[dict],
+        car_id: str | None = None,
+        device_id: str | None = None,
+    ) -> dict:
+        """Handle a batch of buffered GPS points (oldest first) as one ping.
+
+        Every point becomes a GPS event with its own device timestamp and skip
+        flag, but the trip cache is read once, the vendor API is checked once
+        and the cache is written once for the whole batch. Stationary detection
+        runs on the batch's last point time, so a delayed upload is judged by
+        when the points were recorded rather than when they arrived.
+
+        Args:
+            user_id: User email
+            points: Dicts with lat, lng and optional timestamp (datetime or ISO string)
+            car_id: Optional explicit car
+            device_id: Optional device for car lookup
+
+        Returns:
+            Same result dict as handle_ping, plus "points"
+        """
+        logger.info(
+            f"GPS ping batch of {len(points)} points, device_id={device_id}",
+            extra={"user_id": user_id, "car_id": car_id}
+        )
+        result = self._handle_points(user_id, points, car_id, device_id)
+        result["points"] = len(points)
+        return result
+
+    def _handle_points(self, user_id: str, points: list[dict], car_id: str | None, device_id: str | None) -> dict:
+        # A batch that pauses the trip part-way goes on with its later points, as later pings would
+        while True:
+            rest: list[dict] = []
+            result = self._with_state_retry(user_id, lambda: self._handle_points_once(user_id, points, car_id, device_id, rest))
+            if not rest:
+                return result
+            points = rest
+
+    def _handle_points_once(
+        self,
+        user_id: str,
+        points: list[dict],
+        car_id: str | None,
+        device_id: str | None,
+        rest: list[dict] | None = None,
+    ) -> dict:
+        """
+        State machine for one ping (one or more GPS points), with a single cache write.
+
+        GPS-only trips are checked for a stop after every point. If one pauses
+        the trip, the points after it are left unprocessed in rest (with their
+        device timestamps) for the caller to handle as the next ping.
+        """
+        if rest is not None:
+            rest.clear()
+        now = datetime.utcnow()
+        timestamp = now.isoformat() + "Z"
+        # Buffered uploads can arrive out of order: process points by device time
+        timed = sorted(
+            ((p, self._point_timestamp(p.get("timestamp"), now)) for p in points),
+            key=lambda pt: self._parse_time(pt[1]),
+        )
+        points = [p for p, _ in timed]
+        point_times = [t for _, t in timed]
+        lat, lng = points[-1]["lat"], points[-1]["lng"]
 
         cache = get_trip_cache(user_id)
+        if cache and cache.get("active"):
+            if self._finalization_claimed(cache):
+                return {"status": "finalizing", "user": user_id}
+            points, point_times = self._fresh_points(cache, points, point_times)
+            if not points:
+                return {"status": "ignored", "reason": "stale_points", "user": user_id}
+        stored = cache  # Inactive leftover (if any) that a new or resumed trip replaces
+        ctx = PingContext(user_id)
         result = None  # Will hold the return value
         clear_cache = False  # Set to True to delete cache instead of saving
 
@@ -47,9 +201,13 @@ class WebhookService:
             paused = get_paused_trip(user_id)
             if paused and paused.get("paused_at"):
                 paused_at = datetime.fromisoformat(paused["paused_at"].replace("Z", "+00:00").replace("+00:00", ""))
-                minutes_since_pause = (datetime.utcnow() - paused_at).total_seconds() / 60
+                # Measured to when the point was recorded (buffered points arrive late)
+                minutes_since_pause = (self._parse_time(point_times[0]) - paused_at).total_seconds() / 60
 
                 if minutes_since_pause <= TRIP_RESUME_WINDOW_MINUTES:
+                    points, point_times = self._fresh_points(paused, points, point_times)
+                    if not points:
+                        return {"status": "ignored", "reason": "stale_points", "user": user_id}
                     # Resume the paused trip
                     logger.info(f"Resuming paused trip from {minutes_since_pause:.1f} min ago")
                     cache = paused
@@ -58,6 +216,7 @@ class WebhookService:
                     cache.pop("paused_lat", None)
                     cache.pop("paused_lng", None)
                     set_paused_trip(None, user_id)  # Clear paused trip
+                    cache = self._replacing(cache, stored)
                     result = {"status": "trip_resumed", "minutes_paused": round(minutes_since_pause, 1), "user": user_id}
                 else:
                     # Too long since pause - finalize the paused trip and start fresh
@@ -78,32 +237,48 @@ class WebhookService:
                 "active": True,
                 "user_id": user_id,
                 "car_id": effective_car_id,
-                "start_time": timestamp,
+                "start_time": point_times[0],
                 "start_odo": None,
                 "last_odo": None,
                 "no_driving_count": 0,
                 "parked_count": 0,
-                "gps_events": [],
             }
+            gps_event_log.start(cache)
+            cache = self._replacing(cache, stored)
 
             # Check if assigned car has API credentials - if not, use GPS-only mode
             if effective_car_id:
-                cars_with_creds = car_service.get_cars_with_credentials(user_id)
-                has_creds = any(c["car_id"] == effective_car_id for c in cars_with_creds)
-                if not has_creds:
+                if not ctx.car_info(effective_car_id):
                     logger.info(f"Car {effective_car_id} has no API credentials - using GPS-only mode")
                     cache["gps_only_mode"] = True
 
-        # Add GPS event (including skip locations - we filter at finalize time)
-        gps_events = cache.get("gps_events", [])
-        gps_events.append({
-            "lat": lat,
-            "lng": lng,
-            "timestamp": timestamp,
-            "is_skip": location_service.is_skip_location(lat, lng),
-        })
-        cache["gps_events"] = gps_events
-        logger.info(f"GPS event added, total: {len(gps_events)}, is_skip: {gps_events[-1]['is_skip']}")
+        # Add GPS events (including skip locations - we filter at finalize time)
+        gps_only_mode = cache.get("gps_only_mode", False)
+        for i, (point, point_time) in enumerate(zip(points, point_times)):
+            event = {
+                "lat": point["lat"],
+                "lng": point["lng"],
+                "timestamp": point_time,
+                "is_skip": location_service.is_skip_location(point["lat"], point["lng"]),
+            }
+            gps_event_log.append(cache, event)
+
+            # GPS-only mode: a stop pauses the trip (can resume within 30 min). A
+            # ping that resumed the trip is not checked, as with single pings
+            if gps_only_mode and (result is None or i > 0) and self._check_gps_stationary(
+                gps_event_log.recent(cache), now=self._parse_time(point_time), window=cache.get("gps_window")
+            ):
+                logger.info(f"GPS-only mode: stationary detected - pausing trip for potential resume")
+                cache["paused_at"] = self._parse_time(point_time).isoformat()
+                cache["paused_lat"] = point["lat"]
+                cache["paused_lng"] = point["lng"]
+                gps_event_log.flush(cache, user_id)
+                set_paused_trip(cache, user_id)
+                set_trip_cache(None, user_id)  # Clear active trip
+                if rest is not None:
+                    rest.extend({**p, "timestamp": t} for p, t in zip(points[i + 1:], point_times[i + 1:]))
+                return {"status": "trip_paused", "reason": "gps_stationary", "resume_window_minutes": TRIP_RESUME_WINDOW_MINUTES, "user": user_id}
+        logger.info(f"GPS events added: {len(points)}, total: {gps_event_log.count(cache)}, is_skip: {event['is_skip']}")
 
         # Check car status on each ping
         start_odo = cache.get("start_odo")
@@ -116,11 +291,10 @@ class WebhookService:
             if bluetooth_car_id:
                 # Bluetooth identified a car - trust it, but try to get API data for odometer
                 logger.info(f"Bluetooth identified car {bluetooth_car_id} - getting API data")
-                cars = car_service.get_cars_with_credentials(user_id)
-                car_info = next((c for c in cars if c["car_id"] == bluetooth_car_id), None)
+                car_info = ctx.car_info(bluetooth_car_id)
 
                 if car_info:
-                    car_status = car_service.check_car_driving_status(car_info)
+                    car_status = ctx.car_status(bluetooth_car_id)
                     if car_status:
                         # Got API data - use it for odometer (trust Bluetooth for car identity)
                         cache["car_name"] = car_status["name"]
@@ -165,7 +339,7 @@ class WebhookService:
                     result = {"status": "gps_only_mode", "reason": "bluetooth_car_no_credentials", "user": user_id}
             else:
                 # No Bluetooth identification - use existing find_driving_car logic
-                driving_car, reason = car_service.find_driving_car(user_id)
+                driving_car, reason = ctx.find_driving_car()
 
                 if not driving_car:
                     no_driving_count = cache.get("no_driving_count", 0) + 1
@@ -222,20 +396,10 @@ class WebhookService:
 
         # GPS-only mode: collect GPS events and check for stationary
         if result is None and gps_only_mode:
-            gps_events = cache.get("gps_events", [])
-            logger.info(f"GPS-only mode: collected {len(gps_events)} GPS events")
-
-            # Check if stationary - pause trip (can resume within 30 min)
-            if self._check_gps_stationary(gps_events):
-                logger.info(f"GPS-only mode: stationary detected - pausing trip for potential resume")
-                cache["paused_at"] = datetime.utcnow().isoformat()
-                cache["paused_lat"] = lat
-                cache["paused_lng"] = lng
-                set_paused_trip(cache, user_id)
-                set_trip_cache(None, user_id)  # Clear active trip
-                return {"status": "trip_paused", "reason": "gps_stationary", "resume_window_minutes": TRIP_RESUME_WINDOW_MINUTES, "user": user_id}
+            gps_count = gps_event_log.count(cache)
+            logger.info(f"GPS-only mode: collected {gps_count} GPS events")
 
-            result = {"status": "gps_only_ping", "gps_count": len(gps_events), "user": user_id}
+            result = {"status": "gps_only_ping", "gps_count": gps_count, "user": user_id}
 
         # Subsequent pings: check assigned car status
         if result is None:
@@ -247,20 +411,22 @@ class WebhookService:
 
         if result is None:
             assigned_car_id = cache.get("car_id")
-            cars = car_service.get_cars_with_credentials(user_id)
-            car_info = next((c for c in cars if c["car_id"] == assigned_car_id), None)
-
-            if not car_info:
+            if not ctx.car_info(assigned_car_id):
                 # Car exists but credentials are missing - continue in GPS-only mode instead of cancelling
                 logger.warning(f"Car {assigned_car_id} has no credentials - continuing in GPS-only mode")
                 cache["gps_only_mode"] = True
-                result = {"status": "gps_only_ping", "reason": "credentials_missing", "gps_count": len(cache.get("gps_events", [])), "user": user_id}
+                result = {"status": "gps_only_ping", "reason": "credentials_missing", "gps_count": gps_event_log.count(cache), "user": user_id}
+
+        if result is None and POLL_SCHEDULER_ENABLED:
+            # Only call the vendor API when the scheduler expects news (parking, odometer)
+            poll, reason, interval = poll_scheduler.should_poll(cache, gps_event_log.recent(cache), now)
+            if not poll:
+                logger.info(f"Vendor poll deferred ({reason}, interval {interval}s) - recording GPS only")
+                result = {"status": "ping_recorded", "poll_deferred": reason, "user": user_id}
 
         if result is None:
             assigned_car_id = cache.get("car_id")
-            cars = car_service.get_cars_with_credentials(user_id)
-            car_info = next((c for c in cars if c["car_id"] == assigned_car_id), None)
-            car_status = car_service.check_car_driving_status(car_info)
+            car_status = ctx.car_status(assigned_car_id)
 
             if not car_status:
                 # API completely failed - maintain previous state, don't reset counters
@@ -271,9 +437,7 @@ class WebhookService:
 
         if result is None:
             assigned_car_id = cache.get("car_id")
-            cars = car_service.get_cars_with_credentials(user_id)
-            car_info = next((c for c in cars if c["car_id"] == assigned_car_id), None)
-            car_status = car_service.check_car_driving_status(car_info)
+            car_status = ctx.car_status(assigned_car_id)
 
             # API returned data - reset error counter
             cache["api_error_count"] = 0
@@ -359,8 +523,9 @@ class WebhookService:
 
                     if not car_gps:
                         # Fallback to phone GPS
-                        if gps_events:
-                            car_gps = {"lat": gps_events[-1]["lat"], "lng": gps_events[-1]["lng"], "timestamp": gps_events[-1]["timestamp"]}
+                        last_event = gps_event_log.last(cache)
+                        if last_event:
+                            car_gps = {"lat": last_event["lat"], "lng": last_event["lng"], "timestamp": last_event["timestamp"]}
                             logger.info(f"No car GPS - using phone GPS as fallback: {car_gps['lat']}, {car_gps['lng']}")
                         else:
                             logger.warning("No end GPS from car or phone")
@@ -369,32 +534,11 @@ class WebhookService:
 
                     if result is None:
                         # Build GPS trail - merge ALL car + phone GPS points, sorted and deduplicated
-                        phone_gps_trail = [
-                            {"lat": e["lat"], "lng": e["lng"], "timestamp": e["timestamp"]}
-                            for e in gps_events if not e.get("is_skip")
-                        ]
+                        gps_events = gps_event_log.load(cache, user_id)
+                        phone_gps_trail = gps_event_log.phone_trail(gps_events)
                         audi_trail = cache.get("gps_trail", [])
 
-                        # Merge all points and sort by timestamp
-                        all_points = []
-                        all_points.extend(audi_trail)
-                        all_points.extend(phone_gps_trail)
-                        if car_gps:
-                            all_points.append(car_gps)
-                        all_points.sort(key=lambda p: p.get("timestamp", ""))
-
-                        # Deduplicate by distance (keep points >50m apart)
-                        combined_trail = []
-                        for p in all_points:
-                            if not combined_trail:
-                                combined_trail.append(p)
-                            else:
-                                last = combined_trail[-1]
-                                last_lng = last.get("lng", last.get("lon"))
-                                p_lng = p.get("lng", p.get("lon"))
-                                dist = haversine(last["lat"], last_lng, p["lat"], p_lng)
-                                if dist >= 50:  # Only add if >50m from last point
-                                    combined_trail.append(p)
+                        combined_trail = self._clean_trail(merge_trails(audi_trail, phone_gps_trail, [car_gps] if car_gps else []))
 
                         start_gps = audi_trail[0] if audi_trail else (gps_events[0] if gps_events else None)
                         if not start_gps:
@@ -402,6 +546,7 @@ class WebhookService:
                             clear_cache = True
                             result = {"status": "skipped", "reason": "no_start_gps", "user": user_id}
                         else:
+                            self._claim_finalization(cache, user_id)
                             trip_result = trip_service.finalize_trip_from_audi(
                                 start_gps=start_gps,
                                 end_gps=car_gps,
@@ -418,11 +563,15 @@ class WebhookService:
             else:
                 result = {"status": "moving" if current_odo != last_odo else "waiting", "current_odo": current_odo, "parked_count": parked_count, "user": user_id}
 
+        if not clear_cache and ctx.polled():
+            status = ctx.polled_status(cache.get("car_id"))
+            poll_scheduler.record_poll(cache, now, lat, lng, status["odometer"] if status else None)
+
         # SINGLE CACHE WRITE at end of all processing
         if clear_cache:
             set_trip_cache(None, user_id)
         else:
-            set_trip_cache(cache, user_id)
+            self._save_trip_cache(cache, user_id)
 
         return result
 
@@ -439,22 +588,26 @@ class WebhookService:
 
     def handle_end(self, user_id: str, lat: float, lng: float) -> dict:
         """Handle trip end (Bluetooth/CarPlay disconnected). Tries to finalize immediately."""
+        return self._with_state_retry(user_id, lambda: self._handle_end_once(user_id, lat, lng))
+
+    def _handle_end_once(self, user_id: str, lat: float, lng: float) -> dict:
         timestamp = datetime.utcnow().isoformat() + "Z"
         logger.info(f"End event at {lat}, {lng}", extra={"user_id": user_id})
 
         cache = get_trip_cache(user_id)
         if not cache or not cache.get("active"):
             return {"status": "ignored", "reason": "no_active_trip"}
+        if self._finalization_claimed(cache):
+            return {"status": "finalizing", "user": user_id}
+        ctx = PingContext(user_id)
 
         # Add final GPS event
-        gps_events = cache.get("gps_events", [])
-        gps_events.append({
+        gps_event_log.append(cache, {
             "lat": lat,
             "lng": lng,
             "timestamp": timestamp,
             "is_skip": location_service.is_skip_location(lat, lng),
         })
-        cache["gps_events"] = gps_events
         cache["end_triggered"] = timestamp
 
         start_odo = cache.get("start_odo")
@@ -467,22 +620,18 @@ class WebhookService:
             if location_service.is_skip_location(lat, lng):
                 logger.info(f"End event in GPS-only mode: phone GPS at skip location - keeping active")
                 cache["end_triggered"] = None
-                set_trip_cache(cache, user_id)
+                self._save_trip_cache(cache, user_id)
                 return {"status": "paused_at_skip", "reason": "gps_only_skip", "user": user_id}
 
             logger.info("End event in GPS-only mode - finalizing with GPS distance")
-            phone_gps_trail = [
-                {"lat": e["lat"], "lng": e["lng"], "timestamp": e["timestamp"]}
-                for e in gps_events if not e.get("is_skip")
-            ]
-
-            if len(phone_gps_trail) >= 2:
-                gps_distance = calculate_gps_distance(phone_gps_trail)
-                if gps_distance < 0.1:
+            if gps_event_log.metrics(cache, user_id)["count"] >= 2:
+                phone_gps_trail, gps_distance = self._gps_only_trail(cache, user_id, min_km=0.1)
+                if phone_gps_trail is None:
                     logger.info(f"GPS-only mode: distance too short ({gps_distance:.2f} km) - skipping")
                     set_trip_cache(None, user_id)
                     return {"status": "skipped", "reason": "gps_distance_too_short", "user": user_id}
 
+                self._claim_finalization(cache, user_id)
                 trip_result = trip_service.finalize_trip_from_gps(
                     start_gps=phone_gps_trail[0],
                     end_gps=phone_gps_trail[-1],
@@ -501,7 +650,7 @@ class WebhookService:
 
         # If we never got odometer data, try one more time
         if start_odo is None:
-            driving_car, reason = car_service.find_driving_car(user_id)
+            driving_car, reason = ctx.find_driving_car()
             if driving_car:
                 cache["car_id"] = driving_car["car_id"]
                 cache["car_name"] = driving_car["name"]
@@ -516,11 +665,8 @@ class WebhookService:
 
         # Try to get final odometer and finalize
         if assigned_car_id and start_odo is not None:
-            cars = car_service.get_cars_with_credentials(user_id)
-            car_info = next((c for c in cars if c["car_id"] == assigned_car_id), None)
-
-            if car_info:
-                car_status = car_service.check_car_driving_status(car_info)
+            if ctx.car_info(assigned_car_id):
+                car_status = ctx.car_status(assigned_car_id)
                 if car_status:
                     current_odo = car_status["odometer"]
                     car_lat = car_status.get("lat")
@@ -538,7 +684,7 @@ class WebhookService:
                     # Still no odometer? Let safety net handle it
                     if current_odo is None:
                         logger.info("End event: no odometer data, deferring to safety net")
-                        set_trip_cache(cache, user_id)
+                        self._save_trip_cache(cache, user_id)
                         return {"status": "pending", "reason": "no_odometer", "user": user_id}
 
                     total_km = current_odo - start_odo
@@ -563,40 +709,20 @@ class WebhookService:
                         if at_skip:
                             logger.info(f"End event: at skip location - keeping active")
                             cache["end_triggered"] = None
-                            set_trip_cache(cache, user_id)
+                            self._save_trip_cache(cache, user_id)
                             return {"status": "paused_at_skip", "total_km": total_km, "user": user_id}
 
                         # Build GPS trail - merge ALL car + phone GPS points, sorted and deduplicated
-                        phone_gps_trail = [
-                            {"lat": e["lat"], "lng": e["lng"], "timestamp": e["timestamp"]}
-                            for e in gps_events if not e.get("is_skip")
-                        ]
+                        gps_events = gps_event_log.load(cache, user_id)
+                        phone_gps_trail = gps_event_log.phone_trail(gps_events)
                         audi_trail = cache.get("gps_trail", [])
 
-                        # Merge all points and sort by timestamp
-                        all_points = []
-                        all_points.extend(audi_trail)
-                        all_points.extend(phone_gps_trail)
-                        if car_gps:
-                            all_points.append(car_gps)
-                        all_points.sort(key=lambda p: p.get("timestamp", ""))
-
-                        # Deduplicate by distance (keep points >50m apart)
-                        combined_trail = []
-                        for p in all_points:
-                            if not combined_trail:
-                                combined_trail.append(p)
-                            else:
-                                last = combined_trail[-1]
-                                last_lng = last.get("lng", last.get("lon"))
-                                p_lng = p.get("lng", p.get("lon"))
-                                dist = haversine(last["lat"], last_lng, p["lat"], p_lng)
-                                if dist >= 50:  # Only add if >50m from last point
-                                    combined_trail.append(p)
+                        combined_trail = self._clean_trail(merge_trails(audi_trail, phone_gps_trail, [car_gps] if car_gps else []))
 
                         start_gps = audi_trail[0] if audi_trail else (gps_events[0] if gps_events else None)
                         if start_gps and car_gps:
                             logger.info(f"End event: finalizing trip, {total_km} km")
+                            self._claim_finalization(cache, user_id)
                             trip_result = trip_service.finalize_trip_from_audi(
                                 start_gps=start_gps,
                                 end_gps=car_gps,
@@ -611,18 +737,23 @@ class WebhookService:
                             return {"status": "finalized", "trip": trip_result, "user": user_id}
 
         # Couldn't finalize yet - save cache and let safety net handle it
-        set_trip_cache(cache, user_id)
+        self._save_trip_cache(cache, user_id)
         logger.info(f"End event: couldn't finalize, saved for safety net")
         return {"status": "pending", "reason": "waiting_for_safety_net", "user": user_id}
 
     def handle_finalize(self, user_id: str) -> dict:
         """Force finalize a pending trip."""
-        cache = get_trip_cache(user_id)
-        if not cache or not cache.get("active"):
-            return {"status": "ignored", "reason": "no_active_trip"}
+        def trigger_end() -> dict | None:
+            cache = get_trip_cache(user_id)
+            if not cache or not cache.get("active"):
+                return {"status": "ignored", "reason": "no_active_trip"}
+            cache["end_triggered"] = datetime.utcnow().isoformat() + "Z"
+            set_trip_cache(cache, user_id)
+            return None
 
-        cache["end_triggered"] = datetime.utcnow().isoformat() + "Z"
-        set_trip_cache(cache, user_id)
+        result = self._with_state_retry(user_id, trigger_end)
+        if result is not None:
+            return result
 
         return self.check_stale_trips()
 
@@ -642,293 +773,469 @@ class WebhookService:
         if not cache or not cache.get("active"):
             return {"active": False}
 
-        gps_events = cache.get("gps_events", [])
         return {
             "active": True,
             "start_time": cache.get("start_time"),
             "start_odo": cache.get("start_odo"),
             "last_odo": cache.get("last_odo"),
             "last_odo_change": cache.get("last_odo_change"),
-            "gps_count": len(gps_events),
-            "first_gps": gps_events[0] if gps_events else None,
-            "last_gps": gps_events[-1] if gps_events else None,
+            "gps_count": gps_event_log.count(cache),
+            "first_gps": gps_event_log.first(cache),
+            "last_gps": gps_event_log.last(cache),
+            **self._status_metrics(cache, user_id),
+        }
+
+    @staticmethod
+    def _status_metrics(cache: dict, user_id: str) -> dict:
+        """Running GPS metrics for get_status."""
+        metrics = gps_event_log.metrics(cache, user_id)
+        bbox = None
+        if metrics["count"]:
+            bbox = {k: metrics[k] for k in ("min_lat", "max_lat", "min_lng", "max_lng")}
+        return {
+            "gps_distance_km": round(gps_event_log.distance_km(cache, user_id), 2),
+            "gps_bbox": bbox,
+            "last_moved_at": metrics["last_moved"]["timestamp"] if metrics["last_moved"] else None,
         }
 
     def check_stale_trips(self) -> dict:
-        """Safety net: recover stale/orphaned trips."""
-        active_trips = get_all_active_trips()
+        """
+        Safety net: recover stale/orphaned trips.
+
+        Users are recovered in parallel on a bounded worker pool, one task per
+        user. A trip still running after SAFETY_NET_TRIP_TIMEOUT_SECONDS, or not
+        reached within SAFETY_NET_TOTAL_TIMEOUT_SECONDS, is reported as "timeout"
+        and the status becomes "partial"; the next scheduler run retries it.
+        """
+        now = datetime.utcnow()
+        # Index query: only trips idle past the threshold or with end triggered
+        active_trips = get_all_active_trips(stale_before=now - timedelta(hours=STALE_TRIP_HOURS))
 
         if not active_trips:
-            logger.info("Safety net: no active trips")
+            logger.info("Safety net: no stale trips")
             return {"status": "no_active_trips", "processed": 0}
 
-        now = datetime.utcnow()
-        results = []
+        results = self._run_safety_net(active_trips, now)
+        status = "partial" if any(r["action"] == "timeout" for r in results) else "completed"
+        return {"status": status, "processed": len(results), "results": results}
+
+    def _run_safety_net(self, active_trips: list[tuple[str, dict]], now: datetime) -> list[dict]:
+        """Run _recover_stale_trip for each user on the worker pool; results keep input order."""
+        results: dict[int, dict] = {}
+        started: dict[int, float] = {}
+        futures: dict[Future, int] = {}
+
+        executor = ThreadPoolExecutor(max_workers=SAFETY_NET_WORKERS, thread_name_prefix="safety-net")
+        for i, (user_id, cache) in enumerate(active_trips):
+            if not self._claim_recovery(user_id):
+                # Previous run still recovering this user - never process a user twice at once
+                results[i] = {"user": user_id, "action": "skipped", "reason": "recovery_in_progress"}
+                continue
+            futures[executor.submit(self._recovery_task, i, user_id, cache, now, started)] = i
+
+        batch_deadline = time.monotonic() + SAFETY_NET_TOTAL_TIMEOUT_SECONDS
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=SAFETY_NET_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = futures[future]
+                user_id = active_trips[i][0]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    logger.error(f"Safety net: recovery failed for {user_id}: {e}")
+                    results[i] = {"user": user_id, "action": "error", "reason": str(e)}
+
+            clock = time.monotonic()
+            for future in list(pending):
+                i = futures[future]
+                user_id = active_trips[i][0]
+                if i in started and clock - started[i] >= SAFETY_NET_TRIP_TIMEOUT_SECONDS:
+                    reason = "trip_deadline"
+                elif clock >= batch_deadline:
+                    reason = "batch_deadline"
+                else:
+                    continue
+                pending.discard(future)
+                if future.cancel():
+                    self._release_recovery(user_id)  # Never started
+                logger.warning(f"Safety net: {reason} exceeded for {user_id}, leaving it for the next run")
+                results[i] = {"user": user_id, "action": "timeout", "reason": reason}
+
+        # Running timed-out tasks finish in the background and release their claim
+        executor.shutdown(wait=False, cancel_futures=True)
+        return [results[i] for i in sorted(results)]
+
+    def _recovery_task(self, index: int, user_id: str, cache: dict, now: datetime, started: dict[int, float]) -> dict:
+        """Worker entry point: record the start time, recover, release the user claim."""
+        started[index] = time.monotonic()
+        try:
+            return self._recover_stale_trip(user_id, cache, now)
+        except TripStateConflict:
+            # A ping or another instance changed the trip since the index read - it is not ours to recover
+            self._count_conflict()
+            return {"user": user_id, "action": "skipped", "reason": "trip_updated"}
+        finally:
+            self._release_recovery(user_id)
+
+    def _claim_recovery(self, user_id: str) -> bool:
+        with self._recovering_lock:
+            if user_id in self._recovering:
+                return False
+            self._recovering.add(user_id)
+            return True
+
+    def _release_recovery(self, user_id: str) -> None:
+        with self._recovering_lock:
+            self._recovering.discard(user_id)
+
+    def _recover_stale_trip(self, user_id: str, cache: dict, now: datetime) -> dict:
+        """Recover one stale trip (finalize, cancel or wait). Returns the safety net result entry."""
+        if self._finalization_claimed(cache):
+            return {"user": user_id, "action": "skipped", "reason": "finalizing"}
+        end_triggered = cache.get("end_triggered")
+
+        if not gps_event_log.count(cache):
+            logger.info(f"Safety net: cancelling trip for {user_id} - no GPS events")
+            set_trip_cache(None, user_id)
+            return {"user": user_id, "action": "cancelled", "reason": "no_gps_events"}
 
-        for user_id, cache in active_trips:
-            gps_events = cache.get("gps_events", [])
-            end_triggered = cache.get("end_triggered")
+        # Check last activity time
+        last_event = gps_event_log.last(cache)
+        last_time = datetime.fromisoformat(last_event["timestamp"].replace("Z", "+00:00")).replace(tzinfo=None)
+        hours_since_activity = (now - last_time).total_seconds() / 3600
 
-            if not gps_events:
-                logger.info(f"Safety net: cancelling trip for {user_id} - no GPS events")
-                set_trip_cache(None, user_id)
-                results.append({"user": user_id, "action": "cancelled", "reason": "no_gps_events"})
-                continue
+        # Trip is stale if: end was triggered OR no activity for 2+ hours
+        is_stale = end_triggered or hours_since_activity >= STALE_TRIP_HOURS
+
+        if not is_stale:
+            return {"user": user_id, "action": "skipped", "reason": "still_active", "hours_since": round(hours_since_activity, 1)}
+
+        logger.info(f"Safety net: recovering stale trip for {user_id} (hours={hours_since_activity:.1f}, end_triggered={end_triggered})")
+        start_odo = cache.get("start_odo")
+        assigned_car_id = cache.get("car_id")
+        gps_only_mode = cache.get("gps_only_mode", False)
+        timestamp = now.isoformat() + "Z"
+        ctx = PingContext(user_id)
 
-            # Check last activity time
-            last_event = gps_events[-1]
-            last_time = datetime.fromisoformat(last_event["timestamp"].replace("Z", "+00:00")).replace(tzinfo=None)
-            hours_since_activity = (now - last_time).total_seconds() / 3600
+        # Handle GPS-only mode
+        if gps_only_mode:
+            logger.info(f"Safety net: finalizing GPS-only trip for {user_id}")
+            if gps_event_log.metrics(cache, user_id)["count"] >= 2:
+                phone_gps_trail, gps_distance = self._gps_only_trail(cache, user_id, min_km=0.1)
+                if phone_gps_trail is not None:
+                    self._claim_finalization(cache, user_id)
+                    trip_result = trip_service.finalize_trip_from_gps(
+                        start_gps=phone_gps_trail[0],
+                        end_gps=phone_gps_trail[-1],
+                        gps_trail=phone_gps_trail,
+                        gps_distance_km=gps_distance,
+                        start_time=cache.get("start_time"),
+                        user_id=user_id,
+                        car_id=assigned_car_id,
+                    )
+                    set_trip_cache(None, user_id)
+                    return {"user": user_id, "action": "finalized_gps_only", "km": gps_distance, "trip_id": trip_result.get("id")}
+                else:
+                    logger.info(f"Safety net: GPS-only trip too short ({gps_distance:.2f} km) for {user_id}")
 
-            # Trip is stale if: end was triggered OR no activity for 2+ hours
-            is_stale = end_triggered or hours_since_activity >= STALE_TRIP_HOURS
+            set_trip_cache(None, user_id)
+            return {"user": user_id, "action": "skipped", "reason": "gps_only_insufficient_data"}
 
-            if not is_stale:
-                results.append({"user": user_id, "action": "skipped", "reason": "still_active", "hours_since": round(hours_since_activity, 1)})
-                continue
+        # If we never got odometer, try now
+        if start_odo is None or not assigned_car_id:
+            driving_car, reason = ctx.find_driving_car()
+            if driving_car:
+                cache["car_id"] = driving_car["car_id"]
+                cache["car_name"] = driving_car["name"]
+                cache["start_odo"] = driving_car["odometer"]
+                start_odo = driving_car["odometer"]
+                assigned_car_id = driving_car["car_id"]
+                if driving_car.get("lat") and driving_car.get("lng"):
+                    cache["audi_gps"] = {"lat": driving_car["lat"], "lng": driving_car["lng"], "timestamp": timestamp}
 
-            logger.info(f"Safety net: recovering stale trip for {user_id} (hours={hours_since_activity:.1f}, end_triggered={end_triggered})")
+        gps_events = gps_event_log.load(cache, user_id)
+
+        if not assigned_car_id or start_odo is None:
+            # Try GPS-only finalization as last resort
+            if gps_event_log.metrics(cache, user_id)["count"] >= 2:
+                phone_gps_trail, gps_distance = self._gps_only_trail(cache, user_id, min_km=0.1, events=gps_events)
+                if phone_gps_trail is not None:
+                    logger.info(f"Safety net: no odometer for {user_id}, finalizing with GPS distance {gps_distance:.2f} km")
+                    self._claim_finalization(cache, user_id)
+                    trip_result = trip_service.finalize_trip_from_gps(
+                        start_gps=phone_gps_trail[0],
+                        end_gps=phone_gps_trail[-1],
+                        gps_trail=phone_gps_trail,
+                        gps_distance_km=gps_distance,
+                        start_time=cache.get("start_time"),
+                        user_id=user_id,
+                        car_id=assigned_car_id,
+                    )
+                    set_trip_cache(None, user_id)
+                    return {"user": user_id, "action": "finalized_gps_fallback", "km": gps_distance, "trip_id": trip_result.get("id")}
 
-            start_odo = cache.get("start_odo")
-            assigned_car_id = cache.get("car_id")
-            gps_only_mode = cache.get("gps_only_mode", False)
-            timestamp = now.isoformat() + "Z"
-
-            # Handle GPS-only mode
-            if gps_only_mode:
-                logger.info(f"Safety net: finalizing GPS-only trip for {user_id}")
-                phone_gps_trail = [
-                    {"lat": e["lat"], "lng": e["lng"], "timestamp": e["timestamp"]}
-                    for e in gps_events if not e.get("is_skip")
-                ]
-
-                if len(phone_gps_trail) >= 2:
-                    gps_distance = calculate_gps_distance(phone_gps_trail)
-                    if gps_distance >= 0.1:
-                        trip_result = trip_service.finalize_trip_from_gps(
-                            start_gps=phone_gps_trail[0],
-                            end_gps=phone_gps_trail[-1],
-                            gps_trail=phone_gps_trail,
-                            gps_distance_km=gps_distance,
-                            start_time=cache.get("start_time"),
-                            user_id=user_id,
-                            car_id=assigned_car_id,
-                        )
-                        set_trip_cache(None, user_id)
-                        results.append({"user": user_id, "action": "finalized_gps_only", "km": gps_distance, "trip_id": trip_result.get("id")})
-                        continue
-                    else:
-                        logger.info(f"Safety net: GPS-only trip too short ({gps_distance:.2f} km) for {user_id}")
+            # Only cancel if GPS fallback also fails
+            logger.info(f"Safety net: cancelling trip for {user_id} - no car/odometer data and insufficient GPS")
+            set_trip_cache(None, user_id)
+            return {"user": user_id, "action": "cancelled", "reason": "no_odometer_and_insufficient_gps"}
 
-                set_trip_cache(None, user_id)
-                results.append({"user": user_id, "action": "skipped", "reason": "gps_only_insufficient_data"})
-                continue
+        # Get current car status
+        car_status = ctx.car_status(assigned_car_id)
 
-            # If we never got odometer, try now
-            if start_odo is None or not assigned_car_id:
-                driving_car, reason = car_service.find_driving_car(user_id)
-                if driving_car:
-                    cache["car_id"] = driving_car["car_id"]
-                    cache["car_name"] = driving_car["name"]
-                    cache["start_odo"] = driving_car["odometer"]
-                    start_odo = driving_car["odometer"]
-                    assigned_car_id = driving_car["car_id"]
-                    if driving_car.get("lat") and driving_car.get("lng"):
-                        cache["audi_gps"] = {"lat": driving_car["lat"], "lng": driving_car["lng"], "timestamp": timestamp}
-
-            if not assigned_car_id or start_odo is None:
-                # Try GPS-only finalization as last resort
-                phone_gps_trail = [
-                    {"lat": e["lat"], "lng": e["lng"], "timestamp": e["timestamp"]}
-                    for e in gps_events if not e.get("is_skip")
-                ]
-                if len(phone_gps_trail) >= 2:
-                    gps_distance = calculate_gps_distance(phone_gps_trail)
-                    if gps_distance >= 0.1:
-                        logger.info(f"Safety net: no odometer for {user_id}, finalizing with GPS distance {gps_distance:.2f} km")
-                        trip_result = trip_service.finalize_trip_from_gps(
-                            start_gps=phone_gps_trail[0],
-                            end_gps=phone_gps_trail[-1],
-                            gps_trail=phone_gps_trail,
-                            gps_distance_km=gps_distance,
-                            start_time=cache.get("start_time"),
-                            user_id=user_id,
-                            car_id=assigned_car_id,
-                        )
-                        set_trip_cache(None, user_id)
-                        results.append({"user": user_id, "action": "finalized_gps_fallback", "km": gps_distance, "trip_id": trip_result.get("id")})
-                        continue
-
-                # Only cancel if GPS fallback also fails
-                logger.info(f"Safety net: cancelling trip for {user_id} - no car/odometer data and insufficient GPS")
-                set_trip_cache(None, user_id)
-                results.append({"user": user_id, "action": "cancelled", "reason": "no_odometer_and_insufficient_gps"})
-                continue
+        # Prepare GPS trail - merge ALL car + phone GPS points
+        phone_gps_trail = gps_event_log.phone_trail(gps_events)
+        audi_trail = cache.get("gps_trail", [])
+        car_gps = cache.get("audi_gps")
 
-            # Get current car status
-            cars = car_service.get_cars_with_credentials(user_id)
-            car_info = next((c for c in cars if c["car_id"] == assigned_car_id), None)
-            car_status = car_service.check_car_driving_status(car_info) if car_info else None
-
-            # Prepare GPS trail - merge ALL car + phone GPS points
-            phone_gps_trail = [
-                {"lat": e["lat"], "lng": e["lng"], "timestamp": e["timestamp"]}
-                for e in gps_events if not e.get("is_skip")
-            ]
-            audi_trail = cache.get("gps_trail", [])
-            car_gps = cache.get("audi_gps")
-
-            # Merge all points and sort by timestamp
-            all_points = []
-            all_points.extend(audi_trail)
-            all_points.extend(phone_gps_trail)
-            all_points.sort(key=lambda p: p.get("timestamp", ""))
-
-            # Deduplicate by distance (keep points >50m apart)
-            combined_trail = []
-            for p in all_points:
-                if not combined_trail:
-                    combined_trail.append(p)
-                else:
-                    last = combined_trail[-1]
-                    last_lng = last.get("lng", last.get("lon"))
-                    p_lng = p.get("lng", p.get("lon"))
-                    dist = haversine(last["lat"], last_lng, p["lat"], p_lng)
-                    if dist >= 50:  # Only add if >50m from last point
-                        combined_trail.append(p)
-
-            start_gps = audi_trail[0] if audi_trail else gps_events[0]
-
-            # Determine distance and source
-            distance_source = "odometer"
-            if car_status:
-                current_odo = car_status["odometer"]
-                car_lat = car_status.get("lat")
-                car_lng = car_status.get("lng")
-
-                if car_lat and car_lng:
-                    cache["audi_gps"] = {"lat": car_lat, "lng": car_lng, "timestamp": timestamp}
-                    car_gps = cache["audi_gps"]
+        combined_trail = self._clean_trail(merge_trails(audi_trail, phone_gps_trail))
 
-                total_km = current_odo - start_odo
-            else:
-                # Car API unavailable - use GPS fallback
-                is_gps_stationary = self._check_gps_stationary(gps_events)
-                if not is_gps_stationary and not end_triggered:
-                    logger.info(f"Safety net: car API unavailable for {user_id}, but GPS shows movement - waiting")
-                    results.append({"user": user_id, "action": "waiting", "reason": "car_api_down_still_moving"})
-                    continue
+        start_gps = audi_trail[0] if audi_trail else gps_events[0]
 
-                logger.warning(f"Safety net: car API unavailable for {user_id}, using GPS fallback")
+        # Determine distance and source
+        distance_source = "odometer"
+        if car_status:
+            current_odo = car_status["odometer"]
+            car_lat = car_status.get("lat")
+            car_lng = car_status.get("lng")
 
-                total_km = get_osrm_distance_from_trail(combined_trail)
-                if total_km:
-                    distance_source = "osrm"
-                else:
-                    total_km = get_gps_distance_from_trail(combined_trail)
-                    distance_source = "gps"
-
-                car_gps = gps_events[-1] if gps_events else None
-
-                # Use last_odo if available (from when API was working mid-trip)
-                # Final odometer should never be less than confirmed last_odo
-                last_odo = cache.get("last_odo")
-                estimated_odo = start_odo + total_km if total_km else start_odo
-                if last_odo is not None and last_odo > estimated_odo:
-                    current_odo = last_odo
-                    logger.info(f"Safety net: using last_odo {last_odo} (higher than estimated {estimated_odo:.1f})")
-                else:
-                    current_odo = estimated_odo
+            if car_lat and car_lng:
+                cache["audi_gps"] = {"lat": car_lat, "lng": car_lng, "timestamp": timestamp}
+                car_gps = cache["audi_gps"]
 
-                logger.info(f"Safety net: GPS fallback distance for {user_id}: {total_km:.1f} km (source: {distance_source})")
+            total_km = current_odo - start_odo
+        else:
+            # Car API unavailable - use GPS fallback
+            is_gps_stationary = self._check_gps_stationary(gps_events, window=cache.get("gps_window"))
+            if not is_gps_stationary and not end_triggered:
+                logger.info(f"Safety net: car API unavailable for {user_id}, but GPS shows movement - waiting")
+                return {"user": user_id, "action": "waiting", "reason": "car_api_down_still_moving"}
 
-            if not car_gps:
-                car_gps = gps_events[-1]
+            logger.warning(f"Safety net: car API unavailable for {user_id}, using GPS fallback")
 
-            if car_gps and isinstance(car_gps, dict) and "lat" in car_gps:
-                combined_trail.append(car_gps)
+            total_km = get_osrm_distance_from_trail(combined_trail)
+            if total_km:
+                distance_source = "osrm"
+            else:
+                total_km = get_gps_distance_from_trail(combined_trail)
+                distance_source = "gps"
 
-            if total_km is None or total_km <= 0:
-                logger.info(f"Safety net: skipping trip for {user_id} - {total_km} km (zero or negative)")
-                set_trip_cache(None, user_id)
-                results.append({"user": user_id, "action": "skipped", "reason": "zero_or_negative_km"})
-                continue
+            car_gps = gps_events[-1] if gps_events else None
 
-            # Finalize the trip
-            logger.info(f"Safety net: finalizing trip for {user_id}, {total_km:.1f} km (source: {distance_source})")
-            trip_result = trip_service.finalize_trip_from_audi(
-                start_gps=start_gps,
-                end_gps=car_gps,
-                start_odo=start_odo,
-                end_odo=current_odo,
-                start_time=cache.get("start_time"),
-                gps_trail=combined_trail,
-                user_id=user_id,
-                car_id=assigned_car_id,
-                distance_source=distance_source,
-            )
+            # Use last_odo if available (from when API was working mid-trip)
+            # Final odometer should never be less than confirmed last_odo
+            last_odo = cache.get("last_odo")
+            estimated_odo = start_odo + total_km if total_km else start_odo
+            if last_odo is not None and last_odo > estimated_odo:
+                current_odo = last_odo
+                logger.info(f"Safety net: using last_odo {last_odo} (higher than estimated {estimated_odo:.1f})")
+            else:
+                current_odo = estimated_odo
+
+            logger.info(f"Safety net: GPS fallback distance for {user_id}: {total_km:.1f} km (source: {distance_source})")
+
+        if not car_gps:
+            car_gps = gps_events[-1]
 
+        if car_gps and isinstance(car_gps, dict) and "lat" in car_gps:
+            combined_trail.append(car_gps)
+
+        if total_km is None or total_km <= 0:
+            logger.info(f"Safety net: skipping trip for {user_id} - {total_km} km (zero or negative)")
             set_trip_cache(None, user_id)
-            results.append({"user": user_id, "action": "finalized", "km": total_km, "trip_id": trip_result.get("id")})
+            return {"user": user_id, "action": "skipped", "reason": "zero_or_negative_km"}
+
+        # Finalize the trip
+        logger.info(f"Safety net: finalizing trip for {user_id}, {total_km:.1f} km (source: {distance_source})")
+        self._claim_finalization(cache, user_id)
+        trip_result = trip_service.finalize_trip_from_audi(
+            start_gps=start_gps,
+            end_gps=car_gps,
+            start_odo=start_odo,
+            end_odo=current_odo,
+            start_time=cache.get("start_time"),
+            gps_trail=combined_trail,
+            user_id=user_id,
+            car_id=assigned_car_id,
+            distance_source=distance_source,
+        )
 
-        return {"status": "completed", "processed": len(results), "results": results}
+        set_trip_cache(None, user_id)
+        return {"user": user_id, "action": "finalized", "km": total_km, "trip_id": trip_result.get("id")}
 
-    def _check_gps_stationary(self, gps_events: list, timeout_minutes: int = GPS_STATIONARY_TIMEOUT_MINUTES) -> bool:
-        """Check if car is stationary based on GPS data."""
-        if not gps_events or len(gps_events) < 2:
-            return False
+    # === Optimistic concurrency ===
 
-        now = datetime.utcnow()
-        recent_events = []
+    def _with_state_retry(self, user_id: str, handler: Callable[[], dict | None]) -> dict | None:
+        """
+        Run a read-modify-write handler, re-running it when the trip cache write conflicts.
 
-        for event in reversed(gps_events):
+        Each attempt re-reads the trip cache, so the retry sees the state the
+        competing request wrote.
+        """
+        for attempt in range(1, TRIP_STATE_MAX_ATTEMPTS + 1):
             try:
-                event_time = datetime.fromisoformat(event["timestamp"].replace("Z", "+00:00")).replace(tzinfo=None)
-                minutes_ago = (now - event_time).total_seconds() / 60
-                if minutes_ago <= timeout_minutes:
-                    recent_events.append(event)
-                else:
+                return handler()
+            except TripStateConflict as e:
+                self._count_conflict()
+                if attempt == TRIP_STATE_MAX_ATTEMPTS:
                     break
-            except (KeyError, ValueError):
-                continue
+                logger.warning(f"{e} - retrying (attempt {attempt + 1}/{TRIP_STATE_MAX_ATTEMPTS})")
+                time.sleep(TRIP_STATE_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+        with self._stats_lock:
+            self.trip_state_retries_exhausted += 1
+        logger.error(f"Trip state for {user_id} kept changing - giving up after {TRIP_STATE_MAX_ATTEMPTS} attempts")
+        return {"status": "conflict", "reason": "concurrent_update", "user": user_id}
+
+    def _count_conflict(self) -> None:
+        with self._stats_lock:
+            self.trip_state_conflicts += 1
+
+    def trip_state_stats(self) -> dict:
+        """Conflict counters since startup."""
+        with self._stats_lock:
+            return {"conflicts": self.trip_state_conflicts, "retries_exhausted": self.trip_state_retries_exhausted}
+
+    def _claim_finalization(self, cache: dict, user_id: str) -> None:
+        """
+        Mark the trip as being finalized before the trip record is created.
 
-        if len(recent_events) < 2:
+        The write carries the read's precondition, so of two requests racing
+        to finalize only one gets past this point; the other re-reads, sees
+        the claim and backs off.
+        """
+        if cache.get(TRIP_CACHE_VERSION) is None:
+            return  # Not read from Firestore (resumed or new trip) - nothing to race
+        cache["finalizing_at"] = datetime.utcnow().isoformat() + "Z"
+        set_trip_cache(cache, user_id)
+
+    def _finalization_claimed(self, cache: dict) -> bool:
+        claimed_at = cache.get("finalizing_at")
+        if not claimed_at:
             return False
+        return (datetime.utcnow() - self._parse_time(claimed_at)).total_seconds() < TRIP_FINALIZE_CLAIM_SECONDS
+
+    def _fresh_points(self, cache: dict, points: list[dict], point_times: list[str]) -> tuple[list[dict], list[str]]:
+        """Drop (time-sorted) points recorded before the trip's last event; a late batch must not rewind the trail."""
+        last_event = gps_event_log.last(cache)
+        if not last_event or not last_event.get("timestamp"):
+            return points, point_times
+        last_time = self._parse_time(last_event["timestamp"])
+        fresh = [i for i, t in enumerate(point_times) if self._parse_time(t) >= last_time]
+        if len(fresh) < len(points):
+            logger.info(f"Dropping {len(points) - len(fresh)} GPS points older than the last event ({last_event['timestamp']})")
+        return [points[i] for i in fresh], [point_times[i] for i in fresh]
+
+    @staticmethod
+    def _replacing(cache: dict, stored: dict | None) -> dict:
+        """
+        Cache to write for a new or resumed trip.
 
-        first_event = recent_events[-1]
-        first_lat, first_lng = first_event.get("lat"), first_event.get("lng", first_event.get("lon"))
+        New trips are created, which fails if trip_start exists; when an
+        inactive document is still there, write over it under its version
+        instead (its other fields cleared).
+        """
+        if not stored:
+            return cache
+        replaced = dict.fromkeys(k for k in stored if k != TRIP_CACHE_VERSION)
+        replaced.update(cache)
+        replaced[TRIP_CACHE_VERSION] = stored.get(TRIP_CACHE_VERSION)
+        return replaced
+
+    def _save_trip_cache(self, cache: dict, user_id: str) -> None:
+        """Persist an active trip: flush full GPS event chunks, then write trip_start."""
+        gps_event_log.flush(cache, user_id)
+        set_trip_cache(cache, user_id)
 
-        for event in recent_events:
-            lat, lng = event.get("lat"), event.get("lng", event.get("lon"))
-            if lat and lng and first_lat and first_lng:
-                distance = haversine(first_lat, first_lng, lat, lng)
-                if distance > GPS_STATIONARY_RADIUS_METERS:
-                    return False
+    def _check_gps_stationary(
+        self,
+        gps_events: list,
+        timeout_minutes: int = GPS_STATIONARY_TIMEOUT_MINUTES,
+        now: datetime | None = None,
+        window: dict | None = None,
+    ) -> bool:
+        """
+        Check if car is stationary based on GPS data (window ends at now, default current time).
 
-        logger.info(f"GPS stationary detected: {len(recent_events)} events within {GPS_STATIONARY_RADIUS_METERS}m for {timeout_minutes} min")
-        return True
+        Uses the trip's running window (cache["gps_window"]) when given;
+        otherwise one is built from gps_events.
+        """
+        if window is None or window["timeout_s"] != timeout_minutes * 60:
+            window = stationary_detector.from_events(gps_events or [], timeout_minutes)
+
+        now = now or datetime.utcnow()
+        stationary, count = stationary_detector.is_stationary(window, now.replace(tzinfo=timezone.utc).timestamp())
+        if stationary:
+            logger.info(f"GPS stationary detected: {count} events within {GPS_STATIONARY_RADIUS_METERS}m for {timeout_minutes} min")
+        return stationary
+
+    @staticmethod
+    def _point_timestamp(value, now: datetime) -> str:
+        """Device timestamp (datetime or ISO string) as naive-UTC ISO with Z; server time if missing or in the future."""
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                value = None
+        if value is None:
+            return now.isoformat() + "Z"
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        # Clock skew: never record events after server time
+        return min(value, now).isoformat() + "Z"
+
+    def _gps_only_trail(self, cache: dict, user_id: str, min_km: float, events: list[dict] | None = None) -> tuple[list[dict] | None, float]:
+        """
+        Phone GPS trail and distance for GPS-only finalization.
+
+        Trips whose running GPS distance is below min_km are rejected without
+        loading or scanning the trail; the rest are measured with
+        calculate_gps_distance (OSRM, haversine fallback).
+
+        Args:
+            cache: Trip cache
+            user_id: User email
+            min_km: Minimum trip distance
+            events: Already loaded events (loaded on demand otherwise)
+
+        Returns:
+            (trail, distance km); trail is None if the trip is too short
+        """
+        estimate = gps_event_log.distance_km(cache, user_id)
+        if estimate < min_km:
+            return None, estimate
+
+        events = events if events is not None else gps_event_log.load(cache, user_id)
+        phone_gps_trail = self._clean_trail(gps_event_log.phone_trail(events))
+        gps_distance = calculate_gps_distance(phone_gps_trail)
+        if gps_distance < min_km:
+            return None, gps_distance
+        return phone_gps_trail, gps_distance
+
+    @staticmethod
+    def _clean_trail(points: list[dict]) -> list[dict]:
+        """Drop speed outliers and simplify a finalized trail (fewer OSRM chunks, smaller trip docs)."""
+        points = reject_outliers(points, GPS_MAX_SPEED_MPS, GPS_OUTLIER_MAX_RUN)
+        return simplify_trail(points, TRAIL_SIMPLIFY_TOLERANCE_METERS)
+
+    @staticmethod
+    def _parse_time(timestamp: str) -> datetime:
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).replace(tzinfo=None)
 
     def _finalize_paused_trip(self, user_id: str, paused_cache: dict):
         """Finalize a paused trip that exceeded the resume window."""
         from .trip_service import trip_service
 
-        gps_events = paused_cache.get("gps_events", [])
-        if len(gps_events) < 2:
+        if gps_event_log.count(paused_cache) < 2:
             logger.info(f"Paused trip for {user_id} has insufficient GPS points - skipping")
             return
 
-        # Calculate GPS distance
-        phone_gps_trail = [
-            {"lat": e["lat"], "lng": e["lng"], "timestamp": e["timestamp"]}
-            for e in gps_events if not e.get("is_skip")
-        ]
-
-        if len(phone_gps_trail) < 2:
+        if gps_event_log.metrics(paused_cache, user_id)["count"] < 2:
             logger.info(f"Paused trip for {user_id} has insufficient non-skip GPS points - skipping")
             return
 
-        gps_distance = calculate_gps_distance(phone_gps_trail)
-        if gps_distance < 0.5:  # Minimum 500m
+        phone_gps_trail, gps_distance = self._gps_only_trail(paused_cache, user_id, min_km=0.5)  # Minimum 500m
+        if phone_gps_trail is None:
             logger.info(f"Paused trip for {user_id} distance too short ({gps_distance:.2f} km) - skipping")
             return
 
@@ -124,6 +124,9 @@ resource "google_cloud_run_v2_service" "api" {
       min_instance_count = 0
       max_instance_count = 1
     }
+
+    # Requests per instance; WEBHOOK_MAX_CONCURRENCY (api/config.py) matches it
+    max_instance_request_concurrency = 80
   }
 
   depends_on = [
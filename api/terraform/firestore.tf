@@ -91,3 +91,29 @@ resource "google_firestore_index" "trips_by_car_user_and_sort_date" {
     order      = "DESCENDING"
   }
 }
+
+# TTL policy: GPS event chunks (users/{uid}/gps_logs/{log_id}/chunks) are
+# deleted once expire_at passes (GPS_EVENT_LOG_TTL_DAYS after the write). This
+# also removes chunks of finished or cancelled trips and leftovers of chunk
+# writes that lost the trip cache race.
+resource "google_firestore_field" "gps_chunks_ttl" {
+  database   = google_firestore_database.main.name
+  collection = "chunks"
+  field      = "expire_at"
+
+  ttl_config {}
+
+  # Only read by the TTL sweeper - skip the single-field indexes
+  index_config {}
+}
+
+# TTL policy: Firestore tier of the reverse-geocode cache (GEOCODE_CACHE_TTL_DAYS)
+resource "google_firestore_field" "geocode_cache_ttl" {
+  database   = google_firestore_database.main.name
+  collection = "geocode_cache"
+  field      = "expire_at"
+
+  ttl_config {}
+
+  index_config {}
+}
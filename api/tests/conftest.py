@@ -6,6 +6,63 @@ from tests.mocks.mock_firestore import MockFirestore
 from tests.mocks.mock_car_provider import MockCarProvider
 
 
+@pytest.fixture(autouse=True)
+def reset_car_service_state():
+    """Start every test with an empty credentials cache and provider pool."""
+    from services.car_service import _credential_cache, _provider_pool
+    _credential_cache.clear()
+    _provider_pool.clear()
+    yield
+    _credential_cache.clear()
+    _provider_pool.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_vwgroup_token_store():
+    """Start every test without in-memory VW Group tokens."""
+    from car_providers.vwgroup import vwgroup_token_store
+    vwgroup_token_store.clear()
+    yield
+    vwgroup_token_store.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_tesla_token_cache():
+    """Start every test without in-memory Tesla tokens."""
+    from car_providers.tesla import _token_cache
+    _token_cache.clear()
+    yield
+    _token_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_geocode_cache():
+    """Start every test with an empty in-memory geocode cache."""
+    from services.location_service import location_service
+    location_service.reset_geocode_cache()
+    yield
+    location_service.reset_geocode_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_routing_cache():
+    """Start every test with an empty OSRM route cache."""
+    from utils.routing import routing_client
+    routing_client.clear_cache()
+    yield
+    routing_client.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def reset_enrichment_queue():
+    """In-memory enrichment queue; jobs only run when a test drains them."""
+    from services.enrichment_queue import MemoryEnrichmentQueue
+    from services.trip_service import trip_service
+    trip_service.configure_enrichment(MemoryEnrichmentQueue(), background=False)
+    yield
+    trip_service.configure_enrichment(MemoryEnrichmentQueue(), background=False)
+
+
 @pytest.fixture
 def mock_db():
     """Provide a mock Firestore database."""
@@ -1,5 +1,6 @@
 """Mock car provider for testing car detection and status checks."""
 
+from collections.abc import Collection
 from typing import Any
 from car_providers.base import CarProvider, CarData, VehicleState
 
@@ -27,6 +28,7 @@ class MockCarProvider(CarProvider):
         self._odometer: float = 10000.0
         self._lat: float | None = None
         self._lng: float | None = None
+        self.requested_fields: list[Collection[str] | None] = []  # fields of each get_data call
 
     @property
     def brand(self) -> str:
@@ -81,6 +83,7 @@ class MockCarProvider(CarProvider):
         self._odometer = 10000.0
         self._lat = None
         self._lng = None
+        self.requested_fields = []
 
     # === CarProvider Interface ===
 
@@ -93,7 +96,8 @@ class MockCarProvider(CarProvider):
     def disconnect(self) -> None:
         self._is_connected = False
 
-    def get_data(self) -> CarData:
+    def get_data(self, fields: Collection[str] | None = None) -> CarData:
+        self.requested_fields.append(fields)
         if self._should_fail:
             raise Exception(self._fail_message)
 
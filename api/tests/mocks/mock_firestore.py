@@ -1,15 +1,45 @@
 """Mock Firestore client for testing."""
 
 from typing import Any
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from google.api_core import exceptions as google_exceptions
+
+
+class MockStorage(dict):
+    """Document data by path, plus each document's last update time."""
+
+    def __init__(self):
+        super().__init__()
+        self.update_times: dict[str, datetime] = {}
+        self._clock = 0
+
+    def touch(self, path: str) -> datetime:
+        """Record a write; every write gets a distinct, increasing update time."""
+        self._clock += 1
+        self.update_times[path] = datetime(2024, 1, 1) + timedelta(microseconds=self._clock)
+        return self.update_times[path]
+
+
+class MockWriteResult:
+    def __init__(self, update_time: datetime | None):
+        self.update_time = update_time
+
+
+class MockWriteOption:
+    def __init__(self, last_update_time: datetime | None = None, exists: bool | None = None):
+        self.last_update_time = last_update_time
+        self.exists = exists
 
 
 class MockDocumentSnapshot:
     """Mock Firestore document snapshot."""
 
-    def __init__(self, data: dict | None, doc_id: str = "trip_start"):
+    def __init__(self, data: dict | None, doc_id: str = "trip_start", update_time: datetime | None = None, reference: "MockDocumentReference | None" = None):
         self._data = data
         self.id = doc_id
+        self.update_time = update_time
+        self.reference = reference
 
     @property
     def exists(self) -> bool:
@@ -28,23 +58,83 @@ class MockDocumentReference:
 
     def get(self) -> MockDocumentSnapshot:
         data = self._storage.get(self._path)
-        return MockDocumentSnapshot(data, self._path.split("/")[-1])
+        return MockDocumentSnapshot(data, self._path.split("/")[-1], self._update_times().get(self._path), self)
 
-    def set(self, data: dict, merge: bool = False) -> None:
+    def set(self, data: dict, merge: bool = False) -> MockWriteResult:
         if merge and self._path in self._storage:
             self._storage[self._path] = {**self._storage[self._path], **data}
         else:
             self._storage[self._path] = data
+        return MockWriteResult(self._touch())
 
-    def update(self, data: dict) -> None:
+    def create(self, data: dict) -> MockWriteResult:
+        if self._path in self._storage:
+            raise google_exceptions.AlreadyExists(f"Document already exists: {self._path}")
+        self._storage[self._path] = data
+        return MockWriteResult(self._touch())
+
+    def update(self, data: dict, option: MockWriteOption | None = None) -> MockWriteResult:
+        if option is not None:
+            # Preconditions behave like Firestore: missing doc -> NotFound, stale -> FailedPrecondition
+            if self._path not in self._storage:
+                raise google_exceptions.NotFound(f"No document to update: {self._path}")
+            if option.last_update_time is not None and option.last_update_time != self._update_times().get(self._path):
+                raise google_exceptions.FailedPrecondition(f"Document changed: {self._path}")
         if self._path in self._storage:
             self._storage[self._path].update(data)
         else:
             self._storage[self._path] = data
+        return MockWriteResult(self._touch())
 
     def delete(self) -> None:
         if self._path in self._storage:
             del self._storage[self._path]
+        self._update_times().pop(self._path, None)
+
+    def _update_times(self) -> dict:
+        return getattr(self._storage, "update_times", {})
+
+    def _touch(self) -> datetime | None:
+        return self._storage.touch(self._path) if isinstance(self._storage, MockStorage) else None
+
+    def collection(self, name: str) -> "MockCollectionReference":
+        return MockCollectionReference(self._storage, f"{self._path}/{name}")
+
+
+class MockQuery:
+    """Mock Firestore query supporting where() filters and limit()."""
+
+    _OPS = {
+        "==": lambda a, b: a == b,
+        "!=": lambda a, b: a != b,
+        "<": lambda a, b: a is not None and a < b,
+        "<=": lambda a, b: a is not None and a <= b,
+        ">": lambda a, b: a is not None and a > b,
+        ">=": lambda a, b: a is not None and a >= b,
+    }
+
+    def __init__(self, collection: "MockCollectionReference", filters: list | None = None, limit: int | None = None):
+        self._collection = collection
+        self._filters = filters or []
+        self._limit = limit
+
+    def where(self, field_path: str | None = None, op_string: str | None = None, value: Any = None, *, filter=None) -> "MockQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return MockQuery(self._collection, self._filters + [(field_path, op_string, value)], self._limit)
+
+    def limit(self, count: int) -> "MockQuery":
+        return MockQuery(self._collection, self._filters, count)
+
+    def stream(self):
+        results = [
+            doc for doc in self._collection._stream_all()
+            if all(field in doc.to_dict() and self._OPS[op](doc.to_dict()[field], value) for field, op, value in self._filters)
+        ]
+        return iter(results[:self._limit] if self._limit is not None else results)
+
+    def get(self):
+        return list(self.stream())
 
 
 class MockCollectionReference:
@@ -63,24 +153,36 @@ class MockCollectionReference:
         doc_ref.set(data)
         return None, doc_ref
 
-    def stream(self):
-        """Yield documents in this collection."""
+    def _stream_all(self):
         prefix = self._path + "/"
-        for path, data in self._storage.items():
+        for path, data in list(self._storage.items()):
             if path.startswith(prefix) and path.count("/") == prefix.count("/"):
                 doc_id = path.split("/")[-1]
-                yield MockDocumentSnapshot(data, doc_id)
+                yield MockDocumentSnapshot(data, doc_id, getattr(self._storage, "update_times", {}).get(path), self.document(doc_id))
+
+    def stream(self):
+        """Yield documents in this collection."""
+        return self._stream_all()
+
+    def where(self, *args, **kwargs) -> MockQuery:
+        return MockQuery(self).where(*args, **kwargs)
+
+    def limit(self, count: int) -> MockQuery:
+        return MockQuery(self, limit=count)
 
 
 class MockFirestore:
     """Mock Firestore client for testing trip cache operations."""
 
     def __init__(self):
-        self._storage: dict[str, dict] = {}
+        self._storage = MockStorage()
 
     def collection(self, name: str) -> MockCollectionReference:
         return MockCollectionReference(self._storage, name)
 
+    def write_option(self, **kwargs) -> MockWriteOption:
+        return MockWriteOption(**kwargs)
+
     # === Test Helper Methods ===
 
     def set_trip_cache(self, user_id: str, cache: dict) -> None:
@@ -107,6 +209,7 @@ class MockFirestore:
     def reset(self) -> None:
         """Clear all stored data."""
         self._storage.clear()
+        self._storage.update_times.clear()
 
     def dump(self) -> dict:
         """Return all stored data for debugging."""
@@ -0,0 +1,173 @@
+"""Unit tests for the active trip index (active_trips collection).
+
+Tests verify:
+- set_trip_cache writes/removes the index entry with last_event_at
+- Pings write the entry only when end_triggered flips or last_event_at moves a step
+- get_all_active_trips reads only indexed users and filters stale trips
+- Orphaned index entries are cleaned up
+- rebuild_active_trip_index backfills from trip caches
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from tests.mocks.mock_firestore import MockFirestore
+
+
+def _ts(hours_ago: float) -> str:
+    return (datetime.utcnow() - timedelta(hours=hours_ago)).isoformat() + "Z"
+
+
+def _trip(hours_ago: float, **overrides) -> dict:
+    trip = {
+        "active": True,
+        "start_time": _ts(hours_ago + 1),
+        "gps_events": [{"lat": 51.9, "lng": 4.4, "timestamp": _ts(hours_ago), "is_skip": False}],
+    }
+    trip.update(overrides)
+    return trip
+
+
+@pytest.fixture
+def firestore():
+    """In-memory Firestore behind database.get_db."""
+    db = MockFirestore()
+    with patch("database.get_db", return_value=db):
+        yield db
+
+
+class TestIndexMaintenance:
+    """Tests for index writes from set_trip_cache."""
+
+    def test_active_trip_is_indexed(self, firestore):
+        """Writing an active trip creates an entry with the last event time."""
+        from database import set_trip_cache
+
+        trip = _trip(0.5)
+        set_trip_cache(trip, "user@test.com")
+
+        entry = firestore.collection("active_trips").document("user@test.com").get().to_dict()
+        expected = datetime.fromisoformat(trip["gps_events"][-1]["timestamp"].rstrip("Z"))
+        assert entry["last_event_at"] == expected
+        assert entry["end_triggered"] is False
+
+    def test_clearing_trip_removes_entry(self, firestore):
+        """Clearing (finalize, cancel or pause) removes the entry."""
+        from database import set_trip_cache
+
+        set_trip_cache(_trip(0.5), "user@test.com")
+        set_trip_cache(None, "user@test.com")
+
+        assert not firestore.collection("active_trips").document("user@test.com").get().exists
+
+    def test_trip_without_events_uses_start_time(self, firestore):
+        """Trips with no GPS events fall back to start_time."""
+        from database import set_trip_cache
+
+        set_trip_cache(_trip(3, gps_events=[]), "user@test.com")
+
+        entry = firestore.collection("active_trips").document("user@test.com").get().to_dict()
+        assert entry["last_event_at"] < datetime.utcnow() - timedelta(hours=3)
+
+
+    def _ping(self, trip, minutes):
+        """Append an event `minutes` after the trip's last one."""
+        last = datetime.fromisoformat(trip["gps_events"][-1]["timestamp"].rstrip("Z"))
+        stamp = (last + timedelta(minutes=minutes)).isoformat() + "Z"
+        trip["gps_events"].append({"lat": 51.9, "lng": 4.4, "timestamp": stamp, "is_skip": False})
+
+    def test_index_written_only_on_change(self, firestore):
+        """Pings within a step of the indexed time leave the entry alone."""
+        import database
+        from database import set_trip_cache, get_trip_cache
+        from config import ACTIVE_TRIP_INDEX_STEP_MINUTES
+
+        trip = _trip(1)
+        set_trip_cache(trip, "user@test.com")
+        index = firestore.collection("active_trips").document("user@test.com")
+        first = index.get().to_dict()["last_event_at"]
+
+        with patch("database._update_active_trip_index", wraps=database._update_active_trip_index) as update:
+            for _ in range(3):
+                trip = get_trip_cache("user@test.com")
+                self._ping(trip, 1)
+                set_trip_cache(trip, "user@test.com")
+            update.assert_not_called()
+
+            trip = get_trip_cache("user@test.com")
+            self._ping(trip, ACTIVE_TRIP_INDEX_STEP_MINUTES)
+            set_trip_cache(trip, "user@test.com")
+            assert update.call_count == 1
+
+            trip = get_trip_cache("user@test.com")
+            trip["end_triggered"] = _ts(0)
+            set_trip_cache(trip, "user@test.com")
+            assert update.call_count == 2
+
+        entry = index.get().to_dict()
+        assert entry["last_event_at"] == first + timedelta(minutes=3 + ACTIVE_TRIP_INDEX_STEP_MINUTES)
+        assert entry["end_triggered"] is True
+
+    def test_paused_trip_is_indexed_again_on_resume(self, firestore):
+        """A paused trip carries no index record, so resuming it writes the entry."""
+        from database import set_trip_cache, get_trip_cache, set_paused_trip, get_paused_trip
+
+        set_trip_cache(_trip(0.5), "user@test.com")
+        trip = get_trip_cache("user@test.com")
+        set_paused_trip(trip, "user@test.com")
+        set_trip_cache(None, "user@test.com")
+
+        resumed = get_paused_trip("user@test.com")
+        self._ping(resumed, 1)
+        set_trip_cache(resumed, "user@test.com")
+
+        assert firestore.collection("active_trips").document("user@test.com").get().exists
+
+
+class TestActiveTripQuery:
+    """Tests for get_all_active_trips."""
+
+    def test_stale_filter_uses_last_event_and_end_triggered(self, firestore):
+        """Only idle or end-triggered trips are returned for a stale query."""
+        from database import set_trip_cache, get_all_active_trips
+
+        set_trip_cache(_trip(3), "stale@test.com")
+        set_trip_cache(_trip(0.1), "driving@test.com")
+        set_trip_cache(_trip(0.1, end_triggered=_ts(0.1)), "ended@test.com")
+
+        stale = get_all_active_trips(stale_before=datetime.utcnow() - timedelta(hours=2))
+        everything = get_all_active_trips()
+
+        assert sorted(uid for uid, _ in stale) == ["ended@test.com", "stale@test.com"]
+        assert len(everything) == 3
+
+    def test_users_without_trips_are_not_read(self, firestore):
+        """Users without an index entry are never touched."""
+        from database import get_all_active_trips
+
+        # Trip cache with no index entry (e.g. written before the index existed)
+        firestore.set_trip_cache("legacy@test.com", _trip(3))
+
+        assert get_all_active_trips() == []
+
+    def test_orphaned_entry_removed(self, firestore):
+        """Index entries whose trip cache is gone are deleted."""
+        from database import set_trip_cache, get_all_active_trips
+
+        set_trip_cache(_trip(3), "user@test.com")
+        firestore.clear_trip_cache("user@test.com")
+
+        assert get_all_active_trips() == []
+        assert not firestore.collection("active_trips").document("user@test.com").get().exists
+
+    def test_rebuild_indexes_existing_trips(self, firestore):
+        """Backfill indexes active trip caches found by scanning users."""
+        from database import rebuild_active_trip_index, get_all_active_trips
+
+        firestore.collection("users").document("legacy@test.com").set({"email": "legacy@test.com"})
+        firestore.collection("users").document("idle@test.com").set({"email": "idle@test.com"})
+        firestore.set_trip_cache("legacy@test.com", _trip(3))
+
+        assert rebuild_active_trip_index() == 1
+        assert [uid for uid, _ in get_all_active_trips()] == ["legacy@test.com"]
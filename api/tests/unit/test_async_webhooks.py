@@ -0,0 +1,83 @@
+"""Unit tests for the asynchronous webhook path.
+
+Tests verify:
+- Webhook routes run the state machine on a bounded set of worker threads
+- Pings beyond the limit wait without blocking the event loop
+"""
+
+import asyncio
+import threading
+import time
+
+import anyio
+import httpx
+import pytest
+from unittest.mock import patch
+
+
+@pytest.fixture
+def app():
+    from main import app
+    return app
+
+
+@pytest.fixture
+def mock_token_service():
+    with patch("routes.webhooks.token_service") as mock:
+        mock.verify_access_token.return_value = {"email": "test@example.com"}
+        yield mock
+
+
+class TestAsyncWebhookRoutes:
+    """Tests for async webhook dispatch."""
+
+    async def test_concurrent_pings_bounded_by_limiter(self, app, mock_token_service):
+        """16 slow pings use at most 4 threads and the rest of the API stays responsive."""
+        lock = threading.Lock()
+        running = {"now": 0, "max": 0}
+
+        def slow_ping(user_id, lat, lng, car_id, device_id):
+            with lock:
+                running["now"] += 1
+                running["max"] = max(running["max"], running["now"])
+            time.sleep(0.1)
+            with lock:
+                running["now"] -= 1
+            return {"status": "ping_recorded", "user": user_id}
+
+        transport = httpx.ASGITransport(app=app)
+        with patch("routes.webhooks.webhook_service") as service, \
+             patch("routes.webhooks.webhook_threads", anyio.CapacityLimiter(4)):
+            service.handle_ping.side_effect = slow_ping
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await client.get("/")  # Warm up (first request pays one-off setup)
+                pings = [
+                    client.post("/webhook/ping", json={"lat": 51.9, "lng": 4.4}, headers={"Authorization": "Bearer t"})
+                    for _ in range(16)
+                ]
+                tasks = [asyncio.ensure_future(p) for p in pings]
+                await asyncio.sleep(0.05)
+
+                started = time.monotonic()
+                health = await client.get("/")
+                health_latency = time.monotonic() - started
+
+                responses = await asyncio.gather(*tasks)
+
+        assert all(r.status_code == 200 for r in responses)
+        assert responses[0].json()["user"] == "test@example.com"
+        assert running["max"] == 4
+        assert health.status_code == 200
+        assert health_latency < 0.1
+
+    async def test_invalid_token_rejected_in_worker(self, app):
+        """Authentication errors raised on the worker thread still return 401."""
+        transport = httpx.ASGITransport(app=app)
+        with patch("routes.webhooks.token_service") as tokens, \
+             patch("routes.webhooks.webhook_service") as service:
+            tokens.verify_access_token.return_value = None
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                response = await client.get("/webhook/status", headers={"Authorization": "Bearer bad"})
+
+        assert response.status_code == 401
+        service.get_status.assert_not_called()
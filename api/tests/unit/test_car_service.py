@@ -329,6 +329,29 @@ class TestCheckCarDrivingStatus:
         assert result["lat"] == 51.95
         assert result["lng"] == 4.50
 
+    def test_requests_driving_fields_only(self, mock_audi_provider, mock_car_provider):
+        """The ping path asks the provider for odometer, state and position only."""
+        from services.car_service import car_service
+        from car_providers import DRIVING_FIELDS
+
+        mock_car_provider.set_driving(odometer=10510)
+        mock_audi_provider.return_value = mock_car_provider
+
+        car_info = {
+            "car_id": "audi-123",
+            "name": "Audi A4",
+            "brand": "audi",
+            "credentials": {
+                "oauth_completed": True,
+                "access_token": "token123",
+            },
+        }
+
+        result = car_service.check_car_driving_status(car_info)
+
+        assert result["odometer"] == 10510
+        assert mock_car_provider.requested_fields == [DRIVING_FIELDS]
+
 
 class TestFindDrivingCar:
     """Tests for find_driving_car function."""
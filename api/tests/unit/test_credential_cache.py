@@ -0,0 +1,231 @@
+"""Unit tests for the decrypted credential cache.
+
+Tests verify:
+- TTLCache expiry, LRU eviction and invalidation
+- Concurrent loads for the same key coalesce into one loader call
+- get_cars_with_credentials skips Firestore/KMS on cache hits
+- Credential writes invalidate the cached entry
+"""
+
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+class TestTTLCache:
+    """Tests for utils.cache.TTLCache."""
+
+    def test_hit_after_load(self):
+        """Second lookup is served from cache and credits the saved cost."""
+        from utils.cache import TTLCache
+
+        cache = TTLCache(ttl_seconds=60, max_entries=10)
+        loader = MagicMock(return_value=("value", 3))
+
+        assert cache.get_or_load("k", loader) == "value"
+        assert cache.get_or_load("k", loader) == "value"
+
+        assert loader.call_count == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["load_cost"] == 3
+        assert stats["saved_cost"] == 3
+
+    def test_expired_entry_is_reloaded(self):
+        """Entries older than the TTL are loaded again."""
+        from utils.cache import TTLCache
+
+        cache = TTLCache(ttl_seconds=60, max_entries=10)
+        loader = MagicMock(return_value=("value", 1))
+
+        with patch("utils.cache.time.monotonic", return_value=1000.0):
+            cache.get_or_load("k", loader)
+        with patch("utils.cache.time.monotonic", return_value=1061.0):
+            cache.get_or_load("k", loader)
+
+        assert loader.call_count == 2
+
+    def test_lru_eviction(self):
+        """Least recently used entry is evicted over capacity."""
+        from utils.cache import TTLCache
+
+        cache = TTLCache(ttl_seconds=60, max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # a is now most recent
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_loader_error_is_not_cached(self):
+        """A failing loader propagates and the next call retries."""
+        from utils.cache import TTLCache
+
+        cache = TTLCache(ttl_seconds=60, max_entries=10)
+        loader = MagicMock(side_effect=[RuntimeError("kms down"), ("value", 1)])
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_load("k", loader)
+        assert cache.get_or_load("k", loader) == "value"
+
+    def test_concurrent_loads_coalesce(self):
+        """Threads missing the same key share a single loader call."""
+        from utils.cache import TTLCache
+
+        cache = TTLCache(ttl_seconds=60, max_entries=10)
+        release = threading.Event()
+        calls = []
+
+        def slow_loader():
+            calls.append(1)
+            release.wait(timeout=5)
+            return "value", 1
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load("k", slow_loader)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        # Wait until all followers are queued behind the leader
+        deadline = time.time() + 5
+        while cache.stats()["coalesced"] < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert len(calls) == 1
+        assert results == ["value"] * 5
+        assert cache.stats()["coalesced"] == 4
+
+    def test_invalidate_during_load_discards_result(self):
+        """A load that races with invalidation is returned but not cached."""
+        from utils.cache import TTLCache
+
+        cache = TTLCache(ttl_seconds=60, max_entries=10)
+
+        def loader():
+            cache.invalidate("k")
+            return "stale", 1
+
+        assert cache.get_or_load("k", loader) == "stale"
+        assert len(cache) == 0
+
+    def test_invalidate_where_drops_matching_keys(self):
+        """Only keys matching the predicate are removed."""
+        from utils.cache import TTLCache
+
+        cache = TTLCache(ttl_seconds=60, max_entries=10)
+        cache.put(("alice", "car-1"), 1)
+        cache.put(("alice", "car-2"), 2)
+        cache.put(("bob", "car-1"), 3)
+
+        assert cache.invalidate_where(lambda key: key[0] == "alice") == 2
+        assert cache.get(("alice", "car-1")) is None
+        assert cache.get(("bob", "car-1")) == 3
+
+
+class TestCarServiceCredentialCache:
+    """Tests for credential caching in CarService."""
+
+    @pytest.fixture
+    def mock_cars_ref(self):
+        """Firestore cars collection with one Audi car holding encrypted tokens."""
+        car_doc = MagicMock()
+        car_doc.id = "car-1"
+        car_doc.to_dict.return_value = {"name": "Audi", "brand": "audi"}
+
+        creds_doc = MagicMock()
+        creds_doc.exists = True
+        creds_doc.to_dict.return_value = {
+            "brand": "audi",
+            "oauth_completed": True,
+            "access_token_encrypted": "enc-a",
+            "refresh_token_encrypted": "enc-r",
+            "id_token_encrypted": "enc-i",
+        }
+
+        cars_ref = MagicMock()
+        cars_ref.stream.return_value = [car_doc]
+        cars_ref.document.return_value.collection.return_value.document.return_value.get.return_value = creds_doc
+        return cars_ref
+
+    @pytest.fixture
+    def mock_db(self, mock_cars_ref):
+        """Patch get_db to return the cars collection."""
+        with patch("services.car_service.get_db") as mock:
+            mock.return_value.collection.return_value.document.return_value.collection.return_value = mock_cars_ref
+            yield mock
+
+    @pytest.fixture
+    def mock_decrypt(self):
+        """Patch KMS decrypt."""
+        with patch("services.car_service.decrypt_string", side_effect=lambda v: f"plain-{v}") as mock:
+            yield mock
+
+    def test_second_ping_skips_firestore_and_kms(self, mock_db, mock_cars_ref, mock_decrypt):
+        """Repeated lookups reuse decrypted credentials."""
+        from services.car_service import car_service
+
+        first = car_service.get_cars_with_credentials("user@test.com")
+        second = car_service.get_cars_with_credentials("user@test.com")
+
+        assert first[0]["credentials"]["access_token"] == "plain-enc-a"
+        assert second[0]["credentials"]["access_token"] == "plain-enc-a"
+        assert mock_decrypt.call_count == 3
+        creds_get = mock_cars_ref.document.return_value.collection.return_value.document.return_value.get
+        assert creds_get.call_count == 1
+
+        stats = car_service.credential_cache_stats()
+        assert stats["hits"] == 1
+        assert stats["kms_calls"] == 3
+        assert stats["kms_calls_saved"] == 3
+
+    def test_cached_credentials_are_copies(self, mock_db, mock_decrypt):
+        """Mutating a returned credentials dict does not poison the cache."""
+        from services.car_service import car_service
+
+        first = car_service.get_cars_with_credentials("user@test.com")
+        first[0]["credentials"]["access_token"] = "mutated"
+        second = car_service.get_cars_with_credentials("user@test.com")
+
+        assert second[0]["credentials"]["access_token"] == "plain-enc-a"
+
+    def test_delete_credentials_invalidates(self, mock_db, mock_decrypt):
+        """delete_car_credentials forces the next lookup to reload."""
+        from services.car_service import car_service
+
+        car_service.get_cars_with_credentials("user@test.com")
+        car_service.delete_car_credentials("user@test.com", "car-1")
+        car_service.get_cars_with_credentials("user@test.com")
+
+        assert mock_decrypt.call_count == 6
+
+    def test_invalidate_user_credentials(self, mock_db, mock_decrypt):
+        """Dropping a user's credentials forces the next lookup to reload."""
+        from services.car_service import car_service
+
+        car_service.get_cars_with_credentials("user@test.com")
+        assert car_service.invalidate_user_credentials("user@test.com") == 1
+        car_service.get_cars_with_credentials("user@test.com")
+
+        assert mock_decrypt.call_count == 6
+
+    def test_save_credentials_invalidates(self, mock_db, mock_decrypt):
+        """save_car_credentials forces the next lookup to reload."""
+        from services.car_service import car_service
+
+        car_service.get_cars_with_credentials("user@test.com")
+        with patch("utils.encryption.encrypt_string", return_value="enc"):
+            car_service.save_car_credentials("user@test.com", "car-1", {"brand": "audi", "password": "pw"})
+        car_service.get_cars_with_credentials("user@test.com")
+
+        assert mock_decrypt.call_count == 6
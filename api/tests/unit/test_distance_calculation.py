@@ -25,7 +25,7 @@ class TestOSRMFallback:
             {"lat": 51.94, "lng": 4.49},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_get.return_value.json.return_value = {
                 "code": "Ok",
                 "routes": [{"distance": 5000}]  # 5km in meters
@@ -45,7 +45,7 @@ class TestOSRMFallback:
             {"lat": 51.93, "lng": 4.48},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             # Simulate OSRM error
             mock_get.return_value.json.return_value = {
                 "code": "InvalidQuery",
@@ -65,7 +65,7 @@ class TestOSRMFallback:
             {"lat": 51.93, "lng": 4.48},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.Timeout("Connection timed out")
 
             result = get_osrm_distance_from_trail(gps_trail)
@@ -81,7 +81,7 @@ class TestOSRMFallback:
             {"lat": 51.93, "lng": 4.48},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.ConnectionError("Network unreachable")
 
             result = get_osrm_distance_from_trail(gps_trail)
@@ -209,7 +209,7 @@ class TestCoordinateFormat:
             {"lat": 51.93, "lng": 4.48},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_get.return_value.json.return_value = {
                 "code": "Ok",
                 "routes": [{"distance": 1000}]
@@ -231,7 +231,7 @@ class TestCoordinateFormat:
             {"lat": 51.93, "lon": 4.48},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_get.return_value.json.return_value = {
                 "code": "Ok",
                 "routes": [{"distance": 1000}]
@@ -279,7 +279,7 @@ class TestOSRMChunking:
             for i in range(50)
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_get.return_value.json.return_value = {
                 "code": "Ok",
                 "routes": [{"distance": 10000}]  # 10km per chunk
@@ -313,7 +313,7 @@ class TestOSRMChunking:
                 mock.json.return_value = {"code": "Ok", "routes": [{"distance": 10000}]}
             return mock
 
-        with patch("utils.routing.requests.get", side_effect=mock_response):
+        with patch("utils.routing.routing_client.session.get", side_effect=mock_response):
             result = get_osrm_distance_from_trail(gps_trail)
 
             # Should return None because one chunk failed
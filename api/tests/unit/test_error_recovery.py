@@ -191,8 +191,10 @@ class TestNetworkErrors:
 
     @pytest.fixture
     def mock_load_custom_locations(self):
-        """Mock load_custom_locations."""
-        with patch("services.location_service.load_custom_locations"):
+        """Mock load_custom_locations and the persistent geocode cache tier."""
+        with patch("services.location_service.load_custom_locations"), \
+             patch("services.location_service.get_cached_geocode", return_value=None), \
+             patch("services.location_service.set_cached_geocode"):
             yield
 
     def test_geocode_failure_uses_coordinates(self, mock_config, mock_load_custom_locations):
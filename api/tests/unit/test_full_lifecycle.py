@@ -7,6 +7,8 @@ interaction between handle_start, handle_ping, and handle_end.
 Each test simulates a realistic trip scenario with multiple state transitions.
 """
 
+from datetime import datetime, timedelta
+
 import pytest
 from unittest.mock import patch, MagicMock
 
@@ -26,7 +28,9 @@ class TestNormalTripLifecycle:
             storage["cache"] = cache.copy() if cache else None
 
         with patch("services.webhook_service.get_trip_cache", side_effect=get_cache) as mock_get, \
-             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set:
+             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set, \
+             patch("services.webhook_service.POLL_SCHEDULER_ENABLED", False):
+            # Pings here stand for minutes of driving; poll every ping (see test_poll_scheduler)
             yield {"get": mock_get, "set": mock_set, "storage": storage}
 
     @pytest.fixture
@@ -193,7 +197,9 @@ class TestTripWithSkipLocationStop:
             storage["cache"] = cache.copy() if cache else None
 
         with patch("services.webhook_service.get_trip_cache", side_effect=get_cache) as mock_get, \
-             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set:
+             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set, \
+             patch("services.webhook_service.POLL_SCHEDULER_ENABLED", False):
+            # Pings here stand for minutes of driving; poll every ping (see test_poll_scheduler)
             yield {"get": mock_get, "set": mock_set, "storage": storage}
 
     @pytest.fixture
@@ -376,7 +382,9 @@ class TestTripWithAPIErrorFallback:
             storage["cache"] = cache.copy() if cache else None
 
         with patch("services.webhook_service.get_trip_cache", side_effect=get_cache) as mock_get, \
-             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set:
+             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set, \
+             patch("services.webhook_service.POLL_SCHEDULER_ENABLED", False):
+            # Pings here stand for minutes of driving; poll every ping (see test_poll_scheduler)
             yield {"get": mock_get, "set": mock_set, "storage": storage}
 
     @pytest.fixture
@@ -495,7 +503,9 @@ class TestTripCancelledNoCarFound:
             storage["cache"] = cache.copy() if cache else None
 
         with patch("services.webhook_service.get_trip_cache", side_effect=get_cache) as mock_get, \
-             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set:
+             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set, \
+             patch("services.webhook_service.POLL_SCHEDULER_ENABLED", False):
+            # Pings here stand for minutes of driving; poll every ping (see test_poll_scheduler)
             yield {"get": mock_get, "set": mock_set, "storage": storage}
 
     @pytest.fixture
@@ -564,7 +574,9 @@ class TestTripWithBluetoothCarIdentification:
             storage["cache"] = cache.copy() if cache else None
 
         with patch("services.webhook_service.get_trip_cache", side_effect=get_cache) as mock_get, \
-             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set:
+             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set, \
+             patch("services.webhook_service.POLL_SCHEDULER_ENABLED", False):
+            # Pings here stand for minutes of driving; poll every ping (see test_poll_scheduler)
             yield {"get": mock_get, "set": mock_set, "storage": storage}
 
     @pytest.fixture
@@ -656,3 +668,131 @@ class TestTripWithBluetoothCarIdentification:
             )
 
         mock_trip_service.finalize_trip_from_audi.assert_called_once()
+
+
+class _Clock(datetime):
+    """Server clock for webhook_service, advanced by the test."""
+
+    now = datetime(2024, 1, 19, 10, 0, 0)
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now
+
+
+class TestTripWithPollScheduler:
+    """Trip lifecycle with the adaptive poll scheduler on and a moving clock."""
+
+    @pytest.fixture
+    def mock_db(self):
+        """Mock database functions with stateful storage."""
+        storage = {"cache": None}
+
+        def get_cache(user_id):
+            return storage["cache"].copy() if storage["cache"] else None
+
+        def set_cache(cache, user_id):
+            storage["cache"] = cache.copy() if cache else None
+
+        with patch("services.webhook_service.get_trip_cache", side_effect=get_cache) as mock_get, \
+             patch("services.webhook_service.set_trip_cache", side_effect=set_cache) as mock_set, \
+             patch("services.webhook_service.get_paused_trip", return_value=None), \
+             patch("services.webhook_service.POLL_SCHEDULER_ENABLED", True), \
+             patch("services.webhook_service.datetime", _Clock):
+            _Clock.now = datetime(2024, 1, 19, 10, 0, 0)
+            yield {"get": mock_get, "set": mock_set, "storage": storage}
+
+    @pytest.fixture
+    def mock_car_service(self):
+        """Mock car service."""
+        with patch("services.webhook_service.car_service") as mock:
+            mock.get_car_id_by_device.return_value = None
+            mock.get_default_car_id.return_value = "car-123"
+            mock.get_cars_with_credentials.return_value = [
+                {"car_id": "car-123", "name": "Test Car", "brand": "audi"}
+            ]
+            mock.find_driving_car.return_value = (
+                {"car_id": "car-123", "name": "Test Car", "odometer": 10000, "is_parked": False},
+                "driving"
+            )
+            mock.get_last_parked_gps.return_value = {"lat": 51.90, "lng": 4.45, "odometer": 10000}
+            yield mock
+
+    @pytest.fixture
+    def mock_location_service(self):
+        """Mock location service (state machine and scheduler)."""
+        with patch("services.webhook_service.location_service") as mock, \
+             patch("services.poll_scheduler.location_service", mock):
+            mock.is_skip_location.return_value = False
+            mock.is_near_known_location.return_value = False
+            yield mock
+
+    @pytest.fixture
+    def mock_trip_service(self):
+        """Mock trip service."""
+        with patch("services.webhook_service.trip_service") as mock:
+            mock.finalize_trip_from_audi.return_value = {"id": "trip-sched-001"}
+            yield mock
+
+    @staticmethod
+    def _status(odometer, is_parked, lat):
+        return {
+            "car_id": "car-123",
+            "name": "Test Car",
+            "odometer": odometer,
+            "is_parked": is_parked,
+            "state": "parked" if is_parked else "driving",
+            "lat": lat,
+            "lng": 4.45,
+        }
+
+    def _ping_at(self, minute, lat, seconds=0):
+        from services.webhook_service import webhook_service
+
+        _Clock.now = datetime(2024, 1, 19, 10, 0, 0) + timedelta(minutes=minute, seconds=seconds)
+        return webhook_service.handle_ping(user_id="test@example.com", lat=lat, lng=4.45)
+
+    def test_parking_confirmed_without_delay(
+        self, mock_db, mock_car_service, mock_location_service, mock_trip_service
+    ):
+        """Driving pings skip the vendor API; parked confirmation polls every minute and finalizes."""
+        check = mock_car_service.check_car_driving_status
+
+        # Minute 0: start (polls for the odometer). Pings every minute at ~10 m/s (0.0054 deg lat = 600 m)
+        check.return_value = self._status(10000, False, 51.90)
+        assert self._ping_at(0, 51.90)["status"] == "trip_started"
+        assert check.call_count == 1
+
+        # Driving interval is 180 s: the next two pings only record GPS
+        assert self._ping_at(1, 51.9054)["poll_deferred"] == "driving"
+        assert self._ping_at(2, 51.9108)["poll_deferred"] == "driving"
+        assert check.call_count == 1
+
+        check.return_value = self._status(10003, False, 51.9162)
+        assert self._ping_at(3, 51.9162)["status"] == "moving"
+        assert check.call_count == 2
+
+        # Car parks; the phone stops with it. Still inside the driving interval
+        check.return_value = self._status(10003, True, 51.93)
+        assert self._ping_at(4, 51.9216)["poll_deferred"] == "driving"
+        assert self._ping_at(5, 51.93)["poll_deferred"] == "driving"
+
+        # Minute 6: interval due - first parked poll
+        assert self._ping_at(6, 51.93)["parked_count"] == 1
+
+        # Confirming parked: a ping 30 s later waits, but keeps the count
+        result = self._ping_at(6, 51.93, seconds=30)
+        assert result["poll_deferred"] == "confirming_state"
+        assert mock_db["storage"]["cache"]["parked_count"] == 1
+
+        # Every ping a minute after the last poll confirms
+        assert self._ping_at(7, 51.93)["parked_count"] == 2
+        mock_trip_service.finalize_trip_from_audi.assert_not_called()
+        result = self._ping_at(8, 51.93)
+
+        assert result["status"] == "finalized"
+        assert check.call_count == 5
+        call_kwargs = mock_trip_service.finalize_trip_from_audi.call_args[1]
+        assert call_kwargs["start_odo"] == 10000
+        assert call_kwargs["end_odo"] == 10003
+        assert mock_db["storage"]["cache"] is None
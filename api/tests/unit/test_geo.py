@@ -4,6 +4,7 @@ Tests verify:
 - haversine() distance calculation between coordinates
 - get_gps_distance_from_trail() straight-line distance with correction
 - calculate_gps_distance() OSRM-first with haversine fallback
+- Array kernels match the scalar haversine
 """
 
 import pytest
@@ -297,3 +298,32 @@ class TestGeoEdgeCases:
 
         # Should only count the last segment
         assert 1.0 < result < 1.5
+
+
+class TestArrayKernels:
+    """Tests for the NumPy array kernels."""
+
+    LATS = [51.90, 51.91, 51.9225, 52.3676]
+    LNGS = [4.50, 4.50, 4.4792, 4.9041]
+
+    def test_path_distances_match_scalar(self):
+        from utils.geo import haversine, path_distances
+
+        result = path_distances(self.LATS, self.LNGS)
+
+        expected = [haversine(self.LATS[i], self.LNGS[i], self.LATS[i + 1], self.LNGS[i + 1]) for i in range(3)]
+        assert result.shape == (3,)
+        assert result.tolist() == pytest.approx(expected, rel=1e-12)
+
+    def test_path_distances_short_path(self):
+        from utils.geo import path_distances
+
+        assert path_distances([51.9], [4.5]).size == 0
+
+    def test_distances_from_match_scalar(self):
+        from utils.geo import distances_from, haversine
+
+        result = distances_from(51.9225, 4.4792, self.LATS, self.LNGS)
+
+        expected = [haversine(51.9225, 4.4792, lat, lng) for lat, lng in zip(self.LATS, self.LNGS)]
+        assert result.tolist() == pytest.approx(expected, rel=1e-12, abs=1e-9)
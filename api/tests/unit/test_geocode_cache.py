@@ -0,0 +1,111 @@
+"""Unit tests for the reverse-geocode cache.
+
+Tests verify:
+- geohash cells match the reference encoding and bucket nearby points
+- Repeated lookups in the same cell hit memory, not the Google API
+- The Firestore tier serves lookups after a cold start
+- Failed lookups are not cached
+"""
+
+import pytest
+from unittest.mock import patch
+
+from tests.mocks.mock_firestore import MockFirestore
+
+
+GOOGLE_OK = {
+    "status": "OK",
+    "results": [{
+        "address_components": [
+            {"types": ["route"], "long_name": "Coolsingel"},
+            {"types": ["locality"], "long_name": "Rotterdam"},
+        ]
+    }],
+}
+
+
+@pytest.fixture
+def firestore():
+    """In-memory Firestore behind database.get_db."""
+    db = MockFirestore()
+    with patch("database.get_db", return_value=db):
+        yield db
+
+
+@pytest.fixture
+def mock_config():
+    """No known locations, Google API key configured."""
+    with patch("services.location_service.CONFIG", {
+        "locations": {},
+        "skip_location": {"lat": 0, "lon": 0, "radius": 0},
+        "maps_api_key": "test-key",
+    }), patch("services.location_service.load_custom_locations"):
+        yield
+
+
+@pytest.fixture
+def mock_google():
+    with patch("services.location_service.requests.get") as mock_get:
+        mock_get.return_value.json.return_value = GOOGLE_OK
+        yield mock_get
+
+
+class TestGeohash:
+    """Tests for utils.geo.geohash."""
+
+    def test_reference_value(self):
+        """Matches the published geohash for a known point."""
+        from utils.geo import geohash
+
+        assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+    def test_nearby_points_share_cell(self):
+        """Points a few meters apart map to the same 8-char cell; distant points do not."""
+        from utils.geo import geohash
+
+        assert geohash(51.92251, 4.47920) == geohash(51.92253, 4.47923)
+        assert geohash(51.92251, 4.47920) != geohash(51.93, 4.47920)
+
+
+class TestGeocodeCache:
+    """Tests for cached LocationService.reverse_geocode."""
+
+    def test_same_cell_uses_memory_tier(self, firestore, mock_config, mock_google):
+        """A second lookup a few meters away does not call Google."""
+        from services.location_service import location_service
+
+        first = location_service.reverse_geocode(51.92251, 4.47920)
+        second = location_service.reverse_geocode(51.92253, 4.47923)
+
+        assert first["address"] == second["address"] == "Coolsingel, Rotterdam"
+        assert second["lat"] == 51.92253
+        assert mock_google.call_count == 1
+        stats = location_service.geocode_cache_stats()
+        assert stats["hits"] == 1
+        assert stats["api_calls"] == 1
+        assert stats["api_calls_saved"] == 1
+
+    def test_firestore_tier_survives_cold_start(self, firestore, mock_config, mock_google):
+        """After the memory tier is dropped, the address comes from Firestore."""
+        from services.location_service import location_service
+
+        location_service.reverse_geocode(51.92251, 4.47920)
+        location_service.reset_geocode_cache()
+        result = location_service.reverse_geocode(51.92251, 4.47920)
+
+        assert result["address"] == "Coolsingel, Rotterdam"
+        assert mock_google.call_count == 1
+        assert location_service.geocode_cache_stats()["firestore_hits"] == 1
+
+    def test_failed_lookup_not_cached(self, firestore, mock_config, mock_google):
+        """ZERO_RESULTS falls back to coordinates and is retried next time."""
+        from services.location_service import location_service
+
+        mock_google.return_value.json.return_value = {"status": "ZERO_RESULTS", "results": []}
+        first = location_service.reverse_geocode(51.92251, 4.47920)
+        mock_google.return_value.json.return_value = GOOGLE_OK
+        second = location_service.reverse_geocode(51.92251, 4.47920)
+
+        assert first["address"] == "51.9225, 4.4792"
+        assert second["address"] == "Coolsingel, Rotterdam"
+        assert mock_google.call_count == 2
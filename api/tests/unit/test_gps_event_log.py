@@ -0,0 +1,266 @@
+"""Unit tests for chunked GPS event storage.
+
+Tests verify:
+- Inline trips keep every event in gps_events (legacy behavior)
+- Chunked trips flush full chunks and keep only a bounded tail inline
+- load() reassembles the full event list in order, from the chunks the
+  trip cache references
+- The webhook state machine works unchanged on chunked trips
+- Running metrics are maintained per event and replace trail scans
+"""
+
+import pytest
+from unittest.mock import patch
+
+from tests.mocks.mock_firestore import MockFirestore
+
+
+def _event(i: int) -> dict:
+    """~111 m every 2 s (200 km/h, below GPS_MAX_SPEED_MPS)."""
+    return {"lat": 51.9 + i * 0.001, "lng": 4.4, "timestamp": f"2024-01-19T10:{2 * i // 60:02d}:{2 * i % 60:02d}Z", "is_skip": False}
+
+
+@pytest.fixture
+def firestore():
+    """In-memory Firestore behind database.get_db."""
+    db = MockFirestore()
+    with patch("database.get_db", return_value=db):
+        yield db
+
+
+@pytest.fixture
+def chunked():
+    """Chunked storage with small chunks for testing."""
+    with patch("services.gps_event_log.GPS_EVENT_STORAGE", "chunked"), \
+         patch("services.gps_event_log.GPS_EVENT_CHUNK_SIZE", 10), \
+         patch("services.gps_event_log.GPS_EVENT_TAIL_SIZE", 4):
+        yield
+
+
+class TestInlineStorage:
+    """Tests for the default inline mode."""
+
+    def test_inline_trip_has_no_log_pointers(self):
+        """Inline caches hold the events and running metrics only."""
+        from services.gps_event_log import gps_event_log
+
+        cache = {}
+        gps_event_log.start(cache)
+        gps_event_log.append(cache, _event(0))
+
+        assert set(cache) == {"gps_events", "gps_metrics", "gps_window"}
+        assert cache["gps_events"] == [_event(0)]
+        assert gps_event_log.count(cache) == 1
+
+    def test_legacy_cache_without_storage_field(self):
+        """Caches written before chunked storage are read as inline."""
+        from services.gps_event_log import gps_event_log
+
+        cache = {"gps_events": [_event(0), _event(1)]}
+
+        assert gps_event_log.first(cache) == _event(0)
+        assert gps_event_log.last(cache) == _event(1)
+        assert gps_event_log.load(cache, "user@test.com") == cache["gps_events"]
+
+
+class TestChunkedStorage:
+    """Tests for chunked mode."""
+
+    def test_flush_writes_chunks_and_trims_tail(self, firestore, chunked):
+        """Full chunks move to the log; the cache keeps counters and a tail."""
+        from services.gps_event_log import gps_event_log
+
+        cache = {}
+        gps_event_log.start(cache)
+        for i in range(25):
+            gps_event_log.append(cache, _event(i))
+            gps_event_log.flush(cache, "user@test.com")
+
+        assert cache["gps_chunk_count"] == 2
+        assert gps_event_log.count(cache) == 25
+        assert len(cache["gps_events"]) <= 4 + 10
+        assert gps_event_log.first(cache) == _event(0)
+        assert gps_event_log.last(cache) == _event(24)
+
+    def test_load_reassembles_events_in_order(self, firestore, chunked):
+        """load() returns chunk events followed by unflushed tail events, no duplicates."""
+        from services.gps_event_log import gps_event_log
+
+        cache = {}
+        gps_event_log.start(cache)
+        for i in range(25):
+            gps_event_log.append(cache, _event(i))
+            gps_event_log.flush(cache, "user@test.com")
+
+        assert gps_event_log.load(cache, "user@test.com") == [_event(i) for i in range(25)]
+
+    def test_log_without_chunk_ids(self, firestore, chunked):
+        """Logs written before chunk IDs were tracked keep their index-named chunks."""
+        from services.gps_event_log import gps_event_log
+
+        cache = {}
+        gps_event_log.start(cache)
+        for i in range(15):
+            gps_event_log.append(cache, _event(i))
+            gps_event_log.flush(cache, "user@test.com")
+        chunks = firestore.collection("users").document("user@test.com").collection("gps_logs").document(cache["gps_log_id"]).collection("chunks")
+        chunks.document("00000").set(chunks.document(cache.pop("gps_chunk_ids")[0]).get().to_dict())
+        chunks.document(next(doc.id for doc in chunks.stream() if doc.id != "00000")).delete()
+
+        assert gps_event_log.load(cache, "user@test.com") == [_event(i) for i in range(15)]
+        for i in range(15, 25):
+            gps_event_log.append(cache, _event(i))
+            gps_event_log.flush(cache, "user@test.com")
+
+        assert cache["gps_chunk_ids"][0] == "00000"
+        assert gps_event_log.load(cache, "user@test.com") == [_event(i) for i in range(25)]
+
+    def test_failed_chunk_write_keeps_events_inline(self, chunked):
+        """If the chunk write fails, nothing is trimmed."""
+        from services.gps_event_log import gps_event_log
+
+        cache = {}
+        gps_event_log.start(cache)
+        for i in range(10):
+            gps_event_log.append(cache, _event(i))
+
+        with patch("services.gps_event_log.write_gps_chunk", side_effect=Exception("unavailable")):
+            gps_event_log.flush(cache, "user@test.com")
+
+        assert len(cache["gps_events"]) == 10
+        assert cache["gps_chunk_count"] == 0
+
+
+class TestRunningMetrics:
+    """Tests for cache["gps_metrics"]."""
+
+    def test_metrics_follow_non_skip_events(self):
+        from services.gps_event_log import gps_event_log
+        from utils.geo import get_gps_distance_from_trail
+
+        cache = {}
+        gps_event_log.start(cache)
+        events = [_event(i) for i in range(5)]
+        events.insert(2, {"lat": 52.5, "lng": 5.0, "timestamp": "2024-01-19T10:00:01Z", "is_skip": True})
+        for event in events:
+            gps_event_log.append(cache, event)
+
+        metrics = gps_event_log.metrics(cache, "user@test.com")
+        assert metrics["count"] == 5
+        assert metrics["first"]["lat"] == 51.9 and metrics["last"]["lat"] == pytest.approx(51.904)
+        assert (metrics["min_lat"], metrics["max_lat"]) == (51.9, pytest.approx(51.904))
+        assert metrics["max_lng"] == 4.4
+        # ~111 m steps: every point left the previous stationary circle
+        assert metrics["last_moved"]["timestamp"] == _event(4)["timestamp"]
+        non_skip = [e for e in events if not e["is_skip"]]
+        assert gps_event_log.distance_km(cache, "user@test.com") == pytest.approx(get_gps_distance_from_trail(non_skip))
+
+    def test_small_moves_keep_last_moved(self):
+        from services.gps_event_log import gps_event_log
+
+        cache = {}
+        gps_event_log.start(cache)
+        gps_event_log.append(cache, _event(0))
+        gps_event_log.append(cache, {**_event(1), "lat": 51.9001})  # ~11 m
+
+        assert gps_event_log.metrics(cache, "user@test.com")["last_moved"]["timestamp"] == _event(0)["timestamp"]
+
+    def test_gps_jump_flagged_as_outlier(self):
+        from services.gps_event_log import gps_event_log
+
+        cache = {}
+        gps_event_log.start(cache)
+        gps_event_log.append(cache, _event(0))
+        jump = {**_event(1), "lat": 52.5}  # ~67 km in 2 s
+        gps_event_log.append(cache, jump)
+        gps_event_log.append(cache, _event(2))
+
+        assert cache["gps_events"][1]["is_outlier"] is True
+        assert "is_outlier" not in cache["gps_events"][2]
+        assert gps_event_log.metrics(cache, "user@test.com")["max_lat"] == pytest.approx(51.902)
+        assert [p["lat"] for p in gps_event_log.phone_trail(cache["gps_events"])] == [51.9, pytest.approx(51.902)]
+
+    def test_legacy_cache_rebuilt_once(self):
+        from services.gps_event_log import gps_event_log
+
+        cache = {"gps_events": [_event(0), _event(1)]}
+
+        assert gps_event_log.metrics(cache, "user@test.com")["count"] == 2
+        gps_event_log.append(cache, _event(2))
+        assert cache["gps_metrics"]["count"] == 3
+
+
+class TestChunkedWebhookFlow:
+    """GPS-only trip through handle_ping/handle_end with chunked storage."""
+
+    @pytest.fixture
+    def trip_store(self):
+        """Trip cache persisted in a dict via patched get/set_trip_cache."""
+        store = {}
+
+        def set_cache(data, user_id):
+            if data:
+                store[user_id] = dict(data)
+            else:
+                store.pop(user_id, None)
+
+        with patch("services.webhook_service.get_trip_cache", side_effect=lambda uid: store.get(uid)), \
+             patch("services.webhook_service.set_trip_cache", side_effect=set_cache), \
+             patch("services.webhook_service.get_paused_trip", return_value=None):
+            yield store
+
+    @pytest.fixture
+    def mock_services(self):
+        """Car without credentials (GPS-only) and no skip locations."""
+        with patch("services.webhook_service.car_service") as car, \
+             patch("services.webhook_service.location_service") as loc, \
+             patch("services.webhook_service.trip_service") as trips:
+            car.get_cars_with_credentials.return_value = []
+            car.get_default_car_id.return_value = "car-1"
+            car.get_car_id_by_device.return_value = None
+            loc.is_skip_location.return_value = False
+            trips.finalize_trip_from_gps.return_value = {"id": "trip-1"}
+            yield {"car": car, "trips": trips}
+
+    def test_finalization_sees_every_event(self, firestore, chunked, trip_store, mock_services):
+        """Events flushed to chunks are included in the finalized trail."""
+        from services.webhook_service import webhook_service
+
+        with patch.object(webhook_service, "_check_gps_stationary", return_value=False):
+            for i in range(30):
+                webhook_service.handle_ping("user@test.com", 51.9 + i * 0.001, 4.4)
+
+        cache = trip_store["user@test.com"]
+        assert cache["gps_storage"] == "chunked"
+        assert len(cache["gps_events"]) < 30
+        assert webhook_service.get_status("user@test.com")["gps_count"] == 30
+
+        # A straight line would simplify to its end points; keep every point
+        with patch("services.webhook_service.TRAIL_SIMPLIFY_TOLERANCE_METERS", 0):
+            result = webhook_service.handle_end("user@test.com", 51.95, 4.4)
+
+        assert result["status"] == "finalized_gps_only"
+        trail = mock_services["trips"].finalize_trip_from_gps.call_args.kwargs["gps_trail"]
+        assert len(trail) == 31
+        assert trail[0]["lat"] == pytest.approx(51.9)
+
+    def test_short_trip_skipped_without_loading_trail(self, firestore, chunked, trip_store, mock_services):
+        """The < 0.1 km rule uses the running distance: no chunk reads, no routing."""
+        from services.gps_event_log import gps_event_log
+        from services.webhook_service import webhook_service
+
+        with patch.object(webhook_service, "_check_gps_stationary", return_value=False):
+            for i in range(30):
+                webhook_service.handle_ping("user@test.com", 51.9 + (i % 2) * 0.00002, 4.4)  # ~2 m jitter
+
+        status = webhook_service.get_status("user@test.com")
+        assert status["gps_distance_km"] < 0.1
+        assert status["gps_bbox"]["max_lat"] == pytest.approx(51.90002)
+
+        with patch.object(gps_event_log, "load") as load, \
+             patch("services.webhook_service.calculate_gps_distance") as distance:
+            result = webhook_service.handle_end("user@test.com", 51.9, 4.4)
+
+        assert result["reason"] == "gps_distance_too_short"
+        load.assert_not_called()
+        distance.assert_not_called()
@@ -170,8 +170,10 @@ class TestReverseGeocodeAPI:
 
     @pytest.fixture
     def mock_load_custom_locations(self):
-        """Mock load_custom_locations."""
-        with patch("services.location_service.load_custom_locations") as mock:
+        """Mock load_custom_locations and the persistent geocode cache tier."""
+        with patch("services.location_service.load_custom_locations") as mock, \
+             patch("services.location_service.get_cached_geocode", return_value=None), \
+             patch("services.location_service.set_cached_geocode"):
             yield mock
 
     def test_uses_google_api_when_available(self, mock_config_with_api, mock_load_custom_locations):
@@ -292,3 +294,34 @@ class TestDistanceCalculation:
         # Result should be approximately straight_line * 1.3
         expected = straight_line * 1.3
         assert abs(result["distance_km"] - expected) < 0.1
+
+
+class TestAddLocation:
+    """Tests for add_location relabelling existing trips."""
+
+    @pytest.fixture
+    def db(self):
+        from tests.mocks.mock_firestore import MockFirestore
+
+        db = MockFirestore()
+        with patch("services.location_service.get_db", return_value=db), \
+             patch("services.location_service.CONFIG", {"locations": {}, "skip_location": {"lat": 0, "lon": 0, "radius": 0}}):
+            yield db
+
+    def test_updates_trips_within_radius(self, db):
+        from services.location_service import location_service
+
+        trips = db.collection("trips")
+        trips.document("both").set({"user_id": "u", "from_lat": 51.9000, "from_lon": 4.45, "to_lat": 51.9010, "to_lon": 4.45})
+        trips.document("to").set({"user_id": "u", "from_lat": 52.0, "from_lon": 4.45, "to_lat": 51.9005, "to_lon": 4.45})
+        trips.document("far").set({"user_id": "u", "from_lat": 52.0, "from_lon": 4.45, "to_lat": 52.1, "to_lon": 4.45})
+        trips.document("no_gps").set({"user_id": "u", "from_lat": None, "to_lat": 0})
+
+        result = location_service.add_location("Klant", 51.9005, 4.45, user_id="u")
+
+        assert result["trips_updated"] == 2
+        assert trips.document("both").get().to_dict()["from_address"] == "Klant"
+        assert trips.document("both").get().to_dict()["to_address"] == "Klant"
+        assert "from_address" not in trips.document("to").get().to_dict()
+        assert trips.document("to").get().to_dict()["to_address"] == "Klant"
+        assert "to_address" not in trips.document("far").get().to_dict()
@@ -0,0 +1,201 @@
+"""Unit tests for batched GPS ping handling (WebhookService.handle_pings).
+
+Tests verify:
+- One cache read, one vendor check and one cache write per batch
+- Each point becomes an event with its device timestamp and skip flag
+- Stationary detection runs per point at its recording time; a stop inside a
+  batch pauses and resumes the trip as the same points sent one by one would
+- Future device timestamps are clamped to server time
+- Points are processed in device time order; points older than the trip's
+  last event are dropped
+"""
+
+import copy
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import patch
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat() + "Z"
+
+
+@pytest.fixture
+def mock_db():
+    with patch("services.webhook_service.get_trip_cache", return_value=None) as mock_get, \
+         patch("services.webhook_service.set_trip_cache") as mock_set, \
+         patch("services.webhook_service.get_paused_trip", return_value=None), \
+         patch("services.webhook_service.set_paused_trip") as mock_set_paused:
+        yield {"get": mock_get, "set": mock_set, "set_paused": mock_set_paused}
+
+
+@pytest.fixture
+def store():
+    """Stateful trip cache and paused trip."""
+    state = {"cache": None, "paused": None, "pauses": 0}
+
+    def set_cache(cache, user_id):
+        state["cache"] = copy.deepcopy(cache) if cache else None
+
+    def set_paused(paused, user_id):
+        state["paused"] = copy.deepcopy(paused) if paused else None
+        state["pauses"] += bool(paused)
+
+    with patch("services.webhook_service.get_trip_cache", side_effect=lambda uid: copy.deepcopy(state["cache"])), \
+         patch("services.webhook_service.set_trip_cache", side_effect=set_cache), \
+         patch("services.webhook_service.get_paused_trip", side_effect=lambda uid: copy.deepcopy(state["paused"])), \
+         patch("services.webhook_service.set_paused_trip", side_effect=set_paused):
+        yield state
+
+
+@pytest.fixture
+def mock_services():
+    with patch("services.webhook_service.car_service") as car, \
+         patch("services.webhook_service.location_service") as loc:
+        car.get_default_car_id.return_value = "car-1"
+        car.get_car_id_by_device.return_value = None
+        car.get_cars_with_credentials.return_value = []
+        loc.is_skip_location.side_effect = lambda lat, lng: lat > 52.0
+        yield {"car": car, "loc": loc}
+
+
+class TestHandlePings:
+    """Tests for handle_pings."""
+
+    def test_batch_is_one_evaluation_and_one_write(self, mock_db, mock_services):
+        """Ten points: one cache read, one car list load, one cache write."""
+        from services.webhook_service import webhook_service
+
+        start = datetime.utcnow() - timedelta(minutes=2)
+        points = [{"lat": 51.9 + i * 0.002, "lng": 4.4, "timestamp": start + timedelta(seconds=10 * i)} for i in range(10)]
+
+        result = webhook_service.handle_pings("user@test.com", points)
+
+        assert result["status"] == "gps_only_ping"
+        assert result["points"] == 10
+        assert mock_db["get"].call_count == 1
+        assert mock_db["set"].call_count == 1
+        assert mock_services["car"].get_cars_with_credentials.call_count == 1
+
+        cache = mock_db["set"].call_args[0][0]
+        assert cache["start_time"] == _iso(start)
+        assert [e["timestamp"] for e in cache["gps_events"]] == [_iso(p["timestamp"]) for p in points]
+
+    def test_skip_flag_per_point(self, mock_db, mock_services):
+        """Skip location is evaluated for each point, not only the last."""
+        from services.webhook_service import webhook_service
+
+        points = [{"lat": 51.9, "lng": 4.4}, {"lat": 52.1, "lng": 4.4}, {"lat": 51.95, "lng": 4.4}]
+
+        webhook_service.handle_pings("user@test.com", points)
+
+        cache = mock_db["set"].call_args[0][0]
+        assert [e["is_skip"] for e in cache["gps_events"]] == [False, True, False]
+
+    def test_stationary_judged_at_recording_time(self, store, mock_services):
+        """A delayed batch ending in a stop pauses the GPS-only trip at the point it stopped."""
+        from services.webhook_service import webhook_service
+
+        # Recorded 20-26 minutes ago, uploaded now; driving, then parked for the last 6 minutes
+        start = datetime.utcnow() - timedelta(minutes=26)
+        points = [{"lat": 51.9 + i * 0.005, "lng": 4.4, "timestamp": start + timedelta(minutes=i)} for i in range(4)]
+        points += [{"lat": 51.915, "lng": 4.4, "timestamp": start + timedelta(minutes=m)} for m in range(4, 11)]
+
+        result = webhook_service.handle_pings("user@test.com", points)
+
+        assert result["status"] == "trip_paused"
+        assert store["cache"] is None
+        paused = store["paused"]
+        assert paused["paused_at"] == (start + timedelta(minutes=10)).isoformat()
+        assert len(paused["gps_events"]) == len(points)
+
+    def test_stop_inside_batch_matches_single_pings(self, store, mock_services):
+        """A stop buried in a batch pauses and resumes the trip exactly as the same points sent one by one."""
+        from services.webhook_service import webhook_service
+
+        start = datetime.utcnow() - timedelta(minutes=40)
+        route = [51.9 + i * 0.005 for i in range(5)]  # ~550 m per minute
+        route += [route[-1]] * 7  # Parked for 6 minutes
+        route += [route[-1] + i * 0.005 for i in range(1, 5)]  # Driving on
+        points = [{"lat": lat, "lng": 4.4, "timestamp": start + timedelta(minutes=i)} for i, lat in enumerate(route)]
+
+        single = []
+        for point in points:
+            single.append(webhook_service.handle_pings("user@test.com", [point])["status"])
+        single_cache, single_paused = store["cache"], store["paused"]
+        single_pauses = store["pauses"]
+
+        store.update({"cache": None, "paused": None, "pauses": 0})
+        result = webhook_service.handle_pings("user@test.com", points)
+
+        assert "trip_paused" in single
+        assert store["pauses"] == single_pauses > 0
+        # The batch answers with the status of the ping that followed the last pause
+        last_pause = len(single) - 1 - single[::-1].index("trip_paused")
+        assert result["status"] == single[last_pause + 1]
+        assert store["paused"] == single_paused
+        assert [e["timestamp"] for e in store["cache"]["gps_events"]] == [e["timestamp"] for e in single_cache["gps_events"]]
+
+    def test_future_timestamp_clamped(self, mock_db, mock_services):
+        """Device clocks ahead of the server do not produce future events."""
+        from services.webhook_service import webhook_service
+
+        future = datetime.utcnow() + timedelta(hours=1)
+
+        webhook_service.handle_pings("user@test.com", [{"lat": 51.9, "lng": 4.4, "timestamp": _iso(future)}])
+
+        event = mock_db["set"].call_args[0][0]["gps_events"][0]
+        assert event["timestamp"] <= _iso(datetime.utcnow())
+
+    def test_out_of_order_points_sorted(self, mock_db, mock_services):
+        from services.webhook_service import webhook_service
+
+        start = datetime.utcnow() - timedelta(minutes=2)
+        points = [{"lat": 51.9 + i * 0.002, "lng": 4.4, "timestamp": start + timedelta(seconds=10 * i)} for i in (2, 0, 1)]
+
+        webhook_service.handle_pings("user@test.com", points)
+
+        cache = mock_db["set"].call_args[0][0]
+        assert cache["start_time"] == _iso(start)
+        assert [e["timestamp"] for e in cache["gps_events"]] == [_iso(start + timedelta(seconds=10 * i)) for i in range(3)]
+
+    def test_points_before_last_event_dropped(self, mock_db, mock_services):
+        """A late batch never rewinds the trail behind events already recorded."""
+        from services.webhook_service import webhook_service
+
+        last = datetime.utcnow() - timedelta(minutes=1)
+        mock_db["get"].return_value = {
+            "active": True,
+            "car_id": "car-1",
+            "gps_only_mode": True,
+            "start_time": _iso(last - timedelta(minutes=5)),
+            "gps_events": [{"lat": 51.9, "lng": 4.4, "timestamp": _iso(last), "is_skip": False}],
+        }
+        points = [
+            {"lat": 51.91, "lng": 4.4, "timestamp": last - timedelta(seconds=30)},
+            {"lat": 51.92, "lng": 4.4, "timestamp": last + timedelta(seconds=10)},
+        ]
+
+        webhook_service.handle_pings("user@test.com", points)
+
+        cache = mock_db["set"].call_args[0][0]
+        assert [e["lat"] for e in cache["gps_events"]] == [51.9, 51.92]
+
+    def test_fully_stale_batch_ignored(self, mock_db, mock_services):
+        from services.webhook_service import webhook_service
+
+        last = datetime.utcnow() - timedelta(minutes=1)
+        mock_db["get"].return_value = {
+            "active": True,
+            "car_id": "car-1",
+            "gps_only_mode": True,
+            "start_time": _iso(last - timedelta(minutes=5)),
+            "gps_events": [{"lat": 51.9, "lng": 4.4, "timestamp": _iso(last), "is_skip": False}],
+        }
+
+        result = webhook_service.handle_pings("user@test.com", [{"lat": 51.91, "lng": 4.4, "timestamp": last - timedelta(seconds=30)}])
+
+        assert result["status"] == "ignored"
+        assert result["reason"] == "stale_points"
+        mock_db["set"].assert_not_called()
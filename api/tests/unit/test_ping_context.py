@@ -0,0 +1,129 @@
+"""Unit tests for request-scoped car lookups in the webhook state machine.
+
+Tests verify:
+- A steady-state ping loads the car list and vendor status exactly once
+- An API failure is not retried within the same ping
+- PingContext shares statuses between find_driving_car and car_status
+"""
+
+import pytest
+from unittest.mock import patch
+
+
+class TestPingContextInHandlePing:
+    """Tests for vendor call counts per ping - calls actual webhook_service."""
+
+    @pytest.fixture
+    def mock_db(self):
+        """Mock database functions."""
+        with patch("services.webhook_service.get_trip_cache") as mock_get, \
+             patch("services.webhook_service.set_trip_cache") as mock_set:
+            yield {"get": mock_get, "set": mock_set}
+
+    @pytest.fixture
+    def mock_car_service(self):
+        """Mock car service."""
+        with patch("services.webhook_service.car_service") as mock:
+            mock.get_cars_with_credentials.return_value = [
+                {"car_id": "car-123", "name": "Test Car", "brand": "audi", "credentials": {}}
+            ]
+            yield mock
+
+    @pytest.fixture
+    def mock_location_service(self):
+        """Mock location service."""
+        with patch("services.webhook_service.location_service") as mock:
+            mock.is_skip_location.return_value = False
+            yield mock
+
+    @pytest.fixture
+    def active_trip_cache(self):
+        """Trip cache for a started trip with a known car."""
+        return {
+            "active": True,
+            "user_id": "test@example.com",
+            "car_id": "car-123",
+            "car_name": "Test Car",
+            "start_time": "2024-01-19T10:00:00Z",
+            "start_odo": 10000,
+            "last_odo": 10005,
+            "no_driving_count": 0,
+            "parked_count": 0,
+            "api_error_count": 0,
+            "gps_events": [{"lat": 51.92, "lng": 4.47, "timestamp": "2024-01-19T10:00:00Z", "is_skip": False}],
+            "gps_trail": [],
+            "gps_only_mode": False,
+        }
+
+    def test_steady_state_ping_checks_vendor_once(
+        self, mock_db, mock_car_service, mock_location_service, active_trip_cache
+    ):
+        """One ping = one car list load and one vendor status call."""
+        from services.webhook_service import webhook_service
+
+        mock_db["get"].return_value = active_trip_cache
+        mock_car_service.check_car_driving_status.return_value = {
+            "car_id": "car-123",
+            "name": "Test Car",
+            "odometer": 10010,
+            "is_parked": False,
+            "state": "driving",
+        }
+
+        result = webhook_service.handle_ping("test@example.com", 51.93, 4.48)
+
+        assert result["status"] == "moving"
+        assert mock_car_service.get_cars_with_credentials.call_count == 1
+        assert mock_car_service.check_car_driving_status.call_count == 1
+
+    def test_api_failure_not_retried_within_ping(
+        self, mock_db, mock_car_service, mock_location_service, active_trip_cache
+    ):
+        """A failed status call is recorded once, not repeated by later branches."""
+        from services.webhook_service import webhook_service
+
+        mock_db["get"].return_value = active_trip_cache
+        mock_car_service.check_car_driving_status.return_value = None
+
+        result = webhook_service.handle_ping("test@example.com", 51.93, 4.48)
+
+        assert result["error"] == "car_status_unavailable"
+        assert mock_car_service.check_car_driving_status.call_count == 1
+
+
+class TestPingContext:
+    """Tests for PingContext memoization."""
+
+    def test_find_driving_car_status_is_reused(self):
+        """Status fetched by find_driving_car is reused by car_status."""
+        from services.webhook_service import PingContext
+        from services.car_service import car_service
+
+        cars = [{"car_id": "car-1", "name": "Car 1", "brand": "audi", "credentials": {}}]
+        status = {"car_id": "car-1", "name": "Car 1", "is_parked": False, "is_driving": True, "odometer": 100}
+
+        with patch.object(car_service, "get_cars_with_credentials", return_value=cars) as mock_cars, \
+             patch.object(car_service, "check_car_driving_status", return_value=status) as mock_check, \
+             patch.object(car_service, "get_last_parked_gps", return_value=None):
+            ctx = PingContext("test@example.com")
+            driving_car, reason = ctx.find_driving_car()
+            again = ctx.car_status("car-1")
+
+        assert reason == "driving"
+        assert driving_car["car_id"] == "car-1"
+        assert again is status
+        assert mock_cars.call_count == 1
+        assert mock_check.call_count == 1
+
+    def test_car_without_credentials_has_no_status(self):
+        """Unknown car_id returns None without calling the vendor API."""
+        from services.webhook_service import PingContext
+        from services.car_service import car_service
+
+        with patch.object(car_service, "get_cars_with_credentials", return_value=[]), \
+             patch.object(car_service, "check_car_driving_status") as mock_check:
+            ctx = PingContext("test@example.com")
+            assert ctx.car_info("car-x") is None
+            assert ctx.car_status("car-x") is None
+
+        mock_check.assert_not_called()
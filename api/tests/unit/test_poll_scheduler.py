@@ -0,0 +1,204 @@
+"""Unit tests for adaptive vendor polling (services/poll_scheduler.py).
+
+Tests verify:
+- Cruising trips poll less often; slow or stopping trips poll at the minimum interval
+- Polling near a known location (likely trip end) is not delayed
+- Skip-location waits back off, and leaving the skip location polls immediately
+- Deferred pings only record GPS; end detection still completes
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import patch
+
+
+NOW = datetime(2024, 1, 19, 10, 30, 0)
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat() + "Z"
+
+
+def _events(speed_mps: float, lat: float = 51.9, lng: float = 4.4, seconds: int = 120) -> list[dict]:
+    """Two events ending at NOW, moving north at speed_mps."""
+    dlat = speed_mps * seconds / 111_320
+    return [
+        {"lat": lat - dlat, "lng": lng, "timestamp": _iso(NOW - timedelta(seconds=seconds)), "is_skip": False},
+        {"lat": lat, "lng": lng, "timestamp": _iso(NOW), "is_skip": False},
+    ]
+
+
+@pytest.fixture
+def no_known_locations():
+    with patch("services.poll_scheduler.location_service") as loc:
+        loc.is_near_known_location.return_value = False
+        yield loc
+
+
+class TestPollInterval:
+    """Tests for PollScheduler.should_poll / poll_interval."""
+
+    def test_first_ping_always_polls(self, no_known_locations):
+        from services.poll_scheduler import poll_scheduler
+
+        assert poll_scheduler.should_poll({}, _events(30), NOW) == (True, "no_previous_poll", 0)
+
+    def test_cruising_defers_poll(self, no_known_locations):
+        """Highway speed: a poll two minutes ago is recent enough."""
+        from config import POLL_CRUISE_INTERVAL_SECONDS
+        from services.poll_scheduler import poll_scheduler
+
+        cache = {"last_poll_at": _iso(NOW - timedelta(minutes=2))}
+
+        poll, reason, interval = poll_scheduler.should_poll(cache, _events(30), NOW)
+
+        assert (poll, reason, interval) == (False, "cruising", POLL_CRUISE_INTERVAL_SECONDS)
+
+    def test_slow_traffic_polls_at_minimum(self, no_known_locations):
+        from config import POLL_MIN_INTERVAL_SECONDS
+        from services.poll_scheduler import poll_scheduler
+
+        cache = {"last_poll_at": _iso(NOW - timedelta(seconds=POLL_MIN_INTERVAL_SECONDS))}
+
+        assert poll_scheduler.should_poll(cache, _events(1), NOW) == (True, "slow_or_stopped", POLL_MIN_INTERVAL_SECONDS)
+
+    def test_near_known_location_polls_at_minimum(self, no_known_locations):
+        from config import POLL_MIN_INTERVAL_SECONDS
+        from services.poll_scheduler import poll_scheduler
+
+        no_known_locations.is_near_known_location.return_value = True
+
+        interval, reason = poll_scheduler.poll_interval({}, _events(30))
+
+        assert (interval, reason) == (POLL_MIN_INTERVAL_SECONDS, "near_destination")
+
+    def test_parked_count_never_delayed(self, no_known_locations):
+        """Confirming a stop keeps the minimum interval even at speed."""
+        from config import POLL_MIN_INTERVAL_SECONDS
+        from services.poll_scheduler import poll_scheduler
+
+        interval, reason = poll_scheduler.poll_interval({"parked_count": 1}, _events(30))
+
+        assert (interval, reason) == (POLL_MIN_INTERVAL_SECONDS, "confirming_state")
+
+    def test_stalled_odometer_polls_at_minimum(self, no_known_locations):
+        from config import POLL_MIN_INTERVAL_SECONDS
+        from services.poll_scheduler import poll_scheduler
+
+        cache = {}
+        poll_scheduler.record_poll(cache, NOW - timedelta(minutes=4), 51.9, 4.4, 10050)
+        poll_scheduler.record_poll(cache, NOW - timedelta(minutes=1), 51.9, 4.4, 10050)
+
+        assert poll_scheduler.poll_interval(cache, _events(10)) == (POLL_MIN_INTERVAL_SECONDS, "odometer_stalled")
+
+    def test_skip_location_backoff(self, no_known_locations):
+        """Intervals double per skip pause, capped at the parked maximum."""
+        from config import POLL_MIN_INTERVAL_SECONDS, POLL_PARKED_MAX_INTERVAL_SECONDS
+        from services.poll_scheduler import poll_scheduler
+
+        cache = {"last_poll_lat": 51.9, "last_poll_lng": 4.4}
+        intervals = []
+        for count in (1, 2, 3, 10):
+            cache["skip_pause_count"] = count
+            intervals.append(poll_scheduler.poll_interval(cache, _events(0))[0])
+
+        assert intervals == [
+            POLL_MIN_INTERVAL_SECONDS,
+            POLL_MIN_INTERVAL_SECONDS * 2,
+            POLL_MIN_INTERVAL_SECONDS * 4,
+            POLL_PARKED_MAX_INTERVAL_SECONDS,
+        ]
+
+    def test_leaving_skip_location_polls_immediately(self, no_known_locations):
+        from services.poll_scheduler import poll_scheduler
+
+        cache = {
+            "skip_pause_count": 5,
+            "last_poll_at": _iso(NOW - timedelta(seconds=10)),
+            "last_poll_lat": 51.9,
+            "last_poll_lng": 4.4,
+        }
+
+        poll, reason, _ = poll_scheduler.should_poll(cache, _events(10, lat=51.91), NOW)
+
+        assert (poll, reason) == (True, "left_skip_location")
+
+
+class TestWebhookScheduling:
+    """Tests for the scheduler inside the ping state machine."""
+
+    @pytest.fixture
+    def mock_deps(self, no_known_locations):
+        storage = {"cache": None}
+
+        def get_cache(user_id):
+            return storage["cache"].copy() if storage["cache"] else None
+
+        def set_cache(cache, user_id):
+            storage["cache"] = cache.copy() if cache else None
+
+        with patch("services.webhook_service.get_trip_cache", side_effect=get_cache), \
+             patch("services.webhook_service.set_trip_cache", side_effect=set_cache), \
+             patch("services.webhook_service.car_service") as car, \
+             patch("services.webhook_service.location_service") as loc, \
+             patch("services.webhook_service.trip_service") as trips:
+            car.get_cars_with_credentials.return_value = [{"car_id": "car-1", "name": "Car", "brand": "audi"}]
+            loc.is_skip_location.return_value = False
+            trips.finalize_trip_from_audi.return_value = {"id": "trip-1"}
+            yield {"storage": storage, "car": car, "trips": trips}
+
+    def _driving_cache(self, last_poll_at: datetime) -> dict:
+        start = datetime.utcnow() - timedelta(minutes=20)
+        return {
+            "active": True,
+            "user_id": "user@test.com",
+            "car_id": "car-1",
+            "start_time": _iso(start),
+            "start_odo": 10000,
+            "last_odo": 10020,
+            "parked_count": 0,
+            "api_error_count": 0,
+            "gps_events": [{"lat": 51.90, "lng": 4.4, "timestamp": _iso(datetime.utcnow() - timedelta(seconds=60)), "is_skip": False}],
+            "gps_trail": [],
+            "last_poll_at": _iso(last_poll_at),
+            "last_poll_lat": 51.90,
+            "last_poll_lng": 4.4,
+            "last_poll_odo": 10020,
+        }
+
+    def test_cruising_ping_skips_vendor_call(self, mock_deps):
+        """A ping shortly after a poll at highway speed records GPS only."""
+        from services.webhook_service import webhook_service
+
+        mock_deps["storage"]["cache"] = self._driving_cache(datetime.utcnow() - timedelta(seconds=90))
+
+        # ~1.7 km in 60 s
+        result = webhook_service.handle_ping("user@test.com", 51.915, 4.4)
+
+        assert result["status"] == "ping_recorded"
+        assert result["poll_deferred"] == "cruising"
+        mock_deps["car"].check_car_driving_status.assert_not_called()
+        assert len(mock_deps["storage"]["cache"]["gps_events"]) == 2
+
+    def test_due_poll_records_state_and_ends_trip(self, mock_deps):
+        """Once due, the car is polled and parking is confirmed as before."""
+        from services.webhook_service import webhook_service
+
+        mock_deps["storage"]["cache"] = self._driving_cache(datetime.utcnow() - timedelta(minutes=10))
+        mock_deps["car"].check_car_driving_status.return_value = {
+            "odometer": 10020, "is_parked": True, "state": "parked", "lat": None, "lng": None,
+        }
+
+        webhook_service.handle_ping("user@test.com", 51.90, 4.4)
+        cache = mock_deps["storage"]["cache"]
+        assert cache["parked_count"] == 1
+        assert cache["last_poll_odo"] == 10020
+
+        # Confirming a stop: the next polls are not deferred
+        for _ in range(2):
+            mock_deps["storage"]["cache"]["last_poll_at"] = _iso(datetime.utcnow() - timedelta(seconds=61))
+            result = webhook_service.handle_ping("user@test.com", 51.90, 4.4)
+
+        assert result["status"] == "finalized"
+        assert mock_deps["car"].check_car_driving_status.call_count == 3
@@ -0,0 +1,225 @@
+"""Unit tests for concurrent endpoint fetching inside vendor providers.
+
+Tests verify:
+- A status poll costs about the slowest endpoint, not the sum of all of them
+- A failing endpoint does not affect the others
+- Audi jobs are parsed in job order whatever order the responses arrive in
+- Concurrent 401s trigger a single Audi re-login
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+DELAY = 0.2
+
+
+def _response(status_code=200, payload=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload or {}
+    return response
+
+
+@pytest.fixture
+def audi_api():
+    from car_providers.audi import AudiAPI, AudiTokens
+
+    api = AudiAPI("user", "pass")
+    api.tokens = AudiTokens(
+        access_token="token", id_token="id", token_type="bearer",
+        expires_in=3600, expires_at=time.time() + 3600,
+    )
+    return api
+
+
+AUDI_PAYLOADS = {
+    "measurements": {"measurements": {"odometerStatus": {"value": {"odometer": 12345}}}},
+    "fuelStatus": {"fuelStatus": {"rangeStatus": {"value": {"primaryEngine": {"currentSOC_pct": 50}}}}},
+    "charging": {"charging": {"batteryStatus": {"value": {"currentSOC_pct": 80}}}},
+    "readiness": {"readiness": {"readinessStatus": {"value": {"connectionState": {"isActive": False}}}}},
+}
+
+
+class TestAudiStatus:
+    """Tests for AudiAPI.get_vehicle_status."""
+
+    def test_endpoints_fetched_concurrently(self, audi_api):
+        def slow_request(method, url, params=None):
+            time.sleep(DELAY)
+            if url.endswith("parkingposition"):
+                return _response(payload={"data": {"lat": 51.9, "lon": 4.4}})
+            return _response(payload=AUDI_PAYLOADS[params["jobs"]])
+
+        with patch.object(audi_api, "_api_request", side_effect=slow_request):
+            started = time.perf_counter()
+            vehicle = audi_api.get_vehicle_status("VIN1")
+            elapsed = time.perf_counter() - started
+
+        assert elapsed < DELAY * 3  # Serial would be 5 * DELAY
+        assert vehicle.odometer_km == 12345
+        assert vehicle.is_parked is True
+        assert (vehicle.latitude, vehicle.longitude) == (51.9, 4.4)
+
+    def test_failing_job_is_isolated(self, audi_api):
+        def flaky_request(method, url, params=None):
+            if params and params["jobs"] == "measurements":
+                raise ConnectionError("timeout")
+            if url.endswith("parkingposition"):
+                return _response(404)
+            return _response(payload=AUDI_PAYLOADS[params["jobs"]])
+
+        with patch.object(audi_api, "_api_request", side_effect=flaky_request):
+            vehicle = audi_api.get_vehicle_status("VIN1")
+
+        assert vehicle.odometer_km is None
+        assert vehicle.battery_level == 80
+        assert set(vehicle.raw_data) == {"fuelStatus", "charging", "readiness"}
+
+    def test_jobs_parsed_in_job_order(self, audi_api):
+        """charging answers before fuelStatus, but still wins on battery level."""
+        def request(method, url, params=None):
+            if url.endswith("parkingposition"):
+                return _response(404)
+            if params["jobs"] == "fuelStatus":
+                time.sleep(DELAY)
+            return _response(payload=AUDI_PAYLOADS[params["jobs"]])
+
+        with patch.object(audi_api, "_api_request", side_effect=request):
+            vehicle = audi_api.get_vehicle_status("VIN1")
+
+        assert vehicle.battery_level == 80
+
+    def test_concurrent_401s_log_in_once(self, audi_api):
+        barrier = threading.Barrier(3)
+
+        def session_request(method, url, headers=None, **kwargs):
+            if headers["Authorization"] == "Bearer token":
+                barrier.wait(timeout=5)  # All three see the stale token
+                return _response(401)
+            return _response(200)
+
+        def login():
+            audi_api.tokens.access_token = "fresh"
+
+        with patch.object(audi_api._session, "request", side_effect=session_request), \
+                patch.object(audi_api, "login", side_effect=login) as mock_login:
+            threads = [threading.Thread(target=audi_api._api_request, args=("GET", "url")) for _ in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert mock_login.call_count == 1
+
+
+class TestSkodaStatus:
+    """Tests for SkodaOAuthProvider.get_data."""
+
+    def _provider(self):
+        from car_providers.skoda import SkodaOAuthProvider
+
+        provider = SkodaOAuthProvider("token")
+        provider._vehicles = [{"vin": "VIN1"}]
+        return provider
+
+    def test_status_and_charging_fetched_concurrently(self):
+        provider = self._provider()
+
+        def slow_get(url):
+            time.sleep(DELAY)
+            if "charging" in url:
+                return _response(payload={"battery": {"stateOfChargeInPercent": 64}, "state": "CHARGING"})
+            return _response(payload={"mileageInKm": 4321})
+
+        with patch.object(provider._session, "get", side_effect=slow_get):
+            started = time.perf_counter()
+            data = provider.get_data()
+            elapsed = time.perf_counter() - started
+
+        assert elapsed < DELAY * 1.8
+        assert data.odometer_km == 4321
+        assert data.battery_level == 64
+        assert data.is_charging is True
+
+    def test_charging_failure_keeps_status(self):
+        provider = self._provider()
+
+        def get(url):
+            if "charging" in url:
+                raise ConnectionError("timeout")
+            return _response(payload={"mileageInKm": 4321})
+
+        with patch.object(provider._session, "get", side_effect=get):
+            data = provider.get_data()
+
+        assert data.odometer_km == 4321
+        assert data.battery_level is None
+
+
+class TestRenaultStatus:
+    """Tests for RenaultProvider.get_data."""
+
+    @staticmethod
+    def _fetch(provider, fields=None):
+        try:
+            return provider.get_data(fields)
+        finally:
+            provider.disconnect()
+
+    def _client(self, vehicle):
+        client = MagicMock()
+        client.session.login = AsyncMock()
+        client.get_person = AsyncMock(return_value=SimpleNamespace(accounts=[SimpleNamespace(accountId="acc")]))
+        account = MagicMock()
+        account.get_vehicles = AsyncMock(return_value=SimpleNamespace(vehicleLinks=[SimpleNamespace(vin="VIN1")]))
+        account.get_api_vehicle = AsyncMock(return_value=vehicle)
+        client.get_api_account = AsyncMock(return_value=account)
+        return client
+
+    @staticmethod
+    async def _slow(value):
+        await asyncio.sleep(DELAY)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    def test_endpoints_awaited_concurrently(self):
+        from car_providers.renault import RenaultProvider
+
+        vehicle = MagicMock()
+        vehicle.get_cockpit = lambda: self._slow(SimpleNamespace(totalMileage=9876))
+        vehicle.get_battery_status = lambda: self._slow(SimpleNamespace(batteryLevel=55))
+        vehicle.get_hvac_status = lambda: self._slow(SimpleNamespace(hvacStatus="off"))
+        vehicle.get_location = lambda: self._slow(SimpleNamespace(gpsLatitude=51.9, gpsLongitude=4.4))
+
+        with patch("renault_api.renault_client.RenaultClient", return_value=self._client(vehicle)):
+            started = time.perf_counter()
+            data = self._fetch(RenaultProvider("user", "pass"))
+            elapsed = time.perf_counter() - started
+
+        assert elapsed < DELAY * 2.5  # Serial would be 4 * DELAY
+        assert data.odometer_km == 9876
+        assert data.battery_level == 55
+        assert (data.latitude, data.longitude) == (51.9, 4.4)
+
+    def test_failing_endpoint_is_isolated(self):
+        from car_providers.renault import RenaultProvider
+
+        vehicle = MagicMock()
+        vehicle.get_cockpit = lambda: self._slow(SimpleNamespace(totalMileage=9876))
+        vehicle.get_battery_status = lambda: self._slow(RuntimeError("battery endpoint down"))
+        vehicle.get_hvac_status = lambda: self._slow(None)
+        vehicle.get_location = lambda: self._slow(SimpleNamespace(gpsLatitude=51.9, gpsLongitude=4.4))
+
+        with patch("renault_api.renault_client.RenaultClient", return_value=self._client(vehicle)):
+            data = self._fetch(RenaultProvider("user", "pass"))
+
+        assert data.odometer_km == 9876
+        assert data.battery_level is None
+        assert data.latitude == 51.9
+        assert "battery" not in data.raw_data
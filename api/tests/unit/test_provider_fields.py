@@ -0,0 +1,161 @@
+"""Unit tests for field-selective CarProvider.get_data.
+
+Tests verify:
+- The driving field set skips Audi charging/fuelStatus jobs, Renault battery
+  and HVAC calls and Skoda charging status, and filters Tesla vehicle_data
+- Requesting everything (fields=None) still makes every vendor call
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from car_providers import DRIVING_FIELDS
+
+
+def _response(status_code=200, payload=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = payload or {}
+    return response
+
+
+class TestAudiFields:
+    """Tests for AudiProvider.get_data(fields=...)."""
+
+    @pytest.fixture
+    def provider(self):
+        from car_providers.audi import AudiProvider
+
+        provider = AudiProvider(
+            vin="VIN1", access_token="token", id_token="id", expires_at=time.time() + 3600,
+        )
+        assert provider.connect()
+        return provider
+
+    def _fetched(self, provider, fields):
+        calls = []
+
+        def request(method, url, params=None):
+            calls.append(params["jobs"] if params else "parkingposition")
+            return _response(404)
+
+        with patch.object(provider._api, "_api_request", side_effect=request):
+            provider.get_data(fields=fields)
+        return sorted(calls)
+
+    def test_driving_fields_skip_charging_jobs(self, provider):
+        assert self._fetched(provider, DRIVING_FIELDS) == ["measurements", "parkingposition", "readiness"]
+
+    def test_all_fields_fetch_every_job(self, provider):
+        assert self._fetched(provider, None) == [
+            "charging", "fuelStatus", "measurements", "parkingposition", "readiness",
+        ]
+
+
+class TestSkodaFields:
+    """Tests for SkodaOAuthProvider.get_data(fields=...)."""
+
+    def test_driving_fields_skip_charging_status(self):
+        from car_providers.skoda import SkodaOAuthProvider
+
+        provider = SkodaOAuthProvider("token")
+        provider._vehicles = [{"vin": "VIN1"}]
+
+        with patch.object(provider._session, "get", return_value=_response(payload={"mileageInKm": 4321})) as get:
+            data = provider.get_data(fields=DRIVING_FIELDS)
+
+        assert data.odometer_km == 4321
+        assert [c.args[0] for c in get.call_args_list] == ["https://mysmob.api.connect.skoda-auto.cz/api/v2/vehicle-status/VIN1"]
+
+
+class TestRenaultFields:
+    """Tests for RenaultProvider.get_data(fields=...)."""
+
+    @staticmethod
+    def _fetch(provider, fields=None):
+        try:
+            return provider.get_data(fields)
+        finally:
+            provider.disconnect()
+
+    def _client(self, vehicle):
+        client = MagicMock()
+        client.session.login = AsyncMock()
+        client.get_person = AsyncMock(return_value=SimpleNamespace(accounts=[SimpleNamespace(accountId="acc")]))
+        account = MagicMock()
+        account.get_vehicles = AsyncMock(return_value=SimpleNamespace(vehicleLinks=[SimpleNamespace(vin="VIN1")]))
+        account.get_api_vehicle = AsyncMock(return_value=vehicle)
+        client.get_api_account = AsyncMock(return_value=account)
+        return client
+
+    def _vehicle(self):
+        vehicle = MagicMock()
+        vehicle.get_cockpit = AsyncMock(return_value=SimpleNamespace(totalMileage=9876))
+        vehicle.get_battery_status = AsyncMock(return_value=SimpleNamespace(batteryLevel=55))
+        vehicle.get_hvac_status = AsyncMock(return_value=SimpleNamespace(hvacStatus="off"))
+        vehicle.get_location = AsyncMock(return_value=SimpleNamespace(gpsLatitude=51.9, gpsLongitude=4.4))
+        return vehicle
+
+    def test_driving_fields_skip_battery_and_hvac(self):
+        from car_providers.renault import RenaultProvider
+
+        vehicle = self._vehicle()
+        with patch("renault_api.renault_client.RenaultClient", return_value=self._client(vehicle)):
+            data = self._fetch(RenaultProvider("user", "pass"), fields=DRIVING_FIELDS)
+
+        assert data.odometer_km == 9876
+        assert data.latitude == 51.9
+        assert data.battery_level is None
+        vehicle.get_battery_status.assert_not_awaited()
+        vehicle.get_hvac_status.assert_not_awaited()
+
+    def test_all_fields_include_battery(self):
+        from car_providers.renault import RenaultProvider
+
+        vehicle = self._vehicle()
+        with patch("renault_api.renault_client.RenaultClient", return_value=self._client(vehicle)):
+            data = self._fetch(RenaultProvider("user", "pass"))
+
+        assert data.battery_level == 55
+        vehicle.get_hvac_status.assert_awaited_once()
+
+
+class TestTeslaFields:
+    """Tests for TeslaProvider.get_data(fields=...)."""
+
+    def _provider(self):
+        from car_providers.tesla import TeslaProvider
+
+        vehicle = MagicMock()
+        vehicle.__getitem__.side_effect = {"vin": "VIN1"}.__getitem__
+        vehicle.get.side_effect = lambda key, default=None: {"state": "online"}.get(key, default)
+        vehicle.get_vehicle_data.return_value = {
+            "vin": "VIN1",
+            "vehicle_state": {"odometer": 100},
+            "drive_state": {"shift_state": "D", "latitude": 51.9, "longitude": 4.4},
+        }
+        provider = TeslaProvider("user@example.com")
+        provider._tesla = MagicMock()
+        provider._tesla.vehicle_list.return_value = [vehicle]
+        return provider, vehicle
+
+    def test_driving_fields_filter_endpoints(self):
+        provider, vehicle = self._provider()
+
+        with patch.object(provider, "_save_tokens_to_firestore"):
+            data = provider.get_data(fields=DRIVING_FIELDS)
+
+        endpoints = vehicle.get_vehicle_data.call_args.kwargs["endpoints"].split(";")
+        assert sorted(endpoints) == ["drive_state", "location_data", "vehicle_state"]
+        assert data.odometer_km == pytest.approx(160.934)
+
+    def test_all_fields_use_default_endpoints(self):
+        provider, vehicle = self._provider()
+
+        with patch.object(provider, "_save_tokens_to_firestore"):
+            provider.get_data()
+
+        vehicle.get_vehicle_data.assert_called_once_with()
@@ -0,0 +1,203 @@
+"""Unit tests for the connected car provider pool.
+
+Tests verify:
+- Providers are reused across leases and rebuilt on credential changes
+- Failed leases and idle providers are disconnected and dropped
+- Background token refresh hands refreshed providers to on_refresh
+- check_car_driving_status keeps the provider connected between pings
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _make_pool(**kwargs):
+    from car_providers.pool import ProviderPool
+    params = {"idle_seconds": 900, "max_entries": 10, "refresh_interval": 3600}
+    params.update(kwargs)
+    return ProviderPool(**params)
+
+
+class TestProviderPool:
+    """Tests for ProviderPool."""
+
+    def test_reuses_provider_for_same_version(self):
+        """Second lease returns the pooled provider without building."""
+        pool = _make_pool()
+        factory = MagicMock(side_effect=lambda: MagicMock())
+
+        with pool.lease(("u", "c"), "v1", factory) as first:
+            pass
+        with pool.lease(("u", "c"), "v1", factory) as second:
+            pass
+
+        assert first is second
+        assert factory.call_count == 1
+        first.disconnect.assert_not_called()
+        assert pool.stats()["hits"] == 1
+
+    def test_rebuilds_on_version_change(self):
+        """A new credential version disconnects the old provider."""
+        pool = _make_pool()
+        factory = MagicMock(side_effect=lambda: MagicMock())
+
+        with pool.lease(("u", "c"), "v1", factory) as old:
+            pass
+        with pool.lease(("u", "c"), "v2", factory) as new:
+            pass
+
+        assert old is not new
+        old.disconnect.assert_called_once()
+
+    def test_set_version_prevents_rebuild(self):
+        """Re-tagging after our own credential write keeps the provider."""
+        pool = _make_pool()
+        factory = MagicMock(side_effect=lambda: MagicMock())
+
+        with pool.lease(("u", "c"), "v1", factory) as old:
+            pass
+        pool.set_version(("u", "c"), "v2")
+        with pool.lease(("u", "c"), "v2", factory) as new:
+            pass
+
+        assert old is new
+
+    def test_error_discards_provider(self):
+        """An exception inside the lease drops and disconnects the provider."""
+        pool = _make_pool()
+        provider = MagicMock()
+
+        with pytest.raises(RuntimeError):
+            with pool.lease(("u", "c"), "v1", lambda: provider):
+                raise RuntimeError("vendor down")
+
+        assert len(pool) == 0
+        provider.disconnect.assert_called_once()
+
+    def test_none_factory_is_not_pooled(self):
+        """Cars that can't be polled yield None and leave the pool empty."""
+        pool = _make_pool()
+
+        with pool.lease(("u", "c"), "v1", lambda: None) as provider:
+            assert provider is None
+
+        assert len(pool) == 0
+
+    def test_evicts_idle_providers(self):
+        """Providers unused for idle_seconds are disconnected."""
+        pool = _make_pool(idle_seconds=60)
+        provider = MagicMock()
+
+        with patch("car_providers.pool.time.monotonic", return_value=1000.0):
+            with pool.lease(("u", "c"), "v1", lambda: provider):
+                pass
+        with patch("car_providers.pool.time.monotonic", return_value=1061.0):
+            assert pool.evict_idle() == 1
+
+        provider.disconnect.assert_called_once()
+        assert len(pool) == 0
+
+    def test_lru_capacity(self):
+        """Least recently used provider is evicted over max_entries."""
+        pool = _make_pool(max_entries=1)
+        first, second = MagicMock(), MagicMock()
+
+        with pool.lease(("u", "a"), "v1", lambda: first):
+            pass
+        with pool.lease(("u", "b"), "v1", lambda: second):
+            pass
+
+        first.disconnect.assert_called_once()
+        assert len(pool) == 1
+
+    def test_refresh_tokens_calls_on_refresh(self):
+        """Providers that refreshed their session are passed to on_refresh."""
+        on_refresh = MagicMock()
+        pool = _make_pool(on_refresh=on_refresh)
+        fresh, expiring = MagicMock(), MagicMock()
+        fresh.refresh_session.return_value = False
+        expiring.refresh_session.return_value = True
+
+        with pool.lease(("u", "a"), "v1", lambda: fresh):
+            pass
+        with pool.lease(("u", "b"), "v1", lambda: expiring):
+            pass
+
+        assert pool.refresh_tokens() == 1
+        on_refresh.assert_called_once_with(("u", "b"), expiring)
+
+
+class TestPooledDrivingStatus:
+    """Tests for provider pooling in check_car_driving_status."""
+
+    @pytest.fixture
+    def mock_audi_provider(self):
+        """Mock Audi provider class."""
+        from car_providers import VehicleState
+
+        with patch("car_providers.AudiProvider") as mock:
+            data = MagicMock()
+            data.state = VehicleState.PARKED
+            data.odometer_km = 10500
+            data.latitude = 51.9
+            data.longitude = 4.4
+            mock.return_value.get_data.return_value = data
+            mock.return_value.get_tokens.return_value = {
+                "access_token": "token123",
+                "id_token": "id123",
+                "refresh_token": "refresh123",
+                "expires_at": 0,
+            }
+            yield mock
+
+    @pytest.fixture
+    def car_info(self):
+        return {
+            "car_id": "audi-123",
+            "user_id": "user@test.com",
+            "name": "Audi A4",
+            "brand": "audi",
+            "credentials": {
+                "oauth_completed": True,
+                "access_token": "token123",
+                "id_token": "id123",
+                "updated_at": "2024-01-19T10:00:00",
+            },
+        }
+
+    def test_provider_stays_connected_between_pings(self, mock_audi_provider, car_info):
+        """Two status checks build one provider and never disconnect it."""
+        from services.car_service import car_service
+
+        with patch.object(car_service, "save_refreshed_tokens") as mock_save:
+            car_service.check_car_driving_status(car_info)
+            car_service.check_car_driving_status(car_info)
+
+        assert mock_audi_provider.call_count == 1
+        assert mock_audi_provider.return_value.get_data.call_count == 2
+        mock_audi_provider.return_value.disconnect.assert_not_called()
+        # Tokens did not change - nothing to persist
+        mock_save.assert_not_called()
+
+    def test_changed_tokens_are_persisted(self, mock_audi_provider, car_info):
+        """A refreshed access token is written back once."""
+        from services.car_service import car_service
+
+        mock_audi_provider.return_value.get_tokens.return_value["access_token"] = "token456"
+
+        with patch.object(car_service, "save_refreshed_tokens") as mock_save:
+            car_service.check_car_driving_status(car_info)
+
+        mock_save.assert_called_once()
+        assert mock_save.call_args[0][:2] == ("user@test.com", "audi-123")
+
+    def test_new_credentials_rebuild_provider(self, mock_audi_provider, car_info):
+        """Re-authenticating (new updated_at) replaces the pooled provider."""
+        from services.car_service import car_service
+
+        car_service.check_car_driving_status(car_info)
+        car_info["credentials"]["updated_at"] = "2024-01-20T10:00:00"
+        car_service.check_car_driving_status(car_info)
+
+        assert mock_audi_provider.call_count == 2
+        mock_audi_provider.return_value.disconnect.assert_called_once()
@@ -0,0 +1,101 @@
+"""Unit tests for the persistent Renault session.
+
+Tests verify:
+- Login, account and vehicle resolution happen once per provider
+- A steady-state poll only requests the vehicle endpoints
+- An auth error logs in again and retries the poll once
+- disconnect closes the session
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from car_providers import DRIVING_FIELDS
+
+
+@pytest.fixture
+def vehicle():
+    vehicle = MagicMock()
+    vehicle.vin = "VIN1"
+    vehicle.get_cockpit = AsyncMock(return_value=SimpleNamespace(totalMileage=9876))
+    vehicle.get_battery_status = AsyncMock(return_value=SimpleNamespace(batteryLevel=55))
+    vehicle.get_hvac_status = AsyncMock(return_value=SimpleNamespace(hvacStatus="off"))
+    vehicle.get_location = AsyncMock(return_value=SimpleNamespace(gpsLatitude=51.9, gpsLongitude=4.4))
+    return vehicle
+
+
+@pytest.fixture
+def client_cls(vehicle):
+    """RenaultClient class whose instances resolve to the vehicle fixture."""
+    def build(websession, locale):
+        client = MagicMock()
+        client.session.login = AsyncMock()
+        client.get_person = AsyncMock(return_value=SimpleNamespace(accounts=[SimpleNamespace(accountId="acc")]))
+        account = MagicMock()
+        account.get_vehicles = AsyncMock(return_value=SimpleNamespace(vehicleLinks=[SimpleNamespace(vin="VIN1")]))
+        account.get_api_vehicle = AsyncMock(return_value=vehicle)
+        client.get_api_account = AsyncMock(return_value=account)
+        return client
+
+    with patch("renault_api.renault_client.RenaultClient", side_effect=build) as cls:
+        yield cls
+
+
+@pytest.fixture
+def provider():
+    from car_providers.renault import RenaultProvider
+
+    provider = RenaultProvider("user", "pass")
+    yield provider
+    provider.disconnect()
+
+
+class TestRenaultSession:
+    """Tests for RenaultProvider session reuse."""
+
+    def test_second_poll_reuses_session(self, provider, client_cls, vehicle):
+        first = provider.get_data(fields=DRIVING_FIELDS)
+        second = provider.get_data(fields=DRIVING_FIELDS)
+
+        client = provider._client
+        assert first.odometer_km == second.odometer_km == 9876
+        assert client_cls.call_count == 1
+        client.session.login.assert_awaited_once()
+        client.get_person.assert_awaited_once()
+        client.get_api_account.return_value.get_vehicles.assert_awaited_once()
+        # Steady state: cockpit and location only
+        assert vehicle.get_cockpit.await_count == 2
+        assert vehicle.get_location.await_count == 2
+        vehicle.get_battery_status.assert_not_awaited()
+
+    def test_auth_error_logs_in_again(self, provider, client_cls, vehicle):
+        from renault_api.exceptions import NotAuthenticatedException
+
+        provider.get_data(fields=DRIVING_FIELDS)
+        vehicle.get_cockpit.side_effect = [NotAuthenticatedException("Authentication expired."), SimpleNamespace(totalMileage=9900)]
+
+        data = provider.get_data(fields=DRIVING_FIELDS)
+
+        assert data.odometer_km == 9900
+        assert client_cls.call_count == 2
+
+    def test_other_errors_keep_the_session(self, provider, client_cls, vehicle):
+        provider.get_data(fields=DRIVING_FIELDS)
+        vehicle.get_cockpit.side_effect = RuntimeError("cockpit endpoint down")
+
+        data = provider.get_data(fields=DRIVING_FIELDS)
+
+        assert data.odometer_km is None
+        assert data.latitude == 51.9
+        assert client_cls.call_count == 1
+
+    def test_disconnect_closes_session(self, provider, client_cls):
+        provider.get_data()
+        websession = provider._websession
+
+        provider.disconnect()
+
+        assert websession.closed
+        assert provider._client is None
@@ -267,3 +267,18 @@ class TestCheckStaleTtrips:
 
         assert response.status_code == 200
         assert response.json()["finalized_trips"] == []
+
+    def test_enrichment_drain_gets_remaining_budget(self, client, mock_webhook_service):
+        """The enrichment drain must finish within the scheduler request budget."""
+        import time
+        from config import SCHEDULER_REQUEST_BUDGET_SECONDS
+
+        mock_webhook_service.check_stale_trips.return_value = {"checked": True}
+        with patch("routes.stats.trip_service") as trips:
+            trips.drain_enrichment_queue.return_value = {"processed": 0}
+            started = time.monotonic()
+            response = client.get("/audi/check-trip")
+
+        assert response.json()["enrichment"] == {"processed": 0}
+        deadline = trips.drain_enrichment_queue.call_args.kwargs["deadline"]
+        assert started < deadline <= time.monotonic() + SCHEDULER_REQUEST_BUDGET_SECONDS
@@ -90,7 +90,7 @@ class TestGetTrips:
 
         assert response.status_code == 200
         mock_trip_service.get_trips.assert_called_once_with(
-            "test@example.com", 2024, 1, "car-123", None, 50
+            "test@example.com", 2024, 1, "car-123", None, 50, trail_format="points"
         )
 
     def test_get_trips_with_pagination(self, client, mock_trip_service):
@@ -104,7 +104,7 @@ class TestGetTrips:
 
         assert response.status_code == 200
         mock_trip_service.get_trips_legacy.assert_called_once_with(
-            "test@example.com", None, None, None, 2, 25
+            "test@example.com", None, None, None, 2, 25, trail_format="points"
         )
 
     def test_get_trips_requires_auth(self, client, mock_trip_service):
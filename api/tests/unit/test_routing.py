@@ -38,7 +38,7 @@ class TestGetOsrmDistanceFromTrail:
             {"lat": 51.95, "lng": 4.55},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.json.return_value = {
                 "code": "Ok",
@@ -59,7 +59,7 @@ class TestGetOsrmDistanceFromTrail:
             {"lat": 51.95, "lng": 4.55},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.json.return_value = {
                 "code": "NoRoute",
@@ -80,7 +80,7 @@ class TestGetOsrmDistanceFromTrail:
             {"lat": 51.95, "lng": 4.55},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.Timeout()
 
             result = get_osrm_distance_from_trail(trail)
@@ -94,7 +94,7 @@ class TestGetOsrmDistanceFromTrail:
         # Create 30-point trail
         trail = [{"lat": 51.9 + i * 0.01, "lng": 4.5} for i in range(30)]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.json.return_value = {
                 "code": "Ok",
@@ -126,7 +126,7 @@ class TestGetOsrmDistanceFromTrail:
                 mock.json.return_value = {"code": "NoRoute"}
             return mock
 
-        with patch("utils.routing.requests.get", side_effect=mock_response):
+        with patch("utils.routing.routing_client.session.get", side_effect=mock_response):
             result = get_osrm_distance_from_trail(trail)
 
             assert result is None
@@ -140,7 +140,7 @@ class TestGetOsrmDistanceFromTrail:
             {"lat": 51.95, "lng": 4.55},
         ]
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.json.return_value = {
                 "code": "Ok",
@@ -162,7 +162,7 @@ class TestGetGoogleMapsRouteDistance:
         """Valid coordinates return distance in km."""
         from utils.routing import get_google_maps_route_distance
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.json.return_value = {
                 "code": "Ok",
@@ -178,7 +178,7 @@ class TestGetGoogleMapsRouteDistance:
         """Missing coordinates return None without API call."""
         from utils.routing import get_google_maps_route_distance
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             result = get_google_maps_route_distance(None, 4.5, 51.95, 4.55)
 
             assert result is None
@@ -188,7 +188,7 @@ class TestGetGoogleMapsRouteDistance:
         """Zero coordinates return None."""
         from utils.routing import get_google_maps_route_distance
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             result = get_google_maps_route_distance(0, 0, 51.95, 4.55)
 
             assert result is None
@@ -198,7 +198,7 @@ class TestGetGoogleMapsRouteDistance:
         """OSRM error returns None."""
         from utils.routing import get_google_maps_route_distance
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_response = MagicMock()
             mock_response.json.return_value = {"code": "NoRoute"}
             mock_get.return_value = mock_response
@@ -212,7 +212,7 @@ class TestGetGoogleMapsRouteDistance:
         from utils.routing import get_google_maps_route_distance
         import requests
 
-        with patch("utils.routing.requests.get") as mock_get:
+        with patch("utils.routing.routing_client.session.get") as mock_get:
             mock_get.side_effect = requests.exceptions.ConnectionError()
 
             result = get_google_maps_route_distance(51.9, 4.5, 51.95, 4.55)
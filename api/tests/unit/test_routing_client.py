@@ -0,0 +1,90 @@
+"""Unit tests for RoutingClient (utils/routing.py).
+
+Tests verify:
+- Chunk requests run concurrently
+- Route distances are cached by quantized coordinates; failures are not cached
+- The base URL is configurable and the session retries with backoff
+"""
+
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _ok(distance_m: float = 10000) -> MagicMock:
+    response = MagicMock()
+    response.json.return_value = {"code": "Ok", "routes": [{"distance": distance_m}]}
+    return response
+
+
+def _trail(n: int) -> list[dict]:
+    return [{"lat": 51.92 + i * 0.001, "lng": 4.47 + i * 0.001} for i in range(n)]
+
+
+class TestRoutingClient:
+    """Tests for the pooled, cached OSRM client."""
+
+    def test_chunks_requested_concurrently(self):
+        """A 3-chunk trail takes about one round-trip, not three."""
+        from utils.routing import routing_client
+
+        def slow_get(url, timeout):
+            time.sleep(0.3)
+            return _ok()
+
+        with patch.object(routing_client.session, "get", side_effect=slow_get) as mock_get:
+            started = time.monotonic()
+            result = routing_client.trail_distance_km(_trail(50))
+            elapsed = time.monotonic() - started
+
+        assert mock_get.call_count == 3
+        assert result == pytest.approx(30.0)
+        assert elapsed < 0.8
+
+    def test_repeated_route_served_from_cache(self):
+        """Same coordinates (up to 1e-5 degrees) do not hit OSRM again."""
+        from utils.routing import routing_client
+
+        with patch.object(routing_client.session, "get", return_value=_ok(15000)) as mock_get:
+            first = routing_client.route_distance_km([(51.9, 4.5), (51.95, 4.55)])
+            second = routing_client.route_distance_km([(51.900001, 4.500001), (51.95, 4.55)])
+
+        assert first == second == 15.0
+        assert mock_get.call_count == 1
+        assert routing_client.cache_stats()["requests_saved"] == 1
+
+    def test_failed_route_not_cached(self):
+        """NoRoute answers return None and are retried on the next call."""
+        from utils.routing import routing_client
+
+        no_route = MagicMock()
+        no_route.json.return_value = {"code": "NoRoute"}
+
+        with patch.object(routing_client.session, "get", side_effect=[no_route, _ok(5000)]) as mock_get:
+            assert routing_client.route_distance_km([(51.9, 4.5), (51.95, 4.55)]) is None
+            assert routing_client.route_distance_km([(51.9, 4.5), (51.95, 4.55)]) == 5.0
+
+        assert mock_get.call_count == 2
+
+    def test_configurable_base_url_and_chunk_size(self):
+        """A local OSRM server can take the whole trail in one request."""
+        from utils.routing import RoutingClient
+
+        client = RoutingClient(base_url="http://osrm.local:5000/", max_points=500)
+        with patch.object(client.session, "get", return_value=_ok()) as mock_get:
+            client.trail_distance_km(_trail(120))
+
+        assert mock_get.call_count == 1
+        assert mock_get.call_args[0][0].startswith("http://osrm.local:5000/route/v1/driving/")
+
+    def test_session_retries_with_backoff(self):
+        """The pooled adapter retries transient failures."""
+        from config import OSRM_RETRIES
+        from utils.routing import routing_client
+
+        retry = routing_client.session.get_adapter("https://router.project-osrm.org").max_retries
+
+        assert retry.total == OSRM_RETRIES
+        assert retry.backoff_factor > 0
+        assert 429 in retry.status_forcelist
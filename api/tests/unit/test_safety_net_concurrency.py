@@ -0,0 +1,105 @@
+"""Unit tests for concurrent safety-net processing in check_stale_trips.
+
+Tests verify:
+- Users are recovered in parallel and results keep input order
+- A slow user times out without holding up the others (partial results)
+- A failing user is reported as error, not aborting the run
+- A user still being recovered is never processed twice at once
+"""
+
+import threading
+import time
+
+import pytest
+from unittest.mock import patch
+
+
+USERS = ["a@test.com", "b@test.com", "c@test.com"]
+
+
+@pytest.fixture
+def active_trips():
+    """Three stale trips returned by the active trip index."""
+    with patch("services.webhook_service.get_all_active_trips") as mock:
+        mock.return_value = [(user_id, {"active": True}) for user_id in USERS]
+        yield mock
+
+
+@pytest.fixture
+def fast_deadlines():
+    """Short deadlines so timeout tests run quickly."""
+    with patch("services.webhook_service.SAFETY_NET_TRIP_TIMEOUT_SECONDS", 0.3), \
+         patch("services.webhook_service.SAFETY_NET_POLL_SECONDS", 0.05):
+        yield
+
+
+class TestSafetyNetConcurrency:
+    """Tests for the bounded-concurrency safety net."""
+
+    def test_users_recovered_in_parallel(self, active_trips):
+        """Three 0.3 s recoveries finish in well under 0.9 s, in input order."""
+        from services.webhook_service import webhook_service
+
+        def recover(user_id, cache, now):
+            time.sleep(0.3)
+            return {"user": user_id, "action": "finalized"}
+
+        with patch.object(webhook_service, "_recover_stale_trip", side_effect=recover):
+            started = time.monotonic()
+            result = webhook_service.check_stale_trips()
+            elapsed = time.monotonic() - started
+
+        assert elapsed < 0.8
+        assert result["status"] == "completed"
+        assert [r["user"] for r in result["results"]] == USERS
+
+    def test_slow_user_times_out(self, active_trips, fast_deadlines):
+        """A hanging vendor call yields a timeout entry and partial status."""
+        from services.webhook_service import webhook_service
+
+        release = threading.Event()
+
+        def recover(user_id, cache, now):
+            if user_id == "b@test.com":
+                release.wait(5)
+            return {"user": user_id, "action": "finalized"}
+
+        try:
+            with patch.object(webhook_service, "_recover_stale_trip", side_effect=recover):
+                result = webhook_service.check_stale_trips()
+        finally:
+            release.set()
+
+        assert result["status"] == "partial"
+        actions = {r["user"]: r["action"] for r in result["results"]}
+        assert actions == {"a@test.com": "finalized", "b@test.com": "timeout", "c@test.com": "finalized"}
+
+    def test_failure_is_isolated(self, active_trips):
+        """An exception for one user is reported and others still finish."""
+        from services.webhook_service import webhook_service
+
+        def recover(user_id, cache, now):
+            if user_id == "a@test.com":
+                raise RuntimeError("vendor API exploded")
+            return {"user": user_id, "action": "finalized"}
+
+        with patch.object(webhook_service, "_recover_stale_trip", side_effect=recover):
+            result = webhook_service.check_stale_trips()
+
+        assert result["status"] == "completed"
+        assert result["results"][0] == {"user": "a@test.com", "action": "error", "reason": "vendor API exploded"}
+        assert [r["action"] for r in result["results"][1:]] == ["finalized", "finalized"]
+
+    def test_user_in_recovery_is_skipped(self, active_trips):
+        """A user still claimed by an earlier run is not recovered again."""
+        from services.webhook_service import webhook_service
+
+        assert webhook_service._claim_recovery("a@test.com")
+        try:
+            with patch.object(webhook_service, "_recover_stale_trip", side_effect=lambda u, c, n: {"user": u, "action": "finalized"}) as recover:
+                result = webhook_service.check_stale_trips()
+        finally:
+            webhook_service._release_recovery("a@test.com")
+
+        assert result["results"][0] == {"user": "a@test.com", "action": "skipped", "reason": "recovery_in_progress"}
+        assert recover.call_count == 2
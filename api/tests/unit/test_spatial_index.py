@@ -0,0 +1,170 @@
+"""Unit tests for utils/spatial.py and the known-location index in LocationService.
+
+Tests verify:
+- LocationIndex returns the nearest location containing the point
+- Circles spanning grid cell boundaries are found from every side
+- Results match a brute-force haversine scan
+- LocationService keeps the index in sync with CONFIG["locations"]
+"""
+
+import random
+
+import pytest
+from unittest.mock import patch
+
+from tests.mocks.mock_firestore import MockFirestore
+
+
+class TestLocationIndex:
+    """Tests for LocationIndex."""
+
+    def test_nearest_of_overlapping_locations(self):
+        """When two circles contain the point, the closer center wins."""
+        from utils.spatial import LocationIndex
+
+        index = LocationIndex()
+        index.add("far", 51.9200, 4.4800, 300, {"id": 1})
+        index.add("near", 51.9210, 4.4800, 300, {"id": 2})
+
+        name, data, distance = index.nearest(51.9209, 4.4800)
+
+        assert name == "near"
+        assert data == {"id": 2}
+        assert distance < 20
+
+    def test_outside_radius_returns_none(self):
+        from utils.spatial import LocationIndex
+
+        index = LocationIndex()
+        index.add("home", 51.92, 4.48, 150)
+
+        assert index.nearest(51.93, 4.48) is None
+
+    def test_location_on_cell_boundary(self):
+        """A circle centered on a grid corner matches from all four cells."""
+        from utils.spatial import LocationIndex
+
+        index = LocationIndex(cell_degrees=0.01)
+        index.add("corner", 51.92, 4.48, 150)
+
+        for dlat, dlon in [(0.0005, 0.0005), (-0.0005, 0.0005), (0.0005, -0.0005), (-0.0005, -0.0005)]:
+            assert index.nearest(51.92 + dlat, 4.48 + dlon)[0] == "corner"
+
+    def test_remove_and_replace(self):
+        """Removing or moving a location updates its cells."""
+        from utils.spatial import LocationIndex
+
+        index = LocationIndex()
+        index.add("office", 51.92, 4.48, 150)
+        index.add("office", 52.37, 4.90, 150)
+
+        assert index.nearest(51.92, 4.48) is None
+        assert index.nearest(52.37, 4.90)[0] == "office"
+
+        index.remove("office")
+        assert len(index) == 0
+        assert index.nearest(52.37, 4.90) is None
+
+    def test_matches_brute_force(self):
+        """Nearest match agrees with a linear haversine scan."""
+        from utils.geo import haversine
+        from utils.spatial import LocationIndex
+
+        rng = random.Random(42)
+        locations = {
+            f"loc-{i}": (51.9 + rng.uniform(-0.05, 0.05), 4.45 + rng.uniform(-0.05, 0.05), rng.choice([100, 150, 300]))
+            for i in range(200)
+        }
+        index = LocationIndex()
+        for name, (lat, lon, radius) in locations.items():
+            index.add(name, lat, lon, radius)
+
+        for _ in range(500):
+            lat, lon = 51.9 + rng.uniform(-0.05, 0.05), 4.45 + rng.uniform(-0.05, 0.05)
+            matches = [
+                (haversine(lat, lon, l_lat, l_lon), name)
+                for name, (l_lat, l_lon, radius) in locations.items()
+                if haversine(lat, lon, l_lat, l_lon) <= radius
+            ]
+            expected = min(matches)[1] if matches else None
+            result = index.nearest(lat, lon)
+            assert (result[0] if result else None) == expected
+
+
+class TestLocationServiceIndex:
+    """Tests for LocationService index synchronization."""
+
+    @pytest.fixture
+    def locations(self):
+        locations = {
+            "Thuis": {"lat": 51.92, "lon": 4.48, "radius": 150, "is_business": False},
+            "Unset": {"lat": 0, "lon": 0, "radius": 150, "is_business": True},
+        }
+        with patch("services.location_service.CONFIG", {
+            "locations": locations,
+            "skip_location": {"lat": 0, "lon": 0, "radius": 0},
+            "maps_api_key": "",
+        }), patch("services.location_service.load_custom_locations"):
+            yield locations
+
+    def test_replaced_config_is_reindexed(self, locations):
+        """A new CONFIG dict is picked up without stale matches."""
+        from services.location_service import location_service
+
+        assert location_service.match_known_location(51.92, 4.48)[0] == "Thuis"
+        assert location_service.match_known_location(0, 0) is None
+
+        with patch("services.location_service.CONFIG", {"locations": {}}):
+            assert location_service.match_known_location(51.92, 4.48) is None
+
+    def test_entries_added_elsewhere_are_indexed(self, locations):
+        """Locations written into CONFIG by load_custom_locations are found."""
+        from database import locations_changed
+        from services.location_service import location_service
+
+        location_service.match_known_location(51.92, 4.48)
+        locations["Klant"] = {"lat": 52.0, "lon": 4.3, "radius": 150, "is_business": True}
+        locations_changed()
+
+        result = location_service.reverse_geocode(52.0, 4.3)
+
+        assert result["label"] == "Klant"
+        assert result["is_business"] is True
+
+    def test_unchanged_locations_not_rescanned(self, locations):
+        """Queries between writes neither rebuild the index nor walk CONFIG."""
+        from services.location_service import location_service
+
+        location_service.match_known_location(51.92, 4.48)
+        with patch.object(location_service._location_index, "clear") as clear, \
+             patch.object(location_service, "_index_location") as index:
+            for _ in range(10):
+                assert location_service.match_known_location(51.92, 4.48)[0] == "Thuis"
+                location_service.is_near_known_location(51.92, 4.48, 1000)
+
+        clear.assert_not_called()
+        index.assert_not_called()
+
+    def test_moved_location_is_reindexed(self, locations):
+        """Moving a location through add_location drops its old position."""
+        from services.location_service import location_service
+
+        with patch("services.location_service.get_db", return_value=MockFirestore()):
+            assert location_service.match_known_location(51.92, 4.48)[0] == "Thuis"
+            location_service.add_location("Thuis", 52.5, 4.48)
+
+        assert location_service.match_known_location(51.92, 4.48) is None
+        assert location_service.match_known_location(52.5, 4.48)[0] == "Thuis"
+
+    def test_add_and_delete_location(self, locations):
+        """add_location and delete_location update the index immediately."""
+        from services.location_service import location_service
+
+        with patch("services.location_service.get_db", return_value=MockFirestore()):
+            location_service.match_known_location(51.92, 4.48)
+            location_service.add_location("Thuis", 52.1, 4.2)
+            assert location_service.match_known_location(52.1, 4.2)[0] == "Thuis"
+            assert location_service.match_known_location(51.92, 4.48) is None
+
+            location_service.delete_location("Thuis")
+            assert location_service.match_known_location(52.1, 4.2) is None
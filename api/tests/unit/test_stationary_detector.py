@@ -0,0 +1,132 @@
+"""Unit tests for services/stationary_detector.py.
+
+Tests verify:
+- The incremental window gives the same answer as rescanning the event tail
+- The window only holds events from the last GPS_STATIONARY_TIMEOUT_MINUTES
+- Window state survives a JSON round trip (it lives in the trip cache)
+- The ping path uses the trip's window instead of rebuilding it
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import patch
+
+from config import GPS_STATIONARY_RADIUS_METERS, GPS_STATIONARY_TIMEOUT_MINUTES
+from utils.geo import haversine
+
+
+START = datetime(2024, 1, 19, 10, 0, 0)
+
+
+def _rescan(events: list[dict], now: datetime) -> bool:
+    """Reference rule: the tail within the timeout, all within the radius of its oldest event."""
+    recent = []
+    for event in reversed(events):
+        event_time = datetime.fromisoformat(event["timestamp"].replace("Z", ""))
+        if (now - event_time).total_seconds() / 60 <= GPS_STATIONARY_TIMEOUT_MINUTES:
+            recent.append(event)
+        else:
+            break
+    if len(recent) < 2:
+        return False
+    first = recent[-1]
+    for event in recent:
+        if event["lat"] and event["lng"] and first["lat"] and first["lng"]:
+            if haversine(first["lat"], first["lng"], event["lat"], event["lng"]) > GPS_STATIONARY_RADIUS_METERS:
+                return False
+    return True
+
+
+def _events(seed: int, count: int = 300) -> list[dict]:
+    """Drive with stops, GPS jitter, L-shaped detours and the odd missing fix."""
+    rng = random.Random(seed)
+    lat, lng, t = 51.9, 4.4, START
+    events = []
+    for _ in range(count):
+        t += timedelta(seconds=rng.choice([5, 10, 15, 30, 60, 90]))
+        mode = rng.random()
+        if mode < 0.5:
+            step = 0.00005  # Parked: a few meters of jitter
+        elif mode < 0.8:
+            step = 0.0003  # Near the radius
+        else:
+            step = 0.002  # Driving
+        if rng.random() < 0.5:
+            lat += rng.uniform(-step, step)
+        else:
+            lng += rng.uniform(-step, step)
+        missing = rng.random() < 0.03
+        events.append({
+            "lat": None if missing else lat,
+            "lng": None if missing else lng,
+            "timestamp": t.isoformat() + "Z",
+            "is_skip": False,
+        })
+    return events
+
+
+class TestStationaryWindow:
+    """Tests for StationaryDetector."""
+
+    @pytest.mark.parametrize("seed", range(8))
+    def test_matches_tail_rescan(self, seed):
+        from services.stationary_detector import stationary_detector
+
+        events = _events(seed)
+        window = stationary_detector.new_window()
+
+        for i, event in enumerate(events):
+            stationary_detector.add(window, event)
+            now = datetime.fromisoformat(event["timestamp"].replace("Z", ""))
+            assert stationary_detector.is_stationary(window, (now - datetime(1970, 1, 1)).total_seconds())[0] == _rescan(events[:i + 1], now), i
+
+    def test_later_now_ignores_old_events(self):
+        """The safety net evaluates at wall-clock time, after the last ping."""
+        from services.stationary_detector import stationary_detector
+
+        events = [{"lat": 51.9, "lng": 4.4, "timestamp": (START + timedelta(minutes=i)).isoformat() + "Z"} for i in range(4)]
+        window = stationary_detector.from_events(events)
+        later = (START + timedelta(minutes=3 + GPS_STATIONARY_TIMEOUT_MINUTES, seconds=1) - datetime(1970, 1, 1)).total_seconds()
+
+        assert stationary_detector.is_stationary(window, later) == (False, 0)
+
+    def test_window_is_bounded(self):
+        from services.stationary_detector import stationary_detector
+
+        window = stationary_detector.from_events(_events(1, count=2000))
+
+        # At most one event every 5 s over the timeout, plus the newest
+        assert len(window["t"]) <= GPS_STATIONARY_TIMEOUT_MINUTES * 60 // 5 + 1
+        assert all(len(window[name]) <= len(window["t"]) for name in ("max_lat", "min_lat", "max_lng", "min_lng"))
+
+    def test_state_survives_json_round_trip(self):
+        from services.stationary_detector import stationary_detector
+
+        events = _events(3, count=50)
+        window = stationary_detector.from_events(events[:40])
+        restored = json.loads(json.dumps(window))
+        for event in events[40:]:
+            stationary_detector.add(window, event)
+            stationary_detector.add(restored, event)
+
+        assert restored == window
+
+
+class TestPingPath:
+    """Tests for the trip's window on the webhook ping path."""
+
+    def test_ping_uses_cached_window(self):
+        from services.stationary_detector import stationary_detector
+        from services.webhook_service import webhook_service
+
+        events = [{"lat": 51.9, "lng": 4.4, "timestamp": (START + timedelta(minutes=i)).isoformat() + "Z"} for i in range(3)]
+        window = stationary_detector.from_events(events)
+
+        with patch.object(stationary_detector, "from_events") as rebuild:
+            result = webhook_service._check_gps_stationary(events, now=START + timedelta(minutes=2), window=window)
+
+        assert result is True
+        rebuild.assert_not_called()
@@ -0,0 +1,237 @@
+"""Unit tests for the Tesla provider's non-waking status mode.
+
+Tests verify:
+- With wake_up=False a sleeping car is never woken and reports UNKNOWN
+  with its last known position
+- An online car is read as before
+- The vehicle list is fetched once per provider
+- Authorized Tesla cars reach the ping path, and a sleeping car keeps its
+  pooled provider
+- Tokens are read from Firestore once and written only when they change;
+  cached tokens expire and are dropped when a refresh fails
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from car_providers import VehicleState
+from tests.mocks.mock_firestore import MockFirestore
+
+
+class FakeVehicle(dict):
+    """teslapy.Vehicle stand-in: a dict with the vehicle methods mocked."""
+
+    def __init__(self, state: str, **data):
+        super().__init__(vin="VIN1", state=state, **data)
+        self.available = MagicMock(side_effect=lambda max_age=60: self["state"] == "online")
+        self.sync_wake_up = MagicMock()
+        self.get_vehicle_data = MagicMock(side_effect=self._vehicle_data)
+        self.live = {}
+
+    def _vehicle_data(self, endpoints=None):
+        self.update(self.live)
+        return self
+
+
+def _provider(vehicle, wake_up=False):
+    from car_providers.tesla import TeslaProvider
+
+    provider = TeslaProvider("driver@example.com", wake_up=wake_up)
+    provider._tesla = MagicMock()
+    provider._tesla.token = None
+    provider._tesla.vehicle_list.return_value = [vehicle]
+    return provider
+
+
+class TestNonWakingStatus:
+    """Tests for TeslaProvider(wake_up=False).get_data."""
+
+    def test_sleeping_car_is_not_woken(self):
+        vehicle = FakeVehicle("asleep", drive_state={"latitude": 51.9, "longitude": 4.4, "shift_state": None})
+        provider = _provider(vehicle)
+
+        data = provider.get_data()
+
+        assert data.state == VehicleState.UNKNOWN
+        assert (data.latitude, data.longitude) == (51.9, 4.4)
+        vehicle.sync_wake_up.assert_not_called()
+        vehicle.get_vehicle_data.assert_not_called()
+
+    def test_online_car_reads_live_data(self):
+        vehicle = FakeVehicle("online")
+        vehicle.live = {"drive_state": {"shift_state": "D", "latitude": 52.0, "longitude": 4.5}, "vehicle_state": {"odometer": 100}}
+        provider = _provider(vehicle)
+
+        data = provider.get_data()
+
+        assert data.state == VehicleState.DRIVING
+        assert data.latitude == 52.0
+        assert data.odometer_km == pytest.approx(160.934)
+
+    def test_failed_live_read_reports_unknown(self):
+        vehicle = FakeVehicle("online", drive_state={"shift_state": "D", "latitude": 51.9, "longitude": 4.4})
+        vehicle.get_vehicle_data.side_effect = RuntimeError("408 vehicle unavailable")
+        provider = _provider(vehicle)
+
+        data = provider.get_data()
+
+        assert data.state == VehicleState.UNKNOWN
+        assert data.latitude == 51.9
+
+    def test_waking_mode_unchanged(self):
+        vehicle = FakeVehicle("asleep")
+        provider = _provider(vehicle, wake_up=True)
+
+        provider.get_data()
+
+        vehicle.sync_wake_up.assert_called_once_with(timeout=30)
+
+    def test_vehicle_list_is_cached(self):
+        provider = _provider(FakeVehicle("asleep"))
+
+        provider.get_data()
+        provider.get_data()
+
+        assert provider._tesla.vehicle_list.call_count == 1
+
+    def test_state_machine_builds_non_waking_provider(self):
+        from services.car_service import car_service
+
+        provider = car_service._build_provider({
+            "car_id": "tesla-1",
+            "brand": "tesla",
+            "credentials": {"username": "driver@example.com", "oauth_completed": True},
+        })
+
+        assert provider._wake_up is False
+
+
+class TestPingPath:
+    """Tests for Tesla cars in get_cars_with_credentials/check_car_driving_status."""
+
+    @pytest.fixture
+    def db(self):
+        db = MockFirestore()
+        with patch("services.car_service.get_db", return_value=db):
+            yield db
+
+    def test_authorized_tesla_is_polled(self, db):
+        from services.car_service import car_service
+
+        car_ref = db.collection("users").document("u1").collection("cars").document("tesla-1")
+        car_ref.set({"name": "Model 3", "brand": "tesla"})
+        car_ref.collection("credentials").document("api").set({
+            "brand": "tesla", "username": "driver@example.com", "password": "", "oauth_completed": True,
+        })
+
+        cars = car_service.get_cars_with_credentials("u1")
+
+        assert [car["car_id"] for car in cars] == ["tesla-1"]
+        assert cars[0]["brand"] == "tesla"
+
+    def test_pending_tesla_is_not_polled(self, db):
+        from services.car_service import car_service
+
+        car_ref = db.collection("users").document("u1").collection("cars").document("tesla-1")
+        car_ref.set({"name": "Model 3", "brand": "tesla"})
+        car_ref.collection("credentials").document("api").set({
+            "brand": "tesla", "username": "driver@example.com", "password": "", "oauth_pending": True,
+        })
+
+        assert car_service.get_cars_with_credentials("u1") == []
+
+    def test_sleeping_car_keeps_pooled_provider(self):
+        from car_providers.tesla import TeslaProvider
+        from services.car_service import car_service
+
+        vehicle = FakeVehicle("asleep", drive_state={"latitude": 51.9, "longitude": 4.4, "shift_state": None})
+        tesla = MagicMock()
+        tesla.token = None
+        tesla.vehicle_list.return_value = [vehicle]
+
+        def connect(provider):
+            provider._tesla = tesla
+            return True
+
+        car_info = {
+            "car_id": "tesla-1",
+            "user_id": "u1",
+            "name": "Model 3",
+            "brand": "tesla",
+            "credentials": {"username": "driver@example.com", "oauth_completed": True},
+        }
+        with patch.object(TeslaProvider, "connect", autospec=True, side_effect=connect) as mock_connect:
+            first = car_service.check_car_driving_status(car_info)
+            second = car_service.check_car_driving_status(car_info)
+
+        assert first == second
+        assert first["is_parked"] is None
+        assert first["state"] == "asleep"
+        assert (first["lat"], first["lng"]) == (51.9, 4.4)
+        vehicle.sync_wake_up.assert_not_called()
+        vehicle.get_vehicle_data.assert_not_called()
+        # Same pooled provider both times: no reconnect, vehicle list fetched once
+        assert mock_connect.call_count == 1
+        assert tesla.vehicle_list.call_count == 1
+
+
+class TestTokenCache:
+    """Tests for the in-memory Tesla token cache."""
+
+    @pytest.fixture
+    def db(self):
+        db = MockFirestore()
+        with patch("database.get_db", return_value=db), \
+                patch("utils.encryption.encrypt_dict", side_effect=lambda d: dict(d)), \
+                patch("utils.encryption.decrypt_dict", side_effect=lambda d: dict(d)):
+            yield db
+
+    def test_tokens_loaded_once(self, db):
+        from car_providers.tesla import TeslaProvider
+
+        db.collection("cache").document("tesla_tokens_driver@example.com").set({"tokens_encrypted": {"access_token": "a"}})
+
+        with patch("database.get_db", wraps=lambda: db) as get_db:
+            first = TeslaProvider("driver@example.com")._load_tokens_from_firestore()
+            second = TeslaProvider("driver@example.com")._load_tokens_from_firestore()
+
+        assert first == second == {"access_token": "a"}
+        assert get_db.call_count == 1
+
+    def test_unchanged_tokens_not_rewritten(self, db):
+        from car_providers.tesla import TeslaProvider
+
+        provider = TeslaProvider("driver@example.com")
+        with patch("database.get_db", wraps=lambda: db) as get_db:
+            provider._save_tokens_to_firestore({"access_token": "a"})
+            provider._save_tokens_to_firestore({"access_token": "a"})
+            provider._save_tokens_to_firestore({"access_token": "b"})
+
+        assert get_db.call_count == 2
+
+    def test_cached_tokens_expire(self, db):
+        """Tokens refreshed by another instance are picked up once the entry expires."""
+        from car_providers.tesla import TeslaProvider, _token_cache
+
+        tokens_doc = db.collection("cache").document("tesla_tokens_driver@example.com")
+        tokens_doc.set({"tokens_encrypted": {"access_token": "a"}})
+
+        with patch.object(_token_cache, "ttl_seconds", 0):
+            first = TeslaProvider("driver@example.com")._load_tokens_from_firestore()
+            tokens_doc.set({"tokens_encrypted": {"access_token": "b"}})
+            second = TeslaProvider("driver@example.com")._load_tokens_from_firestore()
+
+        assert first == {"access_token": "a"}
+        assert second == {"access_token": "b"}
+
+    def test_failed_refresh_drops_cached_tokens(self, db):
+        from car_providers.tesla import TeslaProvider, _token_cache
+
+        _token_cache.put("driver@example.com", {"access_token": "a", "expires_at": 0})
+        teslapy = MagicMock()
+        teslapy.Tesla.return_value.refresh_token.side_effect = RuntimeError("invalid_grant")
+
+        with patch.dict("sys.modules", {"teslapy": teslapy}):
+            assert TeslaProvider("driver@example.com").connect() is False
+
+        assert _token_cache.get("driver@example.com") is None
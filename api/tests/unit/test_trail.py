@@ -0,0 +1,146 @@
+"""Unit tests for utils/trail.py.
+
+Tests verify:
+- Time-ordered streams are merged on numeric timestamps
+- Near-duplicate points are dropped like the scalar haversine check
+- lng/lon keys, missing timestamps and out-of-order input are handled
+- Speed outliers are dropped and trails are simplified within the tolerance
+"""
+
+import random
+
+from utils.geo import haversine
+from utils.trail import (
+    DEDUPE_METERS, merge_trails, parse_epoch, reject_outliers, simplify_trail, _segment_distance,
+)
+
+
+def _point(lat, lng, timestamp):
+    return {"lat": lat, "lng": lng, "timestamp": timestamp}
+
+
+class TestParseEpoch:
+    """Tests for parse_epoch."""
+
+    def test_mixed_precision_compares_numerically(self):
+        # As strings "08:00:00.500000" sorts before "08:00:00Z" ("." < "Z")
+        assert parse_epoch("2024-01-20T08:00:00.500000") > parse_epoch("2024-01-20T08:00:00Z")
+        assert parse_epoch("2024-01-20T08:00:00Z") == parse_epoch("2024-01-20T08:00:00+00:00")
+
+    def test_missing_or_invalid_sorts_first(self):
+        assert parse_epoch(None) == float("-inf")
+        assert parse_epoch("not a time") == float("-inf")
+
+
+class TestMergeTrails:
+    """Tests for merge_trails."""
+
+    def test_interleaves_streams_by_time(self):
+        car = [_point(51.90, 4.40, "2024-01-20T08:00:00Z"), _point(51.92, 4.40, "2024-01-20T08:02:00Z")]
+        phone = [_point(51.91, 4.40, "2024-01-20T08:01:00.250000"), _point(51.93, 4.40, "2024-01-20T08:03:00Z")]
+
+        trail = merge_trails(car, phone)
+
+        assert [p["lat"] for p in trail] == [51.90, 51.91, 51.92, 51.93]
+        assert trail[1]["timestamp"] == "2024-01-20T08:01:00.250000"
+
+    def test_drops_points_within_dedupe_distance(self):
+        car = [_point(51.9000, 4.40, "2024-01-20T08:00:00Z"), _point(51.9002, 4.40, "2024-01-20T08:00:10Z")]
+        phone = [_point(51.9010, 4.40, "2024-01-20T08:00:20Z")]
+
+        trail = merge_trails(car, phone)
+
+        # 0.0002 deg lat is ~22 m; 0.001 deg is ~111 m
+        assert [p["lat"] for p in trail] == [51.9000, 51.9010]
+
+    def test_accepts_lon_key(self):
+        trail = merge_trails([{"lat": 51.90, "lon": 4.40, "timestamp": None}], [_point(51.91, 4.40, "2024-01-20T08:00:00Z")])
+
+        assert trail[0] == {"lat": 51.90, "lng": 4.40, "timestamp": None}
+        assert len(trail) == 2
+
+    def test_unsorted_stream_is_sorted(self):
+        phone = [_point(51.92, 4.40, "2024-01-20T08:02:00Z"), _point(51.90, 4.40, "2024-01-20T08:00:00Z")]
+
+        trail = merge_trails([], phone)
+
+        assert [p["lat"] for p in trail] == [51.90, 51.92]
+
+    def test_matches_scalar_haversine_dedupe(self):
+        """Same points kept as the per-point haversine loop, including near the threshold."""
+        rng = random.Random(7)
+        points, lat = [], 51.90
+        for i in range(2000):
+            lat += rng.uniform(0.0003, 0.0006)  # ~33-67 m steps straddle the threshold
+            points.append(_point(lat, 4.40 + rng.uniform(-0.0003, 0.0003), f"2024-01-20T08:{i // 60 % 60:02d}:{i % 60:02d}Z"))
+        points.sort(key=lambda p: p["timestamp"])
+
+        expected = []
+        for p in points:
+            if not expected or haversine(expected[-1]["lat"], expected[-1]["lng"], p["lat"], p["lng"]) >= DEDUPE_METERS:
+                expected.append(p)
+
+        trail = merge_trails(points[::2], points[1::2])
+
+        assert trail == expected
+
+
+def _timed(lat, lng, second):
+    return _point(lat, lng, f"2024-01-20T08:{second // 60:02d}:{second % 60:02d}Z")
+
+
+class TestRejectOutliers:
+    """Tests for reject_outliers."""
+
+    def test_drops_jump(self):
+        points = [_timed(51.90, 4.40, 0), _timed(51.95, 4.40, 10), _timed(51.9003, 4.40, 20)]
+
+        # 5.5 km in 10 s is ~2000 km/h
+        assert reject_outliers(points, max_speed_mps=70) == [points[0], points[2]]
+
+    def test_accepts_after_max_run(self):
+        """The phone really is over there: keep going after max_run rejections."""
+        points = [_timed(51.90, 4.40, 0)] + [_timed(52.00, 4.40, 10 + i) for i in range(4)]
+
+        kept = reject_outliers(points, max_speed_mps=70, max_run=3)
+
+        assert kept == [points[0], points[4]]
+
+    def test_untimed_or_simultaneous_fixes_kept(self):
+        points = [_timed(51.90, 4.40, 0), _timed(51.95, 4.40, 0), {"lat": 52.0, "lng": 4.4, "timestamp": None}]
+
+        assert reject_outliers(points, max_speed_mps=70) == points
+
+
+class TestSimplifyTrail:
+    """Tests for simplify_trail / TrailSimplifier."""
+
+    def test_straight_jittery_line_collapses(self):
+        rng = random.Random(3)
+        points = [_timed(51.90 + i * 0.0003, 4.40 + rng.uniform(-0.00005, 0.00005), i) for i in range(500)]
+
+        simplified = simplify_trail(points, tolerance=15)
+
+        assert simplified[0] is points[0] and simplified[-1] is points[-1]
+        assert len(simplified) < 30
+
+    def test_dropped_points_within_tolerance(self):
+        rng = random.Random(5)
+        lat, lng, points = 51.9, 4.4, []
+        for i in range(1000):
+            lat += rng.uniform(-0.0004, 0.0006)
+            lng += rng.uniform(-0.0004, 0.0006)
+            points.append(_timed(lat, lng, i))
+
+        simplified = simplify_trail(points, tolerance=15)
+
+        kept_at = [points.index(p) for p in simplified]
+        for a, b in zip(kept_at, kept_at[1:]):
+            for p in points[a + 1:b]:
+                assert _segment_distance(points[a], points[b], p) <= 15
+        assert len(simplified) < len(points)
+
+    def test_zero_tolerance_is_noop(self):
+        points = [_timed(51.90 + i * 0.001, 4.40, i) for i in range(10)]
+
+        assert simplify_trail(points, tolerance=0) == points
@@ -0,0 +1,147 @@
+"""Unit tests for utils/trail_codec.py and encoded trail storage.
+
+Tests verify:
+- Round trip keeps coordinates to 1e-5 degrees and timestamps to the second
+- Missing timestamps and negative coordinates survive encoding
+- Legacy trip documents (list of dicts) decode transparently
+- Finalized trips are stored with gps_trail_encoded
+"""
+
+import json
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+class TestTrailCodec:
+    """Tests for encode_trail/decode_trail."""
+
+    def test_round_trip(self):
+        """Decoded points match the input within codec precision."""
+        from utils.trail_codec import encode_trail, decode_trail
+
+        trail = [
+            {"lat": 51.92345, "lng": 4.47891, "timestamp": "2024-01-19T10:00:00Z"},
+            {"lat": 51.93012, "lng": 4.49007, "timestamp": "2024-01-19T10:00:45.123456Z"},
+            {"lat": 51.91, "lng": 4.5, "timestamp": "2024-01-19T10:02:00+00:00"},
+        ]
+
+        decoded = decode_trail(encode_trail(trail))
+
+        assert len(decoded) == 3
+        for original, point in zip(trail, decoded):
+            assert point["lat"] == pytest.approx(original["lat"], abs=1e-5)
+            assert point["lng"] == pytest.approx(original["lng"], abs=1e-5)
+        assert decoded[0]["timestamp"] == "2024-01-19T10:00:00Z"
+        assert decoded[1]["timestamp"] == "2024-01-19T10:00:45Z"
+        assert decoded[2]["timestamp"] == "2024-01-19T10:02:00Z"
+
+    def test_missing_timestamps_and_negative_coords(self):
+        """None timestamps, lon keys and western/southern coordinates are kept."""
+        from utils.trail_codec import encode_trail, decode_trail
+
+        trail = [
+            {"lat": -33.86785, "lon": -151.20732, "timestamp": None},
+            {"lat": -33.8679, "lng": -151.2071, "timestamp": "2024-01-19T10:00:00"},
+        ]
+
+        decoded = decode_trail(encode_trail(trail))
+
+        assert decoded[0]["timestamp"] is None
+        assert decoded[0]["lng"] == pytest.approx(-151.20732, abs=1e-5)
+        assert decoded[1]["timestamp"] == "2024-01-19T10:00:00Z"
+
+    def test_empty_trail(self):
+        """Empty trails encode to a bare version header."""
+        from utils.trail_codec import encode_trail, decode_trail
+
+        assert encode_trail([]) == "1:"
+        assert decode_trail("1:") == []
+
+    def test_unknown_version_rejected(self):
+        """Future versions are not silently misread."""
+        from utils.trail_codec import decode_trail
+
+        with pytest.raises(ValueError):
+            decode_trail("9:abc")
+
+    def test_encoding_is_much_smaller(self):
+        """A realistic trail shrinks by an order of magnitude vs JSON dicts."""
+        from utils.trail_codec import encode_trail
+
+        trail = [
+            {"lat": 51.9 + i * 0.0003, "lng": 4.4 + i * 0.0002, "timestamp": f"2024-01-19T10:{i // 60:02d}:{i % 60:02d}.000000Z"}
+            for i in range(500)
+        ]
+
+        assert len(encode_trail(trail)) * 8 < len(json.dumps(trail))
+
+    def test_trail_from_doc_reads_legacy_and_encoded(self):
+        """Documents with either representation yield the same point dicts."""
+        from utils.trail_codec import encode_trail, trail_from_doc
+
+        legacy = [{"lat": 51.9, "lng": 4.4, "timestamp": "2024-01-19T10:00:00Z"}]
+
+        assert trail_from_doc({"gps_trail": legacy}) == legacy
+        assert trail_from_doc({"gps_trail_encoded": encode_trail(legacy)}) == legacy
+        assert trail_from_doc({}) == []
+
+
+class TestEncodedTripStorage:
+    """Tests for encoded trails in TripService."""
+
+    @pytest.fixture
+    def mock_db(self):
+        with patch("services.trip_service.get_db") as mock:
+            yield mock
+
+    @pytest.fixture
+    def mock_deps(self):
+        with patch("services.trip_service.location_service") as loc, \
+             patch("services.trip_service.car_service") as car, \
+             patch("services.trip_service.get_google_maps_route_distance", return_value=None), \
+             patch("services.trip_service.calculate_route_deviation", return_value={"google_maps_km": None, "deviation_percent": None, "flag": None}), \
+             patch("services.trip_service.generate_id", return_value="trip-1"):
+            loc.match_known_location.return_value = ("Home", {"is_business": False})
+            loc.reverse_geocode.return_value = {"label": "Home", "address": "Street 1", "lat": 51.9, "lon": 4.4}
+            car.get_default_car_id.return_value = "car-1"
+            yield
+
+    def test_finalize_stores_encoded_trail(self, mock_db, mock_deps):
+        """The Firestore document holds gps_trail_encoded instead of a list."""
+        from services.trip_service import trip_service
+        from utils.trail_codec import decode_trail
+
+        trail = [
+            {"lat": 51.90, "lng": 4.45, "timestamp": "2024-01-15T08:00:00Z"},
+            {"lat": 51.95, "lng": 4.50, "timestamp": "2024-01-15T08:30:00Z"},
+        ]
+
+        result = trip_service.finalize_trip_from_gps(
+            start_gps=trail[0], end_gps=trail[-1], gps_trail=trail, gps_distance_km=6.0,
+            start_time="2024-01-15T08:00:00Z", user_id="user@test.com", car_id="car-1",
+        )
+
+        stored = mock_db.return_value.collection.return_value.document.return_value.set.call_args[0][0]
+        assert "gps_trail" not in stored
+        assert decode_trail(stored["gps_trail_encoded"]) == trail
+        # Return value keeps the plain trail for callers
+        assert result["gps_trail"] == trail
+
+    def test_doc_to_trip_encoded_format(self):
+        """trail_format=encoded returns the string and an empty point list."""
+        from services.trip_service import trip_service
+
+        doc = MagicMock()
+        doc.id = "trip-1"
+        doc.to_dict.return_value = {
+            "date": "15-01-2024",
+            "gps_trail": [{"lat": 51.9, "lng": 4.4, "timestamp": None}],
+        }
+
+        points = trip_service._doc_to_trip(doc)
+        encoded = trip_service._doc_to_trip(doc, trail_format="encoded")
+
+        assert points.gps_trail[0].lat == 51.9
+        assert encoded.gps_trail == []
+        assert encoded.gps_trail_encoded.startswith("1:")
@@ -0,0 +1,256 @@
+"""Unit tests for deferred trip enrichment (TripService + services/enrichment_queue.py).
+
+Tests verify:
+- Finalization commits the trip without geocoding or routing
+- Enrichment fills in addresses, route deviation and classification
+- Failed jobs are retried with backoff and give up after ENRICHMENT_MAX_ATTEMPTS
+- User edits made before enrichment are kept
+- The job is queued before the trip is written, and only one runner can
+  lease a job
+- The file-backed queue survives a restart
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import patch
+
+from tests.mocks.mock_firestore import MockFirestore
+
+
+START = {"lat": 51.90, "lng": 4.45, "timestamp": "2024-01-20T08:00:00Z"}  # Saturday
+END = {"lat": 51.95, "lng": 4.50, "timestamp": "2024-01-20T08:30:00Z"}
+
+
+@pytest.fixture
+def deps():
+    db = MockFirestore()
+    with patch("services.trip_service.get_db", return_value=db), \
+         patch("services.trip_service.location_service") as loc, \
+         patch("services.trip_service.car_service") as car, \
+         patch("services.trip_service.get_google_maps_route_distance", return_value=14.0) as route, \
+         patch("services.trip_service.generate_id", return_value="trip-1"), \
+         patch("services.trip_service.CONFIG", {"private_days": [5, 6], "locations": {}}):
+        loc.match_known_location.return_value = None
+        loc.reverse_geocode.side_effect = lambda lat, lng, user_id: {
+            "label": "Kantoor" if lat >= 51.92 else None,
+            "address": "Coolsingel 40, Rotterdam" if lat >= 51.92 else "Thuisstraat 1",
+            "lat": lat,
+            "lon": lng,
+            "is_business": lat >= 51.92,
+        }
+        car.get_default_car_id.return_value = "car-1"
+        yield {"db": db, "loc": loc, "route": route}
+
+
+def _finalize():
+    from services.trip_service import trip_service
+    return trip_service.finalize_trip_from_audi(
+        start_gps=START, end_gps=END, start_odo=10000, end_odo=10015,
+        start_time=START["timestamp"], user_id="user@test.com", car_id="car-1",
+    )
+
+
+def _trip(db: MockFirestore) -> dict:
+    return db.collection("trips").document("trip-1").get().to_dict()
+
+
+class TestDeferredFinalization:
+    """Tests for the fast commit + enrichment split."""
+
+    def test_commit_skips_geocoding_and_routing(self, deps):
+        trip = _finalize()
+
+        assert trip["enrichment_status"] == "pending"
+        assert trip["from_address"] == "51.9000, 4.4500"
+        assert trip["google_maps_km"] is None
+        deps["loc"].reverse_geocode.assert_not_called()
+        deps["route"].assert_not_called()
+        assert _trip(deps["db"])["distance_km"] == 15.0
+
+    def test_drain_enriches_trip(self, deps):
+        from services.trip_service import trip_service
+
+        _finalize()
+        result = trip_service.drain_enrichment_queue()
+
+        trip = _trip(deps["db"])
+        assert result == {"processed": 1, "done": 1}
+        assert trip["from_address"] == "Thuisstraat 1"
+        assert trip["to_address"] == "Kantoor"
+        assert trip["google_maps_km"] == 14.0
+        # Weekend, but to the office: business after enrichment
+        assert trip["trip_type"] == "B"
+        assert trip["enrichment_status"] == "done"
+        assert len(trip_service.enrichment_queue) == 0
+
+    def test_user_edits_survive_enrichment(self, deps):
+        from services.trip_service import trip_service
+
+        _finalize()
+        deps["db"].collection("trips").document("trip-1").update({"from_address": "Klant BV"})
+        trip_service.drain_enrichment_queue()
+
+        trip = _trip(deps["db"])
+        assert trip["from_address"] == "Klant BV"
+        assert trip["to_address"] == "Kantoor"
+
+    def test_failed_job_retried_with_backoff(self, deps):
+        from config import ENRICHMENT_RETRY_BASE_SECONDS
+        from services.trip_service import trip_service
+
+        _finalize()
+        deps["loc"].reverse_geocode.side_effect = RuntimeError("maps down")
+
+        assert trip_service.drain_enrichment_queue() == {"processed": 1, "retry": 1}
+        job = trip_service.enrichment_queue.get("trip-1")
+        retry_at = datetime.fromisoformat(job["next_attempt_at"].rstrip("Z"))
+        assert retry_at - datetime.utcnow() > timedelta(seconds=ENRICHMENT_RETRY_BASE_SECONDS - 5)
+        assert job["last_error"] == "maps down"
+
+        # Not due yet
+        assert trip_service.drain_enrichment_queue() == {"processed": 0}
+
+    def test_gives_up_after_max_attempts(self, deps):
+        from config import ENRICHMENT_MAX_ATTEMPTS
+        from services.trip_service import trip_service
+
+        _finalize()
+        deps["loc"].reverse_geocode.side_effect = RuntimeError("maps down")
+        trip_service.enrichment_queue.update("trip-1", {"attempts": ENRICHMENT_MAX_ATTEMPTS - 1})
+
+        assert trip_service.enrich_trip("trip-1") == "failed"
+        assert trip_service.enrichment_queue.get("trip-1")["next_attempt_at"] is None
+        assert trip_service.drain_enrichment_queue() == {"processed": 0}
+
+    def test_deleted_trip_skipped(self, deps):
+        from services.trip_service import trip_service
+
+        _finalize()
+        deps["db"].collection("trips").document("trip-1").delete()
+
+        assert trip_service.drain_enrichment_queue() == {"processed": 1, "skipped": 1}
+
+    def test_drain_stops_at_deadline(self, deps):
+        """Jobs that could not finish before the deadline stay due for the next run."""
+        import time
+        from config import ENRICHMENT_JOB_MAX_SECONDS
+        from services.trip_service import trip_service
+
+        _finalize()
+        result = trip_service.drain_enrichment_queue(deadline=time.monotonic() + ENRICHMENT_JOB_MAX_SECONDS - 1)
+
+        assert result == {"processed": 0, "deferred": 1}
+        deps["loc"].reverse_geocode.assert_not_called()
+        assert trip_service.drain_enrichment_queue(deadline=time.monotonic() + ENRICHMENT_JOB_MAX_SECONDS + 5) == {"processed": 1, "done": 1}
+
+    def test_job_queued_before_trip_write(self, deps):
+        """A failed trip write leaves a job that is dropped, never a trip without a job."""
+        from services.trip_service import trip_service
+        from tests.mocks.mock_firestore import MockDocumentReference
+
+        with patch.object(MockDocumentReference, "set", side_effect=RuntimeError("firestore down")):
+            with pytest.raises(RuntimeError):
+                _finalize()
+
+        assert trip_service.enrichment_queue.get("trip-1") is not None
+        assert trip_service.drain_enrichment_queue() == {"processed": 1, "skipped": 1}
+        assert len(trip_service.enrichment_queue) == 0
+
+    def test_background_job_not_drained_while_leased(self, deps):
+        """The committing worker holds the job's lease; the scheduler leaves it alone."""
+        from services.trip_service import trip_service
+
+        with patch("services.trip_service._enrichment_executor") as executor:
+            trip_service.configure_enrichment(trip_service.enrichment_queue, background=True)
+            _finalize()
+
+        job_id, expected = executor.submit.call_args.args[1:]
+        assert trip_service.drain_enrichment_queue() == {"processed": 0}
+        assert trip_service.enrich_trip(job_id, expected) == "done"
+
+    def test_second_runner_loses_lease(self, deps):
+        from services.trip_service import trip_service
+
+        _finalize()
+        expected = trip_service.enrichment_queue.get("trip-1")["next_attempt_at"]
+        deps["loc"].reverse_geocode.side_effect = RuntimeError("maps down")
+
+        assert trip_service.enrich_trip("trip-1", expected) == "retry"
+        assert trip_service.enrich_trip("trip-1", expected) == "leased"
+        assert trip_service.enrichment_queue.get("trip-1")["attempts"] == 1
+
+
+class TestEnrichmentQueueBackends:
+    """Tests for create_enrichment_queue backends."""
+
+    def test_file_queue_survives_restart(self, tmp_path):
+        from services.enrichment_queue import create_enrichment_queue
+
+        path = str(tmp_path / "queue.json")
+        queue = create_enrichment_queue("file", path)
+        queue.put({"id": "a", "next_attempt_at": "2024-01-20T08:00:00.000000Z"})
+        queue.put({"id": "b", "next_attempt_at": "2024-01-20T09:00:00.000000Z"})
+        queue.delete("a")
+
+        reopened = create_enrichment_queue("file", path)
+
+        assert [j["id"] for j in reopened.due("2024-01-20T10:00:00.000000Z", 10)] == ["b"]
+
+    def test_firestore_queue_due(self):
+        from services.enrichment_queue import create_enrichment_queue
+
+        db = MockFirestore()
+        with patch("services.enrichment_queue.get_db", return_value=db):
+            queue = create_enrichment_queue("firestore")
+            queue.put({"id": "late", "next_attempt_at": "2024-01-20T09:00:00.000000Z"})
+            queue.put({"id": "early", "next_attempt_at": "2024-01-20T08:00:00.000000Z"})
+            queue.put({"id": "failed", "next_attempt_at": None})
+
+            due = queue.due("2024-01-20T08:30:00.000000Z", 10)
+
+        assert [j["id"] for j in due] == ["early"]
+
+    @pytest.mark.parametrize("kind", ["memory", "firestore"])
+    def test_lease_only_once(self, kind):
+        from services.enrichment_queue import create_enrichment_queue
+
+        db = MockFirestore()
+        with patch("services.enrichment_queue.get_db", return_value=db):
+            queue = create_enrichment_queue(kind)
+            queue.put({"id": "a", "attempts": 0, "next_attempt_at": "2024-01-20T08:00:00.000000Z"})
+
+            first = queue.lease("a", "2024-01-20T08:00:00.000000Z", "2024-01-20T08:05:00.000000Z")
+            second = queue.lease("a", "2024-01-20T08:00:00.000000Z", "2024-01-20T08:05:00.000000Z")
+
+            assert first["attempts"] == 1
+            assert second is None
+            assert queue.get("a")["next_attempt_at"] == "2024-01-20T08:05:00.000000Z"
+            assert queue.lease("missing", "2024-01-20T08:00:00.000000Z", "2024-01-20T08:05:00.000000Z") is None
+
+    def test_firestore_lease_checks_update_time(self):
+        """A write between the lease's read and its update makes the lease fail."""
+        from services.enrichment_queue import create_enrichment_queue
+        from tests.mocks.mock_firestore import MockDocumentReference
+
+        db = MockFirestore()
+        with patch("services.enrichment_queue.get_db", return_value=db):
+            queue = create_enrichment_queue("firestore")
+            queue.put({"id": "a", "attempts": 0, "next_attempt_at": "2024-01-20T08:00:00.000000Z"})
+            real_get = MockDocumentReference.get
+
+            def racing_get(ref):
+                snapshot = real_get(ref)
+                ref.update({"attempts": 1})  # Another runner writes after our read
+                return snapshot
+
+            with patch.object(MockDocumentReference, "get", racing_get):
+                leased = queue.lease("a", "2024-01-20T08:00:00.000000Z", "2024-01-20T08:05:00.000000Z")
+
+        assert leased is None
+
+    def test_unknown_backend_rejected(self):
+        from services.enrichment_queue import create_enrichment_queue
+
+        with pytest.raises(ValueError):
+            create_enrichment_queue("redis")
@@ -199,6 +199,7 @@ class TestFinalizeFromAudi:
     def mock_location_service(self):
         """Mock location service for reverse geocoding."""
         with patch("services.trip_service.location_service") as mock:
+            mock.match_known_location.return_value = None
             mock.reverse_geocode.side_effect = lambda lat, lng, user_id: {
                 "label": "Thuis" if lat < 51.92 else "Kantoor",
                 "address": "Some Address",
@@ -415,6 +416,7 @@ class TestFinalizeFromGPS:
     def mock_location_service(self):
         """Mock location service."""
         with patch("services.trip_service.location_service") as mock:
+            mock.match_known_location.return_value = None
             mock.reverse_geocode.side_effect = lambda lat, lng, user_id: {
                 "label": "Thuis" if lat < 51.92 else "Kantoor",
                 "address": "Some Address",
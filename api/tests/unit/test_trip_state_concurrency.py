@@ -0,0 +1,262 @@
+"""Unit tests for optimistic concurrency on the trip cache.
+
+Tests verify:
+- Caches read with get_trip_cache are written back only if unchanged
+- New trips are created, never written over a trip another request started
+- Overlapping pings re-run instead of dropping GPS events, also when both
+  flush a GPS event chunk
+- Only one of two racing requests finalizes a trip
+- Conflicts are counted and retries are bounded
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import patch
+
+from tests.mocks.mock_firestore import MockFirestore
+
+
+USER = "user@test.com"
+
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat() + "Z"
+
+
+@pytest.fixture
+def db():
+    db = MockFirestore()
+    with patch("database.get_db", return_value=db):
+        yield db
+
+
+def _trip(**overrides) -> dict:
+    now = _iso(datetime.utcnow())
+    trip = {
+        "active": True,
+        "user_id": USER,
+        "car_id": "car-1",
+        "start_time": now,
+        "start_odo": None,
+        "gps_only_mode": True,
+        "gps_events": [{"lat": 51.90, "lng": 4.40, "timestamp": now, "is_skip": False}],
+        "gps_trail": [],
+    }
+    trip.update(overrides)
+    return trip
+
+
+class TestVersionedTripCache:
+    """Tests for the update-time precondition in database.set_trip_cache."""
+
+    def test_round_trip_keeps_version_out_of_storage(self, db):
+        from database import get_trip_cache, set_trip_cache, TRIP_CACHE_VERSION
+
+        set_trip_cache(_trip(), USER)
+        cache = get_trip_cache(USER)
+        cache["parked_count"] = 1
+        set_trip_cache(cache, USER)
+        cache["parked_count"] = 2
+        set_trip_cache(cache, USER)  # New version was stored in the dict
+
+        assert db.get_trip_cache(USER)["parked_count"] == 2
+        assert TRIP_CACHE_VERSION not in db.get_trip_cache(USER)
+
+    def test_stale_write_rejected(self, db):
+        from database import get_trip_cache, set_trip_cache, TripStateConflict
+
+        set_trip_cache(_trip(), USER)
+        first = get_trip_cache(USER)
+        second = get_trip_cache(USER)
+        second["parked_count"] = 1
+        set_trip_cache(second, USER)
+
+        first["parked_count"] = 5
+        with pytest.raises(TripStateConflict):
+            set_trip_cache(first, USER)
+        assert db.get_trip_cache(USER)["parked_count"] == 1
+
+    def test_write_after_delete_rejected(self, db):
+        from database import get_trip_cache, set_trip_cache, TripStateConflict
+
+        set_trip_cache(_trip(), USER)
+        cache = get_trip_cache(USER)
+        set_trip_cache(None, USER)
+
+        with pytest.raises(TripStateConflict):
+            set_trip_cache(cache, USER)
+        assert db.get_trip_cache(USER) is None
+
+    def test_new_cache_never_overwrites(self, db):
+        from database import set_trip_cache, TripStateConflict
+
+        set_trip_cache(_trip(), USER)
+
+        with pytest.raises(TripStateConflict):
+            set_trip_cache(_trip(car_id="car-2"), USER)
+        assert db.get_trip_cache(USER)["car_id"] == "car-1"
+
+
+class TestConcurrentRequests:
+    """Tests for conflict handling in the webhook state machine."""
+
+    @pytest.fixture
+    def services(self, db):
+        with patch("services.webhook_service.car_service") as car, \
+             patch("services.webhook_service.location_service") as loc, \
+             patch("services.webhook_service.trip_service") as trips, \
+             patch("services.webhook_service.calculate_gps_distance", return_value=5.0):
+            car.get_cars_with_credentials.return_value = []  # GPS-only pings, no vendor calls
+            loc.is_skip_location.return_value = False
+            trips.finalize_trip_from_gps.return_value = {"id": "trip-1"}
+            yield {"car": car, "loc": loc, "trips": trips}
+
+    def test_overlapping_pings_keep_both_events(self, db, services):
+        """A ping that lost the race re-reads and appends to the winner's state."""
+        import database
+        from services.webhook_service import webhook_service
+
+        database.set_trip_cache(_trip(), USER)
+        conflicts = webhook_service.trip_state_stats()["conflicts"]
+        real_get = database.get_trip_cache
+        calls = {"n": 0}
+
+        def racing_get(user_id):
+            cache = real_get(user_id)
+            calls["n"] += 1
+            if calls["n"] == 1:
+                # Another ping commits between our read and our write
+                other = real_get(user_id)
+                other["gps_events"] = other["gps_events"] + [{"lat": 51.91, "lng": 4.40, "timestamp": _iso(datetime.utcnow()), "is_skip": False}]
+                database.set_trip_cache(other, user_id)
+            return cache
+
+        with patch("services.webhook_service.get_trip_cache", side_effect=racing_get):
+            result = webhook_service.handle_ping(USER, 51.92, 4.40)
+
+        assert result["status"] == "gps_only_ping"
+        assert calls["n"] == 2
+        assert [e["lat"] for e in db.get_trip_cache(USER)["gps_events"]] == [51.90, 51.91, 51.92]
+        assert webhook_service.trip_state_stats()["conflicts"] == conflicts + 1
+
+    def test_racing_trip_starts_create_one_trip(self, db, services):
+        """A ping that starts a trip after another ping did joins that trip."""
+        import database
+        from services.webhook_service import webhook_service
+
+        real_get = database.get_trip_cache
+        calls = {"n": 0}
+
+        def racing_get(user_id):
+            cache = real_get(user_id)
+            calls["n"] += 1
+            if calls["n"] == 1:
+                database.set_trip_cache(_trip(), user_id)  # Another ping starts the trip
+            return cache
+
+        with patch("services.webhook_service.get_trip_cache", side_effect=racing_get):
+            result = webhook_service.handle_ping(USER, 51.92, 4.40)
+
+        assert result["status"] == "gps_only_ping"
+        assert [e["lat"] for e in db.get_trip_cache(USER)["gps_events"]] == [51.90, 51.92]
+
+    def test_inactive_leftover_is_replaced(self, db, services):
+        from services.webhook_service import webhook_service
+
+        db.collection("users").document(USER).collection("cache").document("trip_start").set(
+            {"active": False, "end_triggered": "2024-01-01T00:00:00Z"}
+        )
+
+        webhook_service.handle_ping(USER, 51.92, 4.40)
+
+        cache = db.get_trip_cache(USER)
+        assert cache["active"] is True
+        assert cache["end_triggered"] is None
+        assert [e["lat"] for e in cache["gps_events"]] == [51.92]
+
+    def test_racing_chunk_flushes_keep_every_event_once(self, db, services):
+        """Both pings flush chunk 0; only the chunk of the cache write that wins is part of the trip."""
+        import database
+        from services.gps_event_log import gps_event_log
+        from services.webhook_service import webhook_service
+
+        start = datetime.utcnow() - timedelta(minutes=5)
+
+        def event(i):
+            return {"lat": 51.90 + i * 0.001, "lng": 4.40, "timestamp": _iso(start + timedelta(seconds=10 * i)), "is_skip": False}
+
+        with patch("services.gps_event_log.GPS_EVENT_STORAGE", "chunked"), \
+             patch("services.gps_event_log.GPS_EVENT_CHUNK_SIZE", 10), \
+             patch("services.gps_event_log.GPS_EVENT_TAIL_SIZE", 4):
+            trip = _trip(gps_events=[])
+            gps_event_log.start(trip)
+            for i in range(9):
+                gps_event_log.append(trip, event(i))
+            database.set_trip_cache(trip, USER)
+            real_get = database.get_trip_cache
+            calls = {"n": 0}
+
+            def racing_get(user_id):
+                cache = real_get(user_id)
+                calls["n"] += 1
+                if calls["n"] == 1:
+                    # Another ping flushes chunk 0 and commits first
+                    other = real_get(user_id)
+                    gps_event_log.append(other, event(9))
+                    webhook_service._save_trip_cache(other, user_id)
+                return cache
+
+            with patch("services.webhook_service.get_trip_cache", side_effect=racing_get):
+                webhook_service.handle_pings(USER, [{"lat": 51.95, "lng": 4.40, "timestamp": start + timedelta(seconds=200)}])
+
+            cache = real_get(USER)
+            chunks = db.collection("users").document(USER).collection("gps_logs").document(cache["gps_log_id"]).collection("chunks")
+            events = gps_event_log.load(cache, USER)
+
+        assert len(list(chunks.stream())) == 2  # The losing attempt's chunk is left unreferenced
+        assert len(cache["gps_chunk_ids"]) == 1
+        assert [round(e["lat"], 3) for e in events] == [round(51.90 + i * 0.001, 3) for i in range(10)] + [51.95]
+
+    def test_racing_finalizations_create_one_trip(self, db, services):
+        """The end event that loses the finalization claim backs off."""
+        import database
+        from services.webhook_service import webhook_service
+
+        trail = [{"lat": 51.90 + i * 0.01, "lng": 4.40, "timestamp": _iso(datetime.utcnow()), "is_skip": False} for i in range(5)]
+        database.set_trip_cache(_trip(gps_events=trail), USER)
+        real_get = database.get_trip_cache
+        calls = {"n": 0}
+
+        def racing_get(user_id):
+            cache = real_get(user_id)
+            calls["n"] += 1
+            if calls["n"] == 1:
+                # Safety net claims the trip first
+                other = real_get(user_id)
+                other["finalizing_at"] = _iso(datetime.utcnow())
+                database.set_trip_cache(other, user_id)
+            return cache
+
+        with patch("services.webhook_service.get_trip_cache", side_effect=racing_get):
+            result = webhook_service.handle_end(USER, 51.95, 4.40)
+
+        assert result["status"] == "finalizing"
+        services["trips"].finalize_trip_from_gps.assert_not_called()
+
+    def test_retries_are_bounded(self, db, services):
+        from config import TRIP_STATE_MAX_ATTEMPTS
+        from database import TripStateConflict
+        from services.webhook_service import webhook_service
+
+        exhausted = webhook_service.trip_state_stats()["retries_exhausted"]
+
+        with patch("services.webhook_service.set_trip_cache", side_effect=TripStateConflict("busy")) as mock_set, \
+             patch("services.webhook_service.TRIP_STATE_RETRY_BACKOFF_SECONDS", 0):
+            database_trip = _trip()
+            with patch("services.webhook_service.get_trip_cache", side_effect=lambda uid: dict(database_trip)):
+                result = webhook_service.handle_ping(USER, 51.92, 4.40)
+
+        assert result == {"status": "conflict", "reason": "concurrent_update", "user": USER}
+        assert mock_set.call_count == TRIP_STATE_MAX_ATTEMPTS
+        assert webhook_service.trip_state_stats()["retries_exhausted"] == exhausted + 1
@@ -0,0 +1,151 @@
+"""Unit tests for the VW Group token store.
+
+Tests verify:
+- Tokens are read from Firestore once per account and kept in memory
+- Firestore is written only when tokens change
+- Storage is scoped per vendor account, not per connector
+- Stored tokens reach the connector session before it refreshes or logs in
+- Session tokens are persisted through the connectors after a fetch
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from unittest.mock import patch
+
+from tests.mocks.mock_firestore import MockFirestore
+
+
+@pytest.fixture
+def db():
+    db = MockFirestore()
+    with patch("database.get_db", return_value=db):
+        yield db
+
+
+def _docs(db) -> dict:
+    return {doc.id: doc.to_dict() for doc in db.collection("cache").stream()}
+
+
+class TestVWGroupTokenStore:
+    """Tests for VWGroupTokenStore."""
+
+    def test_load_reads_firestore_once(self, db):
+        from car_providers.vwgroup import VWGroupTokenStore, vwgroup_token_store
+
+        doc_id = VWGroupTokenStore._doc_id("skoda", "driver@example.com")
+        db.collection("cache").document(doc_id).set({"tokens": '{"session": "abc"}'})
+
+        with patch.object(vwgroup_token_store, "_read", wraps=vwgroup_token_store._read) as read:
+            first = vwgroup_token_store.load("skoda", "driver@example.com")
+            second = vwgroup_token_store.load("skoda", "Driver@Example.com")
+
+        assert first == second == {"session": "abc"}
+        assert read.call_count == 1
+        first["session"] = "changed"  # Callers get copies
+        assert vwgroup_token_store.load("skoda", "driver@example.com") == {"session": "abc"}
+
+    def test_save_writes_only_changes(self, db):
+        from car_providers.vwgroup import vwgroup_token_store
+
+        vwgroup_token_store.load("skoda", "driver@example.com")
+
+        assert vwgroup_token_store.save("skoda", "driver@example.com", {"session": "abc"}) is True
+        assert vwgroup_token_store.save("skoda", "driver@example.com", {"session": "abc"}) is False
+        assert vwgroup_token_store.save("skoda", "driver@example.com", {}) is False
+        assert vwgroup_token_store.save("skoda", "driver@example.com", {"session": "def"}) is True
+
+    def test_accounts_are_scoped_separately(self, db):
+        from car_providers.vwgroup import vwgroup_token_store
+
+        vwgroup_token_store.save("skoda", "a@example.com", {"session": "a"})
+        vwgroup_token_store.save("skoda", "b@example.com", {"session": "b"})
+
+        assert len(_docs(db)) == 2
+        vwgroup_token_store.clear()
+        assert vwgroup_token_store.load("skoda", "a@example.com") == {"session": "a"}
+        assert vwgroup_token_store.load("skoda", "b@example.com") == {"session": "b"}
+
+    def test_failed_write_is_retried(self, db):
+        from car_providers.vwgroup import vwgroup_token_store
+
+        with patch("database.get_db", side_effect=RuntimeError("firestore down")):
+            assert vwgroup_token_store.save("skoda", "driver@example.com", {"session": "abc"}) is False
+
+        assert vwgroup_token_store.save("skoda", "driver@example.com", {"session": "abc"}) is True
+
+
+class TestVWGroupProviderTokens:
+    """Tests for VWGroupProvider token handling against the real CarConnectivity."""
+
+    @pytest.fixture
+    def we_connect_session(self):
+        """Volkswagen connector session with the network calls patched out."""
+        pytest.importorskip("carconnectivity_connectors.volkswagen")
+        from carconnectivity_connectors.volkswagen.auth.we_connect_session import WeConnectSession
+
+        with patch("carconnectivity.carconnectivity.ntp_time_delta", return_value=0.0), \
+                patch.object(WeConnectSession, "refresh") as refresh, \
+                patch.object(WeConnectSession, "login") as login:
+            yield SimpleNamespace(refresh=refresh, login=login)
+
+    @staticmethod
+    def _identifier(username):
+        from carconnectivity_connectors.volkswagen.auth.session_manager import SessionManager, Service, SessionUser
+
+        return SessionManager.generate_identifier(Service.WE_CONNECT, SessionUser(username=username, password="secret"))
+
+    @staticmethod
+    def _token(access_token):
+        return {
+            "access_token": access_token, "refresh_token": "refresh", "id_token": "id",
+            "token_type": "Bearer", "expires_in": 3600, "expires_at": time.time() + 3600,
+        }
+
+    def test_stored_tokens_reach_the_connector_session(self, db, we_connect_session):
+        from car_providers.vwgroup import VWGroupProvider, vwgroup_token_store
+
+        identifier = self._identifier("driver@example.com")
+        vwgroup_token_store.save("volkswagen", "driver@example.com", {
+            identifier: {"token": self._token("old"), "metadata": {}},
+        })
+        provider = VWGroupProvider("volkswagen", "driver@example.com", "secret")
+
+        assert provider.connect()
+
+        session = provider._cc.connectors.connectors["volkswagen"].session
+        assert session.token["access_token"] == "old"
+        we_connect_session.refresh.assert_called_once()
+        we_connect_session.login.assert_not_called()
+
+    def test_without_stored_tokens_connector_logs_in(self, db, we_connect_session):
+        from car_providers.vwgroup import VWGroupProvider
+
+        assert VWGroupProvider("volkswagen", "driver@example.com", "secret").connect()
+
+        we_connect_session.login.assert_called_once()
+        we_connect_session.refresh.assert_not_called()
+
+    def test_save_persists_refreshed_session_tokens(self, db, we_connect_session):
+        from car_providers.vwgroup import VWGroupProvider, vwgroup_token_store
+
+        identifier = self._identifier("driver@example.com")
+        vwgroup_token_store.save("volkswagen", "driver@example.com", {
+            identifier: {"token": self._token("old"), "metadata": {}},
+        })
+        provider = VWGroupProvider("volkswagen", "driver@example.com", "secret")
+        provider.connect()
+        session = provider._cc.connectors.connectors["volkswagen"].session
+
+        with patch("database.get_db", wraps=lambda: db) as get_db:
+            provider._save_tokens()  # Unchanged: no write
+            assert get_db.call_count == 0
+
+            session.token = self._token("new")
+            provider._save_tokens()
+            assert get_db.call_count == 1
+
+        vwgroup_token_store.clear()
+        stored = vwgroup_token_store.load("volkswagen", "driver@example.com")
+        assert stored[identifier]["token"]["access_token"] == "new"
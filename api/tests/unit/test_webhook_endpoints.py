@@ -96,6 +96,45 @@ class TestPingEndpoint:
         )
 
 
+class TestPingsBatchEndpoint:
+    """Tests for POST /webhook/pings endpoint."""
+
+    def test_pings_requires_bearer_token(self, client):
+        """POST /webhook/pings without Bearer token returns 401."""
+        response = client.post(
+            "/webhook/pings",
+            json={"points": [{"lat": 51.92, "lng": 4.47}]},
+        )
+
+        assert response.status_code == 401
+
+    def test_pings_rejects_empty_batch(self, client, auth_headers, mock_token_service):
+        """POST /webhook/pings with no points returns 422."""
+        response = client.post("/webhook/pings", json={"points": []}, headers=auth_headers)
+
+        assert response.status_code == 422
+
+    @patch("routes.webhooks.webhook_service")
+    def test_pings_passes_ordered_points(self, mock_service, client, auth_headers, mock_token_service):
+        """POST /webhook/pings passes points with device timestamps in order."""
+        mock_service.handle_pings.return_value = {"status": "gps_only_ping", "points": 2}
+
+        response = client.post(
+            "/webhook/pings?device_id=device-456",
+            json={"points": [
+                {"lat": 51.92, "lng": 4.47, "timestamp": "2024-01-19T10:00:00Z"},
+                {"lat": 51.93, "lng": 4.48, "timestamp": "2024-01-19T10:00:10Z"},
+            ]},
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 200
+        args = mock_service.handle_pings.call_args[0]
+        assert args[0] == "test@example.com"
+        assert [(p["lat"], p["timestamp"].second) for p in args[1]] == [(51.92, 0), (51.93, 10)]
+        assert args[2:] == (None, "device-456")
+
+
 class TestStartEndpoint:
     """Tests for POST /webhook/start endpoint."""
 
@@ -2,7 +2,17 @@
 Utility functions for mileage-tracker API.
 """
 
-from .geo import haversine, calculate_gps_distance, get_gps_distance_from_trail
+from .geo import (
+    haversine,
+    equirectangular_distance,
+    within_radius,
+    path_distances,
+    distances_from,
+    calculate_gps_distance,
+    get_gps_distance_from_trail,
+    geohash,
+)
+from .spatial import LocationIndex
 from .routing import (
     get_osrm_distance_from_trail,
     get_google_maps_route_distance,
@@ -12,12 +22,22 @@ from .ids import generate_id
 from .secrets import get_secret, get_secret_or_default, get_secret_or_env
 from .encryption import encrypt_string, decrypt_string, encrypt_dict, decrypt_dict
 from .errors import auth_error, oauth_error, validation_error, server_error
+from .cache import TTLCache
+from .concurrency import run_blocking
+from .trail import merge_trails
 
 __all__ = [
     # Geo utilities
     "haversine",
+    "equirectangular_distance",
+    "within_radius",
+    "path_distances",
+    "distances_from",
     "calculate_gps_distance",
     "get_gps_distance_from_trail",
+    "geohash",
+    # Spatial utilities
+    "LocationIndex",
     # Routing utilities
     "get_osrm_distance_from_trail",
     "get_google_maps_route_distance",
@@ -38,4 +58,10 @@ __all__ = [
     "oauth_error",
     "validation_error",
     "server_error",
+    # Cache utilities
+    "TTLCache",
+    # Concurrency utilities
+    "run_blocking",
+    # Trail utilities
+    "merge_trails",
 ]
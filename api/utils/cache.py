@@ -0,0 +1,183 @@
+"""
+In-process caching utilities.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """A load in progress that other callers for the same key wait on."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+        self.invalidated = False
+
+
+class TTLCache:
+    """
+    Thread-safe TTL cache with LRU eviction and single-flight loading.
+
+    Concurrent get_or_load() calls for the same missing key share one loader
+    call. Loaders return (value, cost); cost is an arbitrary number of
+    expensive operations the load performed (e.g. KMS calls), which is
+    credited to `saved_cost` every time a hit avoids repeating them.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int, name: str = "cache"):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.name = name
+        self._entries: OrderedDict[Hashable, tuple[float, Any, int]] = OrderedDict()
+        self._inflight: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.load_cost = 0
+        self.saved_cost = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh cached value without loading (counts as hit/miss)."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.saved_cost += entry[2]
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, cost: int = 0) -> None:
+        """Store a value, evicting least-recently-used entries over capacity."""
+        with self._lock:
+            self._store(key, value, cost)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], tuple[Any, int]]) -> Any:
+        """
+        Return the cached value for key, loading it once if missing or expired.
+
+        Args:
+            key: Cache key
+            loader: Callable returning (value, cost); exceptions propagate to
+                every caller waiting on the same load and nothing is cached
+
+        Returns:
+            Cached or freshly loaded value
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                self.saved_cost += entry[2]
+                return entry[1]
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value, cost = loader()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+            raise
+
+        flight.value = value
+        with self._lock:
+            self._inflight.pop(key, None)
+            self.load_cost += cost
+            if not flight.invalidated:
+                self._store(key, value, cost)
+        flight.event.set()
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a key (and discard any load for it that is still in flight)."""
+        with self._lock:
+            self._entries.pop(key, None)
+            flight = self._inflight.get(key)
+            if flight is not None:
+                flight.invalidated = True
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every key matching predicate. Returns number of entries removed."""
+        with self._lock:
+            keys = [k for k in self._entries if predicate(k)]
+            for k in keys:
+                del self._entries[k]
+            for k, flight in self._inflight.items():
+                if predicate(k):
+                    flight.invalidated = True
+            return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            self._entries.clear()
+            for flight in self._inflight.values():
+                flight.invalidated = True
+            self.hits = self.misses = self.coalesced = self.evictions = 0
+            self.load_cost = self.saved_cost = 0
+
+    def stats(self) -> dict:
+        """Counters snapshot including hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "load_cost": self.load_cost,
+                "saved_cost": self.saved_cost,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Callers must hold self._lock
+
+    def _lookup(self, key: Hashable) -> tuple[float, Any, int] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: Hashable, value: Any, cost: int) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, cost)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
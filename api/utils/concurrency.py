@@ -0,0 +1,27 @@
+"""
+Helpers for calling blocking code from async route handlers.
+"""
+
+import functools
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+import anyio
+import anyio.to_thread
+
+T = TypeVar("T")
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, limiter: anyio.CapacityLimiter | None = None, **kwargs: Any) -> T:
+    """
+    Run a blocking function on a worker thread without blocking the event loop.
+
+    Args:
+        func: Function to call
+        *args, **kwargs: Arguments for func
+        limiter: Capacity limiter bounding the threads used (default: the shared threadpool)
+
+    Returns:
+        The function's return value (exceptions propagate)
+    """
+    return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs), limiter=limiter)
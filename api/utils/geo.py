@@ -1,14 +1,23 @@
 """
 Geographic utility functions.
+
+Scalar functions take one pair of points. The array kernels (path_distances,
+distances_from) take NumPy coordinate arrays in degrees and replace Python
+loops over trails, trips and GPS windows.
 """
 
 import math
 import logging
 
+import numpy as np
+
 from .routing import get_osrm_distance_from_trail
 
 logger = logging.getLogger(__name__)
 
+EARTH_RADIUS_METERS = 6371000
+GPS_DISTANCE_CORRECTION = 1.15  # GPS straight lines underestimate road distance
+
 
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -21,7 +30,7 @@ def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     Returns:
         Distance in meters
     """
-    R = 6371000  # Earth's radius in meters
+    R = EARTH_RADIUS_METERS
     p1, p2 = math.radians(lat1), math.radians(lat2)
     dp = math.radians(lat2 - lat1)
     dl = math.radians(lon2 - lon1)
@@ -29,6 +38,105 @@ def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
 
 
+def equirectangular_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Fast approximate distance in meters (equirectangular projection).
+
+    Accurate to well under 1% for distances of a few kilometers; use as a
+    cheap pre-filter before haversine.
+    """
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return EARTH_RADIUS_METERS * math.sqrt(x * x + y * y)
+
+
+def within_radius(lat1: float, lon1: float, lat2: float, lon2: float, radius: float) -> bool:
+    """Whether two points are within radius meters (equirectangular pre-filter, then haversine)."""
+    if equirectangular_distance(lat1, lon1, lat2, lon2) > radius * 1.01:
+        return False
+    return haversine(lat1, lon1, lat2, lon2) <= radius
+
+
+# === Array kernels ===
+
+
+def _haversine_array(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Element-wise haversine in meters for broadcastable degree arrays."""
+    p1, p2 = np.radians(lat1), np.radians(lat2)
+    dp = p2 - p1
+    dl = np.radians(np.subtract(lon2, lon1))
+    a = np.sin(dp / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dl / 2) ** 2
+    return EARTH_RADIUS_METERS * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def path_distances(lats, lons) -> np.ndarray:
+    """
+    Distances between consecutive points of a path.
+
+    Args:
+        lats, lons: Coordinate arrays in degrees (length n)
+
+    Returns:
+        Array of n - 1 distances in meters (NaN where a coordinate is NaN)
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    if lats.size < 2:
+        return np.empty(0)
+    return _haversine_array(lats[:-1], lons[:-1], lats[1:], lons[1:])
+
+
+def distances_from(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """
+    Distances from one point to many points.
+
+    Args:
+        lat, lon: Reference point in degrees
+        lats, lons: Coordinate arrays in degrees
+
+    Returns:
+        Array of distances in meters
+    """
+    return _haversine_array(lat, lon, np.asarray(lats, dtype=float), np.asarray(lons, dtype=float))
+
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lon: float, precision: int = 8) -> str:
+    """
+    Encode coordinates as a geohash cell ID.
+
+    Args:
+        lat, lon: Coordinates in degrees
+        precision: Number of characters (7 = ~150 m, 8 = ~38 x 19 m, 9 = ~5 m)
+
+    Returns:
+        Geohash string; nearby points share a prefix
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Even bits encode longitude
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = bit_count = 0
+    return "".join(chars)
+
+
 def get_gps_distance_from_trail(gps_trail: list) -> float:
     """
     Calculate distance from GPS trail using haversine (fallback if OSRM fails).
@@ -42,17 +150,13 @@ def get_gps_distance_from_trail(gps_trail: list) -> float:
     if not gps_trail or len(gps_trail) < 2:
         return 0.0
 
-    total_meters = 0.0
-    for i in range(1, len(gps_trail)):
-        prev = gps_trail[i - 1]
-        curr = gps_trail[i]
-        prev_lat, prev_lng = prev.get("lat"), prev.get("lng", prev.get("lon"))
-        curr_lat, curr_lng = curr.get("lat"), curr.get("lng", curr.get("lon"))
-        if prev_lat and prev_lng and curr_lat and curr_lng:
-            total_meters += haversine(prev_lat, prev_lng, curr_lat, curr_lng)
+    # Missing (or zero) coordinates become NaN; segments touching them add 0
+    lats = np.array([p.get("lat") or np.nan for p in gps_trail], dtype=float)
+    lons = np.array([p.get("lng", p.get("lon")) or np.nan for p in gps_trail], dtype=float)
+    total_meters = float(np.nansum(path_distances(lats, lons)))
 
     # Add 15% correction factor (GPS typically underestimates road distance)
-    return (total_meters / 1000) * 1.15
+    return (total_meters / 1000) * GPS_DISTANCE_CORRECTION
 
 
 def calculate_gps_distance(gps_trail: list) -> float:
@@ -2,17 +2,153 @@
 Routing utility functions (OSRM, Google Maps).
 """
 
+import hashlib
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    OSRM_BASE_URL,
+    OSRM_MAX_POINTS,
+    OSRM_MAX_CONCURRENCY,
+    OSRM_TIMEOUT_SECONDS,
+    OSRM_RETRIES,
+    OSRM_CACHE_TTL,
+    OSRM_CACHE_MAX_ENTRIES,
+)
+from .cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
+COORD_PRECISION = 5  # Quantize to 1e-5 degrees (~1 m) for cache keys
+
+
+class _RouteUnavailable(Exception):
+    """OSRM answered without a usable route; nothing is cached."""
+
+
+class RoutingClient:
+    """
+    OSRM client with a pooled keep-alive session, retries with backoff,
+    concurrent chunk requests and a cache of route distances keyed by a hash
+    of the quantized coordinates.
+    """
+
+    def __init__(
+        self,
+        base_url: str = OSRM_BASE_URL,
+        max_points: int = OSRM_MAX_POINTS,
+        max_concurrency: int = OSRM_MAX_CONCURRENCY,
+        timeout: float = OSRM_TIMEOUT_SECONDS,
+        retries: int = OSRM_RETRIES,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_points = max_points
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="osrm")
+        # Cost = OSRM requests made by the load
+        self._cache = TTLCache(ttl_seconds=OSRM_CACHE_TTL, max_entries=OSRM_CACHE_MAX_ENTRIES, name="osrm")
+
+    def route_distance_km(self, points: list[tuple[float, float]]) -> float | None:
+        """
+        Driving distance through (lat, lon) points in a single OSRM request.
+
+        Returns:
+            Distance in km, or None if routing fails
+        """
+        coords = [(round(lat, COORD_PRECISION), round(lon, COORD_PRECISION)) for lat, lon in points]
+        key = hashlib.sha1(";".join(f"{lat},{lon}" for lat, lon in coords).encode()).hexdigest()
+        try:
+            return self._cache.get_or_load(key, lambda: (self._request_distance_km(coords), 1))
+        except _RouteUnavailable as e:
+            logger.warning(f"OSRM route unavailable: {e}")
+        except Exception as e:
+            logger.error(f"OSRM request error: {e}")
+        return None
+
+    def trail_distance_km(self, gps_trail: list) -> float | None:
+        """
+        Driving distance along a GPS trail.
+
+        Trails longer than max_points are split into chunks overlapping by one
+        point; chunks are requested concurrently and summed.
+
+        Returns:
+            Distance in km, or None if any chunk fails
+        """
+        if not gps_trail or len(gps_trail) < 2:
+            return None
+
+        points = [(p.get("lat"), p.get("lng", p.get("lon"))) for p in gps_trail]
+        chunks = self._split(points)
+        distances = list(self._executor.map(self.route_distance_km, chunks))
+        if any(d is None for d in distances):
+            failed = next(i for i, d in enumerate(distances) if d is None)
+            logger.warning(f"OSRM chunk {failed + 1}/{len(chunks)} failed")
+            return None  # If any chunk fails, fall back to haversine
+
+        total_distance_km = sum(distances)
+        logger.info(f"OSRM distance from trail ({len(gps_trail)} points, {len(chunks)} chunks): {total_distance_km:.1f} km")
+        return total_distance_km
+
+    def cache_stats(self) -> dict:
+        """Route cache counters (hit rate, OSRM requests made and saved)."""
+        stats = self._cache.stats()
+        stats["requests"] = stats.pop("load_cost")
+        stats["requests_saved"] = stats.pop("saved_cost")
+        return stats
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+
+    def _split(self, points: list[tuple[float, float]]) -> list[list[tuple[float, float]]]:
+        """Split into chunks of max_points, overlapping by 1 point for route continuity."""
+        if len(points) <= self.max_points:
+            return [points]
+        chunks = []
+        i = 0
+        while i < len(points) - 1:
+            end = min(i + self.max_points, len(points))
+            chunks.append(points[i:end])
+            i = end - 1
+        return chunks
+
+    def _request_distance_km(self, coords: list[tuple[float, float]]) -> float:
+        # OSRM uses lon,lat order (not lat,lon!)
+        path = ";".join(f"{lon},{lat}" for lat, lon in coords)
+        url = f"{self.base_url}/route/v1/driving/{path}?overview=false"
+        data = self.session.get(url, timeout=self.timeout).json()
+        if data.get("code") == "Ok" and data.get("routes"):
+            # Distance is in meters
+            return data["routes"][0]["distance"] / 1000
+        raise _RouteUnavailable(data.get("code"))
+
+
+# Singleton instance
+routing_client = RoutingClient()
+
 
 def get_osrm_distance_from_trail(gps_trail: list) -> float | None:
     """
     Calculate driving distance from GPS trail using OSRM.
 
-    If trail has >25 points, splits into multiple requests and sums distances.
+    If the trail has more than OSRM_MAX_POINTS points, chunks are requested
+    concurrently and summed.
 
     Args:
         gps_trail: List of GPS points with lat/lng keys
@@ -20,52 +156,10 @@ def get_osrm_distance_from_trail(gps_trail: list) -> float | None:
     Returns:
         Distance in km, or None if OSRM fails
     """
-    if not gps_trail or len(gps_trail) < 2:
-        return None
-
     try:
-        # Split into chunks of max 25 points (with 1 point overlap for continuity)
-        max_points = 25
-        total_distance_km = 0.0
-        chunks = []
-
-        if len(gps_trail) <= max_points:
-            chunks = [gps_trail]
-        else:
-            # Split with overlap: [0-24], [24-48], [48-72], etc.
-            i = 0
-            while i < len(gps_trail) - 1:
-                end = min(i + max_points, len(gps_trail))
-                chunks.append(gps_trail[i:end])
-                i = end - 1  # Overlap by 1 point for route continuity
-
-        for chunk_idx, chunk in enumerate(chunks):
-            if len(chunk) < 2:
-                continue
-
-            # Build OSRM coords string (lon,lat order)
-            coords = ";".join(
-                f"{p.get('lng', p.get('lon'))},{p.get('lat')}"
-                for p in chunk
-            )
-            url = f"https://router.project-osrm.org/route/v1/driving/{coords}?overview=false"
-
-            response = requests.get(url, timeout=10)
-            data = response.json()
-
-            if data.get("code") == "Ok" and data.get("routes"):
-                chunk_km = data["routes"][0]["distance"] / 1000
-                total_distance_km += chunk_km
-            else:
-                logger.warning(f"OSRM chunk {chunk_idx + 1}/{len(chunks)} failed: {data.get('code')}")
-                return None  # If any chunk fails, fall back to haversine
-
-        logger.info(f"OSRM distance from trail ({len(gps_trail)} points, {len(chunks)} chunks): {total_distance_km:.1f} km")
-        return total_distance_km
-
+        return routing_client.trail_distance_km(gps_trail)
     except Exception as e:
         logger.error(f"OSRM trail distance error: {e}")
-
     return None
 
 
@@ -85,18 +179,7 @@ def get_google_maps_route_distance(from_lat: float, from_lon: float, to_lat: flo
     if not from_lat or not from_lon or not to_lat or not to_lon:
         return None
 
-    try:
-        # OSRM uses lon,lat order (not lat,lon!)
-        url = f"https://router.project-osrm.org/route/v1/driving/{from_lon},{from_lat};{to_lon},{to_lat}?overview=false"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        if data.get("code") == "Ok" and data.get("routes"):
-            # Distance is in meters
-            return data["routes"][0]["distance"] / 1000
-    except Exception as e:
-        logger.error(f"OSRM route distance error: {e}")
-
-    return None
+    return routing_client.route_distance_km([(from_lat, from_lon), (to_lat, to_lon)])
 
 
 def calculate_route_deviation(driven_km: float, google_maps_km: float | None) -> dict:
@@ -0,0 +1,118 @@
+"""
+Spatial index for matching coordinates against named circular locations.
+"""
+
+import math
+import threading
+from typing import Any
+
+from .geo import haversine, equirectangular_distance
+
+METERS_PER_DEGREE_LAT = 111_320
+DEFAULT_CELL_DEGREES = 0.01  # ~1.1 km north-south, ~0.7 km east-west at 52°N
+
+# Equirectangular error is far below this for the few-hundred-meter radii we
+# index; candidates within radius * (1 + margin) get the exact haversine check
+PREFILTER_MARGIN = 0.01
+
+
+class LocationIndex:
+    """
+    Uniform lat/lon grid of circular locations (center + radius in meters).
+
+    Each location is registered in every grid cell its circle's bounding box
+    overlaps, so a query only inspects the single cell containing the point.
+    Candidates are pre-filtered with the equirectangular approximation before
+    the exact haversine check. Adds and removes update only the affected cells.
+    """
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._cells: dict[tuple[int, int], set[str]] = {}
+        self._entries: dict[str, tuple[float, float, float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, lat: float, lon: float, radius: float, data: Any = None) -> None:
+        """Add or replace a location."""
+        with self._lock:
+            self._remove(name)
+            self._entries[name] = (lat, lon, radius, data)
+            for cell in self._covered_cells(lat, lon, radius):
+                self._cells.setdefault(cell, set()).add(name)
+
+    def remove(self, name: str) -> None:
+        """Remove a location (no-op if absent)."""
+        with self._lock:
+            self._remove(name)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells.clear()
+            self._entries.clear()
+
+    def nearest(self, lat: float, lon: float) -> tuple[str, Any, float] | None:
+        """
+        Find the nearest location whose radius contains the point.
+
+        Args:
+            lat, lon: Query coordinates
+
+        Returns:
+            (name, data, distance in meters), or None if no location matches
+        """
+        with self._lock:
+            names = self._cells.get(self._cell(lat, lon))
+            candidates = [(name, self._entries[name]) for name in names] if names else []
+
+        best = None
+        for name, (loc_lat, loc_lon, radius, data) in candidates:
+            if equirectangular_distance(lat, lon, loc_lat, loc_lon) > radius * (1 + PREFILTER_MARGIN):
+                continue
+            distance = haversine(lat, lon, loc_lat, loc_lon)
+            if distance <= radius and (best is None or distance < best[2]):
+                best = (name, data, distance)
+        return best
+
+    def any_within(self, lat: float, lon: float, margin: float) -> bool:
+        """Whether the point is within margin meters of any location's radius."""
+        with self._lock:
+            names = set()
+            for cell in self._covered_cells(lat, lon, margin):
+                names.update(self._cells.get(cell, ()))
+            candidates = [self._entries[name] for name in names]
+
+        for loc_lat, loc_lon, radius, _ in candidates:
+            if equirectangular_distance(lat, lon, loc_lat, loc_lon) <= (radius + margin) * (1 + PREFILTER_MARGIN):
+                if haversine(lat, lon, loc_lat, loc_lon) <= radius + margin:
+                    return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    # Callers must hold self._lock
+
+    def _remove(self, name: str) -> None:
+        entry = self._entries.pop(name, None)
+        if entry is None:
+            return
+        for cell in self._covered_cells(entry[0], entry[1], entry[2]):
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(name)
+                if not bucket:
+                    del self._cells[cell]
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    def _covered_cells(self, lat: float, lon: float, radius: float) -> list[tuple[int, int]]:
+        """Grid cells overlapped by the circle's bounding box."""
+        dlat = radius / METERS_PER_DEGREE_LAT
+        dlon = radius / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        min_row, min_col = self._cell(lat - dlat, lon - dlon)
+        max_row, max_col = self._cell(lat + dlat, lon + dlon)
+        return [(row, col) for row in range(min_row, max_row + 1) for col in range(min_col, max_col + 1)]
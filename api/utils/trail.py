@@ -0,0 +1,211 @@
+"""
+Trail processing: merge car and phone GPS streams into one deduplicated trail.
+
+Every finalization path combines the car's gps_trail with the phone's GPS
+events. Both streams are already in time order, so they are merged in O(n)
+on numeric epoch timestamps (ISO strings with and without fractional
+seconds or "Z" do not sort correctly as strings), then points closer than
+DEDUPE_METERS to the previously kept point are dropped.
+
+Dedupe is sequential (each point is compared to the last *kept* point), so
+it cannot be vectorized; a cheap equirectangular check decides almost every
+point and only those within 1% of the threshold get the exact haversine.
+
+Finalized trails are then cleaned: fixes that imply an impossible speed are
+dropped (reject_outliers) and the polyline is simplified within a distance
+tolerance (TrailSimplifier, an opening-window algorithm that works one point
+at a time), which shrinks stored trails and the number of OSRM chunks.
+"""
+
+import math
+from collections.abc import Iterable
+from datetime import datetime, timezone
+
+from .geo import haversine
+
+DEDUPE_METERS = 50  # Keep points at least this far from the previous kept point
+
+_EARTH_RADIUS = 6371000
+_METERS_PER_DEGREE = _EARTH_RADIUS * math.pi / 180
+SIMPLIFY_MAX_WINDOW = 64  # Points a simplified segment may span (bounds work per point)
+_PREFILTER_MARGIN = 0.01  # Relative band around min_distance checked with haversine
+
+
+def parse_epoch(timestamp: str | None) -> float:
+    """ISO-8601 timestamp (naive = UTC) to epoch seconds; missing or invalid sorts first."""
+    if not timestamp:
+        return float("-inf")
+    try:
+        dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return float("-inf")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def merge_trails(*streams: Iterable[dict], min_distance: float = DEDUPE_METERS) -> list[dict]:
+    """
+    Merge time-ordered GPS point streams and drop near-duplicate points.
+
+    Args:
+        *streams: Point lists (lat, lng or lon, optional ISO timestamp), each in
+            time order; on equal timestamps earlier streams come first
+        min_distance: Minimum distance in meters from the previous kept point
+
+    Returns:
+        Kept points as {lat, lng, timestamp} dicts, in time order
+    """
+    points = [p for stream in streams for p in stream]
+    epochs = [parse_epoch(p.get("timestamp")) for p in points]
+    # Timsort finds the pre-sorted runs and merges them in linear time; being
+    # stable, ties keep stream order. Unsorted input still comes out sorted.
+    order = sorted(range(len(points)), key=epochs.__getitem__)
+    lats = [points[i]["lat"] for i in order]
+    lngs = [points[i]["lng"] if "lng" in points[i] else points[i].get("lon") for i in order]
+
+    return [
+        {"lat": lats[k], "lng": lngs[k], "timestamp": points[order[k]].get("timestamp")}
+        for k in _dedupe(lats, lngs, min_distance)
+    ]
+
+
+def _dedupe(lats: list[float], lngs: list[float], min_distance: float) -> list[int]:
+    """Indices of points at least min_distance from the previous kept point."""
+    if not lats:
+        return []
+    # Squared equirectangular distance in degrees, scaled by cos(lat) of the
+    # last kept point; outside the margin band it decides without haversine
+    deg = min_distance / _METERS_PER_DEGREE
+    low = (deg * (1 - _PREFILTER_MARGIN)) ** 2
+    high = (deg * (1 + _PREFILTER_MARGIN)) ** 2
+
+    kept = [0]
+    last_lat, last_lng = lats[0], lngs[0]
+    cos_lat = math.cos(math.radians(last_lat))
+    for i in range(1, len(lats)):
+        lat, lng = lats[i], lngs[i]
+        dlat = lat - last_lat
+        dlng = (lng - last_lng) * cos_lat
+        d2 = dlat * dlat + dlng * dlng
+        if d2 < low:
+            continue
+        if d2 < high and haversine(last_lat, last_lng, lat, lng) < min_distance:
+            continue
+        kept.append(i)
+        last_lat, last_lng = lat, lng
+        cos_lat = math.cos(math.radians(lat))
+    return kept
+
+
+# === Outliers and simplification ===
+
+
+def _lng(point: dict) -> float:
+    return point["lng"] if "lng" in point else point.get("lon")
+
+
+def is_speed_outlier(prev: dict, point: dict, max_speed_mps: float) -> bool:
+    """
+    Whether reaching point from prev needs more than max_speed_mps.
+
+    Fixes less than a second apart (batched or duplicate pings) and points
+    without timestamps give no usable speed and are never outliers.
+    """
+    elapsed = parse_epoch(point.get("timestamp")) - parse_epoch(prev.get("timestamp"))
+    if math.isnan(elapsed) or math.isinf(elapsed) or elapsed < 1:
+        return False
+    return haversine(prev["lat"], _lng(prev), point["lat"], _lng(point)) > max_speed_mps * elapsed
+
+
+def reject_outliers(points: list[dict], max_speed_mps: float, max_run: int = 3) -> list[dict]:
+    """
+    Drop GPS jumps that imply an impossible speed from the previous kept point.
+
+    Args:
+        points: Time-ordered points
+        max_speed_mps: Fastest plausible speed
+        max_run: After this many consecutive rejections the next point is kept
+            (the earlier fix was the bad one, or the phone really moved)
+
+    Returns:
+        Points without outliers
+    """
+    kept = []
+    run = 0
+    for point in points:
+        if kept and run < max_run and is_speed_outlier(kept[-1], point, max_speed_mps):
+            run += 1
+            continue
+        run = 0
+        kept.append(point)
+    return kept
+
+
+def _segment_distance(a: dict, b: dict, p: dict) -> float:
+    """Meters from p to segment a-b (equirectangular projection around a)."""
+    cos_lat = math.cos(math.radians(a["lat"]))
+    bx = (_lng(b) - _lng(a)) * cos_lat
+    by = b["lat"] - a["lat"]
+    px = (_lng(p) - _lng(a)) * cos_lat
+    py = p["lat"] - a["lat"]
+    length2 = bx * bx + by * by
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, (px * bx + py * by) / length2))
+    dx, dy = px - t * bx, py - t * by
+    return math.sqrt(dx * dx + dy * dy) * _METERS_PER_DEGREE
+
+
+class TrailSimplifier:
+    """
+    Streaming polyline simplification (opening window).
+
+    Points are pushed one at a time. The last kept point anchors a segment to
+    the newest point; while every point in between stays within tolerance of
+    that segment the window keeps opening, otherwise the previous point is
+    kept and becomes the new anchor. Every dropped point is within tolerance
+    meters of the kept segment spanning it; first and last points are kept.
+    """
+
+    __slots__ = ("tolerance", "max_window", "kept", "_pending")
+
+    def __init__(self, tolerance: float, max_window: int = SIMPLIFY_MAX_WINDOW):
+        self.tolerance = tolerance
+        self.max_window = max_window
+        self.kept: list[dict] = []
+        self._pending: list[dict] = []  # Points since the anchor; the last one is the open end
+
+    def push(self, point: dict) -> None:
+        if not self.kept:
+            self.kept.append(point)
+            return
+        if self._pending and (len(self._pending) >= self.max_window or not self._fits(point)):
+            self.kept.append(self._pending[-1])
+            self._pending = []
+        self._pending.append(point)
+
+    def finish(self) -> list[dict]:
+        """Kept points, including the open end."""
+        return self.kept + self._pending[-1:]
+
+    def _fits(self, end: dict) -> bool:
+        anchor = self.kept[-1]
+        return all(_segment_distance(anchor, end, p) <= self.tolerance for p in self._pending)
+
+
+def simplify_trail(points: list[dict], tolerance: float) -> list[dict]:
+    """
+    Simplify a trail within tolerance meters (tolerance <= 0 returns it unchanged).
+
+    Args:
+        points: Time-ordered points
+        tolerance: Max distance of a dropped point from the simplified trail
+
+    Returns:
+        Subset of points, first and last included
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return list(points)
+    simplifier = TrailSimplifier(tolerance)
+    for point in points:
+        simplifier.push(point)
+    return simplifier.finish()
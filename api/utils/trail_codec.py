@@ -0,0 +1,129 @@
+"""
+Compact GPS trail encoding.
+
+Trails are stored as a versioned string: "<version>:<payload>". The v1
+payload is a polyline-style varint encoding (Google's 5-bit chunk scheme)
+of delta-encoded triples per point:
+
+- lat, lng as fixed-point integers (1e-5 degrees, ~1.1 m)
+- timestamp as epoch seconds + 1 (0 = no timestamp)
+
+A 500-point trail shrinks from ~35 KB of dicts with ISO-8601 strings to
+roughly 5 KB of ASCII. Timestamps keep second precision.
+"""
+
+from datetime import datetime, timezone
+
+TRAIL_CODEC_VERSION = 1
+COORD_SCALE = 100_000
+
+
+def encode_trail(points: list[dict]) -> str:
+    """
+    Encode GPS points into a compact versioned string.
+
+    Args:
+        points: GPS points with lat, lng (or lon) and optional ISO timestamp
+
+    Returns:
+        Encoded trail like "1:_p~iF~ps|U..."
+    """
+    out: list[str] = []
+    prev_lat = prev_lng = prev_t = 0
+    for p in points:
+        lat = round(p["lat"] * COORD_SCALE)
+        lng = round(p.get("lng", p.get("lon")) * COORD_SCALE)
+        t = _to_epoch(p.get("timestamp"))
+        t = t + 1 if t is not None else 0
+        _encode_value(lat - prev_lat, out)
+        _encode_value(lng - prev_lng, out)
+        _encode_value(t - prev_t, out)
+        prev_lat, prev_lng, prev_t = lat, lng, t
+    return f"{TRAIL_CODEC_VERSION}:{''.join(out)}"
+
+
+def decode_trail(encoded: str) -> list[dict]:
+    """
+    Decode a trail produced by encode_trail.
+
+    Returns:
+        List of {"lat", "lng", "timestamp"} dicts (timestamp is ISO-8601 with Z, or None)
+    """
+    version, _, payload = encoded.partition(":")
+    if version != str(TRAIL_CODEC_VERSION):
+        raise ValueError(f"Unsupported trail encoding version: {version}")
+
+    values = _decode_values(payload)
+    if len(values) % 3:
+        raise ValueError("Corrupt trail encoding")
+
+    points = []
+    lat = lng = t = 0
+    for i in range(0, len(values), 3):
+        lat += values[i]
+        lng += values[i + 1]
+        t += values[i + 2]
+        points.append({
+            "lat": lat / COORD_SCALE,
+            "lng": lng / COORD_SCALE,
+            "timestamp": _from_epoch(t - 1) if t else None,
+        })
+    return points
+
+
+def trail_from_doc(data: dict) -> list[dict]:
+    """Read a trip document's trail, encoded or legacy list of dicts."""
+    encoded = data.get("gps_trail_encoded")
+    if encoded:
+        return decode_trail(encoded)
+    return data.get("gps_trail") or []
+
+
+def encoded_trail_from_doc(data: dict) -> str:
+    """Encoded trail of a trip document (encodes legacy lists on the fly)."""
+    return data.get("gps_trail_encoded") or encode_trail(data.get("gps_trail") or [])
+
+
+# === Internal ===
+
+def _encode_value(value: int, out: list[str]) -> None:
+    """Append a signed integer as zigzag 5-bit chunks (polyline alphabet)."""
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def _decode_values(payload: str) -> list[int]:
+    """Decode every signed integer in a polyline payload."""
+    values = []
+    result = shift = 0
+    for ch in payload:
+        b = ord(ch) - 63
+        result |= (b & 0x1F) << shift
+        shift += 5
+        if b < 0x20:
+            values.append(~(result >> 1) if result & 1 else result >> 1)
+            result = shift = 0
+    if shift:
+        raise ValueError("Truncated trail encoding")
+    return values
+
+
+def _to_epoch(timestamp: str | None) -> int | None:
+    """ISO-8601 timestamp (naive = UTC) to epoch seconds."""
+    if not timestamp:
+        return None
+    try:
+        dt = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return round(dt.timestamp())
+
+
+def _from_epoch(seconds: int) -> str:
+    """Epoch seconds to ISO-8601 UTC with Z suffix (same style as webhook timestamps)."""
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None).isoformat() + "Z"